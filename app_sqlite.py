@@ -2,7 +2,6 @@ import streamlit as st
 import pandas as pd
 import time
 from datetime import datetime, timedelta
-import json
 import os
 import sys
 from pathlib import Path
@@ -12,13 +11,11 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
 
 # Импортируем модули
 from modules.database import VGTRKDatabase
-from modules.site_parser import SiteParser
-from modules.gigachat_client import GigaChatClient
-from modules.advanced_logger import AdvancedLogger, LogLevel, get_logger
-from modules.scrapy_parser import ScrapyParser  # Новый модуль для Sitemap парсинга
-from modules.results_formatter import SitemapResultsFormatter
+from modules.advanced_logger import LogLevel, get_logger
+from modules.results_exporter import export_results
+from modules.runner import MonitoringRunner, job_params, enqueue_job, resume_job, launch_background, ARCHIVE_MODES
+from modules.sharding import SHARD_STRATEGY_NAMES
 from app_sqlite_results_cards import ResultsCardsDisplay
-from config.settings import GIGACHAT_API_KEY, GIGACHAT_CLIENT_ID
 
 # Настройка страницы
 st.set_page_config(
@@ -98,6 +95,7 @@ def show_filials_tab(db: VGTRKDatabase):
     
     # Отображаем интерактивную таблицу
     table_editor.display_interactive_table()
+    table_editor.display_host_health()
     
     return  # Заменяем старый код на новый модуль
     
@@ -178,25 +176,18 @@ def show_filials_tab(db: VGTRKDatabase):
             if without_sitemap:
                 st.info(f"🔍 Поиск sitemap для {len(without_sitemap)} филиалов...")
                 
-                # Импортируем модуль поиска sitemap
-                from sitemap_finder import find_sitemap_for_filial, save_sitemap_to_db
+                # Поиск sitemap: robots.txt и стандартные пути одновременно, результат - в filials
+                from modules.sitemap_discovery import discover_for_filial
                 
                 found_count = 0
                 progress_bar = st.progress(0)
                 
                 for idx, filial in enumerate(without_sitemap[:10]):  # Ограничиваем 10 филиалами за раз
                     progress_bar.progress((idx + 1) / min(len(without_sitemap), 10))
-                    website = filial.get('website')
-                    if website:
-                        if not website.startswith(('http://', 'https://')):
-                            website = f'https://{website}'
-                        
-                        sitemap_url = find_sitemap_for_filial(website)
-                        if sitemap_url:
-                            # Сохраняем в БД
-                            save_sitemap_to_db(filial['id'], sitemap_url, db_path)
-                            found_count += 1
-                            st.success(f"✅ {filial['name']}: найден {sitemap_url}")
+                    found = discover_for_filial(db, filial, force=True)
+                    if found:
+                        found_count += 1
+                        st.success(f"✅ {filial['name']}: найден {found['url']} ({found['type']})")
                 
                 progress_bar.empty()
                 if found_count > 0:
@@ -386,7 +377,8 @@ def show_monitoring_tab(db: VGTRKDatabase):
             "⚡ Только главная страница": "main_only",
             "📰 Главная + Новости": "main_and_news",
             "📡 RSS поиск (новинка!)": "rss_search",
-            "🕷️ Sitemap архив (глубокий поиск)": "sitemap_search"
+            "🕷️ Sitemap архив (глубокий поиск)": "sitemap_search",
+            "📰 Полнотекстовая лента / Турбо": "fulltext_search"
         }
         
         selected_search_mode = st.selectbox(
@@ -398,13 +390,14 @@ def show_monitoring_tab(db: VGTRKDatabase):
             📰 Главная + Новости: поиск по метаданным главной и новостных страниц (5-10x быстрее)
             📡 RSS поиск: супер-быстрый поиск только по свежим новостям из RSS ленты
             🕷️ Sitemap архив: полный поиск по ВСЕМУ архиву сайта за выбранный период
+            📰 Полнотекстовая лента: поиск по Турбо/yandex:full-text ленте без загрузки статей (нет ленты - sitemap)
             """
         )
         
         search_mode = search_mode_options[selected_search_mode]
         
         # Настройки периода для Sitemap поиска
-        if search_mode == "sitemap_search":
+        if search_mode in ARCHIVE_MODES:
             st.markdown("### 📅 Период поиска")
             
             # Выбор типа поиска по дате
@@ -491,10 +484,11 @@ def show_monitoring_tab(db: VGTRKDatabase):
             )
             
             # Формируем информационное сообщение
+            source_name = "📰 Полнотекстовая лента" if search_mode == "fulltext_search" else "🕷️ Sitemap поиск"
             if search_specific_date:
-                info_msg = f"🕷️ Sitemap поиск: статьи за {search_specific_date.strftime('%d.%m.%Y')}. "
+                info_msg = f"{source_name}: статьи за {search_specific_date.strftime('%d.%m.%Y')}. "
             else:
-                info_msg = f"🕷️ Sitemap поиск: полный архив за {search_days} дней. "
+                info_msg = f"{source_name}: полный архив за {search_days} дней. "
             info_msg += 'С анализом GigaChat' if use_gigachat else 'Без GigaChat (список статей)'
             st.info(info_msg)
         else:
@@ -508,7 +502,10 @@ def show_monitoring_tab(db: VGTRKDatabase):
             st.info("💡 Расширенный мета-поиск: включает новостные страницы, 80% экономия токенов")
         elif search_mode == "rss_search":
             st.info("🚀 RSS поиск: только свежие новости, экстремальная скорость, 95% экономия токенов!")
-        
+        elif search_mode == "fulltext_search":
+            st.info("📰 Полнотекстовая лента: текст статей берется из Турбо/Яндекс-ленты без загрузки страниц, "
+                    "при отсутствии ленты - поиск по sitemap")
+
         st.markdown("---")
         
         # Выбор режима обработки для Sitemap
@@ -526,12 +523,29 @@ def show_monitoring_tab(db: VGTRKDatabase):
             
             if processing_mode == "🚀 Асинхронный (параллельно)":
                 max_concurrent = st.slider(
-                    "Макс. параллельных соединений",
+                    "Начальное число параллельных соединений",
                     min_value=5,
                     max_value=50,
                     value=20,
-                    help="Больше соединений = быстрее, но выше нагрузка на сеть"
+                    help="Дальше предел подстраивается автоматически: растет на быстрых ответах, "
+                         "снижается при таймаутах, 429 и 5xx (пределы сайтов запоминаются)"
                 )
+                col_shards, col_strategy = st.columns(2)
+                with col_shards:
+                    shards = st.number_input(
+                        "Процессов",
+                        min_value=1,
+                        max_value=max(1, os.cpu_count() or 1),
+                        value=1,
+                        help="Филиалы делятся между процессами, каждый со своим циклом обработки (несколько ядер)"
+                    )
+                with col_strategy:
+                    shard_strategy = st.selectbox(
+                        "Деление филиалов",
+                        list(SHARD_STRATEGY_NAMES.keys()),
+                        format_func=lambda key: SHARD_STRATEGY_NAMES[key],
+                        disabled=shards == 1
+                    )
                 use_async = True
             else:
                 max_concurrent = 1
@@ -539,6 +553,9 @@ def show_monitoring_tab(db: VGTRKDatabase):
         else:
             use_async = False
             max_concurrent = 1
+        if not use_async:
+            shards = 1
+            shard_strategy = 'round_robin'
         
         st.markdown("---")
         
@@ -626,6 +643,11 @@ def show_monitoring_tab(db: VGTRKDatabase):
         
         # Кнопка запуска
         st.markdown("---")
+        run_in_background = st.checkbox(
+            "🖥️ Фоновый запуск (очередь заданий)",
+            value=True,
+            help="Мониторинг ставится в очередь и выполняется воркерами (python -m modules.worker), не завися от вкладки браузера"
+        )
         start_button = st.button(
             "🚀 Начать мониторинг",
             type="primary",
@@ -654,9 +676,12 @@ def show_monitoring_tab(db: VGTRKDatabase):
             else:
                 st.info(f"💤 {st.session_state.current_status}")
         
+        show_job_queue(db)
+        show_resumable_sessions(db)
+        
         # Запуск мониторинга
         if start_button and filials_to_monitor:
-            st.session_state.processing = True
+            st.session_state.processing = not run_in_background
             st.session_state.current_status = "Запуск мониторинга..."
             
             # Запускаем процесс мониторинга с режимом поиска
@@ -670,16 +695,21 @@ def show_monitoring_tab(db: VGTRKDatabase):
             }
             
             # Добавляем параметры для Sitemap поиска
-            if search_mode == "sitemap_search":
+            if search_mode in ARCHIVE_MODES:
                 monitoring_params['search_days'] = search_days
                 monitoring_params['use_gigachat'] = use_gigachat
                 monitoring_params['search_specific_date'] = search_specific_date if 'search_specific_date' in locals() else None
                 monitoring_params['search_date_range'] = search_date_range if 'search_date_range' in locals() else None
                 monitoring_params['use_async'] = use_async if 'use_async' in locals() else False
                 monitoring_params['max_concurrent'] = max_concurrent if 'max_concurrent' in locals() else 1
+                monitoring_params['shards'] = int(shards)
+                monitoring_params['shard_strategy'] = shard_strategy
             
             # Выбираем функцию обработки в зависимости от режима
-            if monitoring_params.get('use_async') and search_mode == "sitemap_search":
+            if run_in_background:
+                start_background_monitoring(**monitoring_params)
+                st.rerun()
+            elif monitoring_params.get('use_async') and search_mode == "sitemap_search":
                 # Используем асинхронную обработку
                 process_monitoring_async_wrapper(**monitoring_params)
             else:
@@ -777,75 +807,64 @@ def show_monitoring_tab(db: VGTRKDatabase):
                 else:
                     st.text(f"[{timestamp}] {message}")
 
+def _streamlit_progress_handler(progress_bar=None, placeholder=None):
+    """Получатель событий MonitoringRunner: статус, прогресс-бар и сводка в интерфейсе"""
+    status_icons = {'success': '✅', 'no_data': '⚠️', 'error': '❌'}
+
+    def on_progress(event: dict):
+        if event['event'] == 'filial_started':
+            st.session_state.current_status = f"Проверка {event['index']}/{event['total']}: {event['filial_name']}"
+        elif event['event'] == 'filial_done':
+            if progress_bar is not None:
+                progress_bar.progress(event['progress'])
+            if placeholder is not None:
+                progress_text = f"""
+                **Прогресс: {event['index']}/{event['total']}**
+                
+                Последний обработан: {status_icons.get(event['status'], '❓')} {event['filial_name']}
+                - Статей найдено: {event.get('articles', 0)}
+                - Время обработки: {event['processing_time']:.2f}с
+                """
+                if event.get('error'):
+                    progress_text += f"\n- Ошибка: {event['error']}"
+                placeholder.markdown(progress_text)
+
+    return on_progress
+
+
 def process_monitoring_async_wrapper(db: VGTRKDatabase, filials: list, queries: list, model: str, temperature: float,
                                     search_mode: str = "main_only", search_days: int = None, use_gigachat: bool = True,
                                     search_specific_date = None, search_date_range = None,
-                                    use_async: bool = False, max_concurrent: int = 20):
-    """Обёртка для асинхронного мониторинга"""
-    
-    from app_sqlite_async import run_async_monitoring_streamlit
-    
+                                    use_async: bool = False, max_concurrent: int = 20,
+                                    shards: int = 1, shard_strategy: str = 'round_robin'):
+    """Асинхронный мониторинг в текущей сессии Streamlit (через MonitoringRunner)"""
     logger = st.session_state.logger
-    logger.log("INFO", f"Запуск АСИНХРОННОГО мониторинга с {max_concurrent} параллельными соединениями")
-    
-    # Создаем сессию мониторинга
-    search_period = None
-    if search_specific_date:
-        search_period = f"Дата: {search_specific_date}"
-    elif search_days:
-        search_period = f"За {search_days} дней"
-    elif search_date_range:
-        date_from, date_to = search_date_range
-        search_period = f"С {date_from} по {date_to}"
-    else:
-        search_period = "Текущий день"
-    
-    session_id = None
-    if hasattr(db, 'start_monitoring_session'):
-        session_id = db.start_monitoring_session(
-            session_name=f"Асинхронный мониторинг {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-            search_mode=f"{search_mode}_async",
-            search_period=search_period,
-            search_date=str(search_specific_date) if search_specific_date else None
-        )
-        logger.log("INFO", f"Создана сессия мониторинга #{session_id}")
-    
-    # Прогресс-плейсхолдер
     progress_placeholder = st.empty()
     
+    runner = MonitoringRunner(
+        db,
+        log_level=st.session_state.log_level,
+        model=model,
+        temperature=temperature,
+        progress_callback=_streamlit_progress_handler(placeholder=progress_placeholder)
+    )
+    
     try:
-        # Запускаем асинхронный мониторинг
-        stats = run_async_monitoring_streamlit(
-            db=db,
-            filials=filials,
-            queries=queries,
+        stats = runner.run(
+            filials, queries,
+            search_mode=search_mode,
             search_days=search_days or 7,
+            use_gigachat=use_gigachat,
+            search_specific_date=search_specific_date,
+            search_date_range=search_date_range,
+            use_async=True,
             max_concurrent=max_concurrent,
-            session_id=session_id,
-            progress_placeholder=progress_placeholder
+            shards=shards,
+            shard_strategy=shard_strategy
         )
-        
-        # Обновляем статус
-        st.session_state.processing = False
         st.session_state.current_status = "Мониторинг завершен"
-        
-        # Логируем результаты
-        logger.log("INFO", f"✅ Асинхронный мониторинг завершен за {stats['total_time']:.1f} сек")
-        logger.log("INFO", f"Обработано: {stats['total_filials']} филиалов")
-        logger.log("INFO", f"Успешно: {stats['success_count']}, Ошибок: {stats['error_count']}, Нет данных: {stats['no_data_count']}")
-        logger.log("INFO", f"Найдено статей: {stats['total_articles']}")
         logger.log("INFO", f"Среднее время на филиал: {stats['avg_time_per_filial']:.2f} сек")
         
-        # Обновляем сессию
-        if session_id and hasattr(db, 'update_monitoring_session'):
-            db.update_monitoring_session(
-                session_id,
-                filials_count=stats['total_filials'],
-                queries_count=len(queries),
-                results_count=stats['results_saved'],
-                status='completed'
-            )
-        
         # Показываем финальную статистику
         progress_placeholder.success(f"""
         ✅ **Асинхронный мониторинг завершен!**
@@ -860,545 +879,125 @@ def process_monitoring_async_wrapper(db: VGTRKDatabase, filials: list, queries:
         
     except Exception as e:
         logger.log("ERROR", f"Ошибка асинхронного мониторинга: {str(e)}")
-        st.session_state.processing = False
         st.session_state.current_status = f"Ошибка: {str(e)}"
-        
-        if session_id and hasattr(db, 'update_monitoring_session'):
-            db.update_monitoring_session(
-                session_id,
-                status='error',
-                error_message=str(e)
-            )
+    finally:
+        st.session_state.processing = False
 
 def process_monitoring(db: VGTRKDatabase, filials: list, queries: list, model: str, temperature: float,
                       search_mode: str = "main_only", search_days: int = None, use_gigachat: bool = True,
                       search_specific_date = None, search_date_range = None,
-                      use_async: bool = False, max_concurrent: int = 1):
-    """Процесс мониторинга филиалов с разными режимами поиска включая Sitemap"""
+                      use_async: bool = False, max_concurrent: int = 1,
+                      shards: int = 1, shard_strategy: str = 'round_robin'):
+    """Мониторинг филиалов в текущей сессии Streamlit (через MonitoringRunner)"""
+    runner = MonitoringRunner(
+        db,
+        log_level=st.session_state.log_level,
+        model=model,
+        temperature=temperature,
+        progress_callback=_streamlit_progress_handler(progress_bar=st.progress(0)),
+        should_stop=lambda: not st.session_state.processing
+    )
+    
     try:
-        logger = st.session_state.logger
-        logger.log("INFO", "Начало мониторинга филиалов ВГТРК")
-        
-        # Создаем новую сессию мониторинга
-        search_period = None
-        if search_specific_date:
-            search_period = f"Дата: {search_specific_date}"
-        elif search_days:
-            search_period = f"За {search_days} дней"
-        elif search_date_range:
-            date_from, date_to = search_date_range
-            search_period = f"С {date_from} по {date_to}"
-        else:
-            search_period = "Текущий день"
-            
-        # Проверяем поддержку сессий
-        if hasattr(db, 'start_monitoring_session'):
-            session_id = db.start_monitoring_session(
-                session_name=f"Мониторинг {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-                search_mode=search_mode,
-                search_period=search_period,
-                search_date=str(search_specific_date) if search_specific_date else None
-            )
-            logger.log("INFO", f"Создана сессия мониторинга #{session_id}")
-        else:
-            session_id = None
-            logger.log("WARNING", "База данных не поддерживает сессии мониторинга")
-        
-        # Статистика сессии
-        session_stats = {
-            'total_checked': 0,
-            'successful': 0,
-            'errors': 0,
-            'total_time': 0,
-            'total_tokens_used': 0,
-            'avg_response_time': 0,
-            'avg_page_size': 0
-        }
-        
-        session_start = time.time()
-        
-        # Инициализация компонентов с уровнем логирования
-        site_parser = SiteParser(log_level=st.session_state.log_level)
-        gigachat_client = GigaChatClient(
-            GIGACHAT_API_KEY,
-            GIGACHAT_CLIENT_ID,
-            model,
-            temperature,
-            log_level=st.session_state.log_level
+        runner.run(
+            filials, queries,
+            search_mode=search_mode,
+            search_days=search_days,
+            use_gigachat=use_gigachat,
+            search_specific_date=search_specific_date,
+            search_date_range=search_date_range
         )
-        
-        total_filials = len(filials)
-        search_mode_names = {
-            "main_only": "Только главная страница",
-            "main_and_news": "Главная + Новости",
-            "rss_search": "RSS лента",
-            "sitemap_search": f"Sitemap архив ({search_days} дней)"
-        }
-        logger.log("INFO", f"Филиалов для проверки: {total_filials} | Режим: {search_mode_names.get(search_mode, search_mode)}")
-        
-        # Инициализация ScrapyParser для Sitemap режима
-        if search_mode == "sitemap_search":
-            scrapy_parser = ScrapyParser(logger=logger)
-        
-        response_times = []
-        page_sizes = []
-        
-        # Обработка каждого филиала
-        for idx, filial in enumerate(filials):
-            if not st.session_state.processing:
-                logger.log("WARNING", "Мониторинг остановлен пользователем")
-                break
-            
-            filial_name = filial['name']
-            # Сначала пробуем website_url из БД, потом website
-            website = filial.get('website_url') or filial.get('website', '')
-            
-            # Получаем sitemap_url из БД для передачи в парсер
-            sitemap_url = None
-            if 'id' in filial:
-                # Получаем sitemap_url из БД
-                filial_full = db.get_filial_by_id(filial['id'])
-                if filial_full:
-                    sitemap_url = filial_full.get('sitemap_url')
-                    filial['sitemap_url'] = sitemap_url  # Добавляем в словарь для дальнейшего использования
-            
-            if not website:
-                logger.log("WARNING", f"{filial_name}: нет сайта")
-                session_stats['errors'] += 1
-                continue
-            
-            # Добавляем протокол если нет (но не для telegram ссылок)
-            if not website.startswith(('http://', 'https://', 'vk.com')):
-                if website.startswith('t.me/'):
-                    website = f"https://{website}"
-                elif not website.startswith(('http://', 'https://')):
-                    website = f"https://{website}"
-            
-            logger.log("INFO", f"Проверка {idx+1}/{total_filials}: {filial_name}")
-            st.session_state.current_status = f"Проверка {idx+1}/{total_filials}: {filial_name}"
-            
-            try:
-                # Выбираем метод парсинга в зависимости от режима
-                if search_mode == "sitemap_search":
-                    # Sitemap режим - глубокий поиск по архиву
-                    logger.log("INFO", f"🕷️ Sitemap поиск для {filial_name} за {search_days} дней")
-                    
-                    keywords = [q['query_text'] for q in queries]
-                    
-                    # Проверяем, есть ли прямой sitemap URL в базе данных
-                    sitemap_url = filial.get('sitemap_url')
-                    if sitemap_url:
-                        logger.log("INFO", f"Используем прямой sitemap URL: {sitemap_url}")
-                    
-                    # Поиск через Sitemap
-                    if search_specific_date:
-                        # Если выбрана конкретная дата, используем специальный метод
-                        sitemap_results = scrapy_parser.search_with_sitemap_date(
-                            website,
-                            keywords,
-                            search_date=search_specific_date,
-                            max_articles=150,  # Увеличиваем лимит для конкретной даты
-                            sitemap_url=sitemap_url
-                        )
-                    else:
-                        # Обычный поиск за период
-                        sitemap_results = scrapy_parser.search_with_sitemap(
-                            website,
-                            keywords,
-                            days=search_days,
-                            max_articles=50,  # Ограничиваем количество для производительности
-                            sitemap_url=sitemap_url,  # Передаем прямой URL если есть
-                            date_from=search_date_range[0] if search_date_range else None,
-                            date_to=search_date_range[1] if search_date_range else None
-                        )
-                    
-                    session_stats['total_checked'] += 1
-                    
-                    # Инициализируем parsed_content и parse_metrics для режима sitemap
-                    parsed_content = None  # Sitemap режим не использует parsed_content
-                    parse_metrics = {'mode': 'sitemap', 'articles_checked': len(sitemap_results) if sitemap_results else 0}
-                    
-                    if sitemap_results:
-                        logger.log("INFO", f"📊 {filial_name}: найдено {len(sitemap_results)} статей в архиве")
-                        
-                        if use_gigachat:
-                            # Режим с GigaChat - анализируем найденное
-                            for query in queries:
-                                query_text = query['query_text']
-                                
-                                # Фильтруем статьи по конкретному запросу
-                                relevant_articles = [
-                                    article for article in sitemap_results
-                                    if query_text.lower() in ' '.join(article.get('keywords', [])).lower()
-                                ]
-                                
-                                if relevant_articles:
-                                    # Используем SitemapResultsFormatter для форматирования
-                                    formatter = SitemapResultsFormatter()
-                                    formatted_results = formatter.format_sitemap_results(
-                                        relevant_articles,
-                                        filial_name,
-                                        query_text,
-                                        max_display=10
-                                    )
-                                    
-                                    # Формируем текст для GigaChat
-                                    analysis_text = formatter.format_for_gigachat(
-                                        formatted_results['articles'],
-                                        filial_name,
-                                        query_text
-                                    )
-                                    
-                                    # Отправляем в GigaChat
-                                    prompt = f"""Проанализируй найденные статьи с сайта {filial_name}.
-                                    Определи релевантность к теме '{query_text}'.
-                                    Сделай краткое резюме основных упоминаний."""
-                                    
-                                    analysis, gigachat_metrics = gigachat_client.analyze_content(
-                                        analysis_text[:3000],
-                                        prompt
-                                    )
-                                    
-                                    # Сохраняем результат с деталями статей
-                                    result = {
-                                        'filial_id': filial['id'],
-                                        'search_query_id': query['id'],
-                                        'url': website,
-                                        'page_title': filial_name,
-                                        'content': formatted_results['content'],
-                                        'gigachat_analysis': analysis,
-                                        'relevance_score': min(formatted_results['total_count'] / 10, 1.0),
-                                        'status': 'success',
-                                        'search_mode': 'sitemap',
-                                        'articles': formatted_results['articles'],  # Сохраняем детали статей
-                                        'metrics': {
-                                            'articles_found': formatted_results['total_count'],
-                                            'search_days': search_days,
-                                            'gigachat_metrics': gigachat_metrics
-                                        }
-                                    }
-                                    db.save_monitoring_result(filial['id'], result, session_id)
-                                    
-                                    logger.log("INFO", f"✅ {filial_name}: найдено {formatted_results['total_count']} статей для '{query_text}'")
-                                    session_stats['successful'] += 1
-                                    session_stats['total_tokens_used'] += gigachat_metrics.get('total_tokens', 0)
-                                else:
-                                    logger.log("INFO", f"❌ {filial_name}: '{query_text}' не найден в архиве за {search_days} дней")
-                        else:
-                            # Режим без GigaChat - просто сохраняем список статей
-                            for query in queries:
-                                query_text = query['query_text']
-                                
-                                # Фильтруем статьи по конкретному запросу
-                                relevant_articles = [
-                                    article for article in sitemap_results
-                                    if query_text.lower() in ' '.join(article.get('keywords', [])).lower()
-                                ]
-                                
-                                if relevant_articles:
-                                    # Используем SitemapResultsFormatter для форматирования
-                                    formatter = SitemapResultsFormatter()
-                                    formatted_results = formatter.format_sitemap_results(
-                                        relevant_articles,
-                                        filial_name,
-                                        query_text,
-                                        max_display=10
-                                    )
-                                    
-                                    result = {
-                                        'filial_id': filial['id'],
-                                        'search_query_id': query['id'],
-                                        'url': website,
-                                        'page_title': filial_name,
-                                        'content': formatted_results['content'],
-                                        'gigachat_analysis': f"Найдено {formatted_results['total_count']} статей (без анализа GigaChat)",
-                                        'relevance_score': min(formatted_results['total_count'] / 10, 1.0),
-                                        'status': 'success',
-                                        'search_mode': 'sitemap_no_ai',
-                                        'articles': formatted_results['articles'],  # Сохраняем детали статей
-                                        'metrics': {
-                                            'articles_found': formatted_results['total_count'],
-                                            'search_days': search_days
-                                        }
-                                    }
-                                    db.save_monitoring_result(filial['id'], result, session_id)
-                                    
-                                    logger.log("INFO", f"📋 {filial_name}: найдено {formatted_results['total_count']} статей для '{query_text}' (без GigaChat)")
-                                    session_stats['successful'] += 1
-                    else:
-                        # Если sitemap_results пустой, это может означать две ситуации:
-                        # 1. Sitemap не найден вообще (реальная ошибка)
-                        # 2. Sitemap найден, но нет статей с ключевыми словами (нормальная ситуация)
-                        
-                        # Проверяем, был ли найден sitemap
-                        if scrapy_parser.find_sitemap(website, sitemap_url):
-                            # Sitemap найден, просто нет релевантных статей
-                            logger.log("INFO", f"📊 {filial_name}: Sitemap обработан, релевантных статей не найдено")
-                            
-                            # Сохраняем результат для каждого запроса
-                            for query in queries:
-                                result = {
-                                    'filial_id': filial['id'],
-                                    'search_query_id': query['id'],
-                                    'url': website,
-                                    'page_title': filial_name,
-                                    'content': "Sitemap обработан",
-                                    'gigachat_analysis': f"В архиве за {search_days} дней не найдено статей с упоминанием '{query['query_text']}'",
-                                    'relevance_score': 0.0,
-                                    'status': 'no_data',
-                                    'search_mode': 'sitemap',
-                                    'articles': [],  # Пустой список статей
-                                    'metrics': {
-                                        'articles_found': 0,
-                                        'search_days': search_days,
-                                        'sitemap_found': True
-                                    }
-                                }
-                                db.save_monitoring_result(filial['id'], result, session_id)
-                            
-                            # Это не ошибка, а нормальный результат
-                            session_stats['total_checked'] += 1
-                        else:
-                            # Реальная ошибка - sitemap не найден
-                            logger.log("WARNING", f"⚠️ {filial_name}: Sitemap не найден")
-                            session_stats['errors'] += 1
-                            
-                            # Сохраняем ошибку
-                            result = {
-                                'filial_id': filial['id'],
-                                'url': website,
-                                'status': 'error',
-                                'error_message': 'Sitemap не найден',
-                                'search_mode': 'sitemap'
-                            }
-                            db.save_monitoring_result(filial['id'], result, session_id)
-                        
-                        # Инициализируем переменные для избежания ошибки
-                        parse_metrics = {'mode': 'sitemap'}
-                        parsed_content = None
-                        
-                elif search_mode == "rss_search":
-                    # RSS режим
-                    rss_data, parse_metrics = site_parser.parse_rss_feed(website)
-                    
-                    if rss_data:
-                        # Формируем текст для поиска из RSS
-                        parsed_content = f"=== RSS ЛЕНТА {filial_name} ===\n"
-                        parsed_content += f"Канал: {rss_data.get('channel_title', '')}\n"
-                        parsed_content += f"Описание: {rss_data.get('channel_description', '')}\n\n"
-                        
-                        for item in rss_data.get('items', []):
-                            parsed_content += f"--- НОВОСТЬ ---\n"
-                            parsed_content += f"Заголовок: {item['title']}\n"
-                            parsed_content += f"Описание: {item['description']}\n"
-                            parsed_content += f"Ссылка: {item['link']}\n"
-                            parsed_content += f"Дата: {item['pubDate']}\n\n"
-                    else:
-                        parsed_content = None
-                else:
-                    # Мета-парсинг режим
-                    include_news = (search_mode == "main_and_news")
-                    parsed_content, parse_metrics = site_parser.parse_meta_data(website, include_news=include_news)
-                
-                # Сохраняем метрики для статистики
-                if parse_metrics.get('response_time'):
-                    response_times.append(parse_metrics['response_time'])
-                if parse_metrics.get('page_size_kb'):
-                    page_sizes.append(parse_metrics['page_size_kb'])
-                
-                # Для режима sitemap_search счетчик уже увеличен выше, не дублируем
-                if search_mode != "sitemap_search":
-                    session_stats['total_checked'] += 1
-                
-                if parsed_content:
-                    # Логируем успешный парсинг
-                    if search_mode == "rss_search":
-                        items_count = parse_metrics.get('items_count', 0)
-                        logger.log("INFO", f"📡 {filial_name}: RSS получен ({items_count} новостей)", {
-                            "rss_url": parse_metrics.get('rss_url'),
-                            "url": website,
-                            "mode": "rss_search"
-                        })
-                    else:
-                        pages_count = parse_metrics.get('pages_parsed', 1)
-                        headers_count = parse_metrics.get('headers_count', 0)
-                        meta_tags_count = parse_metrics.get('meta_tags_count', 0)
-                        
-                        preview_length = 500  # Показываем первые 500 символов
-                        text_preview = parsed_content[:preview_length]
-                        if len(parsed_content) > preview_length:
-                            text_preview += f"\n... (ещё {len(parsed_content) - preview_length} символов)"
-                        
-                        logger.log("INFO", f"📄 {filial_name}: Мета-данные получены (страниц: {pages_count}, заголовков: {headers_count}, мета-тегов: {meta_tags_count})", {
-                            "text_preview": text_preview,
-                            "url": website,
-                            "mode": "meta_search"
-                        })
-                    
-                    # Поиск ключевых слов
-                    keywords = [q['query_text'] for q in queries]
-                    search_results = site_parser.search_keywords(parsed_content, keywords)
-                    
-                    # Анализ для каждого поискового запроса
-                    for query in queries:
-                        query_text = query['query_text']
-                        query_results = search_results.get(query_text, {})
-                        
-                        # Для мета-поиска всегда используем GigaChat для анализа
-                        logger.log_search_results(filial_name, query_text, query_results)
-                        
-                        # Логируем найденные фрагменты если есть
-                        if query_results.get('occurrences', 0) > 0:
-                            contexts = query_results.get('contexts', [])
-                            if contexts:
-                                first_context = contexts[0][:150] if contexts[0] else ""
-                                logger.log("INFO", f"📋 {filial_name}: Найден фрагмент в метаданных для '{query_text}'", {
-                                    "fragment": first_context.replace("**", "")
-                                })
-                        
-                        # Отправляем метаданные в GigaChat для анализа
-                        logger.log("DEBUG", f"Мета-поиск: анализируем метаданные через GigaChat для '{query_text}'")
-                        
-                        # Формируем промпт для анализа метаданных
-                        prompt = f"""Проанализируй метаданные и заголовки страницы.
-                        Определи, есть ли упоминания темы '{query_text}'.
-                        Метаданные включают: заголовки страниц, описания, ключевые слова, H1-H3 заголовки.
-                        Ответь кратко: найдено/не найдено и что именно.
-                        
-                        Метаданные для анализа:"""
-                        
-                        analysis, gigachat_metrics = gigachat_client.analyze_content(
-                            parsed_content[:3000],
-                            prompt
-                        )
-                        
-                        # Логируем метрики GigaChat
-                        logger.log_gigachat_analysis(filial_name, gigachat_metrics)
-                        
-                        # Логируем ответ GigaChat
-                        if analysis and not analysis.startswith("Ошибка"):
-                            analysis_preview = analysis[:200] + "..." if len(analysis) > 200 else analysis
-                            logger.log("INFO", f"🤖 GigaChat анализ метаданных для {filial_name}", {
-                                "analysis": analysis_preview,
-                                "query": query_text,
-                                "mode": "meta_" + search_mode
-                            })
-                            
-                            # Проверяем, нашел ли GigaChat что-то
-                            found_by_gigachat = not any(phrase in analysis.lower() for phrase in
-                                ["не найден", "не обнаружен", "отсутствует", "нет упоминаний"])
-                            
-                            if found_by_gigachat:
-                                # GigaChat что-то нашел
-                                result = {
-                                    'filial_id': filial['id'],
-                                    'search_query_id': query['id'],
-                                    'url': website,
-                                    'page_title': filial_name,
-                                    'content': parsed_content[:1000],
-                                    'gigachat_analysis': analysis,
-                                    'relevance_score': 0.7 if query_results.get('occurrences', 0) == 0 else min(query_results['occurrences'] / 10, 1.0),
-                                    'status': 'success',
-                                    'search_mode': search_mode,
-                                    'metrics': {
-                                        'parse_metrics': parse_metrics,
-                                        'search_results': query_results,
-                                        'gigachat_metrics': gigachat_metrics
-                                    }
-                                }
-                                db.save_monitoring_result(filial['id'], result, session_id)
-                                
-                                if query_results.get('occurrences', 0) > 0:
-                                    logger.log("INFO", f"✅ {filial_name}: найдено '{query_text}' в метаданных ({query_results['occurrences']} раз)")
-                                else:
-                                    logger.log("INFO", f"✅ {filial_name}: GigaChat нашел упоминания '{query_text}' в метаданных")
-                                session_stats['successful'] += 1
-                            else:
-                                # GigaChat не нашел в метаданных
-                                logger.log("INFO", f"❌ {filial_name}: '{query_text}' не найден в метаданных", {
-                                    "searched_in": f"{parse_metrics.get('pages_parsed', 1)} страниц, {parse_metrics.get('headers_count', 0)} заголовков",
-                                    "url": website,
-                                    "mode": "meta_" + search_mode
-                                })
-                                
-                                result = {
-                                    'filial_id': filial['id'],
-                                    'search_query_id': query['id'],
-                                    'url': website,
-                                    'status': 'no_data',
-                                    'error_message': f"Запрос '{query_text}' не найден",
-                                    'search_mode': search_mode
-                                }
-                                db.save_monitoring_result(filial['id'], result, session_id)
-                        
-                        # Обновляем статистику токенов
-                        session_stats['total_tokens_used'] += gigachat_metrics.get('total_tokens', 0)
-                else:
-                    # Для режима sitemap_search отсутствие parsed_content не является ошибкой,
-                    # так как этот режим не использует parsed_content
-                    if search_mode != "sitemap_search":
-                        # Ошибка парсинга только для других режимов
-                        result = {
-                            'filial_id': filial['id'],
-                            'url': website,
-                            'status': 'error',
-                            'error_message': parse_metrics.get('error', 'Не удалось получить контент сайта')
-                        }
-                        db.save_monitoring_result(filial['id'], result, session_id)
-                        logger.log("ERROR", f"{filial_name}: ошибка парсинга")
-                        session_stats['errors'] += 1
-                
-                # Обновление прогресса
-                progress = (idx + 1) / total_filials
-                st.progress(progress)
-                
-            except Exception as e:
-                logger.log("ERROR", f"Ошибка при обработке {filial_name}: {str(e)}")
-                db.add_log(filial['id'], 'monitoring_error', 'error', str(e))
-                session_stats['errors'] += 1
-                continue
-        
-        # Подсчет финальной статистики
-        session_stats['total_time'] = time.time() - session_start
-        if response_times:
-            session_stats['avg_response_time'] = sum(response_times) / len(response_times)
-        if page_sizes:
-            session_stats['avg_page_size'] = sum(page_sizes) / len(page_sizes)
-        
-        # Логируем статистику сессии
-        logger.log_session_stats(session_stats)
-        
-        # Завершение мониторинга
-        st.session_state.processing = False
         st.session_state.current_status = "Мониторинг завершен"
-        logger.log("INFO", f"✅ Мониторинг завершен за {session_stats['total_time']:.1f} сек")
-        
-        # Обновляем статистику сессии
-        if session_id and hasattr(db, 'update_monitoring_session'):
-            db.update_monitoring_session(
-                session_id,
-                filials_count=len(filials),
-                queries_count=len(queries),
-                results_count=session_stats['successful'],
-                status='completed'
-            )
-        
-        # Добавляем запись в лог БД
-        db.add_log(None, 'monitoring_complete', 'success',
-                  f'Проверено {total_filials} филиалов, успешно {session_stats["successful"]}, ошибок {session_stats["errors"]}')
-        
     except Exception as e:
-        logger.log("ERROR", f"Критическая ошибка: {str(e)}")
-        st.session_state.processing = False
         st.session_state.current_status = f"Критическая ошибка: {str(e)}"
-        
-        # Обновляем сессию с ошибкой
-        if 'session_id' in locals() and session_id and hasattr(db, 'update_monitoring_session'):
-            db.update_monitoring_session(
-                session_id,
-                status='error',
-                error_message=str(e)
+    finally:
+        st.session_state.processing = False
+
+def start_background_monitoring(db: VGTRKDatabase, filials: list, queries: list, model: str, temperature: float,
+                                search_mode: str = "main_only", search_days: int = None, use_gigachat: bool = True,
+                                search_specific_date = None, search_date_range = None,
+                                use_async: bool = False, max_concurrent: int = 1,
+                                shards: int = 1, shard_strategy: str = 'round_robin'):
+    """Постановка мониторинга в очередь заданий; выполняют воркеры (python -m modules.worker)"""
+    params = job_params(
+        [q['id'] for q in queries],
+        search_mode,
+        search_days=search_days,
+        use_gigachat=use_gigachat or search_mode not in ARCHIVE_MODES,
+        search_specific_date=search_specific_date,
+        search_date_range=search_date_range,
+        use_async=use_async,
+        max_concurrent=max_concurrent,
+        model=model,
+        temperature=temperature,
+        shards=shards,
+        shard_strategy=shard_strategy
+    )
+    job_id = enqueue_job(db, [f['id'] for f in filials], params)
+    st.session_state.logger.log("INFO", f"Задание #{job_id} поставлено в очередь ({len(filials)} филиалов)")
+    
+    start_queue_worker(db)
+
+def start_queue_worker(db: VGTRKDatabase):
+    """Поднять воркер очереди до ее опустошения (если воркеры не запущены отдельно)"""
+    Path("logs").mkdir(exist_ok=True)
+    launch_background(
+        [sys.executable, '-m', 'modules.worker', '--db', str(db.db_path), '--until-idle'],
+        log_path=f"logs/worker_{datetime.now():%Y%m%d}.log"
+    )
+
+def show_resumable_sessions(db: VGTRKDatabase):
+    """Незавершенные сессии (остановлены, упали, прерваны перезапуском) с продолжением"""
+    sessions = db.get_resumable_sessions(limit=5)
+    if not sessions:
+        return
+    
+    with st.expander(f"⏯️ Незавершенные сессии ({len(sessions)})"):
+        for session in sessions:
+            col_info, col_action = st.columns([4, 1])
+            with col_info:
+                st.caption(
+                    f"#{session['id']} {session['session_name']} · "
+                    f"обработано {session['filials_done'] or 0}/{session['filials_total']}"
+                    + (f" · {session['error_message']}" if session.get('error_message') else "")
+                )
+            with col_action:
+                if st.button("▶️", key=f"resume_session_{session['id']}", help="Продолжить с необработанных филиалов"):
+                    job_id = resume_job(db, session['id'])
+                    if job_id:
+                        st.session_state.logger.log("INFO", f"Сессия #{session['id']} продолжена заданием #{job_id}")
+                        start_queue_worker(db)
+                    st.rerun()
+
+def show_job_queue(db: VGTRKDatabase):
+    """Прогресс заданий очереди мониторинга (из БД - переживает перезапуск интерфейса)"""
+    jobs = db.get_monitoring_jobs(limit=5)
+    if not jobs:
+        return
+    
+    st.markdown("**🗂️ Очередь заданий**")
+    status_icons = {'queued': '⏳', 'running': '🔄', 'completed': '✅', 'cancelled': '⏹️'}
+    for job in jobs:
+        total = job['tasks_total'] or 0
+        done = job['tasks_done'] or 0
+        col_info, col_action = st.columns([4, 1])
+        with col_info:
+            st.caption(
+                f"{status_icons.get(job['status'], '❓')} Задание #{job['id']} · "
+                f"{job['params'].get('search_mode')} · {done}/{total} филиалов"
+                + (f" · ошибок: {job['tasks_error']}" if job['tasks_error'] else "")
+                + (f" · в работе: {job['tasks_leased']}" if job['tasks_leased'] else "")
             )
+            if job['status'] in ('queued', 'running'):
+                st.progress(done / total if total else 0.0)
+        with col_action:
+            if job['status'] in ('queued', 'running'):
+                if st.button("⏹️", key=f"cancel_job_{job['id']}", help="Отменить задание"):
+                    db.cancel_monitoring_job(job['id'])
+                    st.rerun()
+    
+    if st.button("🔄 Обновить прогресс"):
+        st.rerun()
 
 def show_results_tab(db: VGTRKDatabase):
     """Вкладка результатов мониторинга"""
@@ -1500,33 +1099,54 @@ def show_results_tab(db: VGTRKDatabase):
         # Режим отображения
         display_mode = st.selectbox(
             "Режим отображения",
-            ["📊 Таблица", "🎴 Карточки"]
+            ["📊 Таблица", "🎴 Карточки", "🗂️ Текущее состояние"],
+            help="Текущее состояние - последний результат по каждому филиалу и запросу (период и сессия не учитываются)"
         )
     
-    # Кнопка экспорта
-    if st.button("📥 Экспорт в Excel", use_container_width='stretch'):
-        export_path = f"exports/monitoring_results_{datetime.now():%Y%m%d_%H%M%S}.xlsx"
-        Path("exports").mkdir(exist_ok=True)
-        db_path = db.export_to_excel(export_path)
-        st.success(f"✅ Экспортировано в {export_path}")
+    # Экспорт результатов с текущими фильтрами (потоково, без загрузки в память)
+    col_e1, col_e2 = st.columns([1, 3])
+    with col_e1:
+        export_format = st.selectbox("Формат", ["xlsx", "csv", "parquet"], label_visibility="collapsed")
+    with col_e2:
+        export_clicked = st.button("📥 Экспорт результатов", use_container_width='stretch')
     
-    # Получаем результаты с фильтрами
-    results = db.get_monitoring_results(
-        date_from=date_from,
-        date_to=date_to,
-        status=status,
-        session_id=selected_session_id
-    )
+    if export_clicked:
+        export_path = f"exports/monitoring_results_{datetime.now():%Y%m%d_%H%M%S}.{export_format}"
+        try:
+            exported = export_results(
+                db, export_path, export_format,
+                date_from=date_from,
+                date_to=date_to,
+                status=status,
+                session_id=selected_session_id,
+                federal_district=selected_district if selected_district != "Все округа" else None
+            )
+            st.success(f"✅ Экспортировано {exported} результатов в {export_path}")
+        except ImportError as e:
+            st.error(f"❌ {e}")
     
-    # Фильтруем по округу если нужно
-    if selected_district != "Все округа":
-        results = [r for r in results if r.get('federal_district') == selected_district]
+    # Получаем результаты с фильтрами
+    if display_mode == "🗂️ Текущее состояние":
+        # Материализованное "последнее состояние" - один индексированный запрос
+        results = db.get_latest_results(
+            federal_district=selected_district if selected_district != "Все округа" else None,
+            status=status
+        )
+    else:
+        results = db.get_monitoring_results(
+            date_from=date_from,
+            date_to=date_to,
+            status=status,
+            session_id=selected_session_id,
+            include_articles=display_mode != "📊 Таблица",
+            federal_district=selected_district if selected_district != "Все округа" else None
+        )
     
     # Отображение результатов
     if results:
         st.metric("Найдено результатов", len(results))
         
-        if display_mode == "🎴 Карточки":
+        if display_mode in ("🎴 Карточки", "🗂️ Текущее состояние"):
             # Режим карточек
             cards_display = ResultsCardsDisplay(results)
             cards_display.display_cards()
@@ -1712,12 +1332,13 @@ def show_settings_tab(db: VGTRKDatabase):
         # Резервное копирование
         st.markdown("---")
         if st.button("🔒 Создать резервную копию БД", use_container_width='stretch'):
-            import shutil
-            backup_dir = Path("backups")
-            backup_dir.mkdir(exist_ok=True)
-            backup_path = backup_dir / f"vgtrk_backup_{datetime.now():%Y%m%d_%H%M%S}.db"
-            shutil.copy2(db_path, backup_path)
-            st.success(f"✅ Резервная копия создана: {backup_path}")
+            # Инкрементальный снимок через backup API - не мешает идущему мониторингу
+            from modules.db_backup import create_snapshot, load_manifest
+            manifest_path = create_snapshot(str(db.db_path), "backups")
+            manifest = load_manifest(manifest_path)
+            new_chunks = sum(f['new_chunks'] for f in manifest['files'])
+            total_chunks = sum(len(f['chunks']) for f in manifest['files'])
+            st.success(f"✅ Резервная копия создана: {manifest_path} (новых блоков: {new_chunks} из {total_chunks})")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
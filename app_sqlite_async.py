@@ -4,12 +4,8 @@
 
 import streamlit as st
 import asyncio
-from datetime import datetime
-import time
-from modules.async_monitoring import AsyncMonitoring
 from modules.database import VGTRKDatabase
-from modules.results_formatter import SitemapResultsFormatter
-import json
+from modules.runner import MonitoringRunner
 
 
 async def process_monitoring_async(
@@ -21,133 +17,30 @@ async def process_monitoring_async(
     session_id: int = None,
     progress_placeholder=None
 ):
-    """Асинхронная обработка мониторинга"""
+    """Асинхронная обработка мониторинга (конвейер - MonitoringRunner.process_async)"""
     
-    start_time = time.time()
-    monitor = AsyncMonitoring(max_concurrent=max_concurrent)
+    status_icons = {'success': '✅', 'no_data': '⚠️', 'error': '❌'}
     
-    try:
-        # Преобразуем запросы в ключевые слова
-        keywords = [q['query_text'] for q in queries]
-        
-        # Счётчики для статистики
-        total = len(filials)
-        completed = 0
-        results_saved = 0
-        
-        # Callback для обновления прогресса
-        def progress_callback(current, total_count, result):
-            nonlocal completed, results_saved
-            completed = current
-            
-            # Обновляем прогресс в Streamlit
-            if progress_placeholder:
-                status_icon = {
-                    'success': '✅',
-                    'no_data': '⚠️', 
-                    'error': '❌'
-                }.get(result['status'], '❓')
-                
-                progress_text = f"""
-                **Прогресс: {completed}/{total_count}**
-                
-                Последний обработан: {status_icon} {result['filial_name']}
-                - Статей найдено: {len(result.get('articles', []))}
-                - Время обработки: {result['processing_time']:.2f}с
-                """
-                
-                if result.get('error'):
-                    progress_text += f"\n- Ошибка: {result['error']}"
-                
-                progress_placeholder.markdown(progress_text)
-        
-        # Запускаем асинхронную обработку
-        results = await monitor.process_filials_batch(
-            filials,
-            keywords,
-            days=search_days,
-            max_articles=50,
-            progress_callback=progress_callback
-        )
+    # Обновляем прогресс в Streamlit по событиям раннера
+    def progress_callback(event):
+        if event['event'] != 'filial_done' or not progress_placeholder:
+            return
         
-        # Сохраняем результаты в БД
-        formatter = SitemapResultsFormatter()
+        progress_text = f"""
+        **Прогресс: {event['index']}/{event['total']}**
         
-        for result in results:
-            if result['status'] == 'success' and result['articles']:
-                # Сохраняем результат для каждого запроса
-                for query in queries:
-                    query_text = query['query_text']
-                    
-                    # Фильтруем статьи по запросу
-                    relevant_articles = [
-                        article for article in result['articles']
-                        if query_text.lower() in ' '.join(article.get('keywords', [])).lower()
-                    ]
-                    
-                    if relevant_articles:
-                        # Форматируем результаты
-                        formatted = formatter.format_sitemap_results(
-                            relevant_articles,
-                            result['filial_name'],
-                            query_text,
-                            max_display=10
-                        )
-                        
-                        # Сохраняем в БД
-                        db_result = {
-                            'filial_id': result['filial_id'],
-                            'search_query_id': query['id'],
-                            'url': result['website'],
-                            'page_title': result['filial_name'],
-                            'content': formatted['content'],
-                            'gigachat_analysis': f"Найдено {len(relevant_articles)} статей (асинхронный поиск)",
-                            'relevance_score': min(len(relevant_articles) / 10, 1.0),
-                            'status': 'success',
-                            'search_mode': 'sitemap_async',
-                            'articles': formatted['articles'],
-                            'metrics': {
-                                'articles_found': len(relevant_articles),
-                                'search_days': search_days,
-                                'processing_time': result['processing_time']
-                            }
-                        }
-                        
-                        db.save_monitoring_result(result['filial_id'], db_result, session_id)
-                        results_saved += 1
-            
-            elif result['status'] == 'error':
-                # Сохраняем ошибку
-                db_result = {
-                    'filial_id': result['filial_id'],
-                    'url': result['website'],
-                    'status': 'error',
-                    'error_message': result.get('error', 'Неизвестная ошибка'),
-                    'search_mode': 'sitemap_async'
-                }
-                db.save_monitoring_result(result['filial_id'], db_result, session_id)
+        Последний обработан: {status_icons.get(event['status'], '❓')} {event['filial_name']}
+        - Статей найдено: {event.get('articles', 0)}
+        - Время обработки: {event['processing_time']:.2f}с
+        """
         
-        total_time = time.time() - start_time
+        if event.get('error'):
+            progress_text += f"\n- Ошибка: {event['error']}"
         
-        # Финальная статистика
-        success_count = sum(1 for r in results if r['status'] == 'success')
-        error_count = sum(1 for r in results if r['status'] == 'error')
-        no_data_count = sum(1 for r in results if r['status'] == 'no_data')
-        total_articles = sum(len(r.get('articles', [])) for r in results)
-        
-        return {
-            'total_time': total_time,
-            'total_filials': total,
-            'success_count': success_count,
-            'error_count': error_count,
-            'no_data_count': no_data_count,
-            'total_articles': total_articles,
-            'results_saved': results_saved,
-            'avg_time_per_filial': total_time / total if total > 0 else 0
-        }
-        
-    finally:
-        await monitor.close()
+        progress_placeholder.markdown(progress_text)
+    
+    runner = MonitoringRunner(db, progress_callback=progress_callback)
+    return await runner.process_async(filials, queries, search_days, max_concurrent, session_id)
 
 
 def run_async_monitoring_streamlit(
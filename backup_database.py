@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 """
 Скрипт для создания резервных копий базы данных
+
+Копии снимаются через sqlite3 backup API и не блокируют идущий мониторинг.
+Инкрементальные снимки (snapshot) хранят только изменившиеся блоки страниц.
 """
 
 import sys
 import os
-import shutil
 import sqlite3
 from pathlib import Path
 from datetime import datetime
@@ -14,6 +16,8 @@ from datetime import datetime
 sys.path.append(os.path.dirname(__file__))
 
 from modules.database import VGTRKDatabase
+from modules.db_backup import (online_copy, quick_check, create_snapshot, verify_snapshot,
+                               restore_snapshot, collect_garbage, load_manifest)
 
 
 def create_backup(source_db: str, backup_dir: str = None):
@@ -47,15 +51,12 @@ def create_backup(source_db: str, backup_dir: str = None):
         print(f"   Исходный файл: {source_path}")
         print(f"   Резервная копия: {backup_file}")
         
-        # Копируем файл базы данных
-        shutil.copy2(source_path, backup_file)
+        # Копируем базу данных через backup API (запись в исходную БД не блокируется)
+        online_copy(str(source_path), str(backup_file))
         
-        # Проверяем целостность резервной копии
+        # Быстрая проверка целостности резервной копии
         print("   🔍 Проверка целостности...")
-        conn = sqlite3.connect(str(backup_file))
-        cursor = conn.execute("PRAGMA integrity_check")
-        result = cursor.fetchone()
-        conn.close()
+        result = [quick_check(str(backup_file))]
         
         if result[0] == "ok":
             print("   ✅ Резервная копия создана успешно!")
@@ -93,8 +94,9 @@ def list_backups(backup_dir: str = None):
     
     # Получаем список файлов резервных копий
     backup_files = list(backup_dir.glob("vgtrk_monitoring_backup_*.db"))
+    manifests = sorted((backup_dir / "snapshots").glob("*.json"), reverse=True)
     
-    if not backup_files:
+    if not backup_files and not manifests:
         print("📭 Нет доступных резервных копий")
         return
     
@@ -112,6 +114,16 @@ def list_backups(backup_dir: str = None):
         print(f"{i:2d}. {backup_file.name}")
         print(f"     📅 {mod_time.strftime('%Y-%m-%d %H:%M:%S')}  💾 {size_mb:.2f} МБ")
         print()
+    
+    # Инкрементальные снимки
+    if manifests:
+        print(f"📸 Инкрементальные снимки ({len(manifests)}):")
+        print("-" * 80)
+        for manifest_path in manifests:
+            manifest = load_manifest(manifest_path)
+            size_mb = sum(f['size'] for f in manifest['files']) / (1024 * 1024)
+            print(f"  {manifest_path.name}")
+            print(f"     📅 {manifest['created_at']}  🗂️  {len(manifest['files'])} файлов  💾 {size_mb:.2f} МБ")
 
 
 def restore_backup(backup_file: str, target_db: str):
@@ -139,11 +151,11 @@ def restore_backup(backup_file: str, target_db: str):
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_pre_restore")
             pre_restore_backup = target_path.parent / f"backups/vgtrk_monitoring_backup_{timestamp}.db"
             pre_restore_backup.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(target_path, pre_restore_backup)
+            online_copy(str(target_path), str(pre_restore_backup))
             print(f"   📦 Создана резервная копия текущей базы: {pre_restore_backup.name}")
         
-        # Копируем резервную копию в целевую базу
-        shutil.copy2(backup_path, target_path)
+        # Переносим резервную копию в целевую базу через backup API
+        online_copy(str(backup_path), str(target_path))
         
         # Проверяем целостность восстановленной базы
         print("   🔍 Проверка целостности...")
@@ -211,6 +223,109 @@ def cleanup_old_backups(backup_dir: str = None, keep_days: int = 30):
         print("✅ Нет старых резервных копий для удаления")
 
 
+def create_incremental_snapshot(source_db: str, backup_dir: str = None):
+    """
+    Создание инкрементального снимка базы данных и ее партиций
+    
+    Args:
+        source_db: Путь к исходной базе данных
+        backup_dir: Каталог хранилища снимков (по умолчанию data/backups)
+    """
+    source_path = Path(source_db)
+    
+    if not source_path.exists():
+        print(f"❌ Исходная база данных не найдена: {source_db}")
+        return False
+    
+    if backup_dir is None:
+        backup_dir = source_path.parent / "backups"
+    
+    try:
+        print(f"📸 Создание инкрементального снимка...")
+        start_time = datetime.now()
+        manifest_path = create_snapshot(str(source_path), str(backup_dir))
+        manifest = load_manifest(manifest_path)
+        
+        total_chunks = sum(len(f['chunks']) for f in manifest['files'])
+        new_chunks = sum(f['new_chunks'] for f in manifest['files'])
+        total_size = sum(f['size'] for f in manifest['files'])
+        
+        print(f"   📄 Манифест: {manifest_path}")
+        print(f"   🗂️  Файлов: {len(manifest['files'])}, размер {total_size / (1024*1024):.2f} МБ")
+        print(f"   🧩 Новых блоков: {new_chunks} из {total_chunks}")
+        
+        problems = verify_snapshot(str(manifest_path))
+        if problems:
+            print(f"   ❌ Ошибка проверки снимка: {problems[0]}")
+            return False
+        
+        print(f"   ✅ Снимок создан за {(datetime.now() - start_time).total_seconds():.1f} сек")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Ошибка при создании снимка: {e}")
+        return False
+
+
+def verify_backup(backup_file: str, deep: bool = False):
+    """
+    Проверка резервной копии или снимка
+    
+    Args:
+        backup_file: Файл резервной копии (.db) или манифест снимка (.json)
+        deep: Глубокая проверка (integrity_check / сверка хешей всех блоков)
+    """
+    backup_path = Path(backup_file)
+    
+    if not backup_path.exists():
+        print(f"❌ Резервная копия не найдена: {backup_file}")
+        return False
+    
+    print(f"🔍 Проверка {backup_path.name}...")
+    
+    if backup_path.suffix == ".json":
+        problems = verify_snapshot(str(backup_path), deep=deep)
+    else:
+        conn = sqlite3.connect(str(backup_path))
+        pragma = "integrity_check" if deep else "quick_check"
+        result = conn.execute(f"PRAGMA {pragma}").fetchone()[0]
+        conn.close()
+        problems = [] if result == "ok" else [result]
+    
+    if problems:
+        for problem in problems[:10]:
+            print(f"   ❌ {problem}")
+        return False
+    
+    print("   ✅ Резервная копия в порядке")
+    return True
+
+
+def restore_from_snapshot(manifest_file: str, target_db: str):
+    """
+    Восстановление базы данных и партиций из инкрементального снимка
+    
+    Args:
+        manifest_file: Путь к манифесту снимка
+        target_db: Путь к целевой базе данных
+    """
+    try:
+        print(f"🔄 Восстановление из снимка {manifest_file}...")
+        
+        problems = verify_snapshot(manifest_file)
+        if problems:
+            print(f"   ❌ Снимок неполный: {problems[0]}")
+            return False
+        
+        restore_snapshot(manifest_file, target_db)
+        print("   ✅ Восстановление завершено успешно!")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Ошибка при восстановлении: {e}")
+        return False
+
+
 def main():
     """Основная функция"""
     print("=" * 60)
@@ -223,6 +338,9 @@ def main():
         print("  python backup_database.py list [backup_dir]")
         print("  python backup_database.py restore [backup_file] [target_db]")
         print("  python backup_database.py cleanup [backup_dir] [keep_days]")
+        print("  python backup_database.py snapshot [source_db] [backup_dir]")
+        print("  python backup_database.py verify [backup_file|manifest] [--deep]")
+        print("  python backup_database.py restore-snapshot [manifest] [target_db]")
         return
     
     command = sys.argv[1]
@@ -251,9 +369,33 @@ def main():
         keep_days = int(sys.argv[3]) if len(sys.argv) > 3 else 30
         cleanup_old_backups(backup_dir, keep_days)
         
+        # Старые снимки и блоки, на которые они ссылались
+        snapshots_dir = backup_dir or "data/backups"
+        deleted_snapshots, deleted_chunks = collect_garbage(snapshots_dir, keep_days)
+        if deleted_snapshots or deleted_chunks:
+            print(f"🗑️  Удалено снимков: {deleted_snapshots}, блоков: {deleted_chunks}")
+        
+    elif command == "snapshot":
+        source_db = sys.argv[2] if len(sys.argv) > 2 else "data/vgtrk_monitoring.db"
+        backup_dir = sys.argv[3] if len(sys.argv) > 3 else None
+        create_incremental_snapshot(source_db, backup_dir)
+        
+    elif command == "verify":
+        if len(sys.argv) < 3:
+            print("Использование: python backup_database.py verify [backup_file|manifest] [--deep]")
+            return
+        verify_backup(sys.argv[2], deep="--deep" in sys.argv)
+        
+    elif command == "restore-snapshot":
+        if len(sys.argv) < 4:
+            print("❌ Недостаточно аргументов для восстановления")
+            print("Использование: python backup_database.py restore-snapshot [manifest] [target_db]")
+            return
+        restore_from_snapshot(sys.argv[2], sys.argv[3])
+        
     else:
         print(f"❌ Неизвестная команда: {command}")
-        print("Доступные команды: create, list, restore, cleanup")
+        print("Доступные команды: create, list, restore, cleanup, snapshot, verify, restore-snapshot")
 
 
 if __name__ == "__main__":
@@ -1,12 +1,19 @@
 #!/usr/bin/env python3
 """
 Скрипт для экспорта и импорта данных между средами разработки и продакшна
+
+Файлы .json - справочники (филиалы, запросы, последние сессии).
+Файлы .ndjson / .jsonl (можно с .gz) - полная история всех таблиц, включая
+результаты, статьи и месячные партиции; пишутся и читаются потоково.
 """
 
 import sys
 import os
+import gzip
+import base64
 import sqlite3
 import json
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Any
 
@@ -65,6 +72,230 @@ def export_data(db_path: str, export_file: str):
         conn.close()
 
 
+# Порядок выгрузки таблиц; остальные таблицы идут следом по алфавиту
+NDJSON_TABLE_ORDER = ['filials', 'search_queries', 'monitoring_sessions',
+                      'monitoring_results', 'result_articles']
+
+# Таблицы результатов, строки которых лежат также в месячных партициях
+PARTITIONED_TABLES = ('monitoring_results', 'result_articles')
+
+NDJSON_BATCH_SIZE = 1000
+
+
+def is_ndjson_file(path: str) -> bool:
+    """Проверить, является ли файл потоковым NDJSON дампом"""
+    name = path[:-3] if path.endswith('.gz') else path
+    return name.endswith('.ndjson') or name.endswith('.jsonl')
+
+
+def open_ndjson(path: str, mode: str):
+    """Открыть NDJSON файл (со сжатием gzip, если имя оканчивается на .gz)"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def encode_value(value):
+    """Значение SQLite -> JSON (BLOB кодируется в base64)"""
+    if isinstance(value, bytes):
+        return {'$b64': base64.b64encode(value).decode('ascii')}
+    return value
+
+
+def decode_value(value):
+    """JSON -> значение SQLite"""
+    if isinstance(value, dict) and '$b64' in value:
+        return base64.b64decode(value['$b64'])
+    return value
+
+
+def export_ndjson(db_path: str, export_file: str):
+    """
+    Потоковый экспорт всех таблиц (включая партиции) в NDJSON
+    
+    Каждая строка файла - отдельный JSON объект: заголовок таблицы
+    ({"type": "table", ...}) и ее строки ({"t": таблица, "r": [значения]}).
+    Память не зависит от объема истории.
+    
+    Args:
+        db_path: Путь к базе данных
+        export_file: Путь к файлу .ndjson / .jsonl (.gz - со сжатием)
+    """
+    print(f"📤 Потоковый экспорт {db_path} → {export_file}")
+    
+    db = VGTRKDatabase(db_path)
+    conn = sqlite3.connect(db_path)
+    counts = {}
+    
+    try:
+        cursor = conn.execute("""
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+        """)
+        tables = {name: sql for name, sql in cursor.fetchall()}
+        ordered = [t for t in NDJSON_TABLE_ORDER if t in tables]
+        ordered += sorted(t for t in tables if t not in NDJSON_TABLE_ORDER)
+        
+        with open_ndjson(export_file, 'w') as f:
+            f.write(json.dumps({
+                'type': 'header', 'format': 'vgtrk-ndjson', 'version': 1,
+                'created_at': datetime.now().isoformat(timespec='seconds')
+            }) + '\n')
+            
+            for table in ordered:
+                columns = [col[1] for col in conn.execute(f'PRAGMA table_info({table})')]
+                f.write(json.dumps({'type': 'table', 'name': table, 'columns': columns,
+                                    'sql': tables[table]}, ensure_ascii=False) + '\n')
+                
+                # Основная таблица и, для результатов, все месячные партиции
+                sources = [(None, 'main')]
+                if table in PARTITIONED_TABLES:
+                    sources += [(db.partition_path(month), 'part') for month in db.list_partitions()]
+                
+                counts[table] = 0
+                for partition_file, schema in sources:
+                    if partition_file:
+                        conn.execute('ATTACH DATABASE ? AS part', (str(partition_file),))
+                    try:
+                        # В старой партиции может не быть колонок, добавленных позже
+                        source_columns = {col[1] for col in conn.execute(f'PRAGMA {schema}.table_info({table})')}
+                        select = ', '.join(col if col in source_columns else 'NULL' for col in columns)
+                        cursor = conn.execute(f'SELECT {select} FROM {schema}.{table}')
+                        while True:
+                            rows = cursor.fetchmany(NDJSON_BATCH_SIZE)
+                            if not rows:
+                                break
+                            for row in rows:
+                                f.write(json.dumps({'t': table, 'r': [encode_value(v) for v in row]},
+                                                   ensure_ascii=False, default=str) + '\n')
+                            counts[table] += len(rows)
+                        cursor.close()
+                    finally:
+                        if partition_file:
+                            conn.execute('DETACH DATABASE part')
+                
+                print(f"   ✅ {table}: {counts[table]} строк")
+            
+            f.write(json.dumps({'type': 'footer', 'counts': counts}) + '\n')
+        
+        print(f"   📁 Данные сохранены в {export_file}")
+        print(f"   💾 Размер файла: {os.path.getsize(export_file) / (1024 * 1024):.2f} МБ")
+        
+    except Exception as e:
+        print(f"❌ Ошибка при экспорте: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def import_ndjson(db_path: str, import_file: str, clear_existing: bool = False):
+    """
+    Потоковый импорт NDJSON дампа пакетами executemany
+    
+    ID записей сохраняются, поэтому дамп загружается только в пустую базу
+    или с clear_existing=True: иначе записи с совпадающими ID (в том числе
+    словари сжатия) были бы перезаписаны.
+    
+    Args:
+        db_path: Путь к базе данных
+        import_file: Путь к файлу .ndjson / .jsonl (.gz)
+        clear_existing: Очистить импортируемые таблицы перед загрузкой
+    
+    Raises:
+        ValueError: База не пуста, а clear_existing не задан
+    """
+    print(f"📥 Потоковый импорт в {db_path} из {import_file}")
+    
+    # Создаем структуру БД текущей версии
+    db = VGTRKDatabase(db_path)
+    if clear_existing:
+        db.drop_partitions()
+    
+    conn = sqlite3.connect(db_path)
+    if not clear_existing:
+        tables = [row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+        filled = [table for table in tables
+                  if conn.execute(f'SELECT 1 FROM {table} LIMIT 1').fetchone()]
+        if filled or db.list_partitions():
+            conn.close()
+            raise ValueError(f"База {db_path} не пуста ({', '.join(filled) or 'партиции'}), "
+                             f"используйте --clear-existing")
+    
+    counts = {}
+    table = None
+    insert_sql = None
+    batch = []
+    
+    def flush():
+        if batch:
+            conn.executemany(insert_sql, batch)
+            counts[table] = counts.get(table, 0) + len(batch)
+            batch.clear()
+    
+    try:
+        with open_ndjson(import_file, 'r') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                
+                if 'r' in record:
+                    batch.append([decode_value(v) for v in record['r']])
+                    if len(batch) >= NDJSON_BATCH_SIZE:
+                        flush()
+                    continue
+                
+                if record.get('type') != 'table':
+                    continue
+                
+                # Начало новой таблицы
+                flush()
+                conn.commit()
+                if table:
+                    print(f"   ✅ {table}: {counts.get(table, 0)} строк")
+                
+                table = record['name']
+                columns = record['columns']
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+                ).fetchone()
+                if not exists and record.get('sql'):
+                    conn.execute(record['sql'])
+                
+                # Колонки, добавленные в источнике лениво, добавляем и сюда
+                target_columns = {col[1] for col in conn.execute(f'PRAGMA table_info({table})')}
+                for column in columns:
+                    if column not in target_columns:
+                        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column}')
+                
+                if clear_existing:
+                    conn.execute(f'DELETE FROM {table}')
+                
+                insert_sql = f"""
+                    INSERT OR REPLACE INTO {table} ({', '.join(columns)})
+                    VALUES ({', '.join('?' for _ in columns)})
+                """
+        
+        flush()
+        conn.commit()
+        if table:
+            print(f"   ✅ {table}: {counts.get(table, 0)} строк")
+        
+    except Exception as e:
+        conn.rollback()
+        print(f"❌ Ошибка при импорте: {e}")
+        raise
+    finally:
+        conn.close()
+    
+    # Прошлые месяцы сразу раскладываем по партициям
+    archived = db.archive_closed_months()
+    if archived:
+        print(f"   🗂️  Перенесено в партиции: {sum(archived.values())} записей")
+    print("✅ Импорт завершен успешно!")
+
+
 def import_data(db_path: str, import_file: str, clear_existing: bool = False):
     """
     Импорт данных из JSON файла в базу данных
@@ -80,6 +311,12 @@ def import_data(db_path: str, import_file: str, clear_existing: bool = False):
     with open(import_file, 'r', encoding='utf-8') as f:
         import_data = json.load(f)
     
+    # Создаем недостающие таблицы (в т.ч. агрегаты статистики)
+    db = VGTRKDatabase(db_path)
+    if clear_existing:
+        # Результаты прошлых месяцев хранятся в отдельных файлах партиций
+        db.drop_partitions()
+    
     # Подключаемся к базе данных
     conn = sqlite3.connect(db_path)
     
@@ -89,7 +326,13 @@ def import_data(db_path: str, import_file: str, clear_existing: bool = False):
         
         if clear_existing:
             print("   🧹 Очистка существующих данных...")
+            conn.execute('DELETE FROM result_articles')
             conn.execute('DELETE FROM monitoring_results')
+            conn.execute('DELETE FROM results_daily_stats')
+            conn.execute('DELETE FROM latest_results')
+            conn.execute('DELETE FROM session_checkpoints')
+            conn.execute('DELETE FROM monitoring_tasks')
+            conn.execute('DELETE FROM monitoring_jobs')
             conn.execute('DELETE FROM monitoring_sessions')
             conn.execute('DELETE FROM search_queries')
             conn.execute('DELETE FROM filials')
@@ -267,7 +510,8 @@ def main():
     if len(sys.argv) < 2:
         print("Использование:")
         print(" python export_import_data.py export [db_path] [export_file]")
-        print("  python export_import_data.py import [db_path] [import_file]")
+        print("  python export_import_data.py import [db_path] [import_file] [--clear-existing]")
+        print("  (export_file/import_file с расширением .ndjson или .ndjson.gz - полная история)")
         print("  python export_import_data.py info [db_path]")
         return
     
@@ -281,7 +525,10 @@ def main():
         
         db_path = sys.argv[2]
         export_file = sys.argv[3]
-        export_data(db_path, export_file)
+        if is_ndjson_file(export_file):
+            export_ndjson(db_path, export_file)
+        else:
+            export_data(db_path, export_file)
         
     elif command == "import":
         if len(sys.argv) < 4:
@@ -291,7 +538,11 @@ def main():
         
         db_path = sys.argv[2]
         import_file = sys.argv[3]
-        import_data(db_path, import_file)
+        clear_existing = "--clear-existing" in sys.argv
+        if is_ndjson_file(import_file):
+            import_ndjson(db_path, import_file, clear_existing)
+        else:
+            import_data(db_path, import_file, clear_existing)
         
     elif command == "info":
         if len(sys.argv) < 3:
@@ -24,23 +24,13 @@ from urllib.parse import urljoin, urlparse
 # Добавляем путь к модулям
 sys.path.append(os.path.join(os.path.dirname(__file__), 'modules'))
 
+from modules.database import VGTRKDatabase
+from modules.sitemap_discovery import discover_sitemap
+
 # Настройки
 DB_PATH = "data/vgtrk_monitoring.db"
 TIMEOUT = 10  # Таймаут для запросов в секундах
 
-# Стандартные пути для поиска sitemap
-SITEMAP_PATHS = [
-    "/sitemap.xml",
-    "/sitemap_index.xml", 
-    "/sitemap2025.xml",  # Как у Якутии
-    "/sitemap2024.xml",  # На случай если есть за прошлый год
-    "/news-sitemap.xml",
-    "/post-sitemap.xml",
-    "/yandex-turbo-sitemap.xml",
-    "/sitemap/sitemap.xml",
-    "/sitemaps/sitemap.xml"
-]
-
 
 class SitemapFinder:
     """Класс для поиска sitemap на сайтах"""
@@ -53,68 +43,23 @@ class SitemapFinder:
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
         })
     
-    def find_sitemap_in_robots(self, base_url: str) -> Optional[str]:
+    def find_sitemap(self, base_url: str) -> Optional[dict]:
         """
-        Ищет sitemap в robots.txt
+        Ищет sitemap: robots.txt и стандартные пути проверяются одновременно
         
         Args:
             base_url: Базовый URL сайта
             
         Returns:
-            URL sitemap или None
+            {'url', 'type', 'source'} или None
         """
-        try:
-            robots_url = urljoin(base_url, '/robots.txt')
-            print(f"  Проверяем robots.txt: {robots_url}")
-            
-            response = self.session.get(robots_url, timeout=TIMEOUT, verify=False)
-            if response.status_code == 200:
-                # Ищем строки с Sitemap:
-                for line in response.text.split('\n'):
-                    if 'sitemap:' in line.lower():
-                        # Извлекаем URL после Sitemap:
-                        sitemap_url = line.split(':', 1)[1].strip()
-                        print(f"  [OK] Найден в robots.txt: {sitemap_url}")
-                        
-                        # Проверяем, что sitemap действительно существует
-                        try:
-                            check_response = self.session.get(sitemap_url, timeout=TIMEOUT, verify=False)
-                            if check_response.status_code == 200 and 'xml' in check_response.text[:100].lower():
-                                return sitemap_url
-                        except:
-                            pass
-        except Exception as e:
-            print(f"  [WARN] Ошибка при проверке robots.txt: {e}")
-        
-        return None
+        found = discover_sitemap(base_url, session=self.session, timeout=TIMEOUT)
+        if found:
+            source = 'robots.txt' if found['source'] == 'robots' else 'стандартный путь'
+            print(f"  [OK] Найден ({source}, {found['type']}): {found['url']}")
+        return found
     
-    def check_standard_paths(self, base_url: str) -> Optional[str]:
-        """
-        Проверяет стандартные пути для sitemap
-        
-        Args:
-            base_url: Базовый URL сайта
-            
-        Returns:
-            URL sitemap или None
-        """
-        for path in SITEMAP_PATHS:
-            try:
-                sitemap_url = urljoin(base_url, path)
-                print(f"  Проверяем: {sitemap_url}")
-                
-                response = self.session.get(sitemap_url, timeout=TIMEOUT, verify=False)
-                if response.status_code == 200:
-                    # Проверяем, что это действительно XML
-                    if 'xml' in response.text[:100].lower() or '<urlset' in response.text[:500]:
-                        print(f"  [OK] Найден: {sitemap_url}")
-                        return sitemap_url
-            except Exception as e:
-                continue
-        
-        return None
-    
-    def process_filial(self, filial: dict) -> Tuple[int, str, Optional[str], str]:
+    def process_filial(self, filial: dict) -> Tuple[int, str, Optional[str], str, Optional[str]]:
         """
         Обрабатывает один филиал
         
@@ -122,7 +67,7 @@ class SitemapFinder:
             filial: Словарь с данными филиала
             
         Returns:
-            Кортеж (id, name, sitemap_url, status)
+            Кортеж (id, name, sitemap_url, status, sitemap_type)
         """
         filial_id = filial['id']
         name = filial['name']
@@ -132,7 +77,7 @@ class SitemapFinder:
         
         if not website:
             print(f"  [X] Нет сайта")
-            return (filial_id, name, None, "Нет сайта")
+            return (filial_id, name, None, "Нет сайта", None)
         
         # Добавляем протокол если нет
         if not website.startswith(('http://', 'https://')):
@@ -143,20 +88,14 @@ class SitemapFinder:
         # Если уже есть sitemap_url, пропускаем
         if filial.get('sitemap_url'):
             print(f"  [INFO] Уже есть sitemap: {filial['sitemap_url']}")
-            return (filial_id, name, filial['sitemap_url'], "Уже есть")
+            return (filial_id, name, filial['sitemap_url'], "Уже есть", None)
         
-        # 1. Сначала проверяем robots.txt
-        sitemap_url = self.find_sitemap_in_robots(website)
-        
-        # 2. Если не нашли, проверяем стандартные пути
-        if not sitemap_url:
-            sitemap_url = self.check_standard_paths(website)
-        
-        if sitemap_url:
-            return (filial_id, name, sitemap_url, "Найден")
+        found = self.find_sitemap(website)
+        if found:
+            return (filial_id, name, found['url'], "Найден", found['type'])
         else:
             print(f"  [X] Sitemap не найден")
-            return (filial_id, name, None, "Не найден")
+            return (filial_id, name, None, "Не найден", None)
     
     def get_filials_from_db(self) -> List[dict]:
         """
@@ -190,24 +129,18 @@ class SitemapFinder:
         
         return filials
     
-    def update_sitemap_in_db(self, filial_id: int, sitemap_url: str):
+    def update_sitemap_in_db(self, filial_id: int, sitemap_url: str, sitemap_type: str = None):
         """
-        Обновляет sitemap_url в БД
+        Обновляет sitemap_url и тип sitemap в БД
         
         Args:
             filial_id: ID филиала
             sitemap_url: URL sitemap
+            sitemap_type: Тип sitemap (index, urlset, news, turbo)
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute("""
-                    UPDATE filials
-                    SET sitemap_url = ?
-                    WHERE id = ?
-                """, (sitemap_url, filial_id))
-                conn.commit()
-                print(f"  [SAVED] Сохранено в БД")
+            VGTRKDatabase(self.db_path).save_sitemap_discovery(filial_id, sitemap_url, sitemap_type)
+            print(f"  [SAVED] Сохранено в БД")
         except Exception as e:
             print(f"  [ERROR] Ошибка при сохранении в БД: {e}")
     
@@ -241,13 +174,14 @@ class SitemapFinder:
             print(f"\n[{i}/{len(filials)}]", end="")
             
             try:
-                filial_id, name, sitemap_url, status = self.process_filial(filial)
+                filial_id, name, sitemap_url, status, sitemap_type = self.process_filial(filial)
                 
                 # Сохраняем результат
                 self.results.append({
                     'id': filial_id,
                     'name': name,
                     'sitemap_url': sitemap_url,
+                    'sitemap_type': sitemap_type,
                     'status': status
                 })
                 
@@ -255,7 +189,7 @@ class SitemapFinder:
                 if status == "Найден":
                     stats['found'] += 1
                     if auto_save:
-                        self.update_sitemap_in_db(filial_id, sitemap_url)
+                        self.update_sitemap_in_db(filial_id, sitemap_url, sitemap_type)
                 elif status == "Не найден":
                     stats['not_found'] += 1
                 elif status == "Нет сайта":
@@ -306,7 +240,7 @@ class SitemapFinder:
             saved_count = 0
             for result in self.results:
                 if result['status'] == "Найден":
-                    self.update_sitemap_in_db(result['id'], result['sitemap_url'])
+                    self.update_sitemap_in_db(result['id'], result['sitemap_url'], result['sitemap_type'])
                     saved_count += 1
             
             print(f"\n[OK] Сохранено {saved_count} записей в БД")
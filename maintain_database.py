@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Скрипт обслуживания базы данных мониторинга ВГТРК
+(пересчет агрегатов, миграции, сжатие и другие служебные операции)
+"""
+
+import sys
+import os
+import time
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.database import VGTRKDatabase
+
+
+def rebuild_stats(db_path: str):
+    """
+    Пересчет агрегатов статистики (results_daily_stats) по всей истории
+
+    Args:
+        db_path: Путь к базе данных
+    """
+    print(f"📊 Пересчет агрегатов статистики в {db_path}")
+
+    db = VGTRKDatabase(db_path)
+    start_time = time.time()
+    rows = db.rebuild_statistics()
+
+    print(f"   ✅ Готово: {rows} строк агрегатов за {time.time() - start_time:.2f} сек")
+
+
+def migrate_articles(db_path: str):
+    """
+    Перенос статей из JSON колонки monitoring_results.articles в таблицу result_articles
+
+    Args:
+        db_path: Путь к базе данных
+    """
+    print(f"📰 Перенос статей в result_articles в {db_path}")
+
+    db = VGTRKDatabase(db_path)
+    start_time = time.time()
+    migrated = db.migrate_articles_to_table()
+
+    print(f"   ✅ Готово: {migrated} результатов за {time.time() - start_time:.2f} сек")
+
+
+def compress(db_path: str):
+    """
+    Сжатие больших текстовых полей: обучение словаря, пересжатие записей и VACUUM
+
+    Args:
+        db_path: Путь к базе данных
+    """
+    print(f"🗜️  Сжатие результатов мониторинга в {db_path}")
+
+    db = VGTRKDatabase(db_path)
+    size_before = os.path.getsize(db_path)
+    start_time = time.time()
+
+    dict_id = db.train_compression_dictionary()
+    if dict_id:
+        print(f"   📖 Обучен словарь сжатия #{dict_id}")
+    else:
+        print("   ⚠️ Нет данных для обучения словаря, сжатие без словаря")
+
+    updated = db.recompress_results()
+    print(f"   🔄 Пересжато записей: {updated}")
+
+    # Освобождаем место в файле после перезаписи
+    with db.get_connection() as conn:
+        conn.execute('VACUUM')
+
+    size_after = os.path.getsize(db_path)
+    print(f"   💾 Размер: {size_before / (1024*1024):.2f} МБ → {size_after / (1024*1024):.2f} МБ")
+    print(f"   ✅ Готово за {time.time() - start_time:.2f} сек")
+
+
+def partition(db_path: str):
+    """
+    Перенос результатов завершенных месяцев в файлы партиций
+
+    Args:
+        db_path: Путь к базе данных
+    """
+    print(f"🗂️  Разбиение результатов по месяцам в {db_path}")
+
+    db = VGTRKDatabase(db_path)
+    start_time = time.time()
+    archived = db.archive_closed_months()
+
+    for month, count in archived.items():
+        print(f"   📁 {month}: {count} записей")
+
+    # Освобождаем место в основном файле
+    with db.get_connection() as conn:
+        conn.execute('VACUUM')
+
+    print(f"   📊 Партиций всего: {len(db.list_partitions())}")
+    print(f"   ✅ Готово за {time.time() - start_time:.2f} сек")
+
+
+def main():
+    """Основная функция"""
+    print("=" * 60)
+    print("🛠️  ОБСЛУЖИВАНИЕ БАЗЫ ДАННЫХ ВГТРК")
+    print("=" * 60)
+
+    if len(sys.argv) < 2:
+        print("Использование:")
+        print("  python maintain_database.py rebuild-stats [db_path]")
+        print("  python maintain_database.py migrate-articles [db_path]")
+        print("  python maintain_database.py compress [db_path]")
+        print("  python maintain_database.py partition [db_path]")
+        return
+
+    command = sys.argv[1]
+    db_path = sys.argv[2] if len(sys.argv) > 2 else "data/vgtrk_monitoring.db"
+
+    if command == "rebuild-stats":
+        rebuild_stats(db_path)
+
+    elif command == "migrate-articles":
+        migrate_articles(db_path)
+
+    elif command == "compress":
+        compress(db_path)
+
+    elif command == "partition":
+        partition(db_path)
+
+    else:
+        print(f"❌ Неизвестная команда: {command}")
+        print("Доступные команды: rebuild-stats, migrate-articles, compress, partition")
+
+
+if __name__ == "__main__":
+    main()
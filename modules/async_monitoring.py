@@ -3,9 +3,13 @@
 Обрабатывает множество филиалов параллельно для максимальной скорости
 """
 
+import os
 import asyncio
+import inspect
 import aiohttp
 import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import xml.etree.ElementTree as ET
@@ -16,25 +20,94 @@ import logging
 from contextlib import asynccontextmanager
 import json
 
+from modules.sitemap_discovery import discover_sitemap, needs_discovery
+from modules.concurrency import ConcurrencyController, MAX_GLOBAL_CONCURRENCY, MAX_HOST_CONCURRENCY
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Процессы разбора HTML по умолчанию (0 - разбор в event loop)
+DEFAULT_PARSE_WORKERS = min(4, os.cpu_count() or 1)
+
+
+def extract_article_info(content: str, keywords: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Разбор загруженной статьи: заголовок и фрагмент с первым найденным ключевым словом
+
+    Выполняется в пуле процессов разбора, поэтому функция модульного уровня.
+
+    Args:
+        content: HTML статьи
+        keywords: Ключевые слова
+
+    Returns:
+        Словарь title, keywords, snippet или None, если ключевых слов в статье нет
+    """
+    content_lower = content.lower()
+    found_keywords = [keyword for keyword in keywords if keyword.lower() in content_lower]
+    if not found_keywords:
+        return None
+
+    # Извлекаем заголовок
+    soup = BeautifulSoup(content, 'html.parser')
+    title = soup.find('title')
+    title_text = title.text if title else ''
+
+    # Извлекаем snippet
+    # Ищем первое вхождение ключевого слова
+    snippet = ''
+    for keyword in found_keywords:
+        pattern = re.compile(
+            f'.{{0,100}}{re.escape(keyword)}.{{0,100}}',
+            re.IGNORECASE | re.DOTALL
+        )
+        match = pattern.search(content_lower)
+        if match:
+            snippet = match.group(0)
+            break
+
+    return {
+        'title': title_text,
+        'keywords': found_keywords,
+        'snippet': snippet[:200] if snippet else ''
+    }
+
 
 class AsyncMonitoring:
     """Асинхронный мониторинг с переиспользованием соединений"""
     
-    def __init__(self, max_concurrent: int = 20, timeout: int = 30):
+    def __init__(self, max_concurrent: int = 20, timeout: int = 30,
+                 parse_workers: int = DEFAULT_PARSE_WORKERS, parse_queue_size: int = None,
+                 host_limits: Optional[Dict[str, float]] = None,
+                 host_timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+                 health=None):
         """
         Args:
-            max_concurrent: Максимальное количество одновременных соединений
+            max_concurrent: Начальный глобальный предел одновременных запросов
+                (дальше подстраивается по ответам, см. modules/concurrency.py)
             timeout: Таймаут для каждого запроса в секундах
+            parse_workers: Процессов разбора HTML (0 - разбор в event loop)
+            parse_queue_size: Максимум статей, ожидающих разбора (по умолчанию 4 на процесс)
+            host_limits: Выученные пределы по хостам из прошлых запусков (db.get_host_limits)
+            host_timeouts: Адаптивные таймауты {хост: (соединение, чтение)} (HostHealth.all_timeouts);
+                для остальных хостов действует timeout
+            health: HostHealth для поиска sitemap (недоступные сайты отклоняются сразу)
         """
         self.max_concurrent = max_concurrent
         self.timeout = aiohttp.ClientTimeout(total=timeout)
-        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.concurrency = ConcurrencyController(max_concurrent, host_limits)
+        self.host_timeouts = {
+            host: aiohttp.ClientTimeout(total=read, sock_connect=connect)
+            for host, (connect, read) in (host_timeouts or {}).items()
+        }
+        self.health = health
         self.session = None
         self.connector = None
+        self.parse_workers = parse_workers
+        # Ограниченная очередь разбора: пока она заполнена, новые статьи не загружаются
+        self.parse_slots = asyncio.Semaphore(parse_queue_size or max(1, parse_workers) * 4)
+        self._parse_executor = None
         
     @asynccontextmanager
     async def get_session(self):
@@ -42,8 +115,9 @@ class AsyncMonitoring:
         if self.session is None:
             # Создаём коннектор с пулом соединений
             self.connector = aiohttp.TCPConnector(
-                limit=100,  # Общий лимит соединений
-                limit_per_host=5,  # Лимит на хост (чтобы не забанили)
+                # Параллельность ограничивает self.concurrency, здесь - только верхние границы
+                limit=MAX_GLOBAL_CONCURRENCY,
+                limit_per_host=MAX_HOST_CONCURRENCY,
                 ttl_dns_cache=300,  # Кэш DNS на 5 минут
                 force_close=False,  # Переиспользуем соединения
                 enable_cleanup_closed=True
@@ -63,8 +137,20 @@ class AsyncMonitoring:
         finally:
             pass  # Не закрываем сессию здесь, будем переиспользовать
     
+    def request_timeout(self, url: str, default=None) -> aiohttp.ClientTimeout:
+        """Таймаут запроса: адаптивный для хоста или default (по умолчанию таймаут сессии)"""
+        timeout = self.host_timeouts.get(urlparse(url).netloc.lower())
+        if timeout:
+            return timeout
+        if isinstance(default, (int, float)):
+            return aiohttp.ClientTimeout(total=default)
+        return default or self.timeout
+
     async def close(self):
         """Закрытие сессии и освобождение ресурсов"""
+        if self._parse_executor:
+            self._parse_executor.shutdown(wait=True)
+            self._parse_executor = None
         if self.session:
             await self.session.close()
             self.session = None
@@ -74,49 +160,35 @@ class AsyncMonitoring:
     
     async def fetch_sitemap(self, url: str, sitemap_url: Optional[str] = None) -> Optional[str]:
         """Асинхронное получение sitemap"""
-        async with self.semaphore:  # Ограничиваем параллельность
-            try:
-                # Определяем URL sitemap
-                if sitemap_url:
-                    if sitemap_url.startswith('http'):
-                        full_sitemap_url = sitemap_url
-                    else:
-                        full_sitemap_url = urljoin(url, sitemap_url)
+        try:
+            # Определяем URL sitemap
+            if sitemap_url:
+                if sitemap_url.startswith('http'):
+                    full_sitemap_url = sitemap_url
                 else:
-                    # Пробуем стандартные пути
-                    base_url = url.rstrip('/')
-                    sitemap_paths = [
-                        '/sitemap.xml',
-                        '/sitemap_index.xml',
-                        '/sitemap2025.xml',
-                        '/sitemap2024.xml'
-                    ]
-                    
-                    async with self.get_session() as session:
-                        for path in sitemap_paths:
-                            try:
-                                test_url = base_url + path
-                                async with session.head(test_url, ssl=False) as response:
-                                    if response.status == 200:
-                                        full_sitemap_url = test_url
-                                        break
-                            except:
-                                continue
-                        else:
-                            return None
-                
-                # Загружаем sitemap
-                async with self.get_session() as session:
-                    async with session.get(full_sitemap_url, ssl=False) as response:
+                    full_sitemap_url = urljoin(url, sitemap_url)
+            else:
+                # robots.txt и стандартные пути - одновременно (modules/sitemap_discovery.py)
+                found = await asyncio.to_thread(discover_sitemap, url, health=self.health)
+                if not found:
+                    return None
+                full_sitemap_url = found['url']
+            
+            # Загружаем sitemap
+            async with self.get_session() as session:
+                async with self.concurrency.slot(full_sitemap_url) as slot:
+                    async with session.get(full_sitemap_url, ssl=False,
+                                           timeout=self.request_timeout(full_sitemap_url)) as response:
+                        slot.record_status(response.status)
                         if response.status == 200:
                             return await response.text()
-                        
-            except asyncio.TimeoutError:
-                logger.warning(f"Timeout при загрузке sitemap: {url}")
-            except Exception as e:
-                logger.error(f"Ошибка при загрузке sitemap {url}: {e}")
-            
-            return None
+                    
+        except asyncio.TimeoutError:
+            logger.warning(f"Timeout при загрузке sitemap: {url}")
+        except Exception as e:
+            logger.error(f"Ошибка при загрузке sitemap {url}: {e}")
+        
+        return None
     
     async def is_sitemap_index(self, content: str) -> bool:
         """Проверка, является ли файл sitemap_index"""
@@ -171,7 +243,10 @@ class AsyncMonitoring:
                 for sitemap_url in sitemap_urls[:10]:  # Ограничиваем количество для скорости
                     try:
                         logger.debug(f"Загружаем вложенный sitemap: {sitemap_url}")
-                        async with session.get(sitemap_url, ssl=False, timeout=10) as response:
+                        async with self.concurrency.slot(sitemap_url) as slot, \
+                                session.get(sitemap_url, ssl=False,
+                                            timeout=self.request_timeout(sitemap_url, 10)) as response:
+                            slot.record_status(response.status)
                             if response.status == 200:
                                 sub_content = await response.text()
                                 # Рекурсивно парсим вложенный sitemap (но без проверки на index)
@@ -263,59 +338,60 @@ class AsyncMonitoring:
     ) -> Optional[Dict[str, Any]]:
         """Асинхронная загрузка и проверка содержимого статьи"""
         
-        async with self.semaphore:
-            try:
+        try:
+            async with self.concurrency.slot(article_url) as slot:
                 async with self.get_session() as session:
                     # Используем allow_redirects для автоматической обработки 301
                     async with session.get(
                         article_url,
                         ssl=False,
                         allow_redirects=True,
-                        max_redirects=3
+                        max_redirects=3,
+                        timeout=self.request_timeout(article_url)
                     ) as response:
-                        if response.status == 200:
-                            content = await response.text()
-                            
-                            # Быстрая проверка наличия ключевых слов
-                            content_lower = content.lower()
-                            found_keywords = []
-                            
-                            for keyword in keywords:
-                                if keyword.lower() in content_lower:
-                                    found_keywords.append(keyword)
-                            
-                            if found_keywords:
-                                # Извлекаем заголовок
-                                soup = BeautifulSoup(content, 'html.parser')
-                                title = soup.find('title')
-                                title_text = title.text if title else ''
-                                
-                                # Извлекаем snippet
-                                # Ищем первое вхождение ключевого слова
-                                snippet = ''
-                                for keyword in found_keywords:
-                                    pattern = re.compile(
-                                        f'.{{0,100}}{re.escape(keyword)}.{{0,100}}',
-                                        re.IGNORECASE | re.DOTALL
-                                    )
-                                    match = pattern.search(content_lower)
-                                    if match:
-                                        snippet = match.group(0)
-                                        break
-                                
-                                return {
-                                    'url': str(response.url),  # Финальный URL после редиректов
-                                    'title': title_text,
-                                    'keywords': found_keywords,
-                                    'snippet': snippet[:200] if snippet else ''
-                                }
-                        
-            except asyncio.TimeoutError:
-                logger.debug(f"Timeout при загрузке статьи: {article_url}")
-            except Exception as e:
-                logger.debug(f"Ошибка при загрузке статьи {article_url}: {e}")
+                        slot.record_status(response.status)
+                        if response.status != 200:
+                            return None
+                        content = await response.text()
+                        final_url = str(response.url)  # Финальный URL после редиректов
+                
+                # Быстрая проверка наличия ключевых слов: страницы без них не отправляем на разбор
+                content_lower = content.lower()
+                if not any(keyword.lower() in content_lower for keyword in keywords):
+                    return None
+                
+                # Слот очереди разбора занимается до освобождения соединения:
+                # если разбор не успевает, новые загрузки ждут
+                await self.parse_slots.acquire()
+            
+            try:
+                info = await self._parse_article(content, keywords)
+            finally:
+                self.parse_slots.release()
             
-            return None
+            if info:
+                return {'url': final_url, **info}
+                    
+        except asyncio.TimeoutError:
+            logger.debug(f"Timeout при загрузке статьи: {article_url}")
+        except Exception as e:
+            logger.debug(f"Ошибка при загрузке статьи {article_url}: {e}")
+        
+        return None
+    
+    async def _parse_article(self, content: str, keywords: List[str]) -> Optional[Dict[str, Any]]:
+        """Разбор статьи в пуле процессов (или в event loop при parse_workers=0)"""
+        if self.parse_workers <= 0:
+            return extract_article_info(content, keywords)
+        
+        if self._parse_executor is None:
+            # spawn: процессы разбора не наследуют потоки и соединения родителя
+            self._parse_executor = ProcessPoolExecutor(
+                max_workers=self.parse_workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._parse_executor, extract_article_info, content, keywords)
     
     async def process_filial_async(
         self,
@@ -348,8 +424,20 @@ class AsyncMonitoring:
             if not website.startswith(('http://', 'https://')):
                 website = f'https://{website}'
             
-            # Получаем sitemap
+            # Получаем sitemap: сохраненный или найденный сейчас (результат поиска
+            # возвращается в sitemap_discovery и сохраняется в filials)
             sitemap_url = filial.get('sitemap_url')
+            if not sitemap_url:
+                # Сайт без sitemap недавно проверялся - повторно не ищем
+                found = None
+                if needs_discovery(filial):
+                    found = await asyncio.to_thread(discover_sitemap, website, health=self.health)
+                    result['sitemap_discovery'] = found or {}
+                if not found:
+                    result['status'] = 'error'
+                    result['error'] = 'Sitemap не найден'
+                    return result
+                sitemap_url = found['url']
             sitemap_content = await self.fetch_sitemap(website, sitemap_url)
             
             if not sitemap_content:
@@ -404,9 +492,18 @@ class AsyncMonitoring:
         keywords: List[str],
         days: int = 7,
         max_articles: int = 50,
-        progress_callback=None
+        progress_callback=None,
+        collect_results: bool = True
     ) -> List[Dict[str, Any]]:
-        """Обработка пакета филиалов параллельно"""
+        """
+        Обработка пакета филиалов параллельно
+        
+        Args:
+            progress_callback: Вызывается для каждого результата по мере готовности
+                (может быть корутиной - тогда ее результат ожидается)
+            collect_results: Вернуть список результатов. False - результаты передаются
+                только в progress_callback и не накапливаются в памяти
+        """
         
         results = []
         total = len(filials)
@@ -421,12 +518,15 @@ class AsyncMonitoring:
         # Обрабатываем результаты по мере готовности
         for future in asyncio.as_completed(tasks):
             result = await future
-            results.append(result)
+            if collect_results:
+                results.append(result)
             completed += 1
             
             # Вызываем callback для обновления прогресса
             if progress_callback:
-                progress_callback(completed, total, result)
+                callback_result = progress_callback(completed, total, result)
+                if inspect.isawaitable(callback_result):
+                    await callback_result
             
             logger.info(
                 f"Обработано {completed}/{total}: {result['filial_name']} "
@@ -0,0 +1,187 @@
+"""
+Модуль сжатия больших текстовых полей для хранения в SQLite
+
+Сжатое значение хранится как BLOB с заголовком:
+    MAGIC (3 байта) + кодек (1 байт) + ID словаря (2 байта) + данные
+Короткие строки и значения без заголовка остаются обычным TEXT,
+поэтому старые записи читаются без миграции.
+"""
+
+import zlib
+import struct
+from collections import Counter
+from typing import Dict, List, Optional, Tuple, Union
+
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    zstandard = None
+    HAS_ZSTD = False
+
+
+MAGIC = b'\x00VZ'
+HEADER_FORMAT = '>BH'
+HEADER_SIZE = len(MAGIC) + struct.calcsize(HEADER_FORMAT)
+
+CODEC_ZLIB = 1
+CODEC_ZSTD = 2
+CODEC_NAMES = {CODEC_ZLIB: 'zlib', CODEC_ZSTD: 'zstd'}
+
+# Строки короче порога не сжимаем - выигрыш меньше заголовка
+MIN_COMPRESS_SIZE = 256
+
+# Окно zlib - 32 КБ, словарь большего размера бесполезен
+ZLIB_DICT_SIZE = 32 * 1024
+
+
+def is_compressed(value) -> bool:
+    """Проверить, является ли значение сжатым BLOB"""
+    return isinstance(value, (bytes, memoryview)) and bytes(value[:len(MAGIC)]) == MAGIC
+
+
+def default_codec() -> int:
+    """Кодек по умолчанию: zstd, если установлен, иначе zlib"""
+    return CODEC_ZSTD if HAS_ZSTD else CODEC_ZLIB
+
+
+def train_dictionary(samples: List[str], codec: int = None, dict_size: int = None) -> bytes:
+    """
+    Обучить словарь сжатия на примерах данных
+
+    Для zstd используется штатное обучение, для zlib словарь собирается
+    из часто повторяющихся фрагментов (самые полезные - в конце словаря).
+
+    Args:
+        samples: Примеры строк (content, metrics и т.п.)
+        codec: Кодек (CODEC_ZLIB / CODEC_ZSTD)
+        dict_size: Размер словаря в байтах
+
+    Returns:
+        Содержимое словаря
+    """
+    codec = codec or default_codec()
+    encoded = [s.encode('utf-8') for s in samples if s]
+
+    if codec == CODEC_ZSTD:
+        if not HAS_ZSTD:
+            raise RuntimeError("Для кодека zstd требуется пакет zstandard")
+        trained = zstandard.train_dictionary(dict_size or 64 * 1024, encoded)
+        return trained.as_bytes()
+
+    dict_size = min(dict_size or ZLIB_DICT_SIZE, ZLIB_DICT_SIZE)
+
+    # Считаем повторяющиеся строки: шаблоны анализа, ключи JSON метрик и т.п.
+    fragments = Counter()
+    for sample in encoded:
+        for line in sample.splitlines():
+            if len(line) >= 8:
+                fragments[line] += 1
+
+    useful = [(count * len(line), line) for line, count in fragments.items() if count > 1]
+    useful.sort()
+
+    dictionary = b''
+    for _, line in reversed(useful):
+        if len(dictionary) + len(line) + 1 > dict_size:
+            continue
+        dictionary = line + b'\n' + dictionary
+
+    # Если повторов мало, берем хвосты примеров
+    if not dictionary:
+        dictionary = b'\n'.join(encoded)[-dict_size:]
+    return dictionary
+
+
+class TextCompressor:
+    """Сжатие и распаковка текстовых полей с поддержкой словарей"""
+
+    def __init__(self, dictionaries: Dict[int, Tuple[int, bytes]] = None,
+                 active_dict_id: int = 0, codec: int = None, level: int = 6):
+        """
+        Args:
+            dictionaries: {ID словаря: (кодек, данные словаря)}
+            active_dict_id: ID словаря для новых записей (0 - без словаря)
+            codec: Кодек для записей без словаря
+            level: Уровень сжатия
+        """
+        self.dictionaries = dictionaries or {}
+        self.active_dict_id = active_dict_id if active_dict_id in self.dictionaries else 0
+        self.level = level
+        if self.active_dict_id:
+            self.codec = self.dictionaries[self.active_dict_id][0]
+        else:
+            self.codec = codec or default_codec()
+        self._zstd_dicts = {}
+
+    def _zstd_dict(self, dict_id: int):
+        """Объект словаря zstd (кэшируется)"""
+        if dict_id not in self._zstd_dicts:
+            self._zstd_dicts[dict_id] = zstandard.ZstdCompressionDict(self.dictionaries[dict_id][1])
+        return self._zstd_dicts[dict_id]
+
+    def compress(self, text: Optional[str]) -> Optional[Union[str, bytes]]:
+        """
+        Сжать строку, если она достаточно длинная
+
+        Args:
+            text: Исходная строка
+
+        Returns:
+            BLOB со сжатыми данными или исходная строка
+        """
+        if not text or len(text) < MIN_COMPRESS_SIZE:
+            return text
+
+        data = text.encode('utf-8')
+        dict_id = self.active_dict_id
+
+        if self.codec == CODEC_ZSTD:
+            params = {'level': self.level}
+            if dict_id:
+                params['dict_data'] = self._zstd_dict(dict_id)
+            payload = zstandard.ZstdCompressor(**params).compress(data)
+        else:
+            if dict_id:
+                compressor = zlib.compressobj(self.level, zdict=self.dictionaries[dict_id][1])
+            else:
+                compressor = zlib.compressobj(self.level)
+            payload = compressor.compress(data) + compressor.flush()
+
+        if len(payload) + HEADER_SIZE >= len(data):
+            return text
+        return MAGIC + struct.pack(HEADER_FORMAT, self.codec, dict_id) + payload
+
+    def decompress(self, value) -> Optional[str]:
+        """
+        Распаковать значение из БД (обычный TEXT возвращается как есть)
+
+        Args:
+            value: Значение колонки
+
+        Returns:
+            Исходная строка
+        """
+        if not is_compressed(value):
+            return value
+
+        value = bytes(value)
+        codec, dict_id = struct.unpack(HEADER_FORMAT, value[len(MAGIC):HEADER_SIZE])
+        payload = value[HEADER_SIZE:]
+
+        if dict_id and dict_id not in self.dictionaries:
+            raise ValueError(f"Словарь сжатия #{dict_id} не найден")
+
+        if codec == CODEC_ZSTD:
+            if not HAS_ZSTD:
+                raise RuntimeError("Для чтения данных zstd требуется пакет zstandard")
+            params = {'dict_data': self._zstd_dict(dict_id)} if dict_id else {}
+            data = zstandard.ZstdDecompressor(**params).decompress(payload)
+        else:
+            if dict_id:
+                decompressor = zlib.decompressobj(zdict=self.dictionaries[dict_id][1])
+            else:
+                decompressor = zlib.decompressobj()
+            data = decompressor.decompress(payload) + decompressor.flush()
+
+        return data.decode('utf-8')
@@ -0,0 +1,183 @@
+"""
+Адаптивное ограничение параллельности запросов (AIMD)
+
+Вместо фиксированных max_concurrent и limit_per_host предел подбирается
+по ответам серверов: быстрые успешные ответы увеличивают его на единицу
+за "окно" (аддитивно), таймауты, 429 и 5xx уменьшают вдвое (мультипликативно).
+Пределы по хостам сохраняются в БД (таблица host_limits) и используются
+как начальные при следующем запуске.
+
+Глобальный предел реагирует только на таймауты и ошибки соединения
+(перегрузка собственной сети), а 429/5xx снижают предел только своего хоста.
+
+Время успешных ответов запоминается по хостам (export, ключ latencies):
+по нему вычисляются адаптивные таймауты (modules/host_health.py).
+"""
+
+import time
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from modules.host_health import LATENCY_SAMPLES
+
+
+# Границы предела одного хоста
+MIN_HOST_CONCURRENCY = 1
+MAX_HOST_CONCURRENCY = 10
+DEFAULT_HOST_CONCURRENCY = 2
+
+# Верхняя граница глобального предела
+MAX_GLOBAL_CONCURRENCY = 100
+
+# Ответ медленнее этого не увеличивает предел
+SLOW_RESPONSE_SECONDS = 5.0
+
+# Повторное снижение не раньше чем через это время (один всплеск ошибок - одно снижение)
+DECREASE_COOLDOWN_SECONDS = 1.0
+
+
+class AdaptiveLimiter:
+    """Семафор с пределом, меняющимся по правилу AIMD"""
+
+    def __init__(self, initial: float, min_limit: float = MIN_HOST_CONCURRENCY,
+                 max_limit: float = MAX_HOST_CONCURRENCY):
+        """
+        Args:
+            initial: Начальный предел
+            min_limit: Нижняя граница предела
+            max_limit: Верхняя граница предела
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial, min_limit), max_limit))
+        self.in_flight = 0
+        self.successes = 0
+        self.failures = 0
+        self.latencies = []
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        """Дождаться свободного места в пределах текущего предела"""
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def release(self, success: Optional[bool], latency: float):
+        """
+        Освободить место и скорректировать предел
+
+        Args:
+            success: True - быстрый успех, False - перегрузка, None - без изменения
+            latency: Время запроса, секунд
+        """
+        async with self._condition:
+            self.in_flight -= 1
+            if success is True:
+                self.successes += 1
+                self.latencies = (self.latencies + [round(latency, 3)])[-LATENCY_SAMPLES:]
+                if latency <= SLOW_RESPONSE_SECONDS:
+                    # +1 за "окно" из limit успешных запросов
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            elif success is False:
+                self.failures += 1
+                now = time.monotonic()
+                if now - self._last_decrease >= DECREASE_COOLDOWN_SECONDS:
+                    self.limit = max(self.min_limit, self.limit / 2)
+                    self._last_decrease = now
+            self._condition.notify_all()
+
+
+class RequestSlot:
+    """Итог запроса внутри ConcurrencyController.slot"""
+
+    def __init__(self):
+        self.host_success: Optional[bool] = True
+        self.global_success: Optional[bool] = True
+
+    def record_status(self, status: int):
+        """Учесть HTTP-статус ответа"""
+        if status == 429 or status >= 500:
+            # Сервер перегружен: снижаем предел хоста, глобальный не трогаем
+            self.host_success, self.global_success = False, None
+        elif status >= 400:
+            self.host_success = self.global_success = None
+
+    def record_timeout(self):
+        """Таймаут или ошибка соединения"""
+        self.host_success = self.global_success = False
+
+
+class ConcurrencyController:
+    """Глобальный и похостовые адаптивные пределы параллельных запросов"""
+
+    def __init__(self, global_limit: int = 20, host_limits: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            global_limit: Начальный глобальный предел
+            host_limits: Выученные пределы по хостам {хост: предел} (db.get_host_limits)
+        """
+        self.global_limiter = AdaptiveLimiter(
+            global_limit, min_limit=min(4, global_limit), max_limit=MAX_GLOBAL_CONCURRENCY)
+        self.initial_host_limits = dict(host_limits or {})
+        self.hosts: Dict[str, AdaptiveLimiter] = {}
+
+    def host_limiter(self, host: str) -> AdaptiveLimiter:
+        """Предел хоста (создается с выученным или начальным значением)"""
+        if host not in self.hosts:
+            self.hosts[host] = AdaptiveLimiter(
+                self.initial_host_limits.get(host, DEFAULT_HOST_CONCURRENCY))
+        return self.hosts[host]
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """
+        Место для одного запроса к url
+
+        Внутри блока вызывается slot.record_status(response.status); таймауты
+        и ошибки соединения учитываются автоматически.
+        """
+        host_limiter = self.host_limiter(urlparse(url).netloc.lower())
+        await self.global_limiter.acquire()
+        try:
+            await host_limiter.acquire()
+        except BaseException:
+            await self.global_limiter.release(None, 0)
+            raise
+
+        slot = RequestSlot()
+        started = time.monotonic()
+        try:
+            yield slot
+        except (asyncio.TimeoutError, aiohttp.ClientConnectionError):
+            slot.record_timeout()
+            raise
+        except BaseException:
+            slot.host_success = slot.global_success = None
+            raise
+        finally:
+            latency = time.monotonic() - started
+            await host_limiter.release(slot.host_success, latency)
+            await self.global_limiter.release(slot.global_success, latency)
+
+    def export(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Выученные пределы хостов для сохранения (db.save_host_limits)
+
+        Returns:
+            {хост: {'concurrency', 'successes', 'failures', 'latencies'}}
+        """
+        return {
+            host: {
+                'concurrency': round(limiter.limit, 2),
+                'successes': limiter.successes,
+                'failures': limiter.failures,
+                'latencies': limiter.latencies
+            }
+            for host, limiter in self.hosts.items()
+            if limiter.successes or limiter.failures
+        }
@@ -7,13 +7,23 @@ import pandas as pd
 from pathlib import Path
 from typing import List, Dict, Optional, Any
 from contextlib import contextmanager
-from datetime import datetime
+from datetime import datetime, timedelta
+import calendar
 import json
+import time
+
+from modules.compression import TextCompressor, train_dictionary, default_codec, CODEC_NAMES
 
 
 class VGTRKDatabase:
     """Класс для работы с базой данных филиалов ВГТРК и результатов мониторинга"""
     
+    # Колонки monitoring_results, которые хранятся в сжатом виде
+    COMPRESSED_COLUMNS = ('content', 'gigachat_analysis', 'metrics')
+    
+    # Сколько секунд ждать снятия блокировки записи другим процессом
+    BUSY_TIMEOUT = 30
+    
     def __init__(self, db_path: str = "data/vgtrk_monitoring.db"):
         """
         Инициализация подключения к базе данных
@@ -23,18 +33,75 @@ class VGTRKDatabase:
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._compressor = None  # Загружается лазильно вместе со словарями сжатия
         self.init_database()
     
     @contextmanager
     def get_connection(self):
         """Контекстный менеджер для безопасной работы с соединением БД"""
-        conn = sqlite3.connect(str(self.db_path))
+        # Ожидание блокировки: в БД параллельно пишут воркеры очереди мониторинга
+        conn = sqlite3.connect(str(self.db_path), timeout=self.BUSY_TIMEOUT)
         conn.row_factory = sqlite3.Row  # Для удобного доступа к полям как к словарю
         try:
             yield conn
         finally:
             conn.close()
     
+    @property
+    def partitions_dir(self) -> Path:
+        """Каталог с месячными партициями результатов"""
+        return self.db_path.parent / "partitions"
+    
+    def partition_path(self, month: str) -> Path:
+        """Путь к файлу партиции за месяц (month в формате YYYY-MM)"""
+        return self.partitions_dir / f"{self.db_path.stem}_{month.replace('-', '_')}.db"
+    
+    def list_partitions(self) -> List[str]:
+        """
+        Получить список месяцев, вынесенных в отдельные файлы партиций
+        
+        Returns:
+            Месяцы в формате YYYY-MM (от новых к старым)
+        """
+        prefix = f"{self.db_path.stem}_"
+        months = []
+        for path in self.partitions_dir.glob(f"{prefix}*.db"):
+            month = path.stem[len(prefix):].replace('_', '-')
+            if len(month) == 7:
+                months.append(month)
+        return sorted(months, reverse=True)
+    
+    def _result_sources(self, conn: sqlite3.Connection,
+                        date_from: str = None, date_to: str = None):
+        """
+        Перебрать схемы с результатами: основную БД и нужные партиции
+        
+        Партиции, не пересекающиеся с периодом [date_from, date_to],
+        не подключаются. Каждая партиция подключается как 'part' на время итерации.
+        
+        Yields:
+            Имя схемы ('main' или 'part')
+        """
+        yield 'main'
+        
+        for month in self.list_partitions():
+            if date_to and f"{month}-01" > date_to:
+                continue
+            if date_from and month < date_from[:7]:
+                continue
+            
+            conn.execute('ATTACH DATABASE ? AS part', (str(self.partition_path(month)),))
+            try:
+                yield 'part'
+            finally:
+                conn.execute('DETACH DATABASE part')
+    
+    @staticmethod
+    def _table_columns(conn: sqlite3.Connection, table: str, schema: str = 'main') -> List[str]:
+        """Список колонок таблицы в указанной схеме"""
+        cursor = conn.execute(f"PRAGMA {schema}.table_info({table})")
+        return [col[1] for col in cursor.fetchall()]
+    
     def init_database(self):
         """Инициализация структуры базы данных"""
         with self.get_connection() as conn:
@@ -70,9 +137,46 @@ class VGTRKDatabase:
                     started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     completed_at TIMESTAMP,
                     duration_seconds INTEGER,
-                    error_message TEXT
+                    error_message TEXT,
+                    params TEXT,
+                    filials_total INTEGER,
+                    filials_done INTEGER DEFAULT 0
+                )
+            ''')
+            
+            # Результат поиска sitemap (modules/sitemap_discovery.py): тип и время проверки
+            filial_columns = self._table_columns(conn, 'filials')
+            # и RSS-ленты (SiteParser.parse_rss_feed): адрес, валидаторы условного GET, время проверки,
+            # и полнотекстовой ленты (modules/fulltext_feed.py): адрес, тип, время проверки
+            for column in ('sitemap_type', 'sitemap_checked_at',
+                           'rss_url', 'rss_etag', 'rss_last_modified', 'rss_checked_at',
+                           'feed_url', 'feed_type', 'feed_checked_at'):
+                if column not in filial_columns:
+                    conn.execute(f'ALTER TABLE filials ADD COLUMN {column} TEXT')
+            
+            # Колонки прогресса и параметров запуска для БД, созданных до их появления
+            session_columns = self._table_columns(conn, 'monitoring_sessions')
+            for column, definition in (('params', 'TEXT'), ('filials_total', 'INTEGER'),
+                                       ('filials_done', 'INTEGER DEFAULT 0')):
+                if column not in session_columns:
+                    conn.execute(f'ALTER TABLE monitoring_sessions ADD COLUMN {column} {definition}')
+            
+            # Контрольные точки сессий: какие филиалы уже обработаны (для продолжения)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS session_checkpoints (
+                    session_id INTEGER NOT NULL,
+                    filial_id INTEGER NOT NULL,
+                    status TEXT NOT NULL,
+                    results_count INTEGER DEFAULT 0,
+                    processing_time REAL,
+                    completed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (session_id, filial_id),
+                    FOREIGN KEY (session_id) REFERENCES monitoring_sessions(id)
                 )
             ''')
+            # Время обработки филиала - основа шардирования по стоимости (modules/sharding.py)
+            if 'processing_time' not in self._table_columns(conn, 'session_checkpoints'):
+                conn.execute('ALTER TABLE session_checkpoints ADD COLUMN processing_time REAL')
             
             # Таблица поисковых запросов/тем для мониторинга
             conn.execute('''
@@ -120,7 +224,138 @@ class VGTRKDatabase:
                 )
             ''')
             
+            # Агрегаты для вкладки статистики: день × филиал × запрос × статус.
+            # Обновляются в той же транзакции, что и вставка результата,
+            # поэтому get_statistics не сканирует monitoring_results
+            cursor = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='results_daily_stats'"
+            )
+            daily_stats_exists = cursor.fetchone() is not None
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS results_daily_stats (
+                    stat_date DATE NOT NULL,
+                    filial_id INTEGER NOT NULL,
+                    search_query_id INTEGER NOT NULL DEFAULT 0,
+                    status TEXT NOT NULL DEFAULT '',
+                    results_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (stat_date, filial_id, search_query_id, status)
+                )
+            ''')
+            
+            # Последний результат по каждой паре (филиал, запрос) - "текущее состояние".
+            # search_query_id = 0 для результатов уровня филиала (ошибка загрузки и т.п.)
+            cursor = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type='table' AND name='latest_results'"
+            )
+            latest_results_exists = cursor.fetchone() is not None
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS latest_results (
+                    filial_id INTEGER NOT NULL,
+                    search_query_id INTEGER NOT NULL DEFAULT 0,
+                    result_id INTEGER NOT NULL,
+                    session_id INTEGER,
+                    status TEXT,
+                    parsing_date TIMESTAMP,
+                    PRIMARY KEY (filial_id, search_query_id)
+                )
+            ''')
+            
+            # Найденные статьи - отдельная таблица вместо JSON в monitoring_results.articles
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS result_articles (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    result_id INTEGER NOT NULL,
+                    position INTEGER NOT NULL DEFAULT 0,
+                    url TEXT,
+                    title TEXT,
+                    article_date DATE,
+                    snippet TEXT,
+                    keywords TEXT,
+                    FOREIGN KEY (result_id) REFERENCES monitoring_results(id)
+                )
+            ''')
+            
+            # Словари сжатия больших текстовых полей (см. modules/compression.py)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS compression_dicts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    codec TEXT NOT NULL,
+                    dict_data BLOB NOT NULL,
+                    samples_count INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Очередь заданий мониторинга: задание - сессия, задачи - филиалы задания.
+            # Воркер арендует задачу до lease_expires_at (unix time) и продлевает аренду;
+            # задачи с истекшей арендой (упавший воркер) выдаются повторно.
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS monitoring_jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id INTEGER,
+                    params TEXT NOT NULL,
+                    status TEXT CHECK(status IN ('queued', 'running', 'completed', 'cancelled')) DEFAULT 'queued',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP,
+                    FOREIGN KEY (session_id) REFERENCES monitoring_sessions(id)
+                )
+            ''')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS monitoring_tasks (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    job_id INTEGER NOT NULL,
+                    filial_id INTEGER NOT NULL,
+                    status TEXT CHECK(status IN ('pending', 'leased', 'success', 'no_data', 'error', 'cancelled')) DEFAULT 'pending',
+                    worker_id TEXT,
+                    lease_expires_at REAL,
+                    heartbeat_at REAL,
+                    attempts INTEGER DEFAULT 0,
+                    last_error TEXT,
+                    finished_at TIMESTAMP,
+                    UNIQUE (job_id, filial_id),
+                    FOREIGN KEY (job_id) REFERENCES monitoring_jobs(id),
+                    FOREIGN KEY (filial_id) REFERENCES filials(id)
+                )
+            ''')
+            
+            # Выученные пределы параллельных запросов к хостам (modules/concurrency.py)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS host_limits (
+                    host TEXT PRIMARY KEY,
+                    concurrency REAL NOT NULL,
+                    successes INTEGER DEFAULT 0,
+                    failures INTEGER DEFAULT 0,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Доступность сайтов и состояние выключателя по хостам (modules/host_health.py)
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS host_health (
+                    host TEXT PRIMARY KEY,
+                    state TEXT CHECK(state IN ('closed', 'open')) DEFAULT 'closed',
+                    error_streak INTEGER DEFAULT 0,
+                    failures INTEGER DEFAULT 0,
+                    avg_latency REAL,
+                    last_error TEXT,
+                    last_success_at REAL,
+                    last_failure_at REAL,
+                    open_until REAL,
+                    open_seconds REAL,
+                    latency_samples TEXT
+                )
+            ''')
+            # Последние замеры времени ответа (JSON) - основа адаптивных таймаутов
+            if 'latency_samples' not in self._table_columns(conn, 'host_health'):
+                conn.execute('ALTER TABLE host_health ADD COLUMN latency_samples TEXT')
+            
             # Создаем индексы для ускорения поиска
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_claim ON monitoring_tasks(status, lease_expires_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_tasks_job ON monitoring_tasks(job_id, status)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_result ON result_articles(result_id, position)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_url ON result_articles(url)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_articles_date ON result_articles(article_date)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_filials_district ON filials(federal_district)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_filials_active ON filials(is_active)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_results_date ON monitoring_results(parsing_date)')
@@ -128,6 +363,163 @@ class VGTRKDatabase:
             conn.execute('CREATE INDEX IF NOT EXISTS idx_results_status ON monitoring_results(status)')
             
             conn.commit()
+            
+            # Для существующей БД заполняем агрегаты по уже накопленной истории
+            if not daily_stats_exists:
+                self._rebuild_daily_stats(conn)
+                conn.commit()
+            if not latest_results_exists:
+                self._rebuild_latest_results(conn)
+                conn.commit()
+    
+    def _rebuild_daily_stats(self, conn: sqlite3.Connection) -> int:
+        """
+        Пересчитать results_daily_stats по monitoring_results и партициям (без commit)
+        
+        Вызывается вне открытой транзакции: партиции подключаются (ATTACH внутри
+        транзакции невозможен) и агрегируются до ее начала. Очистка и заполнение
+        таблицы идут одной транзакцией, ее фиксирует вызывающий; при сбое она
+        откатывается, и статистика не остается частично пересчитанной.
+        """
+        aggregate = '''
+            SELECT DATE(parsing_date), filial_id, COALESCE(search_query_id, 0),
+                   COALESCE(status, ''), COUNT(*)
+            FROM {schema}.monitoring_results
+            GROUP BY DATE(parsing_date), filial_id, COALESCE(search_query_id, 0), COALESCE(status, '')
+        '''
+        
+        # История из месячных партиций
+        partition_rows = []
+        for schema in self._result_sources(conn):
+            if schema != 'main':
+                partition_rows.extend(conn.execute(aggregate.format(schema=schema)).fetchall())
+        
+        try:
+            conn.execute('DELETE FROM results_daily_stats')
+            conn.execute(f'''
+                INSERT INTO results_daily_stats
+                (stat_date, filial_id, search_query_id, status, results_count)
+                {aggregate.format(schema='main')}
+            ''')
+            conn.executemany('''
+                INSERT INTO results_daily_stats
+                (stat_date, filial_id, search_query_id, status, results_count)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(stat_date, filial_id, search_query_id, status) DO UPDATE SET
+                    results_count = results_count + excluded.results_count
+            ''', partition_rows)
+        except Exception:
+            conn.rollback()
+            raise
+        
+        return conn.execute('SELECT COUNT(*) FROM results_daily_stats').fetchone()[0]
+    
+    def _bump_daily_stats(self, conn: sqlite3.Connection, result_id: int):
+        """Учесть только что вставленный результат в results_daily_stats (без commit)"""
+        conn.execute('''
+            INSERT INTO results_daily_stats
+            (stat_date, filial_id, search_query_id, status, results_count)
+            SELECT DATE(parsing_date), filial_id, COALESCE(search_query_id, 0),
+                   COALESCE(status, ''), 1
+            FROM monitoring_results
+            WHERE id = ?
+            ON CONFLICT(stat_date, filial_id, search_query_id, status)
+            DO UPDATE SET results_count = results_count + 1
+        ''', (result_id,))
+    
+    def _rebuild_latest_results(self, conn: sqlite3.Connection) -> int:
+        """Пересчитать latest_results по monitoring_results (без commit)"""
+        cursor = conn.execute("PRAGMA table_info(monitoring_results)")
+        columns = [col[1] for col in cursor.fetchall()]
+        session_column = 'mr.session_id' if 'session_id' in columns else 'NULL'
+        
+        conn.execute('DELETE FROM latest_results')
+        cursor = conn.execute(f'''
+            INSERT INTO latest_results
+            (filial_id, search_query_id, result_id, session_id, status, parsing_date)
+            SELECT mr.filial_id, COALESCE(mr.search_query_id, 0), mr.id,
+                   {session_column}, mr.status, mr.parsing_date
+            FROM monitoring_results mr
+            WHERE mr.id IN (
+                SELECT MAX(id) FROM monitoring_results
+                GROUP BY filial_id, COALESCE(search_query_id, 0)
+            )
+        ''')
+        rows = cursor.rowcount
+        
+        # Ошибка уровня филиала устаревает, если позже были результаты по запросам
+        conn.execute('''
+            DELETE FROM latest_results
+            WHERE search_query_id = 0
+              AND result_id < (SELECT MAX(lr.result_id) FROM latest_results lr
+                               WHERE lr.filial_id = latest_results.filial_id
+                                 AND lr.search_query_id != 0)
+        ''')
+        return rows
+    
+    def _upsert_latest_result(self, conn: sqlite3.Connection, result_id: int):
+        """Обновить latest_results только что вставленным результатом (без commit)"""
+        conn.execute('''
+            INSERT INTO latest_results
+            (filial_id, search_query_id, result_id, session_id, status, parsing_date)
+            SELECT filial_id, COALESCE(search_query_id, 0), id, session_id, status, parsing_date
+            FROM monitoring_results
+            WHERE id = ?
+            ON CONFLICT(filial_id, search_query_id) DO UPDATE SET
+                result_id = excluded.result_id,
+                session_id = excluded.session_id,
+                status = excluded.status,
+                parsing_date = excluded.parsing_date
+        ''', (result_id,))
+        
+        # Новый результат по запросу заменяет старую ошибку уровня филиала
+        conn.execute('''
+            DELETE FROM latest_results
+            WHERE search_query_id = 0
+              AND filial_id = (SELECT filial_id FROM monitoring_results
+                               WHERE id = ? AND search_query_id IS NOT NULL)
+        ''', (result_id,))
+    
+    def _get_compressor(self, conn: sqlite3.Connection, reload: bool = False) -> TextCompressor:
+        """Компрессор со всеми словарями из compression_dicts (последний - активный)"""
+        if self._compressor is None or reload:
+            codec_ids = {name: codec for codec, name in CODEC_NAMES.items()}
+            dictionaries = {
+                row['id']: (codec_ids[row['codec']], row['dict_data'])
+                for row in conn.execute('SELECT id, codec, dict_data FROM compression_dicts')
+                if row['codec'] in codec_ids
+            }
+            self._compressor = TextCompressor(dictionaries, max(dictionaries, default=0))
+        return self._compressor
+    
+    def _compressed_columns(self, conn: sqlite3.Connection) -> tuple:
+        """Сжимаемые колонки, которые уже есть в monitoring_results (metrics добавляется лениво)"""
+        cursor = conn.execute("PRAGMA table_info(monitoring_results)")
+        columns = [col[1] for col in cursor.fetchall()]
+        return tuple(column for column in self.COMPRESSED_COLUMNS if column in columns)
+    
+    def _decompress(self, conn: sqlite3.Connection, value):
+        """Распаковать значение колонки (словарь мог быть добавлен другим процессом)"""
+        try:
+            return self._get_compressor(conn).decompress(value)
+        except ValueError:
+            return self._get_compressor(conn, reload=True).decompress(value)
+    
+    def rebuild_statistics(self) -> int:
+        """
+        Полностью пересчитать агрегаты статистики по таблице результатов
+        
+        Returns:
+            Количество строк в results_daily_stats
+        """
+        with self.get_connection() as conn:
+            rows = self._rebuild_daily_stats(conn)
+            conn.commit()
+        
+        self.add_log(None, 'rebuild_statistics', 'success',
+                    f'Агрегаты статистики пересчитаны: {rows} строк')
+        
+        return rows
     
     def import_filials_from_csv(self, csv_path: str, clear_existing: bool = False) -> int:
         """
@@ -235,6 +627,66 @@ class VGTRKDatabase:
             row = cursor.fetchone()
             return dict(row) if row else None
     
+    def save_sitemap_discovery(self, filial_id: int, sitemap_url: Optional[str],
+                               sitemap_type: Optional[str] = None):
+        """
+        Сохранить результат поиска sitemap филиала (modules/sitemap_discovery.py)
+        
+        Args:
+            filial_id: ID филиала
+            sitemap_url: Найденный sitemap или None (сохраненный URL не стирается)
+            sitemap_type: Тип sitemap (index, urlset, news, turbo)
+        """
+        checked_at = datetime.now().isoformat(sep=' ', timespec='seconds')
+        with self.get_connection() as conn:
+            if sitemap_url:
+                conn.execute('''
+                    UPDATE filials SET sitemap_url = ?, sitemap_type = ?, sitemap_checked_at = ?,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ?
+                ''', (sitemap_url, sitemap_type, checked_at, filial_id))
+            else:
+                conn.execute('UPDATE filials SET sitemap_checked_at = ? WHERE id = ?',
+                             (checked_at, filial_id))
+            conn.commit()
+    
+    def save_rss_state(self, filial_id: int, rss_url: Optional[str], etag: Optional[str] = None,
+                       last_modified: Optional[str] = None):
+        """
+        Сохранить RSS-ленту филиала и валидаторы для условного GET
+        
+        Args:
+            filial_id: ID филиала
+            rss_url: Адрес ленты или None (лента не найдена - сохраняется только время проверки)
+            etag: Заголовок ETag последнего ответа
+            last_modified: Заголовок Last-Modified последнего ответа
+        """
+        checked_at = datetime.now().isoformat(sep=' ', timespec='seconds')
+        with self.get_connection() as conn:
+            conn.execute('''
+                UPDATE filials SET rss_url = ?, rss_etag = ?, rss_last_modified = ?, rss_checked_at = ?
+                WHERE id = ?
+            ''', (rss_url, etag if rss_url else None, last_modified if rss_url else None,
+                  checked_at, filial_id))
+            conn.commit()
+    
+    def save_feed_discovery(self, filial_id: int, feed_url: Optional[str], feed_type: Optional[str] = None):
+        """
+        Сохранить результат поиска полнотекстовой ленты филиала (modules/fulltext_feed.py)
+    
+        Args:
+            filial_id: ID филиала
+            feed_url: Лента с полным текстом или None (лента не найдена - сохраняется только время проверки)
+            feed_type: Тип ленты (turbo, yandex, content)
+        """
+        checked_at = datetime.now().isoformat(sep=' ', timespec='seconds')
+        with self.get_connection() as conn:
+            conn.execute('''
+                UPDATE filials SET feed_url = ?, feed_type = ?, feed_checked_at = ?
+                WHERE id = ?
+            ''', (feed_url, feed_type if feed_url else None, checked_at, filial_id))
+            conn.commit()
+    
     def update_filial(self, filial_id: int, **kwargs) -> bool:
         """
         Обновить данные филиала
@@ -258,6 +710,12 @@ class VGTRKDatabase:
         with self.get_connection() as conn:
             set_clause = ', '.join([f'{k} = ?' for k in fields_to_update.keys()])
             set_clause += ', updated_at = CURRENT_TIMESTAMP'
+            if 'sitemap_url' in fields_to_update or 'website' in fields_to_update:
+                # Сохраненный результат поиска sitemap больше не актуален
+                set_clause += ', sitemap_type = NULL, sitemap_checked_at = NULL'
+            if 'website' in fields_to_update:
+                set_clause += ', rss_url = NULL, rss_etag = NULL, rss_last_modified = NULL, rss_checked_at = NULL'
+                set_clause += ', feed_url = NULL, feed_type = NULL, feed_checked_at = NULL'
             values = list(fields_to_update.values()) + [filial_id]
             
             conn.execute(f'UPDATE filials SET {set_clause} WHERE id = ?', values)
@@ -341,39 +799,316 @@ class VGTRKDatabase:
             if 'session_id' not in columns:
                 conn.execute('ALTER TABLE monitoring_results ADD COLUMN session_id INTEGER REFERENCES monitoring_sessions(id)')
             
-            # Сериализуем сложные данные в JSON
+            # Сериализуем метрики в JSON, статьи сохраняются в result_articles
             metrics_json = json.dumps(result.get('metrics', {})) if result.get('metrics') else None
-            articles_json = json.dumps(result.get('articles', []), ensure_ascii=False) if result.get('articles') else None
+            compressor = self._get_compressor(conn)
             
             cursor = conn.execute('''
                 INSERT INTO monitoring_results
                 (filial_id, search_query_id, url, page_title, content,
                  gigachat_analysis, relevance_score, status, error_message,
-                 search_mode, metrics, articles, session_id)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                 search_mode, metrics, session_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 filial_id,
                 result.get('search_query_id'),
                 result.get('url'),
                 result.get('page_title'),
-                result.get('content', '')[:5000] if result.get('content') else None,  # Ограничиваем размер
-                result.get('gigachat_analysis'),
+                compressor.compress(result['content'][:5000]) if result.get('content') else None,  # Ограничиваем размер
+                compressor.compress(result.get('gigachat_analysis')),
                 result.get('relevance_score'),
                 result.get('status', 'success'),
                 result.get('error_message'),
                 result.get('search_mode'),
-                metrics_json,
-                articles_json,
+                compressor.compress(metrics_json),
                 session_id
             ))
+            result_id = cursor.lastrowid
+            
+            if result.get('articles'):
+                self._insert_articles(conn, result_id, result['articles'])
+            
+            # Агрегаты статистики и "текущее состояние" обновляем в той же транзакции
+            self._bump_daily_stats(conn, result_id)
+            self._upsert_latest_result(conn, result_id)
             conn.commit()
             
-            return cursor.lastrowid
+            return result_id
+    
+    @staticmethod
+    def _article_date_to_iso(date_str: Optional[str]) -> Optional[str]:
+        """Дата статьи 'дд.мм.гггг' -> 'гггг-мм-дд' для хранения и индексации"""
+        if not date_str:
+            return None
+        for date_format in ('%d.%m.%Y', '%Y-%m-%d'):
+            try:
+                return datetime.strptime(date_str, date_format).strftime('%Y-%m-%d')
+            except (ValueError, TypeError):
+                continue
+        return None
+    
+    @staticmethod
+    def _article_row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        """Строка result_articles -> статья в формате SitemapResultsFormatter"""
+        if row['article_date']:
+            date_str = datetime.strptime(row['article_date'], '%Y-%m-%d').strftime('%d.%m.%Y')
+        else:
+            date_str = 'Дата не указана'
+        
+        return {
+            'title': row['title'],
+            'url': row['url'],
+            'date': date_str,
+            'keywords_found': json.loads(row['keywords']) if row['keywords'] else [],
+            'snippet': row['snippet'] or ''
+        }
+    
+    def _insert_articles(self, conn: sqlite3.Connection, result_id: int, articles: List[Dict]):
+        """Записать статьи результата в result_articles (без commit)"""
+        conn.executemany('''
+            INSERT INTO result_articles
+            (result_id, position, url, title, article_date, snippet, keywords)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', [
+            (
+                result_id,
+                position,
+                article.get('url'),
+                article.get('title'),
+                self._article_date_to_iso(article.get('date')),
+                article.get('snippet'),
+                json.dumps(article.get('keywords_found', []), ensure_ascii=False)
+            )
+            for position, article in enumerate(articles)
+        ])
+    
+    def _attach_articles(self, conn: sqlite3.Connection, results: List[Dict[str, Any]],
+                         schema: str = 'main'):
+        """Загрузить статьи для списка результатов пакетными запросами по result_id"""
+        ids = [r['id'] for r in results if not r.get('articles')]
+        if not ids:
+            return
+        
+        articles_by_result = {}
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ','.join('?' * len(batch))
+            cursor = conn.execute(f'''
+                SELECT * FROM {schema}.result_articles
+                WHERE result_id IN ({placeholders})
+                ORDER BY result_id, position
+            ''', batch)
+            for row in cursor:
+                articles_by_result.setdefault(row['result_id'], []).append(self._article_row_to_dict(row))
+        
+        for result in results:
+            if result['id'] in articles_by_result:
+                result['articles'] = articles_by_result[result['id']]
+    
+    def iter_articles(self, filial_id: int = None,
+                      date_from: str = None,
+                      date_to: str = None,
+                      url: str = None,
+                      batch_size: int = 500):
+        """
+        Потоковое чтение найденных статей без загрузки всех результатов в память
+        
+        Args:
+            filial_id: ID филиала (опционально)
+            date_from: Начальная дата публикации статьи (YYYY-MM-DD)
+            date_to: Конечная дата публикации статьи (YYYY-MM-DD)
+            url: Точный URL статьи (опционально)
+            batch_size: Размер пачки при чтении из курсора
+            
+        Yields:
+            Статья с полями result_id, filial_id, filial_name, query_text
+        """
+        with self.get_connection() as conn:
+            for schema in self._result_sources(conn):
+                yield from self._iter_articles_in(conn, schema, filial_id, date_from,
+                                                  date_to, url, batch_size)
+    
+    def _iter_articles_in(self, conn: sqlite3.Connection, schema: str, filial_id: int,
+                          date_from: str, date_to: str, url: str, batch_size: int):
+        """Потоковое чтение статей из одной схемы (основная БД или партиция)"""
+        query = f'''
+            SELECT ra.*, mr.filial_id, mr.parsing_date, f.name as filial_name, sq.query_text
+            FROM {schema}.result_articles ra
+            JOIN {schema}.monitoring_results mr ON ra.result_id = mr.id
+            LEFT JOIN filials f ON mr.filial_id = f.id
+            LEFT JOIN search_queries sq ON mr.search_query_id = sq.id
+            WHERE 1=1
+        '''
+        params = []
+        
+        if filial_id:
+            query += ' AND mr.filial_id = ?'
+            params.append(filial_id)
+        
+        if date_from:
+            query += ' AND ra.article_date >= ?'
+            params.append(date_from)
+        
+        if date_to:
+            query += ' AND ra.article_date <= ?'
+            params.append(date_to)
+        
+        if url:
+            query += ' AND ra.url = ?'
+            params.append(url)
+        
+        query += ' ORDER BY ra.result_id, ra.position'
+        
+        cursor = conn.execute(query, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    article = self._article_row_to_dict(row)
+                    article.update({
+                        'result_id': row['result_id'],
+                        'filial_id': row['filial_id'],
+                        'filial_name': row['filial_name'],
+                        'query_text': row['query_text'],
+                        'parsing_date': row['parsing_date']
+                    })
+                    yield article
+        finally:
+            # Незакрытый курсор не дает отключить партицию
+            cursor.close()
+    
+    def migrate_articles_to_table(self, batch_size: int = 500) -> int:
+        """
+        Перенести статьи из JSON колонки monitoring_results.articles в result_articles
+        
+        Миграция идет пачками и коммитится после каждой пачки, поэтому
+        ее можно прервать и запустить повторно.
+        
+        Args:
+            batch_size: Количество результатов в одной пачке
+            
+        Returns:
+            Количество перенесенных результатов
+        """
+        migrated = 0
+        with self.get_connection() as conn:
+            cursor = conn.execute("PRAGMA table_info(monitoring_results)")
+            if 'articles' not in [col[1] for col in cursor.fetchall()]:
+                return 0
+            
+            last_id = 0
+            while True:
+                rows = conn.execute('''
+                    SELECT id, articles FROM monitoring_results
+                    WHERE id > ? AND articles IS NOT NULL
+                    ORDER BY id LIMIT ?
+                ''', (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                
+                for row in rows:
+                    try:
+                        articles = json.loads(row['articles'])
+                    except json.JSONDecodeError:
+                        articles = []
+                    if articles:
+                        self._insert_articles(conn, row['id'], articles)
+                    conn.execute('UPDATE monitoring_results SET articles = NULL WHERE id = ?', (row['id'],))
+                    migrated += 1
+                
+                last_id = rows[-1]['id']
+                conn.commit()
+        
+        self.add_log(None, 'migrate_articles', 'success',
+                    f'Статьи {migrated} результатов перенесены в result_articles')
+        return migrated
+    
+    def train_compression_dictionary(self, sample_limit: int = 1000) -> int:
+        """
+        Обучить словарь сжатия на последних результатах мониторинга
+        
+        Args:
+            sample_limit: Количество последних результатов для обучения
+            
+        Returns:
+            ID нового словаря (0, если данных для обучения нет)
+        """
+        with self.get_connection() as conn:
+            compressed_columns = self._compressed_columns(conn)
+            rows = conn.execute(f'''
+                SELECT {', '.join(compressed_columns)} FROM monitoring_results
+                ORDER BY id DESC LIMIT ?
+            ''', (sample_limit,)).fetchall()
+            
+            samples = [
+                self._decompress(conn, row[column])
+                for row in rows for column in compressed_columns
+                if row[column]
+            ]
+            if not samples:
+                return 0
+            
+            codec = default_codec()
+            cursor = conn.execute('''
+                INSERT INTO compression_dicts (codec, dict_data, samples_count)
+                VALUES (?, ?, ?)
+            ''', (CODEC_NAMES[codec], train_dictionary(samples, codec), len(samples)))
+            conn.commit()
+            dict_id = cursor.lastrowid
+            
+            self._get_compressor(conn, reload=True)
+        
+        self.add_log(None, 'compression_dict', 'success',
+                    f'Обучен словарь сжатия #{dict_id} на {len(samples)} примерах')
+        return dict_id
+    
+    def recompress_results(self, batch_size: int = 500) -> int:
+        """
+        Пересжать большие текстовые поля существующих результатов текущим словарем
+        
+        Args:
+            batch_size: Количество записей в одной пачке (commit после каждой)
+            
+        Returns:
+            Количество измененных записей
+        """
+        updated = 0
+        
+        with self.get_connection() as conn:
+            compressed_columns = self._compressed_columns(conn)
+            columns = ', '.join(compressed_columns)
+            assignments = ', '.join(f'{column} = ?' for column in compressed_columns)
+            compressor = self._get_compressor(conn, reload=True)
+            last_id = 0
+            while True:
+                rows = conn.execute(f'''
+                    SELECT id, {columns} FROM monitoring_results
+                    WHERE id > ? ORDER BY id LIMIT ?
+                ''', (last_id, batch_size)).fetchall()
+                if not rows:
+                    break
+                
+                for row in rows:
+                    values = [compressor.compress(self._decompress(conn, row[column]))
+                              for column in compressed_columns]
+                    if values != [row[column] for column in compressed_columns]:
+                        conn.execute(f'UPDATE monitoring_results SET {assignments} WHERE id = ?',
+                                     (*values, row['id']))
+                        updated += 1
+                
+                last_id = rows[-1]['id']
+                conn.commit()
+        
+        self.add_log(None, 'recompress', 'success', f'Пересжато {updated} записей')
+        return updated
     
     def start_monitoring_session(self, session_name: str = None,
                                search_mode: str = None,
                                search_period: str = None,
-                               search_date: str = None) -> int:
+                               search_date: str = None,
+                               params: Dict[str, Any] = None) -> int:
         """
         Начать новую сессию мониторинга
         
@@ -382,6 +1117,7 @@ class VGTRKDatabase:
             search_mode: Режим поиска
             search_period: Период поиска
             search_date: Дата поиска
+            params: Параметры запуска с filial_ids (нужны для продолжения сессии)
             
         Returns:
             ID созданной сессии
@@ -389,14 +1125,16 @@ class VGTRKDatabase:
         with self.get_connection() as conn:
             cursor = conn.execute('''
                 INSERT INTO monitoring_sessions
-                (session_name, search_mode, search_period, search_date, status)
-                VALUES (?, ?, ?, ?, ?)
+                (session_name, search_mode, search_period, search_date, status, params, filials_total)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
             ''', (
                 session_name or f"Мониторинг {datetime.now().strftime('%Y-%m-%d %H:%M')}",
                 search_mode,
                 search_period,
                 search_date,
-                'running'
+                'running',
+                json.dumps(params, ensure_ascii=False) if params else None,
+                len(params.get('filial_ids', [])) if params else None
             ))
             conn.commit()
             return cursor.lastrowid
@@ -407,11 +1145,13 @@ class VGTRKDatabase:
         
         Args:
             session_id: ID сессии
-            **kwargs: Поля для обновления (filials_count, queries_count, results_count, status, error_message)
+            **kwargs: Поля для обновления (filials_count, queries_count, results_count, status,
+                error_message, filials_done, filials_total)
         """
         with self.get_connection() as conn:
             # Формируем список полей для обновления
-            allowed_fields = ['filials_count', 'queries_count', 'results_count', 'status', 'error_message']
+            allowed_fields = ['filials_count', 'queries_count', 'results_count', 'status', 'error_message',
+                              'filials_done', 'filials_total']
             update_fields = []
             update_values = []
             
@@ -472,11 +1212,459 @@ class VGTRKDatabase:
             row = cursor.fetchone()
             return dict(row) if row else None
     
+    def save_session_checkpoint(self, session_id: int, filial_id: int, status: str,
+                                results_count: int = 0, processing_time: float = None):
+        """
+        Отметить филиал обработанным в сессии и обновить прогресс сессии
+        
+        Args:
+            session_id: ID сессии
+            filial_id: ID филиала
+            status: Итог по филиалу (success, no_data, error)
+            results_count: Количество успешных результатов по филиалу
+            processing_time: Время обработки филиала, секунд
+        """
+        with self.get_connection() as conn:
+            conn.execute('''
+                INSERT INTO session_checkpoints (session_id, filial_id, status, results_count, processing_time)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(session_id, filial_id) DO UPDATE SET
+                    status = excluded.status,
+                    results_count = excluded.results_count,
+                    processing_time = excluded.processing_time,
+                    completed_at = CURRENT_TIMESTAMP
+            ''', (session_id, filial_id, status, results_count, processing_time))
+            conn.execute('''
+                UPDATE monitoring_sessions
+                SET filials_done = (SELECT COUNT(*) FROM session_checkpoints WHERE session_id = ?),
+                    results_count = (SELECT COALESCE(SUM(results_count), 0)
+                                     FROM session_checkpoints WHERE session_id = ?)
+                WHERE id = ?
+            ''', (session_id, session_id, session_id))
+            conn.commit()
+    
+    def get_session_checkpoints(self, session_id: int) -> Dict[int, str]:
+        """
+        Получить обработанные филиалы сессии
+        
+        Returns:
+            {ID филиала: итог}
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                'SELECT filial_id, status FROM session_checkpoints WHERE session_id = ?', (session_id,))
+            return {row['filial_id']: row['status'] for row in cursor.fetchall()}
+    
+    def get_filial_costs(self, filial_ids: List[int] = None, last_n: int = 5) -> Dict[int, float]:
+        """
+        Историческая стоимость обработки филиалов: среднее время по последним контрольным точкам
+        
+        Args:
+            filial_ids: ID филиалов (по умолчанию все, для которых есть история)
+            last_n: Сколько последних обработок учитывать
+            
+        Returns:
+            {ID филиала: среднее время обработки, секунд}
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute('''
+                SELECT filial_id, AVG(processing_time) AS cost
+                FROM (
+                    SELECT filial_id, processing_time,
+                           ROW_NUMBER() OVER (PARTITION BY filial_id ORDER BY completed_at DESC) AS rn
+                    FROM session_checkpoints
+                    WHERE processing_time IS NOT NULL
+                )
+                WHERE rn <= ?
+                GROUP BY filial_id
+            ''', (last_n,))
+            costs = {row['filial_id']: row['cost'] for row in cursor.fetchall()}
+        if filial_ids is not None:
+            costs = {filial_id: costs[filial_id] for filial_id in filial_ids if filial_id in costs}
+        return costs
+    
+    def get_host_limits(self) -> Dict[str, float]:
+        """
+        Получить выученные пределы параллельных запросов по хостам
+        
+        Returns:
+            {хост: предел}
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute('SELECT host, concurrency FROM host_limits')
+            return {row['host']: row['concurrency'] for row in cursor.fetchall()}
+    
+    def save_host_limits(self, limits: Dict[str, Dict[str, Any]]):
+        """
+        Сохранить пределы хостов после запуска (ConcurrencyController.export)
+        
+        Args:
+            limits: {хост: {'concurrency', 'successes', 'failures'}}; счетчики суммируются
+        """
+        if not limits:
+            return
+        with self.get_connection() as conn:
+            conn.executemany('''
+                INSERT INTO host_limits (host, concurrency, successes, failures)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(host) DO UPDATE SET
+                    concurrency = excluded.concurrency,
+                    successes = host_limits.successes + excluded.successes,
+                    failures = host_limits.failures + excluded.failures,
+                    updated_at = CURRENT_TIMESTAMP
+            ''', [(host, item['concurrency'], item.get('successes', 0), item.get('failures', 0))
+                  for host, item in limits.items()])
+            conn.commit()
+    
+    def get_host_health(self) -> List[Dict[str, Any]]:
+        """
+        Получить записи о доступности хостов
+        
+        Returns:
+            Список записей host_health (время - unix time, latency_samples - список секунд)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute('SELECT * FROM host_health ORDER BY error_streak DESC, host')
+            records = [dict(row) for row in cursor.fetchall()]
+        for record in records:
+            record['latency_samples'] = json.loads(record['latency_samples'] or '[]')
+        return records
+    
+    def save_host_health(self, records: List[Dict[str, Any]]):
+        """
+        Сохранить записи о доступности хостов одной транзакцией (HostHealth.flush)
+        
+        Args:
+            records: Записи с полями таблицы host_health
+        """
+        columns = ['host', 'state', 'error_streak', 'failures', 'avg_latency', 'last_error',
+                   'last_success_at', 'last_failure_at', 'open_until', 'open_seconds']
+        rows = [[record.get(column) for column in columns] +
+                [json.dumps(record.get('latency_samples') or [])] for record in records]
+        columns.append('latency_samples')
+        with self.get_connection() as conn:
+            conn.executemany(f'''
+                INSERT OR REPLACE INTO host_health ({', '.join(columns)})
+                VALUES ({', '.join('?' for _ in columns)})
+            ''', rows)
+            conn.commit()
+    
+    def reset_host_health(self, host: str = None):
+        """
+        Сбросить выключатель хоста (или всех хостов): следующий запрос выполнится сразу
+        
+        Args:
+            host: Хост; None - все хосты
+        """
+        with self.get_connection() as conn:
+            query = '''
+                UPDATE host_health
+                SET state = 'closed', error_streak = 0, open_until = NULL, open_seconds = NULL
+            '''
+            if host:
+                conn.execute(query + ' WHERE host = ?', (host,))
+            else:
+                conn.execute(query)
+            conn.commit()
+    
+    def get_resumable_sessions(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Получить незавершенные сессии, которые можно продолжить
+        
+        Сессия незавершена, если обработаны не все филиалы и она не выполняется
+        сейчас заданием очереди (остановлена, упала или прервана перезапуском).
+        
+        Args:
+            limit: Максимальное количество сессий
+            
+        Returns:
+            Список сессий (params раскодирован)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute('''
+                SELECT * FROM monitoring_sessions s
+                WHERE s.params IS NOT NULL
+                  AND s.status != 'completed'
+                  AND COALESCE(s.filials_done, 0) < COALESCE(s.filials_total, 0)
+                  AND NOT EXISTS (
+                      SELECT 1 FROM monitoring_jobs j
+                      WHERE j.session_id = s.id AND j.status IN ('queued', 'running')
+                  )
+                ORDER BY s.started_at DESC
+                LIMIT ?
+            ''', (limit,))
+            
+            sessions = []
+            for row in cursor.fetchall():
+                session = dict(row)
+                session['params'] = json.loads(session['params'])
+                sessions.append(session)
+            return sessions
+    
+    def enqueue_monitoring_job(self, session_id: int, filial_ids: List[int],
+                               params: Dict[str, Any]) -> int:
+        """
+        Поставить сессию мониторинга в очередь: задание и по задаче на филиал
+        
+        Args:
+            session_id: ID созданной сессии мониторинга
+            filial_ids: ID филиалов
+            params: Параметры запуска (JSON-совместимый словарь, см. modules.runner.job_params)
+            
+        Returns:
+            ID задания
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute(
+                'INSERT INTO monitoring_jobs (session_id, params) VALUES (?, ?)',
+                (session_id, json.dumps(params, ensure_ascii=False))
+            )
+            job_id = cursor.lastrowid
+            conn.executemany(
+                'INSERT OR IGNORE INTO monitoring_tasks (job_id, filial_id) VALUES (?, ?)',
+                [(job_id, filial_id) for filial_id in filial_ids]
+            )
+            conn.commit()
+            return job_id
+    
+    def claim_monitoring_tasks(self, worker_id: str, lease_seconds: int = 300,
+                               limit: int = 1, max_attempts: int = 3,
+                               job_id: int = None) -> List[Dict[str, Any]]:
+        """
+        Арендовать задачи из очереди (все задачи - из одного задания)
+        
+        Выдаются ожидающие задачи и задачи с истекшей арендой (воркер упал).
+        Задачи, исчерпавшие попытки, помечаются ошибкой.
+        
+        Args:
+            worker_id: Идентификатор воркера
+            lease_seconds: Срок аренды, секунд
+            limit: Максимум задач
+            max_attempts: Максимум попыток на задачу
+            job_id: Брать задачи только из этого задания
+            
+        Returns:
+            Задачи: id, job_id, filial_id, attempts, session_id, params
+        """
+        now = time.time()
+        available = "(t.status = 'pending' OR (t.status = 'leased' AND t.lease_expires_at < ?))"
+        
+        with self.get_connection() as conn:
+            # Блокировка записи сразу: два воркера не получат одну задачу
+            conn.execute('BEGIN IMMEDIATE')
+            
+            exhausted_jobs = [row[0] for row in conn.execute('''
+                SELECT DISTINCT job_id FROM monitoring_tasks
+                WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= ?
+            ''', (now, max_attempts))]
+            conn.execute('''
+                UPDATE monitoring_tasks
+                SET status = 'error', last_error = 'Превышено число попыток', finished_at = CURRENT_TIMESTAMP
+                WHERE status = 'leased' AND lease_expires_at < ? AND attempts >= ?
+            ''', (now, max_attempts))
+            for exhausted_id in exhausted_jobs:
+                self._finalize_monitoring_job(conn, exhausted_id)
+            
+            job_filter = 'AND t.job_id = ?' if job_id else ''
+            row = conn.execute(f'''
+                SELECT t.job_id FROM monitoring_tasks t
+                JOIN monitoring_jobs j ON j.id = t.job_id
+                WHERE j.status IN ('queued', 'running') AND {available} {job_filter}
+                ORDER BY t.job_id, t.id
+                LIMIT 1
+            ''', (now, job_id) if job_id else (now,)).fetchone()
+            if not row:
+                conn.commit()
+                return []
+            job_id = row[0]
+            
+            tasks = [dict(r) for r in conn.execute(f'''
+                SELECT t.id, t.job_id, t.filial_id, t.attempts + 1 AS attempts,
+                       j.session_id, j.params
+                FROM monitoring_tasks t
+                JOIN monitoring_jobs j ON j.id = t.job_id
+                WHERE t.job_id = ? AND {available}
+                ORDER BY t.id
+                LIMIT ?
+            ''', (job_id, now, limit))]
+            
+            conn.executemany('''
+                UPDATE monitoring_tasks
+                SET status = 'leased', worker_id = ?, lease_expires_at = ?,
+                    heartbeat_at = ?, attempts = attempts + 1
+                WHERE id = ?
+            ''', [(worker_id, now + lease_seconds, now, task['id']) for task in tasks])
+            conn.execute('''
+                UPDATE monitoring_jobs
+                SET status = 'running', started_at = COALESCE(started_at, CURRENT_TIMESTAMP)
+                WHERE id = ? AND status = 'queued'
+            ''', (job_id,))
+            conn.commit()
+        
+        for task in tasks:
+            task['params'] = json.loads(task['params'])
+        return tasks
+    
+    def heartbeat_monitoring_tasks(self, task_ids: List[int], worker_id: str,
+                                   lease_seconds: int = 300) -> int:
+        """
+        Продлить аренду задач воркера
+        
+        Returns:
+            Количество задач, которые все еще принадлежат воркеру
+        """
+        if not task_ids:
+            return 0
+        now = time.time()
+        placeholders = ','.join('?' * len(task_ids))
+        with self.get_connection() as conn:
+            cursor = conn.execute(f'''
+                UPDATE monitoring_tasks
+                SET lease_expires_at = ?, heartbeat_at = ?
+                WHERE id IN ({placeholders}) AND worker_id = ? AND status = 'leased'
+            ''', [now + lease_seconds, now, *task_ids, worker_id])
+            conn.commit()
+            return cursor.rowcount
+    
+    def complete_monitoring_task(self, task_id: int, worker_id: str, status: str,
+                                 error: str = None) -> bool:
+        """
+        Отметить задачу выполненной
+        
+        Args:
+            task_id: ID задачи
+            worker_id: Идентификатор воркера
+            status: Итог по филиалу (success, no_data, error)
+            error: Текст ошибки
+            
+        Returns:
+            False, если аренда была потеряна (задачу уже забрал другой воркер)
+        """
+        with self.get_connection() as conn:
+            cursor = conn.execute('''
+                UPDATE monitoring_tasks
+                SET status = ?, last_error = ?, finished_at = CURRENT_TIMESTAMP, lease_expires_at = NULL
+                WHERE id = ? AND worker_id = ? AND status = 'leased'
+            ''', (status, error, task_id, worker_id))
+            if cursor.rowcount == 0:
+                conn.commit()
+                return False
+            job_id = conn.execute('SELECT job_id FROM monitoring_tasks WHERE id = ?', (task_id,)).fetchone()[0]
+            self._finalize_monitoring_job(conn, job_id)
+            conn.commit()
+            return True
+    
+    def _finalize_monitoring_job(self, conn: sqlite3.Connection, job_id: int):
+        """Закрыть задание и его сессию, если не осталось незавершенных задач (без commit)"""
+        remaining = conn.execute('''
+            SELECT COUNT(*) FROM monitoring_tasks
+            WHERE job_id = ? AND status IN ('pending', 'leased')
+        ''', (job_id,)).fetchone()[0]
+        if remaining:
+            return
+        
+        job = conn.execute('SELECT session_id, params, status FROM monitoring_jobs WHERE id = ?',
+                           (job_id,)).fetchone()
+        if job['status'] == 'completed':
+            return
+        conn.execute('''
+            UPDATE monitoring_jobs
+            SET status = CASE WHEN status = 'cancelled' THEN 'cancelled' ELSE 'completed' END,
+                finished_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (job_id,))
+        
+        if job['session_id']:
+            # Колонка session_id добавляется при первом сохранении результата с сессией
+            results_count = 0
+            if 'session_id' in self._table_columns(conn, 'monitoring_results'):
+                results_count = conn.execute('''
+                    SELECT COUNT(*) FROM monitoring_results WHERE session_id = ? AND status = 'success'
+                ''', (job['session_id'],)).fetchone()[0]
+            
+            # Отмененная сессия остается незавершенной - ее можно продолжить
+            conn.execute('''
+                UPDATE monitoring_sessions
+                SET status = ?,
+                    filials_count = COALESCE(filials_total, (SELECT COUNT(*) FROM monitoring_tasks WHERE job_id = ?)),
+                    queries_count = ?,
+                    results_count = ?,
+                    error_message = ?,
+                    completed_at = CURRENT_TIMESTAMP,
+                    duration_seconds = CAST(strftime('%s', 'now') - strftime('%s', started_at) AS INTEGER)
+                WHERE id = ?
+            ''', (
+                'error' if job['status'] == 'cancelled' else 'completed',
+                job_id,
+                len(json.loads(job['params']).get('query_ids', [])),
+                results_count,
+                'Задание отменено' if job['status'] == 'cancelled' else None,
+                job['session_id']
+            ))
+    
+    def cancel_monitoring_job(self, job_id: int) -> int:
+        """
+        Отменить задание: ожидающие задачи снимаются, арендованные дорабатываются
+        
+        Returns:
+            Количество снятых задач
+        """
+        with self.get_connection() as conn:
+            conn.execute('''
+                UPDATE monitoring_jobs SET status = 'cancelled'
+                WHERE id = ? AND status IN ('queued', 'running')
+            ''', (job_id,))
+            cursor = conn.execute('''
+                UPDATE monitoring_tasks SET status = 'cancelled', finished_at = CURRENT_TIMESTAMP
+                WHERE job_id = ? AND status = 'pending'
+            ''', (job_id,))
+            self._finalize_monitoring_job(conn, job_id)
+            conn.commit()
+            return cursor.rowcount
+    
+    def get_monitoring_jobs(self, limit: int = 20, active_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        Получить задания очереди с прогрессом по задачам
+        
+        Args:
+            limit: Максимальное количество заданий
+            active_only: Только ожидающие и выполняющиеся задания
+            
+        Returns:
+            Задания: поля monitoring_jobs, session_name и счетчики задач
+            (tasks_total, tasks_done, tasks_leased, tasks_error)
+        """
+        with self.get_connection() as conn:
+            where = "WHERE j.status IN ('queued', 'running')" if active_only else ""
+            cursor = conn.execute(f'''
+                SELECT j.*, s.session_name,
+                       COUNT(t.id) AS tasks_total,
+                       SUM(CASE WHEN t.status NOT IN ('pending', 'leased') THEN 1 ELSE 0 END) AS tasks_done,
+                       SUM(CASE WHEN t.status = 'leased' THEN 1 ELSE 0 END) AS tasks_leased,
+                       SUM(CASE WHEN t.status = 'error' THEN 1 ELSE 0 END) AS tasks_error
+                FROM monitoring_jobs j
+                LEFT JOIN monitoring_sessions s ON s.id = j.session_id
+                LEFT JOIN monitoring_tasks t ON t.job_id = j.id
+                {where}
+                GROUP BY j.id
+                ORDER BY j.id DESC
+                LIMIT ?
+            ''', (limit,))
+            
+            jobs = []
+            for row in cursor.fetchall():
+                job = dict(row)
+                job['params'] = json.loads(job['params'])
+                jobs.append(job)
+            return jobs
+    
     def get_monitoring_results(self, filial_id: int = None,
                               date_from: str = None,
                               date_to: str = None,
                               status: str = None,
-                              session_id: int = None) -> List[Dict[str, Any]]:
+                              session_id: int = None,
+                              include_articles: bool = True,
+                              federal_district: str = None) -> List[Dict[str, Any]]:
         """
         Получить результаты мониторинга с фильтрацией
         
@@ -486,76 +1674,172 @@ class VGTRKDatabase:
             date_to: Конечная дата (YYYY-MM-DD)
             status: Фильтр по статусу
             session_id: ID сессии мониторинга (опционально)
+            include_articles: Загружать ли найденные статьи (не нужны для таблицы и экспорта)
+            federal_district: Федеральный округ (опционально)
             
         Returns:
             Список результатов
         """
+        results = [
+            result
+            for chunk in self.iter_monitoring_results(filial_id, date_from, date_to, status,
+                                                      session_id, include_articles, federal_district)
+            for result in chunk
+        ]
+        results.sort(key=lambda r: r.get('parsing_date') or '', reverse=True)
+        return results
+    
+    def iter_monitoring_results(self, filial_id: int = None,
+                                date_from: str = None,
+                                date_to: str = None,
+                                status: str = None,
+                                session_id: int = None,
+                                include_articles: bool = False,
+                                federal_district: str = None,
+                                chunk_size: int = 1000):
+        """
+        Потоковое чтение результатов мониторинга пачками
+        
+        Фильтры те же, что у get_monitoring_results. Пачки идут сначала из основной БД,
+        затем из партиций (от новых месяцев к старым), внутри источника - по убыванию даты.
+        
+        Args:
+            chunk_size: Количество результатов в пачке
+            
+        Yields:
+            Списки результатов размером не более chunk_size
+        """
         with self.get_connection() as conn:
-            # Проверяем наличие новых колонок
-            cursor = conn.execute("PRAGMA table_info(monitoring_results)")
-            columns = [col[1] for col in cursor.fetchall()]
+            # Колонки основной таблицы (старый JSON статей - только если нужен)
+            columns = [col for col in self._table_columns(conn, 'monitoring_results')
+                       if include_articles or col != 'articles']
             
-            # Формируем список колонок для запроса
-            mr_columns = ['mr.*']
-            if 'search_mode' in columns:
-                mr_columns.append('mr.search_mode')
-            if 'metrics' in columns:
-                mr_columns.append('mr.metrics')
-            if 'articles' in columns:
-                mr_columns.append('mr.articles')
-            
-            query = f'''
-                SELECT {', '.join(mr_columns)}, f.name as filial_name, f.federal_district, f.region, sq.query_text
-                FROM monitoring_results mr
-                LEFT JOIN filials f ON mr.filial_id = f.id
-                LEFT JOIN search_queries sq ON mr.search_query_id = sq.id
-                WHERE 1=1
-            '''
+            filters = ''
             params = []
             
             if filial_id:
-                query += ' AND mr.filial_id = ?'
+                filters += ' AND mr.filial_id = ?'
                 params.append(filial_id)
             
             if date_from:
-                query += ' AND DATE(mr.parsing_date) >= ?'
+                filters += ' AND DATE(mr.parsing_date) >= ?'
                 params.append(date_from)
             
             if date_to:
-                query += ' AND DATE(mr.parsing_date) <= ?'
+                filters += ' AND DATE(mr.parsing_date) <= ?'
                 params.append(date_to)
             
             if status:
-                query += ' AND mr.status = ?'
+                filters += ' AND mr.status = ?'
                 params.append(status)
             
             if session_id is not None:
-                query += ' AND mr.session_id = ?'
+                filters += ' AND mr.session_id = ?'
                 params.append(session_id)
             
-            query += ' ORDER BY mr.parsing_date DESC'
+            if federal_district:
+                filters += ' AND f.federal_district = ?'
+                params.append(federal_district)
+            
+            # Основная БД и только те месячные партиции, что попадают в период
+            for schema in self._result_sources(conn, date_from, date_to):
+                # В старой партиции может не быть колонок, добавленных позже
+                existing = set(self._table_columns(conn, 'monitoring_results', schema))
+                if session_id is not None and 'session_id' not in existing:
+                    continue
+                mr_columns = [f'mr.{col}' if col in existing else f'NULL AS {col}'
+                              for col in columns]
+                
+                query = f'''
+                    SELECT {', '.join(mr_columns)}, f.name as filial_name, f.federal_district, f.region, sq.query_text
+                    FROM {schema}.monitoring_results mr
+                    LEFT JOIN filials f ON mr.filial_id = f.id
+                    LEFT JOIN search_queries sq ON mr.search_query_id = sq.id
+                    WHERE 1=1 {filters}
+                    ORDER BY mr.parsing_date DESC
+                '''
+                cursor = conn.execute(query, params)
+                try:
+                    while True:
+                        rows = cursor.fetchmany(chunk_size)
+                        if not rows:
+                            break
+                        chunk = [self._decode_result_row(conn, row) for row in rows]
+                        if include_articles:
+                            self._attach_articles(conn, chunk, schema)
+                        yield chunk
+                finally:
+                    # Незакрытый курсор не дает отключить партицию
+                    cursor.close()
+    
+    def _decode_result_row(self, conn: sqlite3.Connection, row: sqlite3.Row) -> Dict[str, Any]:
+        """Преобразовать строку monitoring_results в словарь с распаковкой и десериализацией полей"""
+        result_dict = dict(row)
+        
+        for column in self.COMPRESSED_COLUMNS + ('articles',):
+            if result_dict.get(column) is not None:
+                result_dict[column] = self._decompress(conn, result_dict[column])
+        
+        # Десериализуем JSON поля, если они есть (articles - только у старых записей до миграции)
+        if 'metrics' in result_dict and result_dict['metrics']:
+            try:
+                result_dict['metrics'] = json.loads(result_dict['metrics'])
+            except json.JSONDecodeError:
+                result_dict['metrics'] = {}
+        
+        if 'articles' in result_dict and result_dict['articles']:
+            try:
+                result_dict['articles'] = json.loads(result_dict['articles'])
+            except json.JSONDecodeError:
+                result_dict['articles'] = []
+        
+        return result_dict
+    
+    def get_latest_results(self, filial_id: int = None,
+                           federal_district: str = None,
+                           status: str = None) -> List[Dict[str, Any]]:
+        """
+        Получить текущее состояние: последний результат по каждой паре (филиал, запрос)
+        
+        Читается из latest_results одним запросом по первичным ключам,
+        без просмотра всех сессий в monitoring_results.
+        
+        Args:
+            filial_id: ID филиала (опционально)
+            federal_district: Федеральный округ (опционально)
+            status: Фильтр по статусу (опционально)
             
-            cursor = conn.execute(query, params)
-            results = []
+        Returns:
+            Список результатов в формате get_monitoring_results
+        """
+        with self.get_connection() as conn:
+            query = '''
+                SELECT mr.*, f.name as filial_name, f.federal_district, f.region, sq.query_text
+                FROM latest_results lr
+                JOIN monitoring_results mr ON mr.id = lr.result_id
+                LEFT JOIN filials f ON lr.filial_id = f.id
+                LEFT JOIN search_queries sq ON mr.search_query_id = sq.id
+                WHERE 1=1
+            '''
+            params = []
             
-            for row in cursor.fetchall():
-                result_dict = dict(row)
-                
-                # Десериализуем JSON поля, если они есть
-                if 'metrics' in result_dict and result_dict['metrics']:
-                    try:
-                        result_dict['metrics'] = json.loads(result_dict['metrics'])
-                    except json.JSONDecodeError:
-                        result_dict['metrics'] = {}
-                
-                if 'articles' in result_dict and result_dict['articles']:
-                    try:
-                        result_dict['articles'] = json.loads(result_dict['articles'])
-                    except json.JSONDecodeError:
-                        result_dict['articles'] = []
-                
-                results.append(result_dict)
+            if filial_id:
+                query += ' AND lr.filial_id = ?'
+                params.append(filial_id)
+            
+            if federal_district:
+                query += ' AND f.federal_district = ?'
+                params.append(federal_district)
+            
+            if status:
+                query += ' AND lr.status = ?'
+                params.append(status)
+            
+            query += ' ORDER BY f.federal_district, f.name, lr.search_query_id'
             
+            cursor = conn.execute(query, params)
+            results = [self._decode_result_row(conn, row) for row in cursor.fetchall()]
+            self._attach_articles(conn, results)
             return results
     
     def get_statistics(self) -> Dict[str, Any]:
@@ -583,15 +1867,15 @@ class VGTRKDatabase:
             ''')
             stats['by_district'] = {row[0]: row[1] for row in cursor.fetchall()}
             
-            # Статистика парсинга за сегодня
+            # Статистика парсинга за сегодня (из агрегатов results_daily_stats)
             cursor = conn.execute('''
                 SELECT 
-                    COUNT(*) as total,
-                    COUNT(CASE WHEN status = 'success' THEN 1 END) as success,
-                    COUNT(CASE WHEN status = 'error' THEN 1 END) as errors,
-                    COUNT(CASE WHEN status = 'no_data' THEN 1 END) as no_data
-                FROM monitoring_results
-                WHERE DATE(parsing_date) = DATE('now', 'localtime')
+                    COALESCE(SUM(results_count), 0) as total,
+                    COALESCE(SUM(CASE WHEN status = 'success' THEN results_count END), 0) as success,
+                    COALESCE(SUM(CASE WHEN status = 'error' THEN results_count END), 0) as errors,
+                    COALESCE(SUM(CASE WHEN status = 'no_data' THEN results_count END), 0) as no_data
+                FROM results_daily_stats
+                WHERE stat_date = DATE('now', 'localtime')
             ''')
             row = cursor.fetchone()
             stats['today'] = {
@@ -603,21 +1887,21 @@ class VGTRKDatabase:
             
             # Статистика за последние 7 дней
             cursor = conn.execute('''
-                SELECT DATE(parsing_date) as date, COUNT(*) as count
-                FROM monitoring_results
-                WHERE DATE(parsing_date) >= DATE('now', '-7 days', 'localtime')
-                GROUP BY DATE(parsing_date)
+                SELECT stat_date as date, SUM(results_count) as count
+                FROM results_daily_stats
+                WHERE stat_date >= DATE('now', '-7 days', 'localtime')
+                GROUP BY stat_date
                 ORDER BY date DESC
             ''')
             stats['last_week'] = [{'date': row[0], 'count': row[1]} for row in cursor.fetchall()]
             
             # Топ-5 филиалов по количеству найденного контента
             cursor = conn.execute('''
-                SELECT f.name, COUNT(*) as count
-                FROM monitoring_results mr
-                JOIN filials f ON mr.filial_id = f.id
-                WHERE mr.status = 'success' 
-                  AND DATE(mr.parsing_date) >= DATE('now', '-30 days', 'localtime')
+                SELECT f.name, SUM(ds.results_count) as count
+                FROM results_daily_stats ds
+                JOIN filials f ON ds.filial_id = f.id
+                WHERE ds.status = 'success' 
+                  AND ds.stat_date >= DATE('now', '-30 days', 'localtime')
                 GROUP BY f.id, f.name
                 ORDER BY count DESC
                 LIMIT 5
@@ -674,24 +1958,199 @@ class VGTRKDatabase:
             cursor = conn.execute(query, params)
             return [dict(row) for row in cursor.fetchall()]
     
+    def _ensure_partition_schema(self, conn: sqlite3.Connection):
+        """Создать таблицы в подключенной партиции 'part' по образцу основной БД"""
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS part.monitoring_results (
+                id INTEGER PRIMARY KEY,
+                filial_id INTEGER NOT NULL
+            )
+        ''')
+        
+        # Колонки, добавленные в основную таблицу лениво, добавляем и в партицию
+        main_columns = conn.execute("PRAGMA main.table_info(monitoring_results)").fetchall()
+        part_columns = set(self._table_columns(conn, 'monitoring_results', 'part'))
+        for col in main_columns:
+            if col[1] not in part_columns:
+                conn.execute(f'ALTER TABLE part.monitoring_results ADD COLUMN {col[1]} {col[2]}')
+        
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS part.result_articles (
+                id INTEGER PRIMARY KEY,
+                result_id INTEGER NOT NULL,
+                position INTEGER NOT NULL DEFAULT 0,
+                url TEXT,
+                title TEXT,
+                article_date DATE,
+                snippet TEXT,
+                keywords TEXT
+            )
+        ''')
+        conn.execute('CREATE INDEX IF NOT EXISTS part.idx_results_date ON monitoring_results(parsing_date)')
+        conn.execute('CREATE INDEX IF NOT EXISTS part.idx_results_filial ON monitoring_results(filial_id)')
+        conn.execute('CREATE INDEX IF NOT EXISTS part.idx_articles_result ON result_articles(result_id, position)')
+        conn.execute('CREATE INDEX IF NOT EXISTS part.idx_articles_url ON result_articles(url)')
+        conn.execute('CREATE INDEX IF NOT EXISTS part.idx_articles_date ON result_articles(article_date)')
+    
+    def archive_closed_months(self) -> Dict[str, int]:
+        """
+        Перенести результаты завершенных месяцев в файлы партиций
+        
+        В основной БД остается текущий месяц и записи, на которые ссылается
+        latest_results (текущее состояние филиалов).
+        
+        Returns:
+            Словарь {месяц YYYY-MM: количество перенесенных записей}
+        """
+        archived = {}
+        current_month_start = datetime.now().strftime('%Y-%m-01')
+        
+        with self.get_connection() as conn:
+            cursor = conn.execute('''
+                SELECT DISTINCT strftime('%Y-%m', parsing_date) AS month
+                FROM monitoring_results
+                WHERE parsing_date < ?
+                  AND id NOT IN (SELECT result_id FROM latest_results)
+                ORDER BY month
+            ''', (current_month_start,))
+            months = [row['month'] for row in cursor.fetchall() if row['month']]
+            
+            if months:
+                self.partitions_dir.mkdir(parents=True, exist_ok=True)
+            
+            for month in months:
+                conn.execute('ATTACH DATABASE ? AS part', (str(self.partition_path(month)),))
+                try:
+                    self._ensure_partition_schema(conn)
+                    
+                    columns = ', '.join(self._table_columns(conn, 'monitoring_results'))
+                    moved_filter = '''
+                        SELECT id FROM main.monitoring_results
+                        WHERE strftime('%Y-%m', parsing_date) = ?
+                          AND id NOT IN (SELECT result_id FROM main.latest_results)
+                    '''
+                    
+                    # Перенос в одной транзакции по обеим БД
+                    conn.execute(f'''
+                        INSERT OR REPLACE INTO part.monitoring_results ({columns})
+                        SELECT {columns} FROM main.monitoring_results
+                        WHERE id IN ({moved_filter})
+                    ''', (month,))
+                    conn.execute(f'''
+                        INSERT OR REPLACE INTO part.result_articles
+                        SELECT * FROM main.result_articles
+                        WHERE result_id IN ({moved_filter})
+                    ''', (month,))
+                    conn.execute(f'DELETE FROM main.result_articles WHERE result_id IN ({moved_filter})', (month,))
+                    cursor = conn.execute(f'DELETE FROM main.monitoring_results WHERE id IN ({moved_filter})', (month,))
+                    archived[month] = cursor.rowcount
+                    conn.commit()
+                finally:
+                    conn.execute('DETACH DATABASE part')
+        
+        if archived:
+            self.add_log(None, 'partition', 'success',
+                        f'Перенесено в партиции: {sum(archived.values())} записей',
+                        json.dumps(archived))
+        return archived
+    
+    def drop_partitions(self, before_date: str = None) -> int:
+        """
+        Удалить файлы месячных партиций целиком
+        
+        Args:
+            before_date: Удалять только месяцы, полностью закончившиеся до этой даты (YYYY-MM-DD);
+                         None - удалить все партиции
+            
+        Returns:
+            Количество удаленных записей результатов
+        """
+        deleted_count = 0
+        for month in self.list_partitions():
+            year, month_num = int(month[:4]), int(month[5:7])
+            month_end = f"{month}-{calendar.monthrange(year, month_num)[1]:02d}"
+            if before_date and month_end >= before_date:
+                continue
+            
+            path = self.partition_path(month)
+            conn = sqlite3.connect(str(path))
+            try:
+                deleted_count += conn.execute('SELECT COUNT(*) FROM monitoring_results').fetchone()[0]
+            except sqlite3.OperationalError:
+                pass
+            finally:
+                conn.close()
+            path.unlink()
+        return deleted_count
+    
+    def delete_archived_results(self, filial_id: int) -> int:
+        """
+        Удалить результаты филиала из всех партиций
+        
+        Args:
+            filial_id: ID филиала
+            
+        Returns:
+            Количество удаленных записей
+        """
+        deleted_count = 0
+        with self.get_connection() as conn:
+            for schema in self._result_sources(conn):
+                if schema == 'main':
+                    continue
+                conn.execute(f'''
+                    DELETE FROM {schema}.result_articles WHERE result_id IN
+                    (SELECT id FROM {schema}.monitoring_results WHERE filial_id = ?)
+                ''', (filial_id,))
+                cursor = conn.execute(f'DELETE FROM {schema}.monitoring_results WHERE filial_id = ?',
+                                      (filial_id,))
+                deleted_count += cursor.rowcount
+                conn.commit()
+        return deleted_count
+    
     def clear_old_results(self, days_to_keep: int = 30) -> int:
         """
         Очистить старые результаты мониторинга
         
+        Завершенные месяцы сначала переносятся в партиции, затем партиции,
+        целиком вышедшие за срок хранения, удаляются как файлы. Основная БД и
+        агрегаты results_daily_stats очищаются по той же границе месяца, поэтому
+        статистика совпадает с оставшимися результатами (хранится не меньше
+        days_to_keep дней).
+        
         Args:
             days_to_keep: Количество дней для хранения
             
         Returns:
             Количество удаленных записей
         """
+        self.archive_closed_months()
+        cutoff_date = (datetime.now() - timedelta(days=days_to_keep)).strftime('%Y-%m-%d')
+        deleted_count = self.drop_partitions(before_date=cutoff_date)
+        # Граница удаленных партиций - начало месяца cutoff_date
+        cutoff_date = cutoff_date[:8] + '01'
+        
         with self.get_connection() as conn:
+            # В основной БД остаются только текущий месяц и "текущее состояние"
+            conn.execute('''
+                DELETE FROM result_articles WHERE result_id IN
+                (SELECT id FROM monitoring_results WHERE DATE(parsing_date) < ?)
+            ''', (cutoff_date,))
             cursor = conn.execute('''
                 DELETE FROM monitoring_results
-                WHERE DATE(parsing_date) < DATE('now', ? || ' days', 'localtime')
-            ''', (-days_to_keep,))
-            conn.commit()
+                WHERE DATE(parsing_date) < ?
+            ''', (cutoff_date,))
+            deleted_count += cursor.rowcount
             
-            deleted_count = cursor.rowcount
+            conn.execute('''
+                DELETE FROM results_daily_stats
+                WHERE stat_date < ?
+            ''', (cutoff_date,))
+            conn.execute('''
+                DELETE FROM latest_results
+                WHERE result_id NOT IN (SELECT id FROM monitoring_results)
+            ''')
+            conn.commit()
             
             # Логируем операцию
             self.add_log(None, 'cleanup', 'success', 
@@ -699,46 +2158,46 @@ class VGTRKDatabase:
             
             return deleted_count
     
-    def export_to_excel(self, output_path: str, include_results: bool = True) -> str:
+    def export_to_excel(self, output_path: str, include_results: bool = True, **filters) -> str:
         """
         Экспорт данных в Excel файл
         
+        Книга пишется в режиме write-only, результаты читаются из БД пачками.
+        
         Args:
             output_path: Путь для сохранения файла
             include_results: Включать ли результаты мониторинга
+            **filters: Фильтры результатов как у get_monitoring_results
+                       (date_from, date_to, status, session_id, federal_district, filial_id)
             
         Returns:
             Путь к созданному файлу
         """
+        from openpyxl import Workbook
+        from modules.results_exporter import write_results_sheet
+        
         output_path = Path(output_path)
+        workbook = Workbook(write_only=True)
+        
+        # Экспорт филиалов
+        write_results_sheet(workbook, [self.get_all_filials()], 'Филиалы')
+        
+        # Экспорт поисковых запросов
+        write_results_sheet(workbook, [self.get_search_queries()], 'Поисковые запросы')
+        
+        # Экспорт результатов мониторинга
+        if include_results:
+            write_results_sheet(workbook, self.iter_monitoring_results(**filters), 'Результаты')
+        
+        # Экспорт статистики
+        stats = self.get_statistics()
+        stats_data = []
+        for district, count in stats['by_district'].items():
+            stats_data.append({'Округ': district, 'Количество филиалов': count})
+        write_results_sheet(workbook, [stats_data], 'Статистика')
         
-        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-            # Экспорт филиалов
-            filials_df = pd.DataFrame(self.get_all_filials())
-            if not filials_df.empty:
-                filials_df.to_excel(writer, sheet_name='Филиалы', index=False)
-            
-            # Экспорт поисковых запросов
-            queries_df = pd.DataFrame(self.get_search_queries())
-            if not queries_df.empty:
-                queries_df.to_excel(writer, sheet_name='Поисковые запросы', index=False)
-            
-            # Экспорт результатов мониторинга
-            if include_results:
-                results_df = pd.DataFrame(self.get_monitoring_results())
-                if not results_df.empty:
-                    # Ограничиваем длину контента для Excel
-                    if 'content' in results_df.columns:
-                        results_df['content'] = results_df['content'].str[:500]
-                    results_df.to_excel(writer, sheet_name='Результаты', index=False)
-            
-            # Экспорт статистики
-            stats = self.get_statistics()
-            stats_data = []
-            for district, count in stats['by_district'].items():
-                stats_data.append({'Округ': district, 'Количество филиалов': count})
-            if stats_data:
-                stats_df = pd.DataFrame(stats_data)
-                stats_df.to_excel(writer, sheet_name='Статистика', index=False)
+        if not workbook.worksheets:
+            workbook.create_sheet('Филиалы')
+        workbook.save(str(output_path))
         
         return str(output_path)
\ No newline at end of file
@@ -0,0 +1,353 @@
+"""
+Модуль онлайн-резервного копирования SQLite базы мониторинга
+
+- online_copy: копия через sqlite3 backup API порциями страниц, не блокирует запись
+- create_snapshot: инкрементальный снимок в хранилище блоков с адресацией по содержимому
+  (неизмененные блоки страниц не сохраняются повторно)
+- verify_snapshot / restore_snapshot / collect_garbage: проверка, восстановление и очистка
+"""
+
+import os
+import json
+import zlib
+import sqlite3
+import time
+import hashlib
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# Страниц за один шаг backup API: между шагами блокировка БД отпускается
+BACKUP_STEP_PAGES = 1024
+
+# Размер блока хранилища (кратен любому размеру страницы SQLite)
+CHUNK_SIZE = 1024 * 1024
+
+# Блокировка хранилища: сколько ждать и через сколько считать ее брошенной
+LOCK_TIMEOUT = 600
+LOCK_STALE_SECONDS = 6 * 60 * 60
+
+
+@contextmanager
+def _store_lock(backup_path: Path, timeout: float = LOCK_TIMEOUT):
+    """
+    Эксклюзивная блокировка хранилища снимков (файл .lock)
+
+    Создание снимка и сборка мусора не выполняются одновременно: иначе сборщик
+    удалит блоки снимка, манифест которого еще не записан.
+    """
+    backup_path.mkdir(parents=True, exist_ok=True)
+    lock_path = backup_path / ".lock"
+    deadline = time.time() + timeout
+
+    while True:
+        try:
+            fd = os.open(str(lock_path), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                # Блокировка процесса, завершившегося аварийно
+                if time.time() - lock_path.stat().st_mtime > LOCK_STALE_SECONDS:
+                    lock_path.unlink()
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > deadline:
+                raise TimeoutError(f"Хранилище {backup_path} занято другим процессом")
+            time.sleep(0.5)
+
+    try:
+        os.write(fd, str(os.getpid()).encode())
+        os.close(fd)
+        yield
+    finally:
+        try:
+            lock_path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def online_copy(source_db: str, target_db: str, pages: int = BACKUP_STEP_PAGES,
+                progress: Optional[Callable[[int, int], None]] = None) -> None:
+    """
+    Скопировать БД через sqlite3 backup API, не останавливая запись в источник
+
+    Args:
+        source_db: Путь к исходной БД
+        target_db: Путь к копии (перезаписывается)
+        pages: Количество страниц за шаг
+        progress: Callback(скопировано_страниц, всего_страниц)
+    """
+    source = sqlite3.connect(str(source_db))
+    target = sqlite3.connect(str(target_db))
+    try:
+        def on_step(status, remaining, total):
+            if progress:
+                progress(total - remaining, total)
+
+        # Между шагами блокировка чтения отпускается и писатели продолжают работу
+        source.backup(target, pages=pages, progress=on_step)
+    finally:
+        target.close()
+        source.close()
+
+
+def quick_check(db_path: str) -> str:
+    """
+    Быстрая проверка структуры БД (PRAGMA quick_check, без сверки индексов)
+
+    Returns:
+        "ok" или описание первой ошибки
+    """
+    conn = sqlite3.connect(str(db_path))
+    try:
+        return conn.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def database_files(source_db: str) -> List[Tuple[str, Path]]:
+    """
+    Файлы, входящие в БД: основной файл и месячные партиции результатов
+
+    Returns:
+        Список (имя относительно каталога БД, путь)
+    """
+    source_path = Path(source_db)
+    files = [(source_path.name, source_path)]
+
+    partitions_dir = source_path.parent / "partitions"
+    for partition in sorted(partitions_dir.glob(f"{source_path.stem}_*.db")):
+        files.append((f"partitions/{partition.name}", partition))
+    return files
+
+
+def _object_path(backup_dir: Path, digest: str) -> Path:
+    """Путь к блоку хранилища по его хешу"""
+    return backup_dir / "objects" / digest[:2] / digest
+
+
+def _store_file_chunks(backup_dir: Path, file_path: Path) -> Dict:
+    """Разбить файл на блоки и сохранить отсутствующие в хранилище"""
+    chunks = []
+    new_chunks = 0
+    file_hash = hashlib.sha256()
+
+    with open(file_path, 'rb') as f:
+        while True:
+            data = f.read(CHUNK_SIZE)
+            if not data:
+                break
+            file_hash.update(data)
+            digest = hashlib.sha256(data).hexdigest()
+            chunks.append(digest)
+
+            object_path = _object_path(backup_dir, digest)
+            if not object_path.exists():
+                object_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = object_path.with_suffix('.tmp')
+                tmp_path.write_bytes(zlib.compress(data, 1))
+                os.replace(tmp_path, object_path)
+                new_chunks += 1
+
+    return {
+        'size': file_path.stat().st_size,
+        'sha256': file_hash.hexdigest(),
+        'chunk_size': CHUNK_SIZE,
+        'chunks': chunks,
+        'new_chunks': new_chunks
+    }
+
+
+def create_snapshot(source_db: str, backup_dir: str,
+                    progress: Optional[Callable[[int, int], None]] = None) -> Path:
+    """
+    Создать инкрементальный снимок БД
+
+    Согласованная копия снимается через backup API во временный файл,
+    после чего в хранилище записываются только новые блоки.
+
+    Каждый файл согласован сам по себе, но основная БД и партиции копируются
+    в разные моменты, общей транзакции между ними нет. Основная БД копируется
+    первой, поэтому месяц, перенесенный archive_closed_months во время снимка,
+    может оказаться и в основной БД, и в партиции, но не потеряется.
+
+    Args:
+        source_db: Путь к исходной БД
+        backup_dir: Каталог хранилища снимков
+        progress: Callback прогресса копирования страниц
+
+    Returns:
+        Путь к манифесту снимка
+    """
+    backup_path = Path(backup_dir)
+    tmp_dir = backup_path / "tmp"
+    snapshots_dir = backup_path / "snapshots"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    snapshots_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'source': str(source_db),
+        'files': []
+    }
+
+    # Блокировка держится до записи манифеста, пока блоки ни на что не ссылаются
+    with _store_lock(backup_path):
+        for name, file_path in database_files(source_db):
+            tmp_copy = tmp_dir / f"{file_path.name}.snapshot"
+            try:
+                online_copy(str(file_path), str(tmp_copy), progress=progress)
+                file_info = _store_file_chunks(backup_path, tmp_copy)
+            finally:
+                if tmp_copy.exists():
+                    tmp_copy.unlink()
+            file_info['name'] = name
+            manifest['files'].append(file_info)
+
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        manifest_path = snapshots_dir / f"{Path(source_db).stem}_snapshot_{timestamp}.json"
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest_path
+
+
+def load_manifest(manifest_path: str) -> Dict:
+    """Прочитать манифест снимка"""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def verify_snapshot(manifest_path: str, deep: bool = False) -> List[str]:
+    """
+    Проверить снимок
+
+    Быстрая проверка - наличие всех блоков; глубокая - распаковка и сверка хешей.
+
+    Args:
+        manifest_path: Путь к манифесту
+        deep: Выполнить глубокую проверку
+
+    Returns:
+        Список найденных проблем (пустой - снимок в порядке)
+    """
+    manifest_path = Path(manifest_path)
+    backup_dir = manifest_path.parent.parent
+    manifest = load_manifest(manifest_path)
+    problems = []
+
+    for file_info in manifest['files']:
+        for digest in file_info['chunks']:
+            object_path = _object_path(backup_dir, digest)
+            if not object_path.exists():
+                problems.append(f"{file_info['name']}: нет блока {digest[:12]}")
+                continue
+            if deep:
+                data = zlib.decompress(object_path.read_bytes())
+                if hashlib.sha256(data).hexdigest() != digest:
+                    problems.append(f"{file_info['name']}: поврежден блок {digest[:12]}")
+
+    return problems
+
+
+def restore_snapshot(manifest_path: str, target_db: str) -> None:
+    """
+    Восстановить БД и партиции из снимка
+
+    Файлы собираются из блоков во временные копии, сверяются по sha256
+    и проверяются quick_check; основной файл переносится в целевую БД через backup API.
+    Партиции целевой БД, которых нет в снимке, удаляются.
+
+    Args:
+        manifest_path: Путь к манифесту
+        target_db: Путь к целевой БД
+    """
+    manifest_path = Path(manifest_path)
+    backup_dir = manifest_path.parent.parent
+    manifest = load_manifest(manifest_path)
+    target_path = Path(target_db)
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+
+    main_name = manifest['files'][0]['name']
+    restored = set()
+    for file_info in manifest['files']:
+        if file_info['name'] == main_name:
+            destination = target_path
+        else:
+            # Партиции называются по имени основной БД
+            partition_name = Path(file_info['name']).name
+            destination = target_path.parent / "partitions" / partition_name.replace(
+                Path(main_name).stem, target_path.stem, 1)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        restored.add(destination)
+
+        tmp_file = destination.parent / f".{destination.name}.restore"
+        file_hash = hashlib.sha256()
+        try:
+            with open(tmp_file, 'wb') as f:
+                for digest in file_info['chunks']:
+                    data = zlib.decompress(_object_path(backup_dir, digest).read_bytes())
+                    file_hash.update(data)
+                    f.write(data)
+
+            if file_hash.hexdigest() != file_info['sha256']:
+                raise ValueError(f"Контрольная сумма {file_info['name']} не совпадает")
+
+            check = quick_check(str(tmp_file))
+            if check != "ok":
+                raise ValueError(f"Ошибка целостности {file_info['name']}: {check}")
+
+            if destination == target_path:
+                online_copy(str(tmp_file), str(target_path))
+            else:
+                os.replace(tmp_file, destination)
+        finally:
+            if tmp_file.exists():
+                tmp_file.unlink()
+
+    # Партиции, созданные после снимка, иначе снова подключились бы к восстановленной БД
+    for _, partition in database_files(str(target_path))[1:]:
+        if partition not in restored:
+            partition.unlink()
+
+
+def collect_garbage(backup_dir: str, keep_days: int = 30) -> Tuple[int, int]:
+    """
+    Удалить старые снимки и блоки, на которые больше не ссылается ни один снимок
+
+    Выполняется под блокировкой хранилища и не пересекается с create_snapshot.
+
+    Args:
+        backup_dir: Каталог хранилища снимков
+        keep_days: Сколько дней хранить снимки
+
+    Returns:
+        (удалено снимков, удалено блоков)
+    """
+    backup_path = Path(backup_dir)
+    snapshots_dir = backup_path / "snapshots"
+    if not snapshots_dir.exists():
+        return 0, 0
+
+    threshold = datetime.now().timestamp() - keep_days * 24 * 60 * 60
+    deleted_snapshots = 0
+    referenced = set()
+
+    with _store_lock(backup_path):
+        for manifest_path in snapshots_dir.glob("*.json"):
+            if manifest_path.stat().st_mtime < threshold:
+                manifest_path.unlink()
+                deleted_snapshots += 1
+                continue
+            for file_info in load_manifest(manifest_path)['files']:
+                referenced.update(file_info['chunks'])
+
+        deleted_chunks = 0
+        for object_path in (backup_path / "objects").glob("*/*"):
+            if object_path.name not in referenced:
+                object_path.unlink()
+                deleted_chunks += 1
+
+    return deleted_snapshots, deleted_chunks
@@ -0,0 +1,90 @@
+"""
+Фоновая запись в БД для асинхронного мониторинга
+
+sqlite3 блокирует поток на время транзакции, поэтому запись из корутин
+останавливала бы все загрузки. DBWriter выполняет операции записи по
+порядку в отдельном потоке: event loop только ставит их в ограниченную
+очередь (submit_async ждет места в ней, не блокируя цикл), а результаты
+филиалов попадают в БД сразу по готовности.
+"""
+
+import queue
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Callable
+
+from modules.advanced_logger import get_logger
+
+
+# Максимум операций, ожидающих записи: при переполнении постановка ждет
+MAX_PENDING_WRITES = 100
+
+
+class DBWriter:
+    """Поток-писатель: выполняет операции записи в порядке постановки"""
+
+    def __init__(self, max_pending: int = MAX_PENDING_WRITES, name: str = "db-writer"):
+        """
+        Args:
+            max_pending: Размер очереди операций
+            name: Имя потока
+        """
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = threading.Thread(target=self._loop, name=name, daemon=True)
+        self._thread.start()
+        self.logger = get_logger()
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Поставить операцию записи в очередь
+
+        Если очередь заполнена, вызов ждет освобождения места (запись отстает от загрузки).
+
+        Returns:
+            Future с результатом func
+        """
+        future = Future()
+        self._queue.put((future, func, args, kwargs))
+        return future
+
+    async def submit_async(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Поставить операцию записи в очередь из корутины
+
+        При заполненной очереди ожидание выполняется в пуле потоков,
+        event loop продолжает загрузки.
+
+        Returns:
+            Future с результатом func
+        """
+        future = Future()
+        item = (future, func, args, kwargs)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, self._queue.put, item)
+        return future
+
+    def close(self):
+        """Дождаться выполнения поставленных операций и остановить поток"""
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            future, func, args, kwargs = item
+            try:
+                future.set_result(func(*args, **kwargs))
+            except Exception as e:
+                self.logger.log("ERROR", f"Ошибка записи в БД: {e}")
+                future.set_exception(e)
@@ -6,10 +6,13 @@
 import streamlit as st
 import pandas as pd
 import sqlite3
+from datetime import datetime
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode, DataReturnMode, JsCode
 
+from modules.database import VGTRKDatabase
+
 
 class FilialsTableEditor:
     """Интерактивная таблица филиалов с возможностью редактирования"""
@@ -117,13 +120,22 @@ class FilialsTableEditor:
             
             # Сначала удаляем связанные записи из дополнительных таблиц
             cursor.execute("DELETE FROM filial_additional_domains WHERE filial_id = ?", (filial_id,))
+            cursor.execute(
+                "DELETE FROM result_articles WHERE result_id IN "
+                "(SELECT id FROM monitoring_results WHERE filial_id = ?)", (filial_id,)
+            )
             cursor.execute("DELETE FROM monitoring_results WHERE filial_id = ?", (filial_id,))
+            cursor.execute("DELETE FROM results_daily_stats WHERE filial_id = ?", (filial_id,))
+            cursor.execute("DELETE FROM latest_results WHERE filial_id = ?", (filial_id,))
             
             # Затем удаляем сам филиал
             cursor.execute("DELETE FROM filials WHERE id = ?", (filial_id,))
             
             conn.commit()
             conn.close()
+            
+            # Результаты прошлых месяцев лежат в файлах партиций
+            VGTRKDatabase(self.db_path).delete_archived_results(filial_id)
             return True
         except Exception as e:
             st.error(f"Ошибка удаления филиала: {e}")
@@ -759,4 +771,52 @@ class FilialsTableEditor:
         - **🗑️ Удалить филиал** - выберите конкретный филиал и подтвердите удаление
         
         ⚡ **Для мониторинга:** выберите нужные филиалы чекбоксами и перейдите на вкладку "🔍 Мониторинг"
-        """)
\ No newline at end of file
+        """)    
+    def display_host_health(self):
+        """Доступность сайтов филиалов: время ответа, серия ошибок, выключатель"""
+        from modules.host_health import host_of, derive_timeouts
+        
+        db = VGTRKDatabase(self.db_path)
+        records = {record['host']: record for record in db.get_host_health()}
+        if not records:
+            return
+        
+        now = datetime.now().timestamp()
+        rows = []
+        for filial in db.get_all_filials(active_only=False):
+            website = filial.get('website_url') or filial.get('website')
+            record = records.get(host_of(website)) if website else None
+            if not record:
+                continue
+            timeouts = derive_timeouts(record['latency_samples'])
+            if record['state'] == 'open' and (record['open_until'] or 0) > now:
+                state = '⛔ Отключен'
+            elif record['state'] == 'open':
+                state = '🔁 Пробная проверка'
+            elif record['error_streak']:
+                state = '⚠️ Ошибки'
+            else:
+                state = '✅ Доступен'
+            rows.append({
+                'Филиал': filial['name'],
+                'Сайт': record['host'],
+                'Состояние': state,
+                'Ответ, с': round(record['avg_latency'], 2) if record['avg_latency'] is not None else None,
+                'Таймаут, с': f"{timeouts[0]:g} / {timeouts[1]:g}" if timeouts else 'по умолчанию',
+                'Ошибок подряд': record['error_streak'],
+                'Последний успех': datetime.fromtimestamp(record['last_success_at']).strftime('%d.%m %H:%M')
+                if record['last_success_at'] else '—',
+                'Последняя ошибка': record['last_error'] or '—',
+                'Проверка после': datetime.fromtimestamp(record['open_until']).strftime('%d.%m %H:%M')
+                if record['state'] == 'open' and record['open_until'] else '—'
+            })
+        
+        disabled = sum(1 for row in rows if row['Состояние'] == '⛔ Отключен')
+        with st.expander(f"🩺 Доступность сайтов (отключено: {disabled})", expanded=disabled > 0):
+            st.caption("Сайт отключается после 3 ошибок подряд (таймаут, нет соединения, 5xx) и "
+                       "проверяется снова через 15 минут; при повторной ошибке срок удваивается. "
+                       "Таймаут (соединение / чтение) подбирается по времени ответа сайта.")
+            st.dataframe(pd.DataFrame(rows), use_container_width=True, hide_index=True)
+            if disabled and st.button("🔄 Сбросить отключения", key="reset_host_health_btn"):
+                db.reset_host_health()
+                st.rerun()
@@ -0,0 +1,251 @@
+"""
+Поиск по полнотекстовым RSS-лентам (Яндекс Турбо, yandex:full-text)
+
+Многие сайты ГТРК публикуют ленты, в которых вместе с заголовком идет
+полный текст статьи (turbo:content, yandex:full-text, content:encoded).
+Одна такая лента заменяет десятки запросов к страницам статей: текст
+проверяется на ключевые слова сразу при чтении ленты.
+
+Лента читается потоково (XMLPullParser по частям ответа): обработанные
+элементы очищаются, чтение прекращается при достижении max_items.
+Следующие страницы берутся по ссылке atom:link rel="next" (до MAX_PAGES).
+
+Найденная лента сохраняется в filials (feed_url, feed_type, feed_checked_at):
+поиск по FEED_PATHS выполняется один раз, сайт без ленты проверяется
+повторно не чаще раза в RECHECK_DAYS дней (needs_discovery(kind='feed')).
+"""
+
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import requests
+from bs4 import BeautifulSoup
+
+from modules.host_health import guarded_request
+from modules.sitemap_discovery import HEADERS, discover_sitemap
+
+# Пути полнотекстовых лент в порядке приоритета
+FEED_PATHS = [
+    "/turbo",
+    "/turbo.xml",
+    "/rss/turbo",
+    "/yandex/turbo",
+    "/yandex-turbo-sitemap.xml",
+    "/rss/yandex",
+    "/yandex.xml",
+    "/export/yandex.xml",
+    "/rss/full",
+    "/rss",
+    "/rss.xml",
+]
+
+TURBO_NS = 'http://turbo.yandex.ru'
+YANDEX_NS = 'http://news.yandex.ru'
+CONTENT_NS = 'http://purl.org/rss/1.0/modules/content/'
+ATOM_NS = 'http://www.w3.org/2005/Atom'
+
+# Элементы item с полным текстом статьи (в порядке предпочтения)
+FULL_TEXT_TAGS = (f'{{{TURBO_NS}}}content', f'{{{YANDEX_NS}}}full-text', f'{{{CONTENT_NS}}}encoded')
+
+# Максимум страниц ленты и размер части потока
+MAX_PAGES = 10
+CHUNK_SIZE = 64 * 1024
+
+# Таймаут загрузки страницы ленты, секунд
+FEED_TIMEOUT = 30
+
+
+def sniff_feed_type(head: str) -> Optional[str]:
+    """
+    Тип полнотекстовой ленты по началу документа
+
+    Returns:
+        turbo, yandex, content или None (не лента или лента без полного текста)
+    """
+    text = head.lower()
+    if '<rss' not in text:
+        return None
+    if TURBO_NS in text:
+        return 'turbo'
+    if YANDEX_NS in text:
+        return 'yandex'
+    if CONTENT_NS in text:
+        return 'content'
+    return None
+
+
+def discover_feed(website: str, health=None, session=None) -> Optional[Dict[str, str]]:
+    """Найти полнотекстовую ленту сайта: FEED_PATHS проверяются одновременно"""
+    return discover_sitemap(website, health=health, session=session, paths=FEED_PATHS,
+                            sniff=sniff_feed_type, robots=False)
+
+
+def _parse_date(text: Optional[str]) -> Optional[datetime]:
+    """Дата pubDate (RFC 822) или ISO в локальном времени без часового пояса"""
+    if not text:
+        return None
+    text = text.strip()
+    try:
+        parsed = parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        try:
+            parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def iter_feed_items(chunks) -> Iterator[Tuple[str, Any]]:
+    """
+    Потоковый разбор RSS
+
+    Args:
+        chunks: Части документа (bytes), например response.iter_content()
+
+    Yields:
+        ('item', {'title', 'link', 'date', 'html'}) для каждой записи
+        и ('next', url) для ссылки на следующую страницу
+    """
+    parser = ET.XMLPullParser(events=('end',))
+    for chunk in chunks:
+        parser.feed(chunk)
+        for _, elem in parser.read_events():
+            if elem.tag == 'item':
+                html = next((elem.findtext(tag) for tag in FULL_TEXT_TAGS if elem.find(tag) is not None), None)
+                yield 'item', {
+                    'title': (elem.findtext('title') or '').strip(),
+                    'link': (elem.findtext('link') or '').strip(),
+                    'date': _parse_date(elem.findtext('pubDate')),
+                    'html': html
+                }
+                # Разобранная запись больше не нужна: память не растет с размером ленты
+                elem.clear()
+            elif elem.tag == f'{{{ATOM_NS}}}link' and elem.get('rel') == 'next' and elem.get('href'):
+                yield 'next', elem.get('href')
+    parser.close()
+
+
+def html_to_text(html: str) -> str:
+    """Текст статьи из HTML полнотекстовой записи"""
+    return ' '.join(BeautifulSoup(html, 'html.parser').get_text(' ').split())
+
+
+def make_snippet(text: str, keyword: str, width: int = 150) -> str:
+    """Фрагмент текста вокруг первого вхождения ключевого слова"""
+    pos = text.lower().find(keyword.lower())
+    if pos < 0:
+        return text[:width * 2]
+    start, end = max(0, pos - width), min(len(text), pos + width)
+    return ('...' if start else '') + text[start:end].strip() + ('...' if end < len(text) else '')
+
+
+def search_fulltext_feed(website: str, keywords: List[str], date_from: datetime, date_to: datetime,
+                         feed_url: Optional[str] = None, health=None, session=None,
+                         max_items: int = 500, discover: bool = True) -> Dict[str, Any]:
+    """
+    Поиск ключевых слов в полнотекстовой ленте сайта без загрузки страниц статей
+
+    Args:
+        website: Адрес сайта
+        keywords: Ключевые слова
+        date_from: Начало периода
+        date_to: Конец периода
+        feed_url: Известная лента (иначе ищется по FEED_PATHS)
+        health: HostHealth
+        session: requests.Session или модуль requests
+        max_items: Максимум прочитанных записей
+        discover: Искать ленту, если feed_url не задан
+
+    Returns:
+        Итог в формате ScrapyParser.search_sitemap (sitemap_status found - лента
+        найдена и содержит полный текст) плюс feed_url, feed_type, pages и
+        discovered (поиск ленты выполнялся - результат стоит сохранить)
+    """
+    started = time.time()
+    session = session or requests
+    outcome = {
+        'sitemap_url': None,
+        'sitemap_status': 'not_found',
+        'feed_url': feed_url,
+        'feed_type': None,
+        'discovered': False,
+        'pages': 0,
+        'urls_in_window': 0,
+        'articles_checked': 0,
+        'articles_fetched': 0,
+        'articles': [],
+        'timings': {}
+    }
+
+    if not feed_url:
+        found = discover_feed(website, health=health, session=session) if discover else None
+        outcome['discovered'] = discover
+        if not found:
+            outcome['timings']['total'] = outcome['timings']['sitemap'] = round(time.time() - started, 3)
+            return outcome
+        outcome['feed_url'], outcome['feed_type'] = found['url'], found['type']
+    outcome['timings']['sitemap'] = round(time.time() - started, 3)
+
+    items_read = full_text_items = 0
+    next_url = outcome['feed_url']
+    seen_pages = set()
+    while next_url and next_url not in seen_pages and outcome['pages'] < MAX_PAGES and items_read < max_items:
+        seen_pages.add(next_url)
+        page_url, next_url = next_url, None
+        try:
+            response = guarded_request(health, session, 'GET', page_url, timeout=FEED_TIMEOUT,
+                                       stream=True, headers=HEADERS, verify=False)
+        except requests.RequestException:
+            break
+        try:
+            if response.status_code != 200:
+                break
+            outcome['pages'] += 1
+            for kind, value in iter_feed_items(response.iter_content(CHUNK_SIZE)):
+                if kind == 'next':
+                    next_url = value
+                    continue
+                items_read += 1
+                if value['html']:
+                    full_text_items += 1
+                    _match_item(value, keywords, date_from, date_to, outcome)
+                if items_read >= max_items:
+                    break
+        except ET.ParseError:
+            break
+        finally:
+            response.close()
+
+    # Лента без полного текста не заменяет загрузку статей
+    if full_text_items:
+        outcome['sitemap_status'] = 'found'
+        outcome['sitemap_url'] = outcome['feed_url']
+    outcome['timings']['total'] = round(time.time() - started, 3)
+    return outcome
+
+
+def _match_item(item: Dict[str, Any], keywords: List[str], date_from: datetime, date_to: datetime,
+                outcome: Dict[str, Any]):
+    """Проверить запись ленты и добавить ее в outcome['articles'] при совпадении"""
+    if item['date'] and not (date_from <= item['date'] <= date_to):
+        return
+    outcome['urls_in_window'] += 1
+    outcome['articles_checked'] += 1
+
+    text = html_to_text(item['html'])
+    full_text = f"{item['title']} {text}".lower()
+    found_keywords = [keyword for keyword in keywords if keyword.lower() in full_text]
+    if found_keywords:
+        outcome['articles'].append({
+            'url': item['link'],
+            'title': item['title'] or "Без заголовка",
+            'content': text[:1000],
+            'snippet': make_snippet(text, found_keywords[0]),
+            'keywords': found_keywords,
+            'date': item['date']
+        })
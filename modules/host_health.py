@@ -0,0 +1,323 @@
+"""
+Доступность сайтов филиалов и автоматический выключатель (circuit breaker)
+
+Недоступный сайт заставлял SiteParser ждать полный DEFAULT_TIMEOUT, а
+ScrapyParser.find_sitemap повторял ожидание для каждого шаблона и
+robots.txt. HostHealth хранит по каждому хосту (таблица host_health)
+среднее время ответа, серию ошибок и время последнего успеха:
+
+    closed    - запросы выполняются как обычно
+    open      - после FAILURE_THRESHOLD ошибок подряд запросы к хосту
+                сразу завершаются ошибкой HostUnavailable до open_until
+    half_open - срок истек: пропускается один пробный запрос; успех
+                закрывает выключатель, ошибка открывает его на вдвое
+                больший срок (до MAX_OPEN_SECONDS)
+
+Ошибкой хоста считаются таймауты, ошибки соединения и ответы 5xx.
+Одновременные проверки одного сайта (поиск sitemap - десяток путей сразу)
+учитываются через failure_once: медленный сайт получает за поиск одну
+ошибку, а не открытый выключатель.
+
+Изменения копятся в памяти и сохраняются в БД одной транзакцией (flush) -
+после филиала и в конце запуска, а не при каждом ответе.
+
+По последним замерам времени ответа (LATENCY_SAMPLES на хост) вычисляются
+таймауты хоста (timeouts): чтение - p99 × TIMEOUT_FACTOR, соединение -
+p50 × TIMEOUT_FACTOR, в пределах floor/ceiling. Быстрые сайты перестают
+держать запуск полным DEFAULT_TIMEOUT, медленные, но живые - не обрываются.
+"""
+
+import time
+import threading
+from typing import Any, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+
+
+# Ошибок подряд до открытия выключателя
+FAILURE_THRESHOLD = 3
+
+# Срок первого открытия и верхняя граница (удваивается при неудачной пробе)
+OPEN_SECONDS = 15 * 60
+MAX_OPEN_SECONDS = 24 * 60 * 60
+
+# Вес последнего ответа в скользящем среднем времени ответа
+LATENCY_WEIGHT = 0.3
+
+# Замеров времени ответа на хост (последние) и минимум для адаптивного таймаута
+LATENCY_SAMPLES = 50
+MIN_LATENCY_SAMPLES = 5
+
+# Таймаут = перцентиль × множитель в пределах [floor, ceiling], секунд
+TIMEOUT_FACTOR = 3.0
+READ_TIMEOUT_FLOOR = 3.0
+READ_TIMEOUT_CEILING = 60.0
+CONNECT_TIMEOUT_FLOOR = 2.0
+CONNECT_TIMEOUT_CEILING = 10.0
+
+
+class HostUnavailable(requests.ConnectionError):
+    """Запрос не выполнен: хост отключен выключателем"""
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль q (0..100) по ближайшему рангу"""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def derive_timeouts(samples: List[float]) -> Optional[Tuple[float, float]]:
+    """
+    Таймауты (соединение, чтение) по замерам времени ответа хоста
+
+    Returns:
+        Кортеж секунд или None, если замеров недостаточно
+    """
+    if len(samples) < MIN_LATENCY_SAMPLES:
+        return None
+    connect = min(max(percentile(samples, 50) * TIMEOUT_FACTOR, CONNECT_TIMEOUT_FLOOR), CONNECT_TIMEOUT_CEILING)
+    read = min(max(percentile(samples, 99) * TIMEOUT_FACTOR, READ_TIMEOUT_FLOOR), READ_TIMEOUT_CEILING)
+    return round(connect, 2), round(read, 2)
+
+
+def host_of(url: str) -> str:
+    """Хост из URL (или адреса сайта без схемы)"""
+    if '://' not in url:
+        url = f"https://{url}"
+    return urlparse(url).netloc.lower()
+
+
+class HostHealth:
+    """Состояние хостов с сохранением в БД (потокобезопасно)"""
+
+    def __init__(self, db):
+        """
+        Args:
+            db: VGTRKDatabase
+        """
+        self.db = db
+        self._lock = threading.Lock()
+        self._records = {record['host']: record for record in db.get_host_health()}
+        self._probing = set()
+        # Хосты с несохраненными изменениями; flush выполняется по одному
+        self._dirty = set()
+        self._flush_lock = threading.Lock()
+
+    def state(self, url: str) -> str:
+        """Текущее состояние хоста: closed, open или half_open"""
+        record = self._records.get(host_of(url))
+        if not record or record['state'] == 'closed':
+            return 'closed'
+        if record['state'] == 'open' and time.time() < (record['open_until'] or 0):
+            return 'open'
+        return 'half_open'
+
+    def allow(self, url: str) -> bool:
+        """
+        Можно ли выполнять запрос к хосту
+
+        В состоянии half_open разрешается только один пробный запрос за раз.
+        """
+        host = host_of(url)
+        with self._lock:
+            state = self.state(url)
+            if state == 'closed':
+                return True
+            if state == 'open' or host in self._probing:
+                return False
+            self._probing.add(host)
+            return True
+
+    def check(self, url: str):
+        """То же, что allow, но с исключением HostUnavailable для отключенного хоста"""
+        if not self.allow(url):
+            raise HostUnavailable(self.describe(url))
+
+    def describe(self, url: str) -> str:
+        """Причина отключения хоста для логов и результатов"""
+        record = self._records.get(host_of(url))
+        if not record or record['state'] == 'closed':
+            return f"Сайт {host_of(url)} доступен"
+        return (f"Сайт {host_of(url)} недоступен ({record['error_streak']} ошибок подряд: "
+                f"{record.get('last_error') or 'нет ответа'}), повторная проверка после "
+                f"{time.strftime('%d.%m %H:%M', time.localtime(record['open_until'] or time.time()))}")
+
+    def record_success(self, url: str, latency: float):
+        """Учесть успешный ответ хоста"""
+        host = host_of(url)
+        with self._lock:
+            self._probing.discard(host)
+            record = self._record(host)
+            record['avg_latency'] = latency if record['avg_latency'] is None else (
+                LATENCY_WEIGHT * latency + (1 - LATENCY_WEIGHT) * record['avg_latency'])
+            record['latency_samples'] = (record['latency_samples'] + [round(latency, 3)])[-LATENCY_SAMPLES:]
+            record.update(state='closed', error_streak=0, open_until=None,
+                          open_seconds=None, last_success_at=time.time())
+            self._dirty.add(host)
+
+    def record_failure(self, url: str, error: str):
+        """Учесть ошибку хоста (таймаут, ошибка соединения, 5xx)"""
+        host = host_of(url)
+        with self._lock:
+            was_probe = host in self._probing
+            self._probing.discard(host)
+            record = self._record(host)
+            record['error_streak'] += 1
+            record['failures'] += 1
+            record.update(last_error=str(error)[:300], last_failure_at=time.time())
+
+            if was_probe:
+                # Неудачная проба: открываем на вдвое больший срок
+                record['open_seconds'] = min((record['open_seconds'] or OPEN_SECONDS) * 2, MAX_OPEN_SECONDS)
+            elif record['state'] == 'closed' and record['error_streak'] >= FAILURE_THRESHOLD:
+                record['open_seconds'] = OPEN_SECONDS
+            if record['open_seconds']:
+                record.update(state='open', open_until=time.time() + record['open_seconds'])
+            self._dirty.add(host)
+
+    def add_latency_samples(self, samples: Dict[str, List[float]]):
+        """
+        Добавить замеры времени ответа, собранные асинхронным обходом
+
+        Args:
+            samples: {хост: [секунд]} (ConcurrencyController.export, ключ latencies)
+        """
+        with self._lock:
+            for host, latencies in samples.items():
+                if not latencies:
+                    continue
+                record = self._record(host)
+                record['latency_samples'] = (record['latency_samples'] +
+                                             [round(value, 3) for value in latencies])[-LATENCY_SAMPLES:]
+                self._dirty.add(host)
+
+    def release(self, url: str):
+        """Освободить пробный запрос без учета результата (ошибка не связана с хостом)"""
+        with self._lock:
+            self._probing.discard(host_of(url))
+
+    def flush(self):
+        """Сохранить измененные записи в БД одной транзакцией"""
+        with self._flush_lock:
+            with self._lock:
+                records = [dict(self._records[host], latency_samples=list(self._records[host]['latency_samples']))
+                           for host in self._dirty]
+                self._dirty.clear()
+            if records:
+                self.db.save_host_health(records)
+
+    def failure_once(self) -> 'FailureOnce':
+        """Обертка для группы одновременных запросов: не больше одной ошибки на хост"""
+        return FailureOnce(self)
+
+    def timeouts(self, url: str, default: Union[float, Tuple[float, float]] = None):
+        """
+        Таймаут запроса к хосту по истории времени ответа
+
+        Args:
+            url: URL запроса
+            default: Таймаут для хоста без достаточной истории
+
+        Returns:
+            (соединение, чтение) в секундах или default
+        """
+        record = self._records.get(host_of(url))
+        derived = derive_timeouts(record['latency_samples']) if record else None
+        return derived or default
+
+    def all_timeouts(self) -> Dict[str, Tuple[float, float]]:
+        """Адаптивные таймауты всех хостов с достаточной историей {хост: (соединение, чтение)}"""
+        result = {}
+        for host, record in self._records.items():
+            derived = derive_timeouts(record['latency_samples'])
+            if derived:
+                result[host] = derived
+        return result
+
+    def record_response(self, url: str, response: requests.Response, latency: float):
+        """Учесть ответ: 5xx - ошибка хоста, остальное - успех"""
+        if response.status_code >= 500:
+            self.record_failure(url, f"HTTP {response.status_code}")
+        else:
+            self.record_success(url, latency)
+
+    def request(self, session, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        HTTP-запрос с проверкой и учетом доступности хоста
+
+        Raises:
+            HostUnavailable: хост отключен выключателем
+            requests.RequestException: ошибка запроса
+        """
+        self.check(url)
+        if 'timeout' in kwargs:
+            kwargs['timeout'] = self.timeouts(url, kwargs['timeout'])
+        started = time.time()
+        try:
+            response = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self.record_failure(url, type(e).__name__)
+            raise
+        except Exception:
+            # Ошибка не говорит о доступности хоста: только освобождаем пробу
+            self.release(url)
+            raise
+        self.record_response(url, response, time.time() - started)
+        return response
+
+    def _record(self, host: str) -> Dict[str, Any]:
+        if host not in self._records:
+            self._records[host] = {
+                'host': host, 'state': 'closed', 'error_streak': 0, 'failures': 0,
+                'avg_latency': None, 'last_error': None, 'last_success_at': None,
+                'last_failure_at': None, 'open_until': None, 'open_seconds': None,
+                'latency_samples': []
+            }
+        return self._records[host]
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Все записи о хостах"""
+        return list(self._records.values())
+
+
+class FailureOnce:
+    """
+    HostHealth, учитывающий не больше одной ошибки на хост
+
+    Одновременные проверки медленного сайта завершаются таймаутом почти
+    одновременно; каждая по отдельности открыла бы выключатель за один
+    поиск. Остальные методы и успехи передаются HostHealth как есть.
+    """
+
+    def __init__(self, health: HostHealth):
+        self._health = health
+        self._failed_lock = threading.Lock()
+        self._failed = set()
+
+    def __getattr__(self, name):
+        return getattr(self._health, name)
+
+    def record_failure(self, url: str, error: str):
+        """Первая ошибка хоста учитывается, следующие только освобождают пробу"""
+        host = host_of(url)
+        with self._failed_lock:
+            first = host not in self._failed
+            self._failed.add(host)
+        if first:
+            self._health.record_failure(url, error)
+        else:
+            self._health.release(url)
+
+    # Вызывают self.record_failure - т.е. версию обертки
+    record_response = HostHealth.record_response
+    request = HostHealth.request
+
+
+def guarded_request(health: Optional[HostHealth], session, method: str, url: str,
+                    **kwargs) -> requests.Response:
+    """Запрос через HostHealth, если он задан, иначе напрямую"""
+    if health is None:
+        return session.request(method, url, **kwargs)
+    return health.request(session, method, url, **kwargs)
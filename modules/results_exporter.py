@@ -0,0 +1,157 @@
+"""
+Потоковый экспорт результатов мониторинга в Excel, CSV и Parquet
+
+Результаты читаются из БД пачками (VGTRKDatabase.iter_monitoring_results)
+и сразу пишутся в файл, поэтому память не зависит от объема выгрузки.
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from openpyxl import Workbook
+
+
+EXPORT_FORMATS = ('xlsx', 'csv', 'parquet')
+
+# Ограничение длины контента в выгрузке (как в прежнем экспорте в Excel)
+CONTENT_LIMIT = 500
+
+# Типы колонок для Parquet, остальные колонки - строки
+PARQUET_INT_COLUMNS = ('id', 'filial_id', 'search_query_id', 'session_id')
+PARQUET_FLOAT_COLUMNS = ('relevance_score',)
+
+
+def _cell_value(column: str, value: Any) -> Any:
+    """Привести значение к виду, пригодному для ячейки/CSV"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if column == 'content' and isinstance(value, str):
+        return value[:CONTENT_LIMIT]
+    return value
+
+
+def _iter_rows(chunks: Iterable[List[Dict[str, Any]]]):
+    """Развернуть пачки результатов в (колонки, строки) с единым порядком колонок"""
+    columns = None
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if columns is None:
+            columns = list(chunk[0].keys())
+            yield columns, None
+        yield columns, [[_cell_value(col, result.get(col)) for col in columns] for result in chunk]
+
+
+def write_results_sheet(workbook: Workbook, chunks: Iterable[List[Dict[str, Any]]],
+                        sheet_name: str = 'Результаты') -> int:
+    """
+    Записать результаты на лист write-only книги Excel
+
+    Args:
+        workbook: Книга, созданная с write_only=True
+        chunks: Пачки результатов
+        sheet_name: Название листа
+
+    Returns:
+        Количество записанных строк
+    """
+    sheet = None
+    count = 0
+    for columns, rows in _iter_rows(chunks):
+        if rows is None:
+            sheet = workbook.create_sheet(sheet_name)
+            sheet.append(columns)
+            continue
+        for row in rows:
+            sheet.append(row)
+        count += len(rows)
+    return count
+
+
+def _write_csv(output_path: Path, chunks) -> int:
+    """Потоковая запись CSV (UTF-8 с BOM, чтобы Excel корректно открывал кириллицу)"""
+    count = 0
+    with open(output_path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        for columns, rows in _iter_rows(chunks):
+            if rows is None:
+                writer.writerow(columns)
+                continue
+            writer.writerows(rows)
+            count += len(rows)
+    return count
+
+
+def _write_parquet(output_path: Path, chunks) -> int:
+    """Потоковая запись Parquet: каждая пачка - отдельная группа строк"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Для экспорта в Parquet установите пакет pyarrow: pip install pyarrow")
+
+    writer = None
+    schema = None
+    count = 0
+    try:
+        for columns, rows in _iter_rows(chunks):
+            if rows is None:
+                schema = pa.schema([
+                    (col, pa.int64() if col in PARQUET_INT_COLUMNS
+                     else pa.float64() if col in PARQUET_FLOAT_COLUMNS
+                     else pa.string())
+                    for col in columns
+                ])
+                writer = pq.ParquetWriter(str(output_path), schema)
+                continue
+
+            arrays = []
+            for index, field in enumerate(schema):
+                values = [row[index] for row in rows]
+                if pa.types.is_string(field.type):
+                    values = [None if v is None else str(v) for v in values]
+                arrays.append(pa.array(values, type=field.type))
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            count += len(rows)
+    finally:
+        if writer:
+            writer.close()
+    return count
+
+
+def export_results(db, output_path: str, export_format: Optional[str] = None,
+                   chunk_size: int = 1000, **filters) -> int:
+    """
+    Экспорт результатов мониторинга с фильтрами вкладки результатов
+
+    Args:
+        db: Экземпляр VGTRKDatabase
+        output_path: Путь к файлу
+        export_format: 'xlsx', 'csv' или 'parquet' (по умолчанию - по расширению файла)
+        chunk_size: Размер пачки при чтении из БД
+        **filters: filial_id, date_from, date_to, status, session_id, federal_district
+
+    Returns:
+        Количество выгруженных результатов
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    export_format = export_format or output_path.suffix.lstrip('.').lower()
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"Неподдерживаемый формат экспорта: {export_format}")
+
+    chunks = db.iter_monitoring_results(chunk_size=chunk_size, **filters)
+
+    if export_format == 'csv':
+        return _write_csv(output_path, chunks)
+    if export_format == 'parquet':
+        return _write_parquet(output_path, chunks)
+
+    workbook = Workbook(write_only=True)
+    count = write_results_sheet(workbook, chunks)
+    if count == 0:
+        workbook.create_sheet('Результаты').append(['Нет результатов'])
+    workbook.save(str(output_path))
+    return count
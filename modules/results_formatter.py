@@ -2,7 +2,6 @@
 Модуль для форматирования результатов поиска через Sitemap
 """
 
-import streamlit as st
 from typing import List, Dict
 from datetime import datetime
 
@@ -81,6 +80,9 @@ class SitemapResultsFormatter:
             filial_name: Название филиала
             keyword: Ключевое слово
         """
+        # Streamlit нужен только для отображения: форматирование работает и без него
+        import streamlit as st
+        
         if not articles:
             st.info(f"Статей с упоминанием '{keyword}' не найдено")
             return
@@ -0,0 +1,1454 @@
+"""
+Фоновый запуск мониторинга филиалов без Streamlit
+
+Конвейер мониторинга (парсинг, поиск, анализ GigaChat, сохранение в БД)
+вынесен из интерфейса в MonitoringRunner. Прогресс передается событиями
+(словари), которые можно выводить построчно в JSON (JsonLinesProgress).
+
+Запуск из cron/systemd:
+    python -m modules.runner --all --mode sitemap_search --days 1
+    python -m modules.runner --all --mode fulltext_search --days 1
+    python -m modules.runner --district СФО --queries 1,2 --async --concurrent 20
+    python -m modules.runner --all --async --shards 4 --shard-strategy cost
+    python -m modules.runner --filials 5,7 --date 2025-01-15 --progress-file logs/run.jsonl
+
+С флагом --enqueue сессия ставится в очередь и выполняется воркерами (modules.worker).
+"""
+
+import sys
+import json
+import time
+import asyncio
+import traceback
+import subprocess
+from pathlib import Path
+from datetime import datetime, date
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+from modules.database import VGTRKDatabase
+from modules.site_parser import SiteParser
+from modules.advanced_logger import LogLevel, get_logger
+from modules.results_formatter import SitemapResultsFormatter
+from modules.sharding import SHARD_STRATEGIES, iter_sharded_results
+from modules.db_writer import DBWriter
+from modules.host_health import HostHealth
+from modules.sitemap_discovery import discover_for_filial, needs_discovery
+from modules.fulltext_feed import search_fulltext_feed
+
+
+SEARCH_MODES = ('main_only', 'main_and_news', 'rss_search', 'sitemap_search', 'fulltext_search')
+
+SEARCH_MODE_NAMES = {
+    "main_only": "Только главная страница",
+    "main_and_news": "Главная + Новости",
+    "rss_search": "RSS лента",
+    "sitemap_search": "Sitemap архив",
+    "fulltext_search": "Полнотекстовая лента (Турбо)"
+}
+
+# Режимы поиска по архиву за период: полнотекстовая лента (modules/fulltext_feed.py),
+# а при ее отсутствии - sitemap
+ARCHIVE_MODES = ('sitemap_search', 'fulltext_search')
+
+DEFAULT_DB_PATH = "data/vgtrk_monitoring.db"
+
+
+class JsonLinesProgress:
+    """Вывод событий прогресса построчно в JSON (stdout или файл)"""
+
+    def __init__(self, stream: Optional[TextIO] = None, path: Optional[str] = None):
+        """
+        Args:
+            stream: Поток вывода (по умолчанию stdout)
+            path: Файл для дозаписи событий (вместо потока)
+        """
+        self.path = Path(path) if path else None
+        self.stream = stream or sys.stdout
+        if self.path:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def __call__(self, event: Dict[str, Any]):
+        line = json.dumps(event, ensure_ascii=False, default=str) + '\n'
+        if self.path:
+            # Открываем на каждое событие: файл можно читать и ротировать параллельно
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+        else:
+            self.stream.write(line)
+            self.stream.flush()
+
+
+def read_progress(path: str) -> List[Dict[str, Any]]:
+    """
+    Прочитать события прогресса из JSON-lines файла
+
+    Неполная последняя строка (процесс еще пишет) пропускается.
+
+    Args:
+        path: Путь к файлу прогресса
+
+    Returns:
+        Список событий в порядке записи
+    """
+    events = []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return events
+
+
+def parse_date(value) -> Optional[date]:
+    """Дата из строки YYYY-MM-DD (или уже готовый date)"""
+    if value is None or isinstance(value, date):
+        return value
+    return datetime.strptime(str(value), '%Y-%m-%d').date()
+
+
+def describe_period(search_days: int = None, search_specific_date=None,
+                    search_date_range=None) -> str:
+    """Текстовое описание периода поиска для сессии мониторинга"""
+    if search_specific_date:
+        return f"Дата: {search_specific_date}"
+    if search_days:
+        return f"За {search_days} дней"
+    if search_date_range:
+        date_from, date_to = search_date_range
+        return f"С {date_from} по {date_to}"
+    return "Текущий день"
+
+
+def job_params(query_ids: List[int], search_mode: str = "main_only", search_days: int = None,
+               use_gigachat: bool = True, search_specific_date=None, search_date_range=None,
+               use_async: bool = False, max_concurrent: int = 20,
+               model: str = "GigaChat", temperature: float = 0.7,
+               shards: int = 1, shard_strategy: str = 'round_robin') -> Dict[str, Any]:
+    """Параметры запуска в виде JSON-совместимого словаря (для очереди заданий)"""
+    return {
+        'query_ids': list(query_ids),
+        'search_mode': search_mode,
+        'search_days': search_days,
+        'use_gigachat': use_gigachat,
+        'search_specific_date': str(search_specific_date) if search_specific_date else None,
+        'search_date_range': [str(d) for d in search_date_range] if search_date_range else None,
+        'use_async': bool(use_async and search_mode == "sitemap_search"),
+        'max_concurrent': max_concurrent,
+        'shards': shards,
+        'shard_strategy': shard_strategy,
+        'model': model,
+        'temperature': temperature
+    }
+
+
+def start_session(db: VGTRKDatabase, filial_ids: List[int], params: Dict[str, Any],
+                  session_name: str = "Мониторинг") -> int:
+    """
+    Создать сессию мониторинга с параметрами запуска (по ним сессию можно продолжить)
+
+    Returns:
+        ID сессии
+    """
+    date_range = params.get('search_date_range')
+    search_mode = params['search_mode']
+    return db.start_monitoring_session(
+        session_name=f"{session_name} {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+        search_mode=f"{search_mode}_async" if params.get('use_async') else search_mode,
+        search_period=describe_period(params.get('search_days'), params.get('search_specific_date'),
+                                      tuple(date_range) if date_range else None),
+        search_date=params.get('search_specific_date'),
+        params={**params, 'filial_ids': list(filial_ids)}
+    )
+
+
+def remaining_filial_ids(db: VGTRKDatabase, session: Dict[str, Any]) -> List[int]:
+    """ID филиалов сессии, для которых еще нет контрольной точки"""
+    params = session['params']
+    if isinstance(params, str):
+        params = json.loads(params)
+    done = db.get_session_checkpoints(session['id'])
+    return [filial_id for filial_id in params.get('filial_ids', []) if filial_id not in done]
+
+
+def enqueue_job(db: VGTRKDatabase, filial_ids: List[int], params: Dict[str, Any],
+                session_id: int = None) -> int:
+    """
+    Поставить филиалы сессии в очередь воркеров
+
+    Args:
+        db: База данных мониторинга
+        filial_ids: ID филиалов
+        params: Параметры из job_params
+        session_id: Продолжаемая сессия (по умолчанию создается новая)
+
+    Returns:
+        ID задания
+    """
+    if session_id is None:
+        session_id = start_session(db, filial_ids, params, session_name="Задание")
+    else:
+        db.update_monitoring_session(session_id, status='running', error_message=None)
+    return db.enqueue_monitoring_job(session_id, filial_ids, params)
+
+
+def resume_job(db: VGTRKDatabase, session_id: int) -> Optional[int]:
+    """
+    Продолжить незавершенную сессию через очередь: в задание попадают только необработанные филиалы
+
+    Returns:
+        ID задания или None, если продолжать нечего
+    """
+    session = db.get_session_info(session_id)
+    if not session or not session.get('params'):
+        raise ValueError(f"Сессия #{session_id} не найдена или создана без параметров запуска")
+    filial_ids = remaining_filial_ids(db, session)
+    if not filial_ids:
+        return None
+    params = {k: v for k, v in json.loads(session['params']).items() if k != 'filial_ids'}
+    return enqueue_job(db, filial_ids, params, session_id=session_id)
+
+
+class MonitoringRunner:
+    """Запуск сессии мониторинга филиалов с записью результатов в VGTRKDatabase"""
+
+    def __init__(self, db: VGTRKDatabase, log_level: LogLevel = LogLevel.INFO,
+                 model: str = "GigaChat", temperature: float = 0.7,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 should_stop: Optional[Callable[[], bool]] = None):
+        """
+        Args:
+            db: База данных мониторинга
+            log_level: Уровень логирования
+            model: Модель GigaChat
+            temperature: Температура генерации GigaChat
+            progress_callback: Получатель событий прогресса (словарь с ключом 'event')
+            should_stop: Функция, возвращающая True, если мониторинг нужно прервать
+        """
+        self.db = db
+        self.log_level = log_level
+        self.logger = get_logger(log_level)
+        self.model = model
+        self.temperature = temperature
+        self.progress_callback = progress_callback
+        self.should_stop = should_stop or (lambda: False)
+        self._gigachat_client = None
+        # Ленты, загруженные заранее prefetch_rss: {filial_id: результат parse_rss_feed}
+        self._rss_feeds = {}
+
+    def emit(self, event: str, **data):
+        """Передать событие прогресса получателю"""
+        if self.progress_callback:
+            self.progress_callback({
+                'event': event,
+                'time': datetime.now().isoformat(timespec='seconds'),
+                **data
+            })
+
+    @property
+    def gigachat_client(self):
+        """Клиент GigaChat создается только при первом обращении (получение токена - сетевой запрос)"""
+        if self._gigachat_client is None:
+            from modules.gigachat_client import GigaChatClient
+            from config.settings import GIGACHAT_API_KEY, GIGACHAT_CLIENT_ID
+            self._gigachat_client = GigaChatClient(
+                GIGACHAT_API_KEY,
+                GIGACHAT_CLIENT_ID,
+                self.model,
+                self.temperature,
+                log_level=self.log_level
+            )
+        return self._gigachat_client
+
+    def run(self, filials: list, queries: list, search_mode: str = "main_only",
+            search_days: int = None, use_gigachat: bool = True,
+            search_specific_date=None, search_date_range=None,
+            use_async: bool = False, max_concurrent: int = 20,
+            shards: int = 1, shard_strategy: str = 'round_robin') -> Dict[str, Any]:
+        """
+        Выполнить сессию мониторинга
+
+        Args:
+            filials: Филиалы (словари из БД)
+            queries: Поисковые запросы (словари из БД)
+            search_mode: main_only, main_and_news, rss_search, sitemap_search или fulltext_search
+            search_days: Период поиска в днях (sitemap)
+            use_gigachat: Анализировать найденное через GigaChat (sitemap)
+            search_specific_date: Конкретная дата поиска (sitemap)
+            search_date_range: Диапазон дат (с, по) (sitemap)
+            use_async: Асинхронная обработка (только sitemap)
+            max_concurrent: Число параллельных соединений в асинхронном режиме
+            shards: Число процессов асинхронного режима (modules.sharding)
+            shard_strategy: Стратегия деления филиалов между процессами
+
+        Returns:
+            Статистика сессии (включая session_id)
+        """
+        params = job_params(
+            [q['id'] for q in queries], search_mode, search_days, use_gigachat,
+            search_specific_date, search_date_range, use_async, max_concurrent,
+            self.model, self.temperature, shards, shard_strategy
+        )
+        session_id = start_session(
+            self.db, [f['id'] for f in filials], params,
+            session_name="Асинхронный мониторинг" if params['use_async'] else "Мониторинг"
+        )
+        self.logger.log("INFO", f"Создана сессия мониторинга #{session_id}")
+        return self._execute(session_id, filials, queries, params, total=len(filials))
+
+    def resume(self, session_id: int) -> Dict[str, Any]:
+        """
+        Продолжить незавершенную сессию: обрабатываются только филиалы без контрольной точки
+
+        Args:
+            session_id: ID сессии
+
+        Returns:
+            Статистика продолжения (включая session_id)
+        """
+        session = self.db.get_session_info(session_id)
+        if not session or not session.get('params'):
+            raise ValueError(f"Сессия #{session_id} не найдена или создана без параметров запуска")
+
+        params = json.loads(session['params'])
+        self.model = params.get('model', self.model)
+        self.temperature = params.get('temperature', self.temperature)
+
+        filials = [f for f in (self.db.get_filial_by_id(i) for i in remaining_filial_ids(self.db, session)) if f]
+        query_ids = set(params.get('query_ids', []))
+        queries = [q for q in self.db.get_search_queries(active_only=False) if q['id'] in query_ids]
+
+        total = len(params.get('filial_ids', []))
+        self.logger.log("INFO", f"Продолжение сессии #{session_id}: осталось {len(filials)} из {total} филиалов")
+        self.db.update_monitoring_session(session_id, status='running', error_message=None)
+        return self._execute(session_id, filials, queries, params, total=total)
+
+    def _execute(self, session_id: int, filials: list, queries: list,
+                 params: Dict[str, Any], total: int) -> Dict[str, Any]:
+        """Выполнить (или продолжить) сессию и закрыть ее с итоговым статусом"""
+        search_mode = params['search_mode']
+        use_async = params.get('use_async', False)
+        search_days = params.get('search_days')
+        max_concurrent = params.get('max_concurrent', 20)
+        date_range = params.get('search_date_range')
+        search_specific_date = parse_date(params.get('search_specific_date'))
+        search_date_range = tuple(parse_date(d) for d in date_range) if date_range else None
+        use_gigachat = params.get('use_gigachat', True)
+
+        self.emit('session_started', session_id=session_id, total=len(filials),
+                  search_mode=search_mode, use_async=use_async)
+
+        try:
+            if use_async and params.get('shards', 1) > 1:
+                self.logger.log("INFO", f"Запуск АСИНХРОННОГО мониторинга в {params['shards']} процессах "
+                                        f"с {max_concurrent} параллельными соединениями")
+                stats = self.process_sharded(
+                    filials, queries, search_days or 7, max_concurrent, session_id,
+                    params['shards'], params.get('shard_strategy', 'round_robin'))
+            elif use_async:
+                self.logger.log("INFO", f"Запуск АСИНХРОННОГО мониторинга с {max_concurrent} параллельными соединениями")
+                stats = self.run_in_loop(self.process_async(
+                    filials, queries, search_days or 7, max_concurrent, session_id))
+            else:
+                stats = self.process_sync(
+                    filials, queries, search_mode, search_days, use_gigachat,
+                    search_specific_date, search_date_range, session_id)
+        except Exception as e:
+            self.logger.log("ERROR", f"Критическая ошибка: {str(e)}")
+            self.db.update_monitoring_session(session_id, status='error', error_message=str(e))
+            self.emit('session_error', session_id=session_id, error=str(e))
+            raise
+
+        stats['session_id'] = session_id
+        if stats.get('stopped'):
+            # Остановленная сессия остается незавершенной: ее можно продолжить
+            done = len(self.db.get_session_checkpoints(session_id))
+            self.db.update_monitoring_session(
+                session_id,
+                status='error',
+                error_message=f"Остановлено пользователем (обработано {done} из {total})"
+            )
+            self.emit('session_stopped', **stats)
+            return stats
+
+        # results_count и filials_done ведутся контрольными точками
+        self.db.update_monitoring_session(
+            session_id,
+            filials_count=total,
+            queries_count=len(queries),
+            status='completed'
+        )
+        self.emit('session_completed', **stats)
+        return stats
+
+    @staticmethod
+    def run_in_loop(coroutine):
+        """Выполнить корутину в отдельном event loop"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            return loop.run_until_complete(coroutine)
+        finally:
+            loop.close()
+
+    @staticmethod
+    def new_session_stats() -> Dict[str, Any]:
+        """Пустые счетчики сессии для process_filial"""
+        return {
+            'total_checked': 0,
+            'successful': 0,
+            'errors': 0,
+            'total_time': 0,
+            'total_tokens_used': 0,
+            'avg_response_time': 0,
+            'avg_page_size': 0,
+            'response_times': [],
+            'page_sizes': []
+        }
+
+    def create_parsers(self, search_mode: str):
+        """Парсеры для process_filial: (SiteParser, ScrapyParser или None) с общим HostHealth"""
+        health = HostHealth(self.db)
+        site_parser = SiteParser(log_level=self.log_level, health=health)
+        scrapy_parser = None
+        if search_mode in ARCHIVE_MODES:
+            from modules.scrapy_parser import ScrapyParser
+            scrapy_parser = ScrapyParser(logger=self.logger, health=health)
+        return site_parser, scrapy_parser
+
+    def process_sync(self, filials: list, queries: list, search_mode: str,
+                     search_days: int = None, use_gigachat: bool = True,
+                     search_specific_date=None, search_date_range=None,
+                     session_id: int = None) -> Dict[str, Any]:
+        """
+        Последовательная обработка филиалов
+
+        Returns:
+            Статистика сессии
+        """
+        logger = self.logger
+        logger.log("INFO", "Начало мониторинга филиалов ВГТРК")
+
+        session_stats = self.new_session_stats()
+        session_start = time.time()
+
+        site_parser, scrapy_parser = self.create_parsers(search_mode)
+
+        total_filials = len(filials)
+        mode_name = SEARCH_MODE_NAMES.get(search_mode, search_mode)
+        if search_mode in ARCHIVE_MODES:
+            mode_name += f" ({search_days} дней)"
+        logger.log("INFO", f"Филиалов для проверки: {total_filials} | Режим: {mode_name}")
+
+        if search_mode == "rss_search":
+            # Ленты всех филиалов загружаются одновременно, анализ - по очереди
+            self.prefetch_rss(filials, site_parser)
+
+        for idx, filial in enumerate(filials):
+            if self.should_stop():
+                logger.log("WARNING", "Мониторинг остановлен пользователем")
+                self.emit('stopped', completed=idx, total=total_filials)
+                session_stats['stopped'] = True
+                break
+
+            self.emit('filial_started', index=idx + 1, total=total_filials,
+                      filial_id=filial.get('id'), filial_name=filial['name'])
+            started = time.time()
+
+            status = self.process_filial(
+                filial, queries, search_mode, site_parser, scrapy_parser, session_stats,
+                search_days, use_gigachat, search_specific_date, search_date_range,
+                session_id, position=f"{idx + 1}/{total_filials}"
+            )
+            self.emit('filial_done', index=idx + 1, total=total_filials,
+                      filial_id=filial.get('id'), filial_name=filial['name'],
+                      status=status, processing_time=round(time.time() - started, 2),
+                      progress=(idx + 1) / total_filials)
+        # Ответы, полученные вне филиалов (prefetch_rss при остановке до первого филиала)
+        if site_parser.health:
+            site_parser.health.flush()
+
+        # Подсчет финальной статистики
+        response_times = session_stats.pop('response_times')
+        page_sizes = session_stats.pop('page_sizes')
+        session_stats['total_time'] = time.time() - session_start
+        if response_times:
+            session_stats['avg_response_time'] = sum(response_times) / len(response_times)
+        if page_sizes:
+            session_stats['avg_page_size'] = sum(page_sizes) / len(page_sizes)
+
+        logger.log_session_stats(session_stats)
+        logger.log("INFO", f"✅ Мониторинг завершен за {session_stats['total_time']:.1f} сек")
+        self._rss_feeds.clear()
+
+        self.db.add_log(None, 'monitoring_complete', 'success',
+                        f'Проверено {total_filials} филиалов, успешно {session_stats["successful"]}, '
+                        f'ошибок {session_stats["errors"]}')
+        return session_stats
+
+    def process_filial(self, filial: Dict[str, Any], queries: list, search_mode: str,
+                       site_parser: SiteParser, scrapy_parser, session_stats: Dict[str, Any],
+                       search_days: int = None, use_gigachat: bool = True,
+                       search_specific_date=None, search_date_range=None,
+                       session_id: int = None, position: str = "") -> str:
+        """
+        Обработать один филиал: парсинг, поиск, анализ и сохранение результатов
+
+        Ошибки обработки не прерывают сессию: они пишутся в лог и счетчик errors.
+
+        Args:
+            filial: Филиал (словарь из БД)
+            queries: Поисковые запросы
+            search_mode: Режим поиска
+            site_parser: Парсер сайтов
+            scrapy_parser: Парсер sitemap (для ARCHIVE_MODES)
+            session_stats: Счетчики сессии (обновляются на месте)
+            session_id: ID сессии (результаты и контрольная точка филиала)
+            position: Позиция филиала в очереди для логов ("3/85")
+
+        Returns:
+            Итог по филиалу: success, no_data или error
+        """
+        before = (session_stats['successful'], session_stats['errors'])
+        started = time.time()
+        try:
+            self._process_filial(filial, queries, search_mode, site_parser, scrapy_parser,
+                                 session_stats, search_days, use_gigachat, search_specific_date,
+                                 search_date_range, session_id, position)
+        finally:
+            # Страницы филиала кэшируются только на время его обработки
+            site_parser.clear_page_cache()
+            if site_parser.health:
+                site_parser.health.flush()
+
+        if session_stats['errors'] > before[1]:
+            status = 'error'
+        elif session_stats['successful'] > before[0]:
+            status = 'success'
+        else:
+            status = 'no_data'
+
+        if session_id and filial.get('id'):
+            self.db.save_session_checkpoint(session_id, filial['id'], status,
+                                            session_stats['successful'] - before[0],
+                                            time.time() - started)
+        return status
+
+    def _process_filial(self, filial, queries, search_mode, site_parser, scrapy_parser,
+                        session_stats, search_days, use_gigachat, search_specific_date,
+                        search_date_range, session_id, position):
+        """Тело process_filial: ошибки учитываются в session_stats"""
+        logger = self.logger
+        db = self.db
+        filial_name = filial['name']
+        # Сначала пробуем website_url из БД, потом website
+        website = filial.get('website_url') or filial.get('website', '')
+
+        # Получаем sitemap_url из БД для передачи в парсер
+        sitemap_url = None
+        filial_full = None
+        if 'id' in filial:
+            filial_full = db.get_filial_by_id(filial['id'])
+            if filial_full:
+                sitemap_url = filial_full.get('sitemap_url')
+                filial['sitemap_url'] = sitemap_url
+
+        if not website:
+            logger.log("WARNING", f"{filial_name}: нет сайта")
+            session_stats['errors'] += 1
+            return
+
+        # Добавляем протокол если нет (но не для telegram ссылок)
+        if not website.startswith(('http://', 'https://', 'vk.com')):
+            website = f"https://{website}"
+
+        logger.log("INFO", f"Проверка {position}: {filial_name}")
+
+        # Сайт отключен выключателем после серии ошибок: не ждем таймаутов
+        health = site_parser.health
+        if health and health.state(website) == 'open':
+            error = health.describe(website)
+            self._rss_feeds.pop(filial.get('id'), None)
+            logger.log("WARNING", f"{filial_name}: {error}")
+            db.save_monitoring_result(filial['id'], {
+                'filial_id': filial['id'], 'url': website, 'status': 'error', 'error_message': error
+            }, session_id)
+            session_stats['errors'] += 1
+            return
+
+        try:
+            if search_mode in ARCHIVE_MODES:
+                if not sitemap_url and filial_full:
+                    # Поиск sitemap один раз с сохранением в filials, а не в каждой сессии
+                    found = discover_for_filial(db, filial_full, health)
+                    sitemap_url = filial['sitemap_url'] = found['url'] if found else None
+                self._process_sitemap(filial, website, sitemap_url, queries, scrapy_parser,
+                                      session_stats, search_days, use_gigachat,
+                                      search_specific_date, search_date_range, session_id,
+                                      use_feed=search_mode == "fulltext_search")
+                return
+
+            if search_mode == "rss_search":
+                fetched = self._rss_feeds.pop(filial.get('id'), None)
+                if fetched is None:
+                    fetched = site_parser.parse_rss_feed(**self._rss_target(filial_full or filial, website))
+                rss_data, parse_metrics = fetched
+                self._save_rss_state(filial, parse_metrics)
+
+                if parse_metrics.get('not_modified'):
+                    # Условный GET: лента не менялась - результаты прошлой проверки остаются
+                    # актуальными; заново ищутся только запросы, которых тогда не было
+                    checked = {r['search_query_id'] for r in db.get_latest_results(filial_id=filial['id'])
+                               if r.get('search_mode') == search_mode}
+                    queries = [q for q in queries if q['id'] not in checked]
+                    if not queries:
+                        session_stats['total_checked'] += 1
+                        logger.log("INFO", f"📡 {filial_name}: RSS не изменился с прошлой проверки")
+                        return
+                    logger.log("INFO", f"📡 {filial_name}: RSS не изменился, новых запросов: {len(queries)}")
+                    target = dict(self._rss_target(filial_full or filial, website), etag=None, last_modified=None)
+                    rss_data, parse_metrics = site_parser.parse_rss_feed(**target)
+                    self._save_rss_state(filial, parse_metrics)
+
+                if rss_data:
+                    # Формируем текст для поиска из RSS
+                    parsed_content = f"=== RSS ЛЕНТА {filial_name} ===\n"
+                    parsed_content += f"Канал: {rss_data.get('channel_title', '')}\n"
+                    parsed_content += f"Описание: {rss_data.get('channel_description', '')}\n\n"
+
+                    for item in rss_data.get('items', []):
+                        parsed_content += f"--- НОВОСТЬ ---\n"
+                        parsed_content += f"Заголовок: {item['title']}\n"
+                        parsed_content += f"Описание: {item['description']}\n"
+                        parsed_content += f"Ссылка: {item['link']}\n"
+                        parsed_content += f"Дата: {item['pubDate']}\n\n"
+                else:
+                    parsed_content = None
+            else:
+                # Мета-парсинг режим
+                include_news = (search_mode == "main_and_news")
+                parsed_content, parse_metrics = site_parser.parse_meta_data(website, include_news=include_news)
+
+            # Сохраняем метрики для статистики
+            if parse_metrics.get('response_time'):
+                session_stats['response_times'].append(parse_metrics['response_time'])
+            if parse_metrics.get('page_size_kb'):
+                session_stats['page_sizes'].append(parse_metrics['page_size_kb'])
+
+            session_stats['total_checked'] += 1
+
+            if parsed_content:
+                self._analyze_content(filial, website, parsed_content, parse_metrics, queries,
+                                      search_mode, site_parser, session_stats, session_id)
+            else:
+                result = {
+                    'filial_id': filial['id'],
+                    'url': website,
+                    'status': 'error',
+                    'error_message': parse_metrics.get('error', 'Не удалось получить контент сайта')
+                }
+                db.save_monitoring_result(filial['id'], result, session_id)
+                logger.log("ERROR", f"{filial_name}: ошибка парсинга")
+                session_stats['errors'] += 1
+
+        except Exception as e:
+            logger.log("ERROR", f"Ошибка при обработке {filial_name}: {str(e)}")
+            db.add_log(filial['id'], 'monitoring_error', 'error', str(e))
+            session_stats['errors'] += 1
+
+    def prefetch_rss(self, filials: list, site_parser: SiteParser):
+        """
+        Одновременно загрузить RSS-ленты филиалов (SiteParser.fetch_rss_feeds)
+
+        Результаты используются _process_filial вместо последовательной загрузки.
+        Филиалы без сайта и с отключенным выключателем хостом пропускаются.
+        """
+        targets = {}
+        for filial in filials:
+            if not filial.get('id'):
+                continue
+            filial_full = self.db.get_filial_by_id(filial['id']) or filial
+            website = filial_full.get('website_url') or filial_full.get('website', '')
+            if not website:
+                continue
+            if not website.startswith(('http://', 'https://', 'vk.com')):
+                website = f"https://{website}"
+            if site_parser.health and site_parser.health.state(website) == 'open':
+                continue
+            targets[filial['id']] = self._rss_target(filial_full, website)
+
+        started = time.time()
+        fetched = site_parser.fetch_rss_feeds(list(targets.values()))
+        self._rss_feeds.update(zip(targets, fetched))
+        self.logger.log("INFO", f"📡 Загружено RSS-лент: {len(fetched)} за {time.time() - started:.1f} сек")
+
+    @staticmethod
+    def _rss_target(filial: Dict[str, Any], website: str) -> Dict[str, Any]:
+        """Аргументы parse_rss_feed по сохраненному состоянию ленты филиала"""
+        return {
+            'url': website,
+            'rss_url': filial.get('rss_url'),
+            'etag': filial.get('rss_etag'),
+            'last_modified': filial.get('rss_last_modified'),
+            # Сайт без ленты проверяется повторно не чаще раза в RECHECK_DAYS дней
+            'discover': bool(filial.get('rss_url')) or needs_discovery(filial, kind='rss')
+        }
+
+    def _save_rss_state(self, filial: Dict[str, Any], parse_metrics: Dict[str, Any]):
+        """Сохранить найденную ленту и валидаторы условного GET (или факт отсутствия ленты)"""
+        if not filial.get('id'):
+            return
+        if parse_metrics.get('rss_url'):
+            self.db.save_rss_state(filial['id'], parse_metrics['rss_url'],
+                                   parse_metrics.get('etag'), parse_metrics.get('last_modified'))
+        elif parse_metrics.get('discovered'):
+            self.db.save_rss_state(filial['id'], None)
+
+    def _process_sitemap(self, filial, website, sitemap_url, queries, scrapy_parser,
+                         session_stats, search_days, use_gigachat,
+                         search_specific_date, search_date_range, session_id, use_feed=False):
+        """
+        Глубокий поиск по архиву сайта через sitemap
+
+        При use_feed сначала читается полнотекстовая лента сайта (статьи не
+        загружаются); sitemap используется, только если ленты нет.
+        """
+        logger = self.logger
+        db = self.db
+        filial_name = filial['name']
+
+        logger.log("INFO", f"🕷️ Sitemap поиск для {filial_name} за {search_days} дней")
+        keywords = [q['query_text'] for q in queries]
+
+        # Для конкретной даты - увеличенный лимит, иначе ограничиваем для производительности
+        date_from, date_to = scrapy_parser.search_period(
+            search_days,
+            search_date_range[0] if search_date_range else None,
+            search_date_range[1] if search_date_range else None,
+            search_date=search_specific_date
+        )
+
+        outcome = None
+        if use_feed:
+            # Сохраненная лента или Турбо-лента, найденная при поиске sitemap, используется напрямую
+            feed_url = filial.get('feed_url')
+            if not feed_url and filial.get('sitemap_type') == 'turbo':
+                feed_url = sitemap_url
+            outcome = search_fulltext_feed(website, keywords, date_from, date_to, feed_url=feed_url,
+                                           health=scrapy_parser.health,
+                                           discover=needs_discovery(filial, kind='feed'))
+            if outcome['discovered'] and filial.get('id'):
+                found = outcome['sitemap_status'] == 'found'
+                db.save_feed_discovery(filial['id'], outcome['feed_url'] if found else None,
+                                       outcome['feed_type'] if found else None)
+            if outcome['sitemap_status'] == 'found':
+                logger.log("INFO", f"📰 {filial_name}: полнотекстовая лента {outcome['feed_url']} "
+                                   f"(страниц: {outcome['pages']}, записей за период: {outcome['urls_in_window']})")
+            else:
+                logger.log("INFO", f"{filial_name}: полнотекстовая лента не найдена, используем sitemap")
+                outcome = None
+
+        if outcome is None:
+            if not sitemap_url:
+                self._save_sitemap_missing(filial, website, session_stats, session_id)
+                return
+            logger.log("INFO", f"Используем прямой sitemap URL: {sitemap_url}")
+            outcome = scrapy_parser.search_sitemap(website, keywords, date_from, date_to,
+                                                   max_articles=150 if search_specific_date else 50,
+                                                   sitemap_url=sitemap_url)
+        sitemap_results = outcome['articles']
+        sitemap_metrics = {
+            'source': 'feed' if outcome.get('feed_url') else 'sitemap',
+            'sitemap_url': outcome['sitemap_url'],
+            'urls_in_window': outcome['urls_in_window'],
+            'articles_checked': outcome['articles_checked'],
+            'articles_fetched': outcome['articles_fetched'],
+            'timings': outcome['timings']
+        }
+
+        session_stats['total_checked'] += 1
+
+        if sitemap_results:
+            logger.log("INFO", f"📊 {filial_name}: найдено {len(sitemap_results)} статей в архиве")
+            formatter = SitemapResultsFormatter()
+
+            for query in queries:
+                query_text = query['query_text']
+
+                # Фильтруем статьи по конкретному запросу
+                relevant_articles = [
+                    article for article in sitemap_results
+                    if query_text.lower() in ' '.join(article.get('keywords', [])).lower()
+                ]
+
+                if not relevant_articles:
+                    if use_gigachat:
+                        logger.log("INFO", f"❌ {filial_name}: '{query_text}' не найден в архиве за {search_days} дней")
+                    continue
+
+                formatted_results = formatter.format_sitemap_results(
+                    relevant_articles,
+                    filial_name,
+                    query_text,
+                    max_display=10
+                )
+
+                result = {
+                    'filial_id': filial['id'],
+                    'search_query_id': query['id'],
+                    'url': website,
+                    'page_title': filial_name,
+                    'content': formatted_results['content'],
+                    'relevance_score': min(formatted_results['total_count'] / 10, 1.0),
+                    'status': 'success',
+                    'articles': formatted_results['articles'],
+                    'metrics': {
+                        'articles_found': formatted_results['total_count'],
+                        'search_days': search_days,
+                        **sitemap_metrics
+                    }
+                }
+
+                if use_gigachat:
+                    # Режим с GigaChat - анализируем найденное
+                    analysis_text = formatter.format_for_gigachat(
+                        formatted_results['articles'],
+                        filial_name,
+                        query_text
+                    )
+                    prompt = f"""Проанализируй найденные статьи с сайта {filial_name}.
+                    Определи релевантность к теме '{query_text}'.
+                    Сделай краткое резюме основных упоминаний."""
+
+                    analysis, gigachat_metrics = self.gigachat_client.analyze_content(
+                        analysis_text[:3000],
+                        prompt
+                    )
+                    result['gigachat_analysis'] = analysis
+                    result['search_mode'] = 'sitemap'
+                    result['metrics']['gigachat_metrics'] = gigachat_metrics
+                    db.save_monitoring_result(filial['id'], result, session_id)
+
+                    logger.log("INFO", f"✅ {filial_name}: найдено {formatted_results['total_count']} статей для '{query_text}'")
+                    session_stats['total_tokens_used'] += gigachat_metrics.get('total_tokens', 0)
+                else:
+                    # Режим без GigaChat - просто сохраняем список статей
+                    result['gigachat_analysis'] = f"Найдено {formatted_results['total_count']} статей (без анализа GigaChat)"
+                    result['search_mode'] = 'sitemap_no_ai'
+                    db.save_monitoring_result(filial['id'], result, session_id)
+
+                    logger.log("INFO", f"📋 {filial_name}: найдено {formatted_results['total_count']} статей для '{query_text}' (без GigaChat)")
+                session_stats['successful'] += 1
+            return
+
+        # Пустой результат: либо sitemap не найден (ошибка),
+        # либо найден, но нет статей с ключевыми словами (нормальная ситуация)
+        if outcome['sitemap_status'] == 'found':
+            logger.log("INFO", f"📊 {filial_name}: Sitemap обработан, релевантных статей не найдено "
+                               f"(URL за период: {outcome['urls_in_window']}, "
+                               f"проверено: {outcome['articles_checked']})")
+
+            for query in queries:
+                result = {
+                    'filial_id': filial['id'],
+                    'search_query_id': query['id'],
+                    'url': website,
+                    'page_title': filial_name,
+                    'content': "Sitemap обработан",
+                    'gigachat_analysis': f"В архиве за {search_days} дней не найдено статей с упоминанием '{query['query_text']}'",
+                    'relevance_score': 0.0,
+                    'status': 'no_data',
+                    'search_mode': 'sitemap',
+                    'articles': [],
+                    'metrics': {
+                        'articles_found': 0,
+                        'search_days': search_days,
+                        'sitemap_found': True,
+                        **sitemap_metrics
+                    }
+                }
+                db.save_monitoring_result(filial['id'], result, session_id)
+
+            session_stats['total_checked'] += 1
+        else:
+            self._save_sitemap_missing(filial, website, session_stats, session_id)
+
+    def _save_sitemap_missing(self, filial, website, session_stats, session_id):
+        """Результат-ошибка для филиала без sitemap"""
+        self.logger.log("WARNING", f"⚠️ {filial['name']}: Sitemap не найден")
+        session_stats['errors'] += 1
+
+        result = {
+            'filial_id': filial['id'],
+            'url': website,
+            'status': 'error',
+            'error_message': 'Sitemap не найден',
+            'search_mode': 'sitemap'
+        }
+        self.db.save_monitoring_result(filial['id'], result, session_id)
+
+    def _analyze_content(self, filial, website, parsed_content, parse_metrics, queries,
+                         search_mode, site_parser, session_stats, session_id):
+        """Поиск запросов в метаданных/RSS и анализ через GigaChat"""
+        logger = self.logger
+        db = self.db
+        filial_name = filial['name']
+
+        if search_mode == "rss_search":
+            items_count = parse_metrics.get('items_count', 0)
+            logger.log("INFO", f"📡 {filial_name}: RSS получен ({items_count} новостей)", {
+                "rss_url": parse_metrics.get('rss_url'),
+                "url": website,
+                "mode": "rss_search"
+            })
+        else:
+            pages_count = parse_metrics.get('pages_parsed', 1)
+            headers_count = parse_metrics.get('headers_count', 0)
+            meta_tags_count = parse_metrics.get('meta_tags_count', 0)
+
+            preview_length = 500
+            text_preview = parsed_content[:preview_length]
+            if len(parsed_content) > preview_length:
+                text_preview += f"\n... (ещё {len(parsed_content) - preview_length} символов)"
+
+            logger.log("INFO", f"📄 {filial_name}: Мета-данные получены (страниц: {pages_count}, заголовков: {headers_count}, мета-тегов: {meta_tags_count})", {
+                "text_preview": text_preview,
+                "url": website,
+                "mode": "meta_search"
+            })
+
+        keywords = [q['query_text'] for q in queries]
+        search_results = site_parser.search_keywords(parsed_content, keywords)
+
+        for query in queries:
+            query_text = query['query_text']
+            query_results = search_results.get(query_text, {})
+
+            logger.log_search_results(filial_name, query_text, query_results)
+
+            if query_results.get('occurrences', 0) > 0:
+                contexts = query_results.get('contexts', [])
+                if contexts:
+                    first_context = contexts[0][:150] if contexts[0] else ""
+                    logger.log("INFO", f"📋 {filial_name}: Найден фрагмент в метаданных для '{query_text}'", {
+                        "fragment": first_context.replace("**", "")
+                    })
+
+            logger.log("DEBUG", f"Мета-поиск: анализируем метаданные через GigaChat для '{query_text}'")
+
+            prompt = f"""Проанализируй метаданные и заголовки страницы.
+                        Определи, есть ли упоминания темы '{query_text}'.
+                        Метаданные включают: заголовки страниц, описания, ключевые слова, H1-H3 заголовки.
+                        Ответь кратко: найдено/не найдено и что именно.
+
+                        Метаданные для анализа:"""
+
+            analysis, gigachat_metrics = self.gigachat_client.analyze_content(
+                parsed_content[:3000],
+                prompt
+            )
+            logger.log_gigachat_analysis(filial_name, gigachat_metrics)
+
+            if analysis and not analysis.startswith("Ошибка"):
+                analysis_preview = analysis[:200] + "..." if len(analysis) > 200 else analysis
+                logger.log("INFO", f"🤖 GigaChat анализ метаданных для {filial_name}", {
+                    "analysis": analysis_preview,
+                    "query": query_text,
+                    "mode": "meta_" + search_mode
+                })
+
+                # Проверяем, нашел ли GigaChat что-то
+                found_by_gigachat = not any(phrase in analysis.lower() for phrase in
+                    ["не найден", "не обнаружен", "отсутствует", "нет упоминаний"])
+
+                if found_by_gigachat:
+                    result = {
+                        'filial_id': filial['id'],
+                        'search_query_id': query['id'],
+                        'url': website,
+                        'page_title': filial_name,
+                        'content': parsed_content[:1000],
+                        'gigachat_analysis': analysis,
+                        'relevance_score': 0.7 if query_results.get('occurrences', 0) == 0 else min(query_results['occurrences'] / 10, 1.0),
+                        'status': 'success',
+                        'search_mode': search_mode,
+                        'metrics': {
+                            'parse_metrics': parse_metrics,
+                            'search_results': query_results,
+                            'gigachat_metrics': gigachat_metrics
+                        }
+                    }
+                    db.save_monitoring_result(filial['id'], result, session_id)
+
+                    if query_results.get('occurrences', 0) > 0:
+                        logger.log("INFO", f"✅ {filial_name}: найдено '{query_text}' в метаданных ({query_results['occurrences']} раз)")
+                    else:
+                        logger.log("INFO", f"✅ {filial_name}: GigaChat нашел упоминания '{query_text}' в метаданных")
+                    session_stats['successful'] += 1
+                else:
+                    logger.log("INFO", f"❌ {filial_name}: '{query_text}' не найден в метаданных", {
+                        "searched_in": f"{parse_metrics.get('pages_parsed', 1)} страниц, {parse_metrics.get('headers_count', 0)} заголовков",
+                        "url": website,
+                        "mode": "meta_" + search_mode
+                    })
+
+                    result = {
+                        'filial_id': filial['id'],
+                        'search_query_id': query['id'],
+                        'url': website,
+                        'status': 'no_data',
+                        'error_message': f"Запрос '{query_text}' не найден",
+                        'search_mode': search_mode
+                    }
+                    db.save_monitoring_result(filial['id'], result, session_id)
+
+            session_stats['total_tokens_used'] += gigachat_metrics.get('total_tokens', 0)
+
+    async def process_async(self, filials: list, queries: list, search_days: int = 7,
+                            max_concurrent: int = 20, session_id: int = None) -> Dict[str, Any]:
+        """
+        Асинхронная обработка филиалов через sitemap (AsyncMonitoring)
+
+        Результат каждого филиала сохраняется сразу по готовности через DBWriter
+        (поток записи), в памяти результаты не накапливаются.
+
+        Returns:
+            Статистика: total_time, total_filials, success_count, error_count,
+            no_data_count, total_articles, results_saved, avg_time_per_filial
+        """
+        from modules.async_monitoring import AsyncMonitoring
+
+        start_time = time.time()
+        health = HostHealth(self.db)
+        monitor = AsyncMonitoring(max_concurrent=max_concurrent, host_limits=self.db.get_host_limits(),
+                                  host_timeouts=health.all_timeouts(), health=health)
+        keywords = [q['query_text'] for q in queries]
+        total = len(filials)
+        formatter = SitemapResultsFormatter()
+        counters = self._new_async_counters()
+        saved = []
+        filials, unavailable = self._split_unavailable(filials)
+
+        async def on_result(current, total_count, result):
+            self._emit_async_result(counters, result, total)
+            # Очередь записи ограничена: ожидание места не должно блокировать event loop
+            saved.append(await writer.submit_async(self._save_async_result, result, queries,
+                                                   search_days, session_id, formatter))
+
+        writer = DBWriter()
+        for result in unavailable:
+            await on_result(None, total, result)
+        try:
+            await monitor.process_filials_batch(
+                filials,
+                keywords,
+                days=search_days,
+                max_articles=50,
+                progress_callback=on_result,
+                collect_results=False
+            )
+        finally:
+            await monitor.close()
+            writer.close()
+            self._save_learned_hosts(monitor.concurrency.export(), health)
+
+        results_saved = sum(future.result() for future in saved)
+        return self._async_stats(counters, total, results_saved, time.time() - start_time)
+
+    def process_sharded(self, filials: list, queries: list, search_days: int = 7,
+                        max_concurrent: int = 20, session_id: int = None, shards: int = 2,
+                        shard_strategy: str = 'round_robin') -> Dict[str, Any]:
+        """
+        Асинхронная обработка филиалов в нескольких процессах (modules.sharding)
+
+        Каждый шард обходит свои филиалы собственным AsyncMonitoring, а результаты
+        сохраняет в БД только этот процесс - по мере поступления от шардов.
+
+        Returns:
+            Статистика, как у process_async (плюс stopped при остановке)
+        """
+        start_time = time.time()
+        keywords = [q['query_text'] for q in queries]
+        total = len(filials)
+        costs = self.db.get_filial_costs([f['id'] for f in filials]) if shard_strategy == 'cost' else None
+
+        formatter = SitemapResultsFormatter()
+        counters = self._new_async_counters()
+        results_saved = 0
+        learned_limits = {}
+        health = HostHealth(self.db)
+        filials, unavailable = self._split_unavailable(filials)
+        for result in unavailable:
+            self._emit_async_result(counters, result, total)
+            results_saved += self._save_async_result(result, queries, search_days, session_id, formatter)
+
+        for result in iter_sharded_results(filials, keywords, search_days, max_concurrent,
+                                           shards, shard_strategy, costs, should_stop=self.should_stop,
+                                           host_limits=self.db.get_host_limits(),
+                                           host_timeouts=health.all_timeouts(),
+                                           learned_limits=learned_limits):
+            self._emit_async_result(counters, result, total)
+            results_saved += self._save_async_result(result, queries, search_days, session_id, formatter)
+
+        self._save_learned_hosts(learned_limits, health)
+        stats = self._async_stats(counters, total, results_saved, time.time() - start_time)
+        if counters['done'] < total:
+            self.logger.log("WARNING", "Мониторинг остановлен пользователем")
+            self.emit('stopped', completed=counters['done'], total=total)
+            stats['stopped'] = True
+        return stats
+
+    def _save_async_result(self, result: Dict[str, Any], queries: list, search_days: int,
+                           session_id: int, formatter: SitemapResultsFormatter) -> int:
+        """
+        Сохранить результат асинхронной обработки филиала и его контрольную точку
+
+        Returns:
+            Количество сохраненных успешных результатов
+        """
+        results_saved = 0
+        if result['status'] == 'success' and result['articles']:
+            for query in queries:
+                query_text = query['query_text']
+
+                relevant_articles = [
+                    article for article in result['articles']
+                    if query_text.lower() in ' '.join(article.get('keywords', [])).lower()
+                ]
+
+                if relevant_articles:
+                    formatted = formatter.format_sitemap_results(
+                        relevant_articles,
+                        result['filial_name'],
+                        query_text,
+                        max_display=10
+                    )
+
+                    db_result = {
+                        'filial_id': result['filial_id'],
+                        'search_query_id': query['id'],
+                        'url': result['website'],
+                        'page_title': result['filial_name'],
+                        'content': formatted['content'],
+                        'gigachat_analysis': f"Найдено {len(relevant_articles)} статей (асинхронный поиск)",
+                        'relevance_score': min(len(relevant_articles) / 10, 1.0),
+                        'status': 'success',
+                        'search_mode': 'sitemap_async',
+                        'articles': formatted['articles'],
+                        'metrics': {
+                            'articles_found': len(relevant_articles),
+                            'search_days': search_days,
+                            'processing_time': result['processing_time']
+                        }
+                    }
+
+                    self.db.save_monitoring_result(result['filial_id'], db_result, session_id)
+                    results_saved += 1
+
+        elif result['status'] == 'error':
+            db_result = {
+                'filial_id': result['filial_id'],
+                'url': result['website'],
+                'status': 'error',
+                'error_message': result.get('error', 'Неизвестная ошибка'),
+                'search_mode': 'sitemap_async'
+            }
+            self.db.save_monitoring_result(result['filial_id'], db_result, session_id)
+
+        if 'sitemap_discovery' in result and result['filial_id']:
+            found = result['sitemap_discovery']
+            self.db.save_sitemap_discovery(result['filial_id'], found.get('url'), found.get('type'))
+
+        if session_id and result['filial_id']:
+            self.db.save_session_checkpoint(session_id, result['filial_id'], result['status'],
+                                            results_saved, result.get('processing_time'))
+        return results_saved
+
+    def _save_learned_hosts(self, limits: Dict[str, Dict[str, Any]], health: HostHealth):
+        """Сохранить выученные пределы и время ответа хостов (ConcurrencyController.export)"""
+        self.db.save_host_limits(limits)
+        health.add_latency_samples({host: item.get('latencies') for host, item in limits.items()})
+        health.flush()
+
+    def _split_unavailable(self, filials: list):
+        """
+        Отделить филиалы, сайты которых отключены выключателем (modules.host_health)
+
+        Returns:
+            (филиалы для обработки, готовые результаты-ошибки для отключенных)
+        """
+        health = HostHealth(self.db)
+        available, unavailable = [], []
+        for filial in filials:
+            website = filial.get('website_url') or filial.get('website')
+            if website and health.state(website) == 'open':
+                unavailable.append({
+                    'filial_id': filial.get('id'),
+                    'filial_name': filial.get('name'),
+                    'website': website,
+                    'status': 'error',
+                    'articles': [],
+                    'error': health.describe(website),
+                    'processing_time': 0
+                })
+            else:
+                available.append(filial)
+        return available, unavailable
+
+    def _emit_async_result(self, counters: Dict[str, int], result: Dict[str, Any], total: int):
+        """Учесть результат филиала и отправить событие filial_done"""
+        self._count_async_result(counters, result)
+        done = counters['done']
+        self.emit('filial_done', index=done, total=total,
+                  filial_id=result.get('filial_id'), filial_name=result['filial_name'],
+                  status=result['status'], articles=len(result.get('articles', [])),
+                  processing_time=round(result.get('processing_time') or 0, 2),
+                  error=result.get('error'), progress=done / total)
+
+    @staticmethod
+    def _new_async_counters() -> Dict[str, int]:
+        """Счетчики асинхронной обработки (результаты по мере готовности не хранятся)"""
+        return {'done': 0, 'success': 0, 'error': 0, 'no_data': 0, 'articles': 0}
+
+    @staticmethod
+    def _count_async_result(counters: Dict[str, int], result: Dict[str, Any]):
+        """Учесть результат филиала в счетчиках"""
+        counters['done'] += 1
+        if result['status'] in counters:
+            counters[result['status']] += 1
+        counters['articles'] += len(result.get('articles', []))
+
+    def _async_stats(self, counters: Dict[str, int], total: int, results_saved: int,
+                     total_time: float) -> Dict[str, Any]:
+        """Итоговая статистика асинхронной обработки (с записью в лог)"""
+        stats = {
+            'total_time': total_time,
+            'total_filials': total,
+            'success_count': counters['success'],
+            'error_count': counters['error'],
+            'no_data_count': counters['no_data'],
+            'total_articles': counters['articles'],
+            'results_saved': results_saved,
+            'avg_time_per_filial': total_time / total if total > 0 else 0
+        }
+
+        self.logger.log("INFO", f"✅ Асинхронный мониторинг завершен за {stats['total_time']:.1f} сек")
+        self.logger.log("INFO", f"Обработано: {stats['total_filials']} филиалов")
+        self.logger.log("INFO", f"Успешно: {stats['success_count']}, Ошибок: {stats['error_count']}, Нет данных: {stats['no_data_count']}")
+        self.logger.log("INFO", f"Найдено статей: {stats['total_articles']}")
+        return stats
+
+
+def launch_background(command: List[str], log_path: str = None) -> subprocess.Popen:
+    """
+    Запустить процесс мониторинга (раннер или воркер), не дожидаясь завершения
+
+    Args:
+        command: Командная строка
+        log_path: Файл для вывода процесса (по умолчанию вывод отбрасывается)
+
+    Returns:
+        Запущенный процесс
+    """
+    output = open(log_path, 'a', encoding='utf-8') if log_path else subprocess.DEVNULL
+    try:
+        return subprocess.Popen(
+            command,
+            cwd=str(Path(__file__).resolve().parent.parent),
+            stdout=output,
+            stderr=subprocess.STDOUT,
+            start_new_session=True
+        )
+    finally:
+        if log_path:
+            output.close()
+
+
+def _parse_args(argv: List[str]) -> Dict[str, Any]:
+    """Разбор аргументов командной строки вида --ключ значение и --флаг"""
+    flags = {'--all', '--gigachat', '--async', '--enqueue', '--help'}
+    options = {}
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if not arg.startswith('--'):
+            raise ValueError(f"Неожиданный аргумент: {arg}")
+        if arg in flags:
+            options[arg[2:]] = True
+            i += 1
+            continue
+        if i + 1 >= len(argv):
+            raise ValueError(f"Не указано значение для {arg}")
+        options[arg[2:]] = argv[i + 1]
+        i += 2
+    return options
+
+
+def _id_list(value: Optional[str]) -> List[int]:
+    """Список ID из строки '1,2,3'"""
+    return [int(part) for part in value.split(',') if part.strip()] if value else []
+
+
+def print_usage():
+    """Справка по запуску"""
+    print("Использование: python -m modules.runner [филиалы] [параметры]")
+    print("\nВыбор филиалов:")
+    print("  --all                    Все активные филиалы")
+    print("  --district СФО           Филиалы округа")
+    print("  --filials 1,2,3          Филиалы по ID")
+    print("\nПараметры:")
+    print("  --queries 1,2            ID поисковых запросов (по умолчанию все активные)")
+    print(f"  --mode РЕЖИМ             {', '.join(SEARCH_MODES)} (по умолчанию sitemap_search)")
+    print("  --days N                 Период поиска в днях (по умолчанию 1)")
+    print("  --date YYYY-MM-DD        Конкретная дата")
+    print("  --from/--to YYYY-MM-DD   Диапазон дат")
+    print("  --gigachat               Анализировать найденное через GigaChat")
+    print("  --async --concurrent N   Асинхронный режим (sitemap)")
+    print("  --shards N               Асинхронный режим в N процессах (по умолчанию 1)")
+    print(f"  --shard-strategy S       {', '.join(SHARD_STRATEGIES)} (по умолчанию round_robin)")
+    print("  --model, --temperature   Параметры GigaChat")
+    print("  --log-level LEVEL        DEBUG, INFO, WARNING, ERROR")
+    print("  --db PATH                Путь к БД (по умолчанию data/vgtrk_monitoring.db)")
+    print("  --progress-file PATH     Писать прогресс в файл вместо stdout")
+    print("  --enqueue                Поставить в очередь для воркеров (python -m modules.worker)")
+    print("\nПродолжение прерванной сессии (только необработанные филиалы):")
+    print("  --resume SESSION_ID [--enqueue]")
+    print("\nПрогресс выводится построчно в формате JSON.")
+
+
+def _resume_session(options: Dict[str, Any]) -> int:
+    """Продолжение сессии из командной строки"""
+    db = VGTRKDatabase(options.get('db', DEFAULT_DB_PATH))
+    session_id = int(options['resume'])
+    progress = JsonLinesProgress(path=options.get('progress-file'))
+
+    try:
+        if options.get('enqueue'):
+            job_id = resume_job(db, session_id)
+            progress({'event': 'job_queued', 'job_id': job_id, 'session_id': session_id})
+            return 0
+
+        runner = MonitoringRunner(
+            db,
+            log_level=LogLevel[options.get('log-level', 'INFO').upper()],
+            progress_callback=progress
+        )
+        runner.resume(session_id)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+    except Exception:
+        # stdout занят JSON-событиями, трассировка - в stderr
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def main(argv: List[str] = None) -> int:
+    """Точка входа командной строки"""
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        options = _parse_args(argv)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        print_usage()
+        return 2
+
+    if options.get('help') or not any(key in options for key in ('all', 'district', 'filials', 'resume')):
+        print_usage()
+        return 0 if options.get('help') else 2
+
+    if options.get('resume'):
+        return _resume_session(options)
+
+    search_mode = options.get('mode', 'sitemap_search')
+    if search_mode not in SEARCH_MODES:
+        print(f"❌ Неизвестный режим поиска: {search_mode}", file=sys.stderr)
+        return 2
+
+    shard_strategy = options.get('shard-strategy', 'round_robin')
+    if shard_strategy not in SHARD_STRATEGIES:
+        print(f"❌ Неизвестная стратегия шардирования: {shard_strategy}", file=sys.stderr)
+        return 2
+    shards = int(options.get('shards', 1))
+
+    db = VGTRKDatabase(options.get('db', DEFAULT_DB_PATH))
+
+    if options.get('all'):
+        filials = db.get_all_filials(active_only=True)
+    elif options.get('district'):
+        filials = db.get_filials_by_district(options['district'])
+    else:
+        filials = [f for f in (db.get_filial_by_id(i) for i in _id_list(options['filials'])) if f]
+
+    queries = db.get_search_queries()
+    query_ids = _id_list(options.get('queries'))
+    if query_ids:
+        queries = [q for q in queries if q['id'] in query_ids]
+
+    if not filials:
+        print("❌ Не найдено филиалов для мониторинга", file=sys.stderr)
+        return 1
+
+    search_date_range = None
+    if options.get('from') and options.get('to'):
+        search_date_range = (parse_date(options['from']), parse_date(options['to']))
+    search_specific_date = parse_date(options.get('date'))
+    search_days = int(options['days']) if options.get('days') else None
+    if search_date_range and not search_days:
+        search_days = (search_date_range[1] - search_date_range[0]).days + 1
+    if not (search_days or search_specific_date):
+        search_days = 1
+
+    progress = JsonLinesProgress(path=options.get('progress-file'))
+    use_gigachat = bool(options.get('gigachat')) or search_mode not in ARCHIVE_MODES
+
+    if options.get('enqueue'):
+        params = job_params(
+            [q['id'] for q in queries], search_mode, search_days, use_gigachat,
+            search_specific_date, search_date_range,
+            use_async=bool(options.get('async')),
+            max_concurrent=int(options.get('concurrent', 20)),
+            model=options.get('model', 'GigaChat'),
+            temperature=float(options.get('temperature', 0.7)),
+            shards=shards,
+            shard_strategy=shard_strategy
+        )
+        job_id = enqueue_job(db, [f['id'] for f in filials], params)
+        progress({'event': 'job_queued', 'job_id': job_id, 'total': len(filials)})
+        return 0
+
+    runner = MonitoringRunner(
+        db,
+        log_level=LogLevel[options.get('log-level', 'INFO').upper()],
+        model=options.get('model', 'GigaChat'),
+        temperature=float(options.get('temperature', 0.7)),
+        progress_callback=progress
+    )
+
+    try:
+        runner.run(
+            filials,
+            queries,
+            search_mode=search_mode,
+            search_days=search_days,
+            use_gigachat=use_gigachat,
+            search_specific_date=search_specific_date,
+            search_date_range=search_date_range,
+            use_async=bool(options.get('async')),
+            max_concurrent=int(options.get('concurrent', 20)),
+            shards=shards,
+            shard_strategy=shard_strategy
+        )
+    except Exception:
+        # stdout занят JSON-событиями, трассировка - в stderr
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,7 @@
 
 import os
 import json
+import time
 import tempfile
 import subprocess
 from datetime import datetime, timedelta
@@ -13,22 +14,28 @@ import requests
 from xml.etree import ElementTree as ET
 from bs4 import BeautifulSoup
 import re
-from urllib.parse import urlparse, urljoin
+
+from modules.host_health import guarded_request
+from modules.sitemap_discovery import SITEMAP_PATHS, discover_sitemap
 
 class ScrapyParser:
     """Парсер для глубокого поиска через sitemap"""
     
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, health=None):
+        """
+        Args:
+            logger: Логгер (AdvancedLogger)
+            health: HostHealth - недоступные сайты отклоняются сразу, без ожидания таймаута
+        """
         self.logger = logger
-        self.sitemap_urls_templates = [
-            "/sitemap_index.xml",  # Ставим первым - часто используется
-            "/sitemap.xml",
-            "/news-sitemap.xml",
-            "/post-sitemap.xml",
-            "/sitemap/sitemap.xml",
-            "/yandex-turbo-sitemap.xml"
-        ]
+        self.health = health
+        # Пути-кандидаты для поиска sitemap (проверяются одновременно с robots.txt)
+        self.sitemap_urls_templates = list(SITEMAP_PATHS)
         
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """GET с учетом доступности хоста (HostUnavailable для отключенных)"""
+        return guarded_request(self.health, requests, 'GET', url, **kwargs)
+    
     def find_sitemap(self, base_url: str, sitemap_url: str = None) -> Optional[Tuple[str, str]]:
         """
         Находит sitemap для сайта
@@ -40,12 +47,18 @@ class ScrapyParser:
         Returns:
             Tuple (url sitemap, содержимое) или None
         """
+        # Сайт отключен выключателем: не перебираем шаблоны и robots.txt
+        if self.health and self.health.state(base_url) == 'open':
+            if self.logger:
+                self.logger.log("WARNING", f"[X] Сайт {base_url} недоступен по последним проверкам, sitemap не ищем")
+            return None
+        
         # Если передан прямой URL sitemap, используем его
         if sitemap_url:
             try:
                 if self.logger:
                     self.logger.log("INFO", f"Используем прямой sitemap URL: {sitemap_url}")
-                response = requests.get(sitemap_url, timeout=10, verify=False)
+                response = self._get(sitemap_url, timeout=10, verify=False)
                 if response.status_code == 200:
                     if self.logger:
                         self.logger.log("INFO", f"[OK] Sitemap успешно загружен: {sitemap_url}")
@@ -57,44 +70,14 @@ class ScrapyParser:
                 if self.logger:
                     self.logger.log("ERROR", f"Ошибка при загрузке sitemap по прямому URL: {e}")
                     
-        # Пробуем стандартные локации
-        for template in self.sitemap_urls_templates:
-            sitemap_url = base_url.rstrip('/') + template
-            try:
-                response = requests.get(sitemap_url, timeout=5, verify=False)
-                if response.status_code == 200 and 'xml' in response.headers.get('content-type', ''):
-                    if self.logger:
-                        self.logger.log("INFO", f"[OK] Найден sitemap: {sitemap_url}")
-                    return sitemap_url, response.text
-            except Exception as e:
-                continue
-        
-        # ВАЖНО: Сначала проверяем robots.txt - это правильный способ найти sitemap
-        try:
-            robots_url = base_url.rstrip('/') + '/robots.txt'
-            response = requests.get(robots_url, timeout=5, verify=False)
-            if response.status_code == 200:
-                if self.logger:
-                    self.logger.log("DEBUG", f"Проверяем robots.txt: {robots_url}")
-                    
-                for line in response.text.split('\n'):
-                    if 'Sitemap:' in line or 'sitemap:' in line.lower():
-                        sitemap_url = line.split(':', 1)[1].strip()
-                        if self.logger:
-                            self.logger.log("INFO", f"Найден Sitemap в robots.txt: {sitemap_url}")
-                        
-                        try:
-                            sitemap_response = requests.get(sitemap_url, timeout=10, verify=False)
-                            if sitemap_response.status_code == 200:
-                                if self.logger:
-                                    self.logger.log("INFO", f"[OK] Sitemap успешно загружен из robots.txt: {sitemap_url}")
-                                return sitemap_url, sitemap_response.text
-                        except Exception as e:
-                            if self.logger:
-                                self.logger.log("WARNING", f"Не удалось загрузить sitemap из robots.txt: {e}")
-        except Exception as e:
+        # robots.txt и стандартные пути - одновременно (modules/sitemap_discovery.py)
+        # Содержимое победителя дочитывается при проверке: повторной загрузки нет
+        found = discover_sitemap(base_url, health=self.health, paths=self.sitemap_urls_templates,
+                                 with_content=True)
+        if found:
             if self.logger:
-                self.logger.log("DEBUG", f"Ошибка при проверке robots.txt: {e}")
+                self.logger.log("INFO", f"[OK] Найден sitemap ({found['type']}, {found['source']}): {found['url']}")
+            return found['url'], found['content']
             
         if self.logger:
             self.logger.log("WARNING", f"[X] Sitemap не найден для {base_url}")
@@ -158,7 +141,7 @@ class ScrapyParser:
                         try:
                             if self.logger:
                                 self.logger.log("DEBUG", f"Загружаем вложенный sitemap: {nested_url}")
-                            response = requests.get(nested_url, timeout=5, verify=False)
+                            response = self._get(nested_url, timeout=5, verify=False)
                             if response.status_code == 200:
                                 nested_articles = self.parse_sitemap_urls(response.text, date_from, date_to)
                                 articles.extend(nested_articles)
@@ -178,15 +161,15 @@ class ScrapyParser:
                     url = loc.text
                     lastmod = url_elem.find('s:lastmod', namespaces)
                     
-                    # Извлекаем дату
-                    article_date = None
-                    if lastmod is not None:
-                        try:
-                            # Парсим дату (убираем timezone для простоты)
-                            date_str = lastmod.text.split('T')[0]
-                            article_date = datetime.strptime(date_str, '%Y-%m-%d')
-                        except:
-                            pass
+                    # Метаданные Google News: заголовок, ключевые слова, дата публикации
+                    news_title = url_elem.findtext('news:news/news:title', None, namespaces)
+                    news_keywords = url_elem.findtext('news:news/news:keywords', None, namespaces)
+                    publication_date = url_elem.findtext('news:news/news:publication_date', None, namespaces)
+                    
+                    # Извлекаем дату: дата публикации точнее lastmod (меняется при правках)
+                    article_date = self._parse_sitemap_date(publication_date)
+                    if not article_date and lastmod is not None:
+                        article_date = self._parse_sitemap_date(lastmod.text)
                     
                     # Если даты нет, пробуем извлечь из URL
                     if not article_date:
@@ -207,7 +190,8 @@ class ScrapyParser:
                     articles.append({
                         'url': url,
                         'date': article_date,
-                        'title': None,
+                        'title': news_title.strip() if news_title else None,
+                        'news_keywords': news_keywords.strip() if news_keywords else None,
                         'content': None
                     })
                     
@@ -217,6 +201,31 @@ class ScrapyParser:
                 
         return articles
     
+    @staticmethod
+    def _parse_sitemap_date(text: Optional[str]) -> Optional[datetime]:
+        """Дата из lastmod/publication_date (время и часовой пояс отбрасываются)"""
+        if not text:
+            return None
+        try:
+            return datetime.strptime(text.strip().split('T')[0], '%Y-%m-%d')
+        except ValueError:
+            return None
+    
+    @staticmethod
+    def match_metadata(article_data: Dict, keywords: List[str]) -> List[str]:
+        """
+        Ключевые слова, найденные в метаданных news sitemap (заголовок и news:keywords)
+        
+        Args:
+            article_data: Запись из parse_sitemap_urls
+            keywords: Ключевые слова
+            
+        Returns:
+            Найденные ключевые слова
+        """
+        text = f"{article_data.get('title') or ''} {article_data.get('news_keywords') or ''}".lower()
+        return [keyword for keyword in keywords if keyword.lower() in text]
+    
     def search_in_article(self, url: str, keywords: List[str]) -> Optional[Dict]:
         """
         Загружает статью и проверяет на наличие ключевых слов
@@ -229,7 +238,7 @@ class ScrapyParser:
             Словарь с данными статьи или None
         """
         try:
-            response = requests.get(url, timeout=5, verify=False)
+            response = self._get(url, timeout=5, verify=False)
             if response.status_code != 200:
                 return None
                 
@@ -322,53 +331,89 @@ class ScrapyParser:
                 
         return None
     
-    def search_with_sitemap(self, site_url: str, keywords: List[str],
-                          days: int = 7, max_articles: int = 100,
-                          sitemap_url: str = None, date_from = None, date_to = None) -> List[Dict]:
+    @staticmethod
+    def search_period(days: int = 7, date_from=None, date_to=None, search_date=None) -> Tuple[datetime, datetime]:
         """
-        Основной метод поиска через sitemap
+        Период поиска по sitemap
+        
+        Args:
+            days: Количество дней до текущего момента
+            date_from: Начальная дата (date, вместе с date_to заменяет days)
+            date_to: Конечная дата (date)
+            search_date: Конкретная дата (date, весь день)
+            
+        Returns:
+            (начало, конец) периода
+        """
+        if search_date:
+            date_from = date_to = search_date
+        if date_from and date_to:
+            return datetime.combine(date_from, datetime.min.time()), datetime.combine(date_to, datetime.max.time())
+        date_to = datetime.now()
+        return date_to - timedelta(days=days), date_to
+    
+    def search_sitemap(self, site_url: str, keywords: List[str], date_from: datetime, date_to: datetime,
+                       max_articles: int = 100, sitemap_url: str = None,
+                       fetch_snippets: bool = True) -> Dict:
+        """
+        Поиск через sitemap со структурированным итогом
+        
+        По итогу можно отличить отсутствие sitemap от отсутствия совпадений
+        без повторной загрузки sitemap.
+        
+        Для записей news sitemap с заголовком ключевые слова сначала ищутся
+        в метаданных: статьи без совпадений не загружаются, а совпавшие -
+        только ради фрагмента текста (fetch_snippets).
         
         Args:
             site_url: URL сайта
             keywords: Ключевые слова для поиска
-            days: Количество дней для поиска (игнорируется если указаны date_from/date_to)
+            date_from: Начало периода
+            date_to: Конец периода
             max_articles: Максимальное количество статей для проверки
             sitemap_url: Прямой URL sitemap (опционально)
-            date_from: Начальная дата (date объект, опционально)
-            date_to: Конечная дата (date объект, опционально)
+            fetch_snippets: Загружать статьи, совпавшие по метаданным, ради фрагмента текста
             
         Returns:
-            Список найденных релевантных статей
+            Словарь:
+                sitemap_url - загруженный sitemap или None
+                sitemap_status - found, not_found или unavailable (сайт отключен выключателем)
+                urls_in_window - URL из sitemap за период
+                articles_checked - проверено статей (по метаданным или загрузкой)
+                articles_fetched - из них загружено со страницы статьи
+                articles - найденные релевантные статьи
+                timings - секунды: sitemap (поиск и загрузка), parse, articles, total
         """
-        results = []
-        
-        # Определяем период
-        if date_from and date_to:
-            # Если переданы конкретные даты, используем их
-            from datetime import time
-            date_from = datetime.combine(date_from, time.min)
-            date_to = datetime.combine(date_to, time.max)
-        else:
-            # Иначе используем days
-            date_to = datetime.now()
-            date_from = date_to - timedelta(days=days)
-        
-        if self.logger:
-            period_str = f"с {date_from.strftime('%d.%m.%Y')} по {date_to.strftime('%d.%m.%Y')}"
-            self.logger.log("INFO", f"[SEARCH] Поиск на {site_url} за период {period_str}")
-            self.logger.log("INFO", f"Ключевые слова: {', '.join(keywords)}")
+        started = time.time()
+        outcome = {
+            'sitemap_url': None,
+            'sitemap_status': 'not_found',
+            'urls_in_window': 0,
+            'articles_checked': 0,
+            'articles_fetched': 0,
+            'articles': [],
+            'timings': {}
+        }
         
         # Находим sitemap
         sitemap_data = self.find_sitemap(site_url, sitemap_url)
+        outcome['timings']['sitemap'] = round(time.time() - started, 3)
         if not sitemap_data:
+            if self.health and self.health.state(site_url) == 'open':
+                outcome['sitemap_status'] = 'unavailable'
             if self.logger:
                 self.logger.log("WARNING", "Sitemap не найден, поиск невозможен")
-            return results
+            outcome['timings']['total'] = outcome['timings']['sitemap']
+            return outcome
         
-        sitemap_url, xml_content = sitemap_data
+        outcome['sitemap_url'], xml_content = sitemap_data
+        outcome['sitemap_status'] = 'found'
         
         # Парсим URL из sitemap
+        stage_started = time.time()
         articles = self.parse_sitemap_urls(xml_content, date_from, date_to)
+        outcome['urls_in_window'] = len(articles)
+        outcome['timings']['parse'] = round(time.time() - stage_started, 3)
         
         if self.logger:
             self.logger.log("INFO", f"[INFO] Найдено {len(articles)} URL за период {date_from.date()} - {date_to.date()}")
@@ -377,31 +422,80 @@ class ScrapyParser:
         articles = articles[:max_articles]
         
         # Проверяем каждую статью
+        stage_started = time.time()
+        results = outcome['articles']
         checked = 0
         for article_data in articles:
             checked += 1
             if self.logger and checked % 10 == 0:
                 self.logger.log("INFO", f"Проверено {checked}/{len(articles)} статей...")
             
-            # Ищем ключевые слова в статье
-            article_result = self.search_in_article(article_data['url'], keywords)
+            if article_data.get('title'):
+                # Предварительный отбор по метаданным news sitemap без загрузки статьи
+                found_keywords = self.match_metadata(article_data, keywords)
+                if not found_keywords:
+                    continue
+                article_result = None
+                if fetch_snippets:
+                    outcome['articles_fetched'] += 1
+                    article_result = self.search_in_article(article_data['url'], keywords)
+                if not article_result:
+                    article_result = {
+                        'url': article_data['url'],
+                        'title': article_data['title'],
+                        'content': '',
+                        'snippet': article_data['title'],
+                        'keywords': found_keywords
+                    }
+            else:
+                # Ищем ключевые слова в статье
+                outcome['articles_fetched'] += 1
+                article_result = self.search_in_article(article_data['url'], keywords)
             
             if article_result:
                 # Добавляем дату если была в sitemap
-                if article_data['date']:
-                    article_result['date'] = article_data['date']
-                else:
-                    article_result['date'] = None
-                    
+                article_result['date'] = article_data['date'] or None
                 results.append(article_result)
                 
                 if self.logger:
                     self.logger.log("INFO", f"[OK] Найдено: {article_result['title'][:50]}...")
         
+        outcome['articles_checked'] = checked
+        outcome['timings']['articles'] = round(time.time() - stage_started, 3)
+        outcome['timings']['total'] = round(time.time() - started, 3)
+        
         if self.logger:
-            self.logger.log("INFO", f"[DONE] Найдено {len(results)} релевантных статей из {checked} проверенных")
+            self.logger.log("INFO", f"[DONE] Найдено {len(results)} релевантных статей из {checked} проверенных "
+                                    f"(загружено страниц: {outcome['articles_fetched']})")
         
-        return results
+        return outcome
+    
+    def search_with_sitemap(self, site_url: str, keywords: List[str],
+                          days: int = 7, max_articles: int = 100,
+                          sitemap_url: str = None, date_from = None, date_to = None) -> List[Dict]:
+        """
+        Основной метод поиска через sitemap
+        
+        Args:
+            site_url: URL сайта
+            keywords: Ключевые слова для поиска
+            days: Количество дней для поиска (игнорируется если указаны date_from/date_to)
+            max_articles: Максимальное количество статей для проверки
+            sitemap_url: Прямой URL sitemap (опционально)
+            date_from: Начальная дата (date объект, опционально)
+            date_to: Конечная дата (date объект, опционально)
+            
+        Returns:
+            Список найденных релевантных статей (полный итог - search_sitemap)
+        """
+        date_from, date_to = self.search_period(days, date_from, date_to)
+        
+        if self.logger:
+            period_str = f"с {date_from.strftime('%d.%m.%Y')} по {date_to.strftime('%d.%m.%Y')}"
+            self.logger.log("INFO", f"[SEARCH] Поиск на {site_url} за период {period_str}")
+            self.logger.log("INFO", f"Ключевые слова: {', '.join(keywords)}")
+        
+        return self.search_sitemap(site_url, keywords, date_from, date_to, max_articles, sitemap_url)['articles']
     
     def search_with_sitemap_date(self, site_url: str, keywords: List[str],
                                search_date, max_articles: int = 150,
@@ -417,63 +511,15 @@ class ScrapyParser:
             sitemap_url: Прямой URL sitemap (опционально)
             
         Returns:
-            Список найденных релевантных статей
+            Список найденных релевантных статей (полный итог - search_sitemap)
         """
-        results = []
-        
-        # Преобразуем date в datetime для начала и конца дня
-        from datetime import datetime, time
-        date_from = datetime.combine(search_date, time.min)  # 00:00:00
-        date_to = datetime.combine(search_date, time.max)    # 23:59:59
+        date_from, date_to = self.search_period(search_date=search_date)
         
         if self.logger:
             self.logger.log("INFO", f"[SEARCH] Поиск на {site_url} за {search_date.strftime('%d.%m.%Y')}")
             self.logger.log("INFO", f"Ключевые слова: {', '.join(keywords)}")
         
-        # Находим sitemap
-        sitemap_data = self.find_sitemap(site_url, sitemap_url)
-        if not sitemap_data:
-            if self.logger:
-                self.logger.log("WARNING", "Sitemap не найден, поиск невозможен")
-            return results
-        
-        sitemap_url, xml_content = sitemap_data
-        
-        # Парсим URL из sitemap с фильтром по конкретной дате
-        articles = self.parse_sitemap_urls(xml_content, date_from, date_to)
-        
-        if self.logger:
-            self.logger.log("INFO", f"[INFO] Найдено {len(articles)} URL за {search_date.strftime('%d.%m.%Y')}")
-        
-        # Не ограничиваем количество для конкретной даты (обычно их немного)
-        articles = articles[:max_articles] if len(articles) > max_articles else articles
-        
-        # Проверяем каждую статью
-        checked = 0
-        for article_data in articles:
-            checked += 1
-            if self.logger and checked % 10 == 0:
-                self.logger.log("INFO", f"Проверено {checked}/{len(articles)} статей...")
-            
-            # Ищем ключевые слова в статье
-            article_result = self.search_in_article(article_data['url'], keywords)
-            
-            if article_result:
-                # Добавляем дату если была в sitemap
-                if article_data['date']:
-                    article_result['date'] = article_data['date']
-                else:
-                    article_result['date'] = None
-                    
-                results.append(article_result)
-                
-                if self.logger:
-                    self.logger.log("INFO", f"[OK] Найдено: {article_result['title'][:50]}...")
-        
-        if self.logger:
-            self.logger.log("INFO", f"[DONE] Найдено {len(results)} релевантных статей из {checked} проверенных")
-        
-        return results
+        return self.search_sitemap(site_url, keywords, date_from, date_to, max_articles, sitemap_url)['articles']
     
     def get_results_simple(self, results: List[Dict]) -> str:
         """
@@ -0,0 +1,215 @@
+"""
+Шардированный асинхронный мониторинг на нескольких ядрах
+
+Один event loop AsyncMonitoring упирается в одно ядро: разбор HTML
+(BeautifulSoup) выполняется в том же потоке, что и сетевой ввод-вывод.
+Здесь список филиалов делится на шарды, каждый шард обрабатывается
+собственным AsyncMonitoring в отдельном процессе, а результаты по мере
+готовности возвращаются через очередь в родительский процесс - он
+остается единственным, кто пишет в БД (см. MonitoringRunner.process_sharded).
+
+Стратегии деления:
+    round_robin - по очереди, филиал i в шард i % N
+    district    - целыми федеральными округами, округа распределяются по размеру
+    cost        - по историческому времени обработки (db.get_filial_costs),
+                  самые долгие филиалы - в наименее загруженный шард
+"""
+
+import heapq
+import queue
+import asyncio
+import multiprocessing
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from modules.advanced_logger import get_logger
+
+
+SHARD_STRATEGIES = ('round_robin', 'district', 'cost')
+
+SHARD_STRATEGY_NAMES = {
+    'round_robin': "По очереди",
+    'district': "По федеральным округам",
+    'cost': "По времени обработки"
+}
+
+# Оценка стоимости филиала без истории обработки, секунд
+DEFAULT_FILIAL_COST = 10.0
+
+# Сколько ждать результата от шардов, прежде чем проверить, живы ли процессы
+RESULT_POLL_SECONDS = 1.0
+
+
+def _balance(groups: List[List[Dict[str, Any]]], weights: List[float],
+             shards: int) -> List[List[Dict[str, Any]]]:
+    """Жадное распределение групп: самая тяжелая группа - в наименее загруженный шард"""
+    heap = [(0.0, index) for index in range(shards)]
+    result = [[] for _ in range(shards)]
+    for weight, group in sorted(zip(weights, groups), key=lambda item: -item[0]):
+        load, index = heapq.heappop(heap)
+        result[index].extend(group)
+        heapq.heappush(heap, (load + weight, index))
+    return result
+
+
+def shard_filials(filials: List[Dict[str, Any]], shards: int, strategy: str = 'round_robin',
+                  costs: Optional[Dict[int, float]] = None) -> List[List[Dict[str, Any]]]:
+    """
+    Разделить филиалы на шарды
+
+    Args:
+        filials: Филиалы (словари из БД)
+        shards: Количество шардов
+        strategy: round_robin, district или cost
+        costs: {ID филиала: время обработки} для стратегии cost
+
+    Returns:
+        Непустые шарды (их может быть меньше shards, например при делении по округам)
+    """
+    if strategy not in SHARD_STRATEGIES:
+        raise ValueError(f"Неизвестная стратегия шардирования: {strategy}")
+    shards = max(1, min(shards, len(filials)))
+
+    if strategy == 'round_robin':
+        result = [filials[index::shards] for index in range(shards)]
+    elif strategy == 'district':
+        districts = {}
+        for filial in filials:
+            districts.setdefault(filial.get('federal_district') or '', []).append(filial)
+        groups = list(districts.values())
+        result = _balance(groups, [len(group) for group in groups], shards)
+    else:
+        costs = costs or {}
+        known = sorted(costs.values())
+        # Филиалы без истории оцениваем медианой известных
+        default = known[len(known) // 2] if known else DEFAULT_FILIAL_COST
+        weights = [costs.get(filial.get('id'), default) for filial in filials]
+        result = _balance([[filial] for filial in filials], weights, shards)
+
+    return [shard for shard in result if shard]
+
+
+def _run_shard(index: int, filials: List[Dict[str, Any]], keywords: List[str], days: int,
+               max_concurrent: int, max_articles: int, host_limits: Dict[str, float],
+               host_timeouts: Dict[str, Tuple[float, float]], results: multiprocessing.Queue):
+    """Процесс шарда: свой event loop и AsyncMonitoring, результаты - в очередь"""
+    from modules.async_monitoring import AsyncMonitoring
+
+    async def crawl():
+        # Шард сам является отдельным процессом: разбор HTML - в его event loop
+        # (daemon-процесс не может запустить собственный пул процессов)
+        monitor = AsyncMonitoring(max_concurrent=max_concurrent, parse_workers=0,
+                                  host_limits=host_limits, host_timeouts=host_timeouts)
+        try:
+            await monitor.process_filials_batch(
+                filials, keywords, days=days, max_articles=max_articles,
+                progress_callback=lambda current, total, result: results.put(('result', index, result)),
+                collect_results=False
+            )
+        finally:
+            await monitor.close()
+            # Выученные пределы хостов сохраняет родительский процесс
+            results.put(('limits', index, monitor.concurrency.export()))
+
+    error = None
+    try:
+        asyncio.run(crawl())
+    except Exception as e:
+        error = str(e)
+    results.put(('done', index, error))
+
+
+def iter_sharded_results(filials: List[Dict[str, Any]], keywords: List[str], days: int = 7,
+                         max_concurrent: int = 20, shards: int = 2, strategy: str = 'round_robin',
+                         costs: Optional[Dict[int, float]] = None, max_articles: int = 50,
+                         should_stop=None, host_limits: Optional[Dict[str, float]] = None,
+                         host_timeouts: Optional[Dict[str, Tuple[float, float]]] = None,
+                         learned_limits: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Обработать филиалы в нескольких процессах и выдавать результаты по мере готовности
+
+    Результаты имеют тот же вид, что и у AsyncMonitoring.process_filial_async.
+    Филиалы шарда, процесс которого завершился аварийно, возвращаются со статусом error.
+
+    Args:
+        filials: Филиалы (словари из БД)
+        keywords: Ключевые слова
+        days: Период поиска в днях
+        max_concurrent: Общее число параллельных соединений (делится между шардами)
+        shards: Количество процессов
+        strategy: Стратегия деления (SHARD_STRATEGIES)
+        costs: Историческая стоимость филиалов для стратегии cost
+        max_articles: Максимум статей на филиал
+        should_stop: Функция без аргументов; True - остановить процессы шардов
+        host_limits: Выученные пределы параллельности по хостам (db.get_host_limits)
+        host_timeouts: Адаптивные таймауты по хостам (HostHealth.all_timeouts)
+        learned_limits: Словарь, куда собираются пределы хостов от шардов (для db.save_host_limits)
+    """
+    logger = get_logger()
+    parts = shard_filials(filials, shards, strategy, costs)
+    per_shard = max(1, max_concurrent // len(parts)) if parts else max_concurrent
+    logger.log("INFO", f"Шардирование ({strategy}): {len(parts)} процессов, "
+                       f"филиалов по шардам {[len(part) for part in parts]}, "
+                       f"{per_shard} соединений на шард")
+
+    # spawn: дочерние процессы не наследуют потоки и соединения родителя
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    processes = [
+        context.Process(target=_run_shard,
+                        args=(index, part, keywords, days, per_shard, max_articles,
+                              host_limits or {}, host_timeouts or {}, results),
+                        daemon=True)
+        for index, part in enumerate(parts)
+    ]
+    for process in processes:
+        process.start()
+
+    pending = set(range(len(parts)))
+    returned = {index: set() for index in pending}
+    try:
+        while pending:
+            if should_stop and should_stop():
+                break
+            try:
+                kind, index, payload = results.get(timeout=RESULT_POLL_SECONDS)
+            except queue.Empty:
+                for index in list(pending):
+                    if not processes[index].is_alive() and results.empty():
+                        # Процесс умер, не отправив 'done' (OOM, kill)
+                        pending.discard(index)
+                        yield from _lost_results(parts[index], returned[index],
+                                                 f"Процесс шарда завершился с кодом {processes[index].exitcode}")
+                continue
+
+            if kind == 'result':
+                returned[index].add(payload.get('filial_id'))
+                yield payload
+            elif kind == 'limits':
+                if learned_limits is not None:
+                    learned_limits.update(payload)
+            else:
+                pending.discard(index)
+                if payload:
+                    logger.log("ERROR", f"Шард {index + 1}: {payload}")
+                    yield from _lost_results(parts[index], returned[index], payload)
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join(timeout=5)
+        results.close()
+
+
+def _lost_results(filials: List[Dict[str, Any]], returned: set, error: str) -> Iterator[Dict[str, Any]]:
+    """Результаты-ошибки для филиалов шарда, по которым ответ так и не пришел"""
+    for filial in filials:
+        if filial.get('id') not in returned:
+            yield {
+                'filial_id': filial.get('id'),
+                'filial_name': filial.get('name'),
+                'website': filial.get('website_url') or filial.get('website'),
+                'status': 'error',
+                'articles': [],
+                'error': error,
+                'processing_time': None
+            }
@@ -3,19 +3,153 @@ from bs4 import BeautifulSoup
 import time
 from typing import Optional, Dict, Any, Tuple, List
 import re
+import codecs
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from urllib.parse import urljoin, urlparse
+from lxml import etree
 from config.settings import DEFAULT_TIMEOUT, MAX_CONTENT_LENGTH, PARSER_DELAY
 from modules.advanced_logger import get_logger, LogLevel
+from modules.host_health import guarded_request
+from modules.sitemap_discovery import PROBE_TIMEOUT, _probe, discover_sitemap
+
+# Стандартные пути RSS-ленты в порядке приоритета
+RSS_PATHS = ['/rss', '/rss.xml', '/feed', '/feed.xml', '/rss/news', '/export/rss.xml']
+
+# Одновременные загрузки лент (fetch_rss_feeds) и размер части потока
+RSS_WORKERS = 20
+RSS_CHUNK_SIZE = 16 * 1024
+
+# Новостные страницы в parse_meta_data: сколько загружается, одновременно всего
+# и к одному хосту, общий лимит времени на филиал (секунд) - по его истечении
+# используются уже загруженные страницы
+NEWS_PAGES_LIMIT = 5
+NEWS_WORKERS = 5
+NEWS_PER_HOST = 3
+NEWS_TIME_BUDGET = 15
+
+# Быстрый путь мета-парсинга (_stream_meta): размер части потока и сколько
+# байт читается максимум, если заголовки страницы уже встречены, а первого
+# абзаца еще нет (заголовки дальше этой границы не учитываются)
+META_CHUNK_SIZE = 8 * 1024
+META_STREAM_LIMIT = 64 * 1024
+
+# Кэш страниц (_get_page): сколько последних страниц хранится вместе с разобранным деревом
+PAGE_CACHE_SIZE = 16
+
+
+def sniff_rss_type(head: str) -> Optional[str]:
+    """Тип ленты по началу документа: rss, atom или None (HTML-страница и т.п.)"""
+    text = head.lstrip('\ufeff \r\n\t').lower()
+    if not text.startswith('<'):
+        return None
+    if '<rss' in text or '<rdf:rdf' in text:
+        return 'rss'
+    if '<feed' in text:
+        return 'atom'
+    return None
+
+
+class StreamedPage:
+    """Дочитанная потоковая страница для кэша _get_page (поля как у requests.Response)"""
+
+    def __init__(self, response: requests.Response, content: bytes, encoding: str):
+        self.url = response.url
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.content = content
+        self.encoding = encoding
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding, errors='replace')
+
 
 class SiteParser:
-    def __init__(self, log_level: LogLevel = LogLevel.INFO):
-        """Инициализация парсера сайтов"""
+    def __init__(self, log_level: LogLevel = LogLevel.INFO, health=None):
+        """
+        Инициализация парсера сайтов
+        
+        Args:
+            log_level: Уровень логирования
+            health: HostHealth - недоступные сайты отклоняются сразу, без ожидания таймаута
+        """
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         })
         self.logger = get_logger(log_level)
         self.metrics = {}
+        self.health = health
+        # LRU-кэш страниц в пределах обработки филиала: {url: (ответ, дерево BeautifulSoup)}
+        self._page_cache = OrderedDict()
+        self._page_cache_lock = threading.Lock()
+        # Поколение кэша: растет при очистке; ответы, запрошенные до нее, не кэшируются
+        self._page_cache_generation = 0
+        self.page_cache_stats = {'hits': 0, 'misses': 0}
+    
+    def _request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Запрос через сессию с учетом доступности хоста (HostUnavailable для отключенных)"""
+        return guarded_request(self.health, self.session, method, url, **kwargs)
+    
+    def _get_page(self, url: str, generation: Optional[int] = None) -> Tuple[requests.Response, BeautifulSoup]:
+        """
+        Страница и ее разобранное дерево (BeautifulSoup на lxml) из кэша или из сети
+        
+        Повторное обращение к той же странице (главная в parse_meta_data,
+        _find_news_urls и _find_rss_url) не выполняет ни запроса, ни разбора.
+        Дерево общее для всех вызывающих: изменять его нельзя.
+        Кэшируются только успешные ответы; ошибки HTTP поднимаются как раньше.
+        Страница, дочитанная _stream_meta, возвращается как StreamedPage.
+        
+        Args:
+            url: Адрес страницы
+            generation: Поколение кэша на момент запуска загрузки (по умолчанию текущее)
+        """
+        with self._page_cache_lock:
+            if generation is None:
+                generation = self._page_cache_generation
+            page = self._page_cache.get(url)
+            if page:
+                self._page_cache.move_to_end(url)
+                self.page_cache_stats['hits'] += 1
+                return page
+            self.page_cache_stats['misses'] += 1
+        
+        response = self._request('GET', url, timeout=DEFAULT_TIMEOUT)
+        response.raise_for_status()
+        
+        # Определяем кодировку
+        if response.encoding is None or response.encoding.lower() == 'iso-8859-1':
+            content_type = response.headers.get('content-type', '')
+            if 'charset=' in content_type:
+                response.encoding = content_type.split('charset=')[-1]
+            else:
+                response.encoding = 'utf-8'
+        
+        page = (response, BeautifulSoup(response.text, 'lxml'))
+        self._cache_page(url, page, generation)
+        return page
+    
+    def _cache_page(self, url: str, page: Tuple[requests.Response, BeautifulSoup], generation: int):
+        """Положить страницу в кэш, если он не очищался после начала ее загрузки"""
+        with self._page_cache_lock:
+            if generation != self._page_cache_generation:
+                return
+            self._page_cache[url] = page
+            while len(self._page_cache) > PAGE_CACHE_SIZE:
+                self._page_cache.popitem(last=False)
+    
+    def _is_page_cached(self, url: str) -> bool:
+        with self._page_cache_lock:
+            return url in self._page_cache
+    
+    def clear_page_cache(self):
+        """Очистить кэш страниц (MonitoringRunner - перед каждым филиалом)"""
+        with self._page_cache_lock:
+            self._page_cache.clear()
+            self._page_cache_generation += 1
     
     def parse_site(self, url: str) -> Tuple[Optional[str], Dict[str, Any]]:
         """
@@ -47,7 +181,7 @@ class SiteParser:
             time.sleep(PARSER_DELAY)
             
             # Выполняем запрос к сайту
-            response = self.session.get(url, timeout=DEFAULT_TIMEOUT)
+            response = self._request('GET', url, timeout=DEFAULT_TIMEOUT)
             response.raise_for_status()
             
             # Собираем метрики ответа
@@ -252,13 +386,18 @@ class SiteParser:
         
         return results
     
-    def parse_meta_data(self, url: str, include_news: bool = False) -> Tuple[Optional[str], Dict[str, Any]]:
+    def parse_meta_data(self, url: str, include_news: bool = False,
+                        time_budget: float = NEWS_TIME_BUDGET) -> Tuple[Optional[str], Dict[str, Any]]:
         """
         Парсинг только метаданных и заголовков страницы (быстрый режим)
         
+        Новостные страницы загружаются одновременно (_extract_news_pages).
+        
         Args:
             url: URL сайта для парсинга
             include_news: Включать ли новостные страницы
+            time_budget: Лимит времени на весь сайт, секунд: новостные страницы,
+                не успевшие загрузиться, пропускаются (metrics['news_timed_out'])
             
         Returns:
             Кортеж (извлеченные метаданные и заголовки, метрики)
@@ -272,6 +411,8 @@ class SiteParser:
             'meta_tags_count': 0,
             'text_length': 0,
             'pages_parsed': 1,
+            'news_timed_out': 0,
+            'bytes_read': 0,
             'mode': 'meta_only',
             'error': None
         }
@@ -283,13 +424,14 @@ class SiteParser:
             self.logger.start_timer(f"parse_meta_{url}")
             start_time = time.time()
             
-            # Парсим главную страницу
-            main_text, main_metrics = self._extract_meta_from_page(url)
+            # Парсим главную страницу (целиком, если по ней ищутся новостные страницы)
+            main_text, main_metrics = self._extract_meta_from_page(url, head_only=not include_news)
             if main_text:
                 all_text.append(f"=== ГЛАВНАЯ СТРАНИЦА ===\n{main_text}")
                 metrics['http_status'] = main_metrics.get('http_status')
                 metrics['headers_count'] += main_metrics.get('headers_count', 0)
                 metrics['meta_tags_count'] += main_metrics.get('meta_tags_count', 0)
+            metrics['bytes_read'] += main_metrics.get('bytes_read', 0)
             
             # Если нужно, парсим новостные страницы
             if include_news and main_text:
@@ -299,14 +441,18 @@ class SiteParser:
                 if news_urls:
                     self.logger.log("INFO", f"Найдено {len(news_urls)} новостных страниц")
                     
-                    # Парсим первые 3-5 новостных страниц
-                    for news_url in news_urls[:5]:
-                        time.sleep(PARSER_DELAY)  # Задержка между запросами
-                        news_text, news_metrics = self._extract_meta_from_page(news_url)
+                    # Новостные страницы - одновременно, в пределах оставшегося времени
+                    news_pages, metrics['news_timed_out'] = self._extract_news_pages(
+                        news_urls[:NEWS_PAGES_LIMIT], time_budget - (time.time() - start_time))
+                    for news_url, (news_text, news_metrics) in news_pages:
+                        metrics['bytes_read'] += news_metrics.get('bytes_read', 0)
                         if news_text:
                             all_text.append(f"\n=== НОВОСТЬ: {news_url} ===\n{news_text}")
                             metrics['pages_parsed'] += 1
                             metrics['headers_count'] += news_metrics.get('headers_count', 0)
+                    if metrics['news_timed_out']:
+                        self.logger.log("WARNING", f"{url}: лимит времени {time_budget} сек, "
+                                                   f"пропущено новостных страниц: {metrics['news_timed_out']}")
             
             # Собираем итоговые метрики
             metrics['response_time'] = time.time() - start_time
@@ -328,88 +474,268 @@ class SiteParser:
             self.logger.log("ERROR", f"Ошибка мета-парсинга {url}: {e}")
             return None, metrics
     
-    def _extract_meta_from_page(self, url: str) -> Tuple[Optional[str], Dict[str, Any]]:
+    def _extract_news_pages(self, news_urls: List[str], timeout: float) -> Tuple[List[Tuple[str, Any]], int]:
+        """
+        Одновременное извлечение метаданных новостных страниц
+        
+        Вежливость к сайту: не более NEWS_PER_HOST одновременных запросов к одному хосту.
+        Загрузки, не начатые до истечения timeout, отменяются; начатые завершаются
+        в фоне, но их страницы не попадают в кэш, очищенный после запуска.
+        
+        Args:
+            news_urls: Адреса страниц
+            timeout: Сколько секунд ждать; незавершенные загрузки бросаются
+            
+        Returns:
+            Кортеж ([(url, результат _extract_meta_from_page)] в порядке news_urls
+            для завершившихся страниц, число пропущенных по времени)
+        """
+        if not news_urls:
+            return [], 0
+        
+        host_limits = {}
+        for news_url in news_urls:
+            host_limits.setdefault(urlparse(news_url).netloc, threading.Semaphore(NEWS_PER_HOST))
+        
+        with self._page_cache_lock:
+            generation = self._page_cache_generation
+        cancelled = threading.Event()
+        
+        def extract(news_url):
+            with host_limits[urlparse(news_url).netloc]:
+                if cancelled.is_set():
+                    return None, {}
+                return self._extract_meta_from_page(news_url, generation=generation)
+        
+        # Пул без ожидания при выходе: загрузки, вышедшие за лимит, не задерживают филиал
+        pool = ThreadPoolExecutor(max_workers=min(NEWS_WORKERS, len(news_urls)), thread_name_prefix='news-meta')
+        try:
+            futures = [pool.submit(extract, news_url) for news_url in news_urls]
+            done, not_done = wait(futures, timeout=max(timeout, 0))
+        finally:
+            cancelled.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+        
+        pages = [(news_url, future.result()) for news_url, future in zip(news_urls, futures) if future in done]
+        return pages, len(not_done)
+    
+    def _extract_meta_from_page(self, url: str, head_only: bool = True,
+                                generation: Optional[int] = None) -> Tuple[Optional[str], Dict[str, Any]]:
         """
         Извлечение метаданных и заголовков с одной страницы
         
         Args:
             url: URL страницы
+            head_only: Быстрый путь - страница читается потоково (_stream_meta) до
+                получения нужных элементов; иначе загружается и разбирается целиком
+                (нужно, когда страница понадобится еще, как главная в режиме с новостями)
+            generation: Поколение кэша страниц (_get_page), в которое пишется результат
             
         Returns:
-            Кортеж (текст метаданных, метрики страницы)
+            Кортеж (текст метаданных, метрики страницы); metrics['head_only'] -
+            сработал быстрый путь, metrics['bytes_read'] - прочитано байт ответа
         """
         metrics = {
             'http_status': None,
             'headers_count': 0,
-            'meta_tags_count': 0
+            'meta_tags_count': 0,
+            'head_only': False,
+            'bytes_read': 0
         }
         
         try:
-            # Запрос страницы
-            response = self.session.get(url, timeout=DEFAULT_TIMEOUT)
-            response.raise_for_status()
+            fields = None
+            if head_only and not self._is_page_cached(url):
+                response, fields, metrics['bytes_read'] = self._stream_meta(url, generation)
+                metrics['head_only'] = fields is not None
+            else:
+                response = None
+            
+            if fields is None:
+                if generation is not None and generation != self._page_cache_generation:
+                    # Кэш очищен во время загрузки (филиал завершен): повторный запрос не нужен
+                    return None, metrics
+                # Страница из кэша, запрос или полный разбор при отсутствии заголовков
+                response, soup = self._get_page(url, generation)
+                fields = self._meta_from_soup(soup)
+                metrics['bytes_read'] = metrics['bytes_read'] or len(response.content)
             metrics['http_status'] = response.status_code
             
-            # Определяем кодировку
-            if response.encoding is None or response.encoding.lower() == 'iso-8859-1':
-                content_type = response.headers.get('content-type', '')
-                if 'charset=' in content_type:
-                    response.encoding = content_type.split('charset=')[-1]
-                else:
-                    response.encoding = 'utf-8'
-            
-            # Парсим HTML
-            soup = BeautifulSoup(response.text, 'lxml')
-            
-            text_parts = []
-            
-            # Извлекаем title
-            title = soup.find('title')
-            if title:
-                text_parts.append(f"Заголовок: {title.get_text().strip()}")
-            
-            # Извлекаем meta description
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc and meta_desc.get('content'):
-                text_parts.append(f"Описание: {meta_desc['content']}")
-                metrics['meta_tags_count'] += 1
-            
-            # Извлекаем meta keywords
-            meta_keywords = soup.find('meta', attrs={'name': 'keywords'})
-            if meta_keywords and meta_keywords.get('content'):
-                text_parts.append(f"Ключевые слова: {meta_keywords['content']}")
-                metrics['meta_tags_count'] += 1
-            
-            # Извлекаем OG meta теги
-            og_tags = soup.find_all('meta', attrs={'property': re.compile('^og:')})
-            for tag in og_tags:
-                if tag.get('content'):
-                    prop_name = tag['property'].replace('og:', '')
-                    text_parts.append(f"OG {prop_name}: {tag['content']}")
-                    metrics['meta_tags_count'] += 1
-            
-            # Извлекаем заголовки H1-H3
-            for level in ['h1', 'h2', 'h3']:
-                headers = soup.find_all(level)
-                for header in headers[:5]:  # Ограничиваем количество
-                    header_text = header.get_text().strip()
-                    if header_text:
-                        text_parts.append(f"{level.upper()}: {header_text}")
-                        metrics['headers_count'] += 1
-            
-            # Извлекаем первый параграф (лид)
-            first_p = soup.find('p')
-            if first_p:
-                lead_text = first_p.get_text().strip()
-                if lead_text and len(lead_text) > 50:
-                    text_parts.append(f"Первый абзац: {lead_text[:300]}...")
-            
-            return "\n".join(text_parts), metrics
+            return self._format_meta(fields, metrics), metrics
             
         except Exception as e:
             self.logger.log("ERROR", f"Ошибка извлечения метаданных с {url}: {e}")
             return None, metrics
     
+    @staticmethod
+    def _meta_from_soup(soup: BeautifulSoup) -> Dict[str, Any]:
+        """Метаданные полностью разобранной страницы (поля как у _stream_meta)"""
+        fields = SiteParser._empty_meta()
+        
+        title = soup.find('title')
+        if title:
+            fields['title'] = title.get_text().strip()
+        
+        for name in ('description', 'keywords'):
+            meta = soup.find('meta', attrs={'name': name})
+            if meta and meta.get('content'):
+                fields[name] = meta['content']
+        
+        for tag in soup.find_all('meta', attrs={'property': re.compile('^og:')}):
+            if tag.get('content'):
+                fields['og'].append((tag['property'].replace('og:', ''), tag['content']))
+        
+        for level in ('h1', 'h2', 'h3'):
+            for header in soup.find_all(level)[:5]:  # Ограничиваем количество
+                fields['headers'][level].append(header.get_text().strip())
+        
+        first_p = soup.find('p')
+        if first_p:
+            fields['lead'] = first_p.get_text().strip()
+        return fields
+    
+    @staticmethod
+    def _empty_meta() -> Dict[str, Any]:
+        return {
+            'title': None,
+            'description': None,
+            'keywords': None,
+            'og': [],
+            'headers': {'h1': [], 'h2': [], 'h3': []},
+            'lead': None
+        }
+    
+    def _stream_meta(self, url: str, generation: Optional[int] = None
+                     ) -> Tuple[requests.Response, Optional[Dict[str, Any]], int]:
+        """
+        Потоковое извлечение метаданных (lxml HTMLPullParser)
+        
+        Чтение прекращается на части потока, в которой уже есть конец <head>,
+        первый абзац и хотя бы один заголовок H1-H3, либо после META_STREAM_LIMIT
+        байт, если заголовки уже есть. Заголовки берутся из прочитанной части:
+        их может быть меньше, чем при полном разборе (по 5 на уровень).
+        Страница без заголовков дочитывается и разбирается целиком (поля None,
+        полная страница кладется в кэш _get_page как StreamedPage).
+        
+        Args:
+            url: Адрес страницы
+            generation: Поколение кэша страниц (по умолчанию текущее)
+        
+        Returns:
+            Кортеж (ответ, поля метаданных или None, прочитано байт)
+        """
+        if generation is None:
+            with self._page_cache_lock:
+                generation = self._page_cache_generation
+        response = self._request('GET', url, timeout=DEFAULT_TIMEOUT, stream=True)
+        try:
+            response.raise_for_status()
+            chunks = response.iter_content(META_CHUNK_SIZE)
+            body = bytearray()
+            fields = self._empty_meta()
+            parser = None
+            head_done = False
+            
+            for chunk in chunks:
+                body.extend(chunk)
+                if parser is None:
+                    encoding = self._stream_encoding(response, bytes(body))
+                    parser = etree.HTMLPullParser(events=('end',), encoding=encoding)
+                parser.feed(chunk)
+                for _, elem in parser.read_events():
+                    head_done = self._collect_meta(elem, fields) or head_done
+                
+                if any(fields['headers'].values()) and (
+                        (head_done and fields['lead'] is not None) or len(body) >= META_STREAM_LIMIT):
+                    return response, fields, len(body)
+            
+            if parser is not None:
+                for _, elem in parser.read_events():
+                    self._collect_meta(elem, fields)
+            if any(fields['headers'].values()) or not body:
+                return response, fields, len(body)
+            
+            # Заголовков нет: полный разбор уже загруженной страницы. Поток прочитан,
+            # поэтому в кэш кладется страница с собранным телом (.content и .text)
+            page = StreamedPage(response, bytes(body), self._stream_encoding(response, bytes(body)))
+            soup = BeautifulSoup(page.text, 'lxml')
+            self._cache_page(url, (page, soup), generation)
+            return response, None, len(body)
+        finally:
+            response.close()
+    
+    @staticmethod
+    def _collect_meta(elem, fields: Dict[str, Any]) -> bool:
+        """Учесть закрытый элемент потокового разбора; True - закончился <head>"""
+        tag = elem.tag
+        if not isinstance(tag, str):
+            return False
+        if tag == 'head':
+            return True
+        if tag == 'title' and fields['title'] is None:
+            fields['title'] = ''.join(elem.itertext()).strip()
+        elif tag == 'meta':
+            content = elem.get('content')
+            name = (elem.get('name') or '').lower()
+            prop = elem.get('property') or ''
+            if content and name in ('description', 'keywords') and fields[name] is None:
+                fields[name] = content
+            elif content and prop.startswith('og:'):
+                fields['og'].append((prop.replace('og:', ''), content))
+        elif tag in fields['headers'] and len(fields['headers'][tag]) < 5:
+            fields['headers'][tag].append(''.join(elem.itertext()).strip())
+        elif tag == 'p' and fields['lead'] is None:
+            fields['lead'] = ''.join(elem.itertext()).strip()
+        return False
+    
+    @staticmethod
+    def _stream_encoding(response: requests.Response, head: bytes) -> str:
+        """Кодировка потока: из Content-Type, из <meta charset> или utf-8"""
+        content_type = response.headers.get('content-type', '')
+        match = re.search(r'charset=["\']?([\w-]+)', content_type, re.I) or \
+            re.search(rb'<meta[^>]+charset=["\']?([\w-]+)', head[:META_CHUNK_SIZE], re.I)
+        if match:
+            encoding = match.group(1)
+            encoding = encoding.decode('ascii') if isinstance(encoding, bytes) else encoding
+            try:
+                return codecs.lookup(encoding).name
+            except LookupError:
+                pass
+        return 'utf-8'
+    
+    @staticmethod
+    def _format_meta(fields: Dict[str, Any], metrics: Dict[str, Any]) -> str:
+        """Текст метаданных для поиска и анализа; счетчики пишутся в metrics"""
+        text_parts = []
+        
+        if fields['title'] is not None:
+            text_parts.append(f"Заголовок: {fields['title']}")
+        
+        if fields['description']:
+            text_parts.append(f"Описание: {fields['description']}")
+            metrics['meta_tags_count'] += 1
+        
+        if fields['keywords']:
+            text_parts.append(f"Ключевые слова: {fields['keywords']}")
+            metrics['meta_tags_count'] += 1
+        
+        for prop_name, content in fields['og']:
+            text_parts.append(f"OG {prop_name}: {content}")
+            metrics['meta_tags_count'] += 1
+        
+        for level in ('h1', 'h2', 'h3'):
+            for header_text in fields['headers'][level]:
+                if header_text:
+                    text_parts.append(f"{level.upper()}: {header_text}")
+                    metrics['headers_count'] += 1
+        
+        # Первый параграф (лид)
+        lead_text = fields['lead']
+        if lead_text and len(lead_text) > 50:
+            text_parts.append(f"Первый абзац: {lead_text[:300]}...")
+        
+        return "\n".join(text_parts)
+    
     def _find_news_urls(self, base_url: str) -> List[str]:
         """
         Поиск ссылок на новостные страницы
@@ -423,10 +749,8 @@ class SiteParser:
         news_urls = []
         
         try:
-            response = self.session.get(base_url, timeout=DEFAULT_TIMEOUT)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'lxml')
+            # Главная уже загружена _extract_meta_from_page: берется из кэша
+            _, soup = self._get_page(base_url)
             
             # Паттерны для поиска новостных ссылок
             news_patterns = [
@@ -500,20 +824,36 @@ class SiteParser:
         
         return article_urls[:5]
     
-    def parse_rss_feed(self, url: str, max_items: int = 20) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    def parse_rss_feed(self, url: str, max_items: int = 20, rss_url: Optional[str] = None,
+                       etag: Optional[str] = None, last_modified: Optional[str] = None,
+                       discover: bool = True) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
         """
         Парсинг RSS-ленты сайта для быстрого поиска в новостях
         
+        Лента запрашивается условным GET (If-None-Match / If-Modified-Since) и
+        разбирается потоково: после max_items записей соединение закрывается.
+        
         Args:
-            url: URL сайта (будет искать RSS автоматически)
+            url: URL сайта
             max_items: Максимальное количество элементов для обработки
+            rss_url: Сохраненный адрес ленты (иначе ищется через discover_rss_url)
+            etag: ETag прошлого ответа ленты
+            last_modified: Last-Modified прошлого ответа ленты
+            discover: Искать ленту, если rss_url не задан или больше не отвечает
             
         Returns:
-            Кортеж (словарь с RSS данными, метрики)
+            Кортеж (словарь с RSS данными, метрики). Для неизмененной ленты (304)
+            данных нет, а metrics['not_modified'] = True; metrics['rss_url'],
+            metrics['etag'] и metrics['last_modified'] сохраняются для следующего запуска,
+            metrics['discovered'] - лента искалась заново
         """
         metrics = {
             'url': url,
             'rss_url': None,
+            'etag': None,
+            'last_modified': None,
+            'not_modified': False,
+            'discovered': False,
             'items_count': 0,
             'response_time': 0,
             'mode': 'rss',
@@ -522,29 +862,20 @@ class SiteParser:
         
         try:
             start_time = time.time()
-            self.logger.start_timer(f"parse_rss_{url}")
             
-            # Пытаемся найти RSS ленту
-            rss_url = self._find_rss_url(url)
-            if not rss_url:
-                # Стандартные варианты RSS
-                possible_rss = [
-                    urljoin(url, '/rss'),
-                    urljoin(url, '/rss.xml'),
-                    urljoin(url, '/feed'),
-                    urljoin(url, '/feed.xml'),
-                    urljoin(url, '/rss/news'),
-                    urljoin(url, '/export/rss.xml')
-                ]
-                
-                for rss_candidate in possible_rss:
-                    try:
-                        response = self.session.head(rss_candidate, timeout=5)
-                        if response.status_code == 200:
-                            rss_url = rss_candidate
-                            break
-                    except:
-                        continue
+            response = None
+            if rss_url:
+                response = self._fetch_rss(rss_url, etag, last_modified)
+                if response.status_code in (404, 410):
+                    # Сохраненная лента удалена: ищем заново
+                    response.close()
+                    response = rss_url = None
+            
+            if not rss_url and discover:
+                metrics['discovered'] = True
+                rss_url = self.discover_rss_url(url)
+                if rss_url:
+                    response = self._fetch_rss(rss_url)
             
             if not rss_url:
                 metrics['error'] = "RSS лента не найдена"
@@ -552,86 +883,29 @@ class SiteParser:
                 return None, metrics
             
             metrics['rss_url'] = rss_url
-            self.logger.log("INFO", f"Найден RSS: {rss_url}")
-            
-            # Загружаем RSS
-            response = self.session.get(rss_url, timeout=DEFAULT_TIMEOUT)
-            response.raise_for_status()
-            
-            # Парсим RSS как XML
-            soup = BeautifulSoup(response.content, 'xml')
-            
-            # Извлекаем информацию о канале
-            channel = soup.find('channel')
-            if not channel:
+            try:
+                metrics['etag'] = response.headers.get('ETag')
+                metrics['last_modified'] = response.headers.get('Last-Modified')
+                if response.status_code == 304:
+                    metrics['not_modified'] = True
+                    metrics['etag'] = metrics['etag'] or etag
+                    metrics['last_modified'] = metrics['last_modified'] or last_modified
+                    metrics['response_time'] = time.time() - start_time
+                    self.logger.log("INFO", f"RSS не изменился: {rss_url}")
+                    return None, metrics
+                response.raise_for_status()
+                rss_data = self._read_rss_items(response.iter_content(RSS_CHUNK_SIZE), max_items)
+            finally:
+                response.close()
+            
+            if rss_data is None:
                 metrics['error'] = "Некорректный формат RSS"
+                # Без валидаторов: следующий запуск загрузит ленту целиком
+                metrics['etag'] = metrics['last_modified'] = None
                 return None, metrics
             
-            rss_data = {
-                'channel_title': '',
-                'channel_description': '',
-                'items': []
-            }
-            
-            # Информация о канале
-            channel_title = channel.find('title')
-            if channel_title:
-                rss_data['channel_title'] = channel_title.get_text().strip()
-            
-            channel_desc = channel.find('description')
-            if channel_desc:
-                rss_data['channel_description'] = channel_desc.get_text().strip()
-            
-            # Извлекаем новости
-            items = soup.find_all('item')[:max_items]
-            metrics['items_count'] = len(items)
-            
-            for item in items:
-                item_data = {
-                    'title': '',
-                    'description': '',
-                    'link': '',
-                    'pubDate': '',
-                    'full_text': ''  # Объединенный текст для поиска
-                }
-                
-                # Заголовок
-                title = item.find('title')
-                if title:
-                    item_data['title'] = title.get_text().strip()
-                
-                # Описание
-                description = item.find('description')
-                if description:
-                    # Очищаем от HTML тегов если есть
-                    desc_text = description.get_text().strip()
-                    # Пробуем распарсить как HTML
-                    try:
-                        desc_soup = BeautifulSoup(desc_text, 'html.parser')
-                        desc_text = desc_soup.get_text().strip()
-                    except:
-                        pass
-                    item_data['description'] = desc_text
-                
-                # Ссылка
-                link = item.find('link')
-                if link:
-                    item_data['link'] = link.get_text().strip()
-                
-                # Дата публикации
-                pub_date = item.find('pubDate')
-                if pub_date:
-                    item_data['pubDate'] = pub_date.get_text().strip()
-                
-                # Объединяем для поиска
-                item_data['full_text'] = f"{item_data['title']} {item_data['description']}"
-                
-                rss_data['items'].append(item_data)
-            
-            # Метрики
+            metrics['items_count'] = len(rss_data['items'])
             metrics['response_time'] = time.time() - start_time
-            duration = self.logger.end_timer(f"parse_rss_{url}")
-            
             self.logger.log("INFO", f"RSS обработан: {metrics['items_count']} новостей за {metrics['response_time']:.2f} сек")
             
             return rss_data, metrics
@@ -641,6 +915,132 @@ class SiteParser:
             self.logger.log("ERROR", f"Ошибка парсинга RSS для {url}: {e}")
             return None, metrics
     
+    def fetch_rss_feeds(self, targets: List[Dict[str, Any]], max_items: int = 20,
+                        max_workers: int = RSS_WORKERS) -> List[Tuple[Optional[Dict[str, Any]], Dict[str, Any]]]:
+        """
+        Одновременная загрузка RSS-лент нескольких сайтов
+        
+        Args:
+            targets: Аргументы parse_rss_feed для каждого сайта ({'url', 'rss_url', 'etag', ...})
+            max_items: Максимальное количество элементов ленты
+            max_workers: Число одновременных загрузок
+            
+        Returns:
+            Результаты parse_rss_feed в порядке targets
+        """
+        if not targets:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(targets)),
+                                thread_name_prefix='rss-fetch') as pool:
+            return list(pool.map(lambda target: self.parse_rss_feed(max_items=max_items, **target), targets))
+    
+    def _fetch_rss(self, rss_url: str, etag: Optional[str] = None,
+                   last_modified: Optional[str] = None) -> requests.Response:
+        """Условный GET ленты (ответ читается потоково)"""
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return self._request('GET', rss_url, timeout=DEFAULT_TIMEOUT, stream=True, headers=headers)
+    
+    @staticmethod
+    def _read_rss_items(chunks, max_items: int) -> Optional[Dict[str, Any]]:
+        """
+        Потоковый разбор RSS/Atom (lxml): чтение прекращается после max_items записей
+        
+        Returns:
+            {'channel_title', 'channel_description', 'items'} или None, если это не лента
+        """
+        parser = etree.XMLPullParser(events=('end',), recover=True, resolve_entities=False)
+        rss_data = {
+            'channel_title': '',
+            'channel_description': '',
+            'items': []
+        }
+        is_feed = False
+        
+        for chunk in chunks:
+            parser.feed(chunk)
+            for _, elem in parser.read_events():
+                if not isinstance(elem.tag, str):
+                    continue
+                tag = etree.QName(elem).localname
+                parent = elem.getparent()
+                parent_tag = etree.QName(parent).localname if parent is not None else None
+                
+                if tag in ('item', 'entry'):
+                    is_feed = True
+                    rss_data['items'].append(SiteParser._rss_item(elem))
+                    # Разобранные записи не накапливаются в дереве
+                    elem.clear()
+                    while elem.getprevious() is not None:
+                        del parent[0]
+                    if len(rss_data['items']) >= max_items:
+                        return rss_data
+                elif parent_tag in ('channel', 'feed'):
+                    is_feed = True
+                    if tag == 'title' and not rss_data['channel_title']:
+                        rss_data['channel_title'] = (elem.text or '').strip()
+                    elif tag in ('description', 'subtitle') and not rss_data['channel_description']:
+                        rss_data['channel_description'] = (elem.text or '').strip()
+        
+        return rss_data if is_feed else None
+    
+    @staticmethod
+    def _rss_item(elem) -> Dict[str, str]:
+        """Запись RSS (item) или Atom (entry)"""
+        fields = {}
+        for child in elem:
+            if not isinstance(child.tag, str):
+                continue
+            name = etree.QName(child).localname
+            if name == 'link' and child.get('href'):
+                # Atom: <link href="..."/>, альтернативная ссылка приоритетнее прочих
+                if child.get('rel', 'alternate') == 'alternate' or 'link' not in fields:
+                    fields['link'] = child.get('href')
+            elif name not in fields:
+                fields[name] = (child.text or '').strip()
+        
+        description = fields.get('description') or fields.get('summary') or ''
+        if '<' in description:
+            # Описание с HTML-разметкой
+            description = BeautifulSoup(description, 'html.parser').get_text().strip()
+        
+        item_data = {
+            'title': fields.get('title', ''),
+            'description': description,
+            'link': fields.get('link', ''),
+            'pubDate': fields.get('pubDate') or fields.get('published') or fields.get('updated', ''),
+        }
+        # Объединенный текст для поиска
+        item_data['full_text'] = f"{item_data['title']} {item_data['description']}"
+        return item_data
+    
+    def discover_rss_url(self, base_url: str) -> Optional[str]:
+        """
+        Поиск RSS-ленты сайта
+        
+        Главная страница (ссылка на ленту в разметке) и стандартные пути RSS_PATHS
+        проверяются одновременно; лента, указанная на главной, приоритетнее, если
+        по ссылке действительно RSS/Atom, а не HTML-страница.
+        
+        Args:
+            base_url: URL сайта
+            
+        Returns:
+            URL RSS ленты или None
+        """
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix='rss-discovery') as pool:
+            from_page = pool.submit(self._find_rss_url, base_url)
+            from_paths = pool.submit(discover_sitemap, base_url, health=self.health, session=self.session,
+                                     paths=RSS_PATHS, sniff=sniff_rss_type, robots=False)
+            found = from_page.result()
+            if found and _probe(self.health, self.session, found, PROBE_TIMEOUT, sniff_rss_type):
+                return found
+            found = from_paths.result()
+            return found['url'] if found else None
+    
     def _find_rss_url(self, base_url: str) -> Optional[str]:
         """
         Поиск RSS ленты на странице сайта
@@ -652,10 +1052,7 @@ class SiteParser:
             URL RSS ленты или None
         """
         try:
-            response = self.session.get(base_url, timeout=DEFAULT_TIMEOUT)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'lxml')
+            _, soup = self._get_page(base_url)
             
             # Ищем link с type="application/rss+xml"
             rss_link = soup.find('link', attrs={'type': 'application/rss+xml'})
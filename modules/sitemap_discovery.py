@@ -0,0 +1,251 @@
+"""
+Поиск sitemap сайта филиала
+
+robots.txt и все стандартные пути проверяются одновременно (в потоках),
+ответ признается sitemap по первым байтам (SNIFF_BYTES), а не по
+Content-Type. Победителем становится кандидат с наивысшим приоритетом
+(Sitemap из robots.txt, затем SITEMAP_PATHS по порядку): поиск завершается,
+как только ответили все более приоритетные кандидаты.
+
+Найденный sitemap и его тип (SITEMAP_TYPES) сохраняются в filials
+(sitemap_url, sitemap_type, sitemap_checked_at), поэтому поиск выполняется
+один раз, а не в каждой сессии (discover_for_filial). Сайт без sitemap
+проверяется повторно не чаще раза в RECHECK_DAYS дней.
+"""
+
+import re
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from urllib.parse import urljoin
+
+import requests
+
+from modules.host_health import guarded_request
+
+# Стандартные пути sitemap в порядке приоритета
+SITEMAP_PATHS = [
+    "/sitemap_index.xml",
+    "/sitemap.xml",
+    "/news-sitemap.xml",
+    "/sitemap2025.xml",
+    "/sitemap2024.xml",
+    "/post-sitemap.xml",
+    "/sitemap/sitemap.xml",
+    "/sitemaps/sitemap.xml",
+    "/wp-sitemap.xml",
+    "/yandex-turbo-sitemap.xml",
+]
+
+# Типы sitemap: индекс, обычный список URL, Google News, Яндекс Турбо (RSS)
+SITEMAP_TYPES = ('index', 'urlset', 'news', 'turbo')
+
+# Сколько байт ответа читается для определения типа
+SNIFF_BYTES = 2048
+
+# Таймаут одной проверки, секунд
+PROBE_TIMEOUT = 5
+
+# Повторный поиск для сайтов без sitemap - не чаще, дней
+RECHECK_DAYS = 7
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'}
+
+
+def sniff_sitemap_type(head: str) -> Optional[str]:
+    """
+    Тип sitemap по началу документа
+
+    Args:
+        head: Первые байты ответа (строка)
+
+    Returns:
+        Один из SITEMAP_TYPES или None, если это не sitemap (HTML-заглушка и т.п.)
+    """
+    text = head.lstrip('﻿ \r\n\t').lower()
+    if not text.startswith('<'):
+        return None
+    if '<sitemapindex' in text:
+        return 'index'
+    if '<rss' in text and 'turbo' in text:
+        return 'turbo'
+    if '<urlset' in text:
+        return 'news' if 'sitemap-news' in text or '<news:' in text else 'urlset'
+    return None
+
+
+def robots_sitemaps(robots_text: str) -> List[str]:
+    """URL из строк Sitemap: файла robots.txt"""
+    return [match.strip() for match in re.findall(r'(?im)^\s*sitemap\s*:\s*(\S+)', robots_text)]
+
+
+def _probe(health, session, url: str, timeout: float, sniff=sniff_sitemap_type,
+           with_content: bool = False) -> Optional[Dict[str, str]]:
+    """
+    Проверить кандидата по первым SNIFF_BYTES ответа 200
+
+    Для неподходящего ответа соединение закрывается, остальное не загружается.
+    with_content - подходящий ответ дочитывается целиком (ключ 'content').
+
+    Returns:
+        {'url', 'type'[, 'content']} или None
+    """
+    try:
+        response = guarded_request(health, session, 'GET', url, timeout=timeout, verify=False,
+                                   stream=True, headers=HEADERS)
+    except Exception:
+        return None
+    try:
+        if response.status_code != 200:
+            return None
+        chunks = response.iter_content(SNIFF_BYTES)
+        head = next(chunks, b'')
+        sitemap_type = sniff(head.decode(response.encoding or 'utf-8', errors='ignore')) if head else None
+        if not sitemap_type:
+            return None
+        found = {'url': url, 'type': sitemap_type}
+        if with_content:
+            # Тело декодируется так же, как response.text при обычной загрузке
+            response._content = head + b''.join(chunks)
+            found['content'] = response.text
+        return found
+    except Exception:
+        return None
+    finally:
+        response.close()
+
+
+def _fetch_robots(health, session, base_url: str, timeout: float) -> List[str]:
+    try:
+        response = guarded_request(health, session, 'GET', base_url + '/robots.txt',
+                                   timeout=timeout, verify=False, headers=HEADERS)
+        if response.status_code == 200:
+            return [urljoin(base_url + '/', url) for url in robots_sitemaps(response.text)]
+    except Exception:
+        pass
+    return []
+
+
+def discover_sitemap(website: str, health=None, session=None, timeout: float = PROBE_TIMEOUT,
+                     paths: Optional[List[str]] = None, sniff=sniff_sitemap_type,
+                     robots: bool = True, with_content: bool = False) -> Optional[Dict[str, str]]:
+    """
+    Найти sitemap сайта: robots.txt и стандартные пути проверяются одновременно
+
+    Args:
+        website: Адрес сайта (можно без схемы)
+        health: HostHealth - недоступные хосты отклоняются сразу; все проверки
+            поиска дают хосту не больше одной ошибки (HostHealth.failure_once)
+        session: requests.Session или модуль requests
+        timeout: Таймаут одной проверки
+        paths: Пути-кандидаты (по умолчанию SITEMAP_PATHS)
+        sniff: Определение типа по началу ответа (None - не подходит); для поиска лент
+            (modules/fulltext_feed.py) передается своя функция
+        robots: Проверять Sitemap из robots.txt
+        with_content: Вернуть и содержимое найденного sitemap (ключ 'content'),
+            чтобы не загружать его повторно
+
+    Returns:
+        {'url', 'type', 'source': 'robots' | 'path'[, 'content']} или None
+    """
+    if not website:
+        return None
+    if not website.startswith(('http://', 'https://')):
+        website = f"https://{website}"
+    base_url = website.rstrip('/')
+    session = session or requests
+    paths = paths or SITEMAP_PATHS
+    if health is not None:
+        health = health.failure_once()
+
+    # Приоритет: 0 - robots.txt (его sitemap проверяются после загрузки), далее пути по порядку
+    candidates = [('robots', base_url + '/robots.txt')] + [('path', base_url + path) for path in paths]
+    outcome = [None] * len(candidates)
+    resolved = [False] * len(candidates)
+
+    # Пул без ожидания при выходе: незавершенные проверки проигравших не задерживают результат
+    pool = ThreadPoolExecutor(max_workers=len(candidates), thread_name_prefix='sitemap-probe')
+    try:
+        futures = {}
+        if robots:
+            futures[pool.submit(_fetch_robots, health, session, base_url, timeout)] = 0
+        else:
+            resolved[0] = True
+        for index, (_, url) in enumerate(candidates[1:], start=1):
+            futures[pool.submit(_probe, health, session, url, timeout, sniff, with_content)] = index
+
+        robots_urls = None
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = futures.pop(future)
+                if index == 0 and robots_urls is None:
+                    robots_urls = future.result()
+                    # Sitemap из robots.txt проверяем тоже параллельно
+                    for url in robots_urls:
+                        futures[pool.submit(_probe, health, session, url, timeout, sniff,
+                                            with_content)] = 0
+                    if not robots_urls:
+                        resolved[0] = True
+                elif index == 0:
+                    found = future.result()
+                    if found and not outcome[0]:
+                        outcome[0] = found
+                    if outcome[0] or 0 not in futures.values():
+                        resolved[0] = True
+                else:
+                    outcome[index] = future.result()
+                    resolved[index] = True
+
+            # Победитель известен, если все более приоритетные кандидаты уже отпали
+            for index, result in enumerate(outcome):
+                if not resolved[index]:
+                    break
+                if result:
+                    return dict(result, source=candidates[index][0])
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return None
+
+
+def needs_discovery(filial: Dict[str, Any], now: Optional[datetime] = None, kind: str = 'sitemap') -> bool:
+    """
+    Нужно ли искать sitemap филиала (нет сохраненного и давно не проверяли)
+
+    kind='rss' - то же для RSS-ленты (колонки rss_url и rss_checked_at),
+    kind='feed' - для полнотекстовой ленты (feed_url и feed_checked_at)
+    """
+    if filial.get(f'{kind}_url') or not (filial.get('website_url') or filial.get('website')):
+        return False
+    checked_at = filial.get(f'{kind}_checked_at')
+    if not checked_at:
+        return True
+    checked = datetime.fromisoformat(str(checked_at))
+    return (now or datetime.now()) - checked >= timedelta(days=RECHECK_DAYS)
+
+
+def discover_for_filial(db, filial: Dict[str, Any], health=None,
+                        force: bool = False) -> Optional[Dict[str, str]]:
+    """
+    Sitemap филиала: сохраненный в БД или найденный и сохраненный сейчас
+
+    Args:
+        db: VGTRKDatabase
+        filial: Филиал (словарь из БД)
+        health: HostHealth
+        force: Искать заново, даже если sitemap уже сохранен
+
+    Returns:
+        {'url', 'type'} или None; filial['sitemap_url'] обновляется
+    """
+    if filial.get('sitemap_url') and not force:
+        return {'url': filial['sitemap_url'], 'type': filial.get('sitemap_type')}
+    if not force and not needs_discovery(filial):
+        return None
+
+    found = discover_sitemap(filial.get('website_url') or filial.get('website'), health=health)
+    db.save_sitemap_discovery(filial['id'], found['url'] if found else None,
+                              found['type'] if found else None)
+    if found:
+        filial.update(sitemap_url=found['url'], sitemap_type=found['type'])
+    return found
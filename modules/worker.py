@@ -0,0 +1,284 @@
+"""
+Воркеры очереди заданий мониторинга
+
+Задание (monitoring_jobs) разбито на задачи по филиалам (monitoring_tasks).
+Воркер арендует задачи, продлевает аренду из фонового потока (heartbeat)
+и отмечает итог по филиалу. Если воркер упал, аренда истекает и задача
+выдается другому воркеру. Воркеров можно запускать в нескольких процессах
+и на нескольких машинах с общей БД:
+
+    python -m modules.worker --workers 4
+    python -m modules.worker --until-idle
+"""
+
+import os
+import sys
+import socket
+import threading
+import multiprocessing
+from typing import Any, Dict, List, Optional
+
+from modules.database import VGTRKDatabase
+from modules.advanced_logger import LogLevel, get_logger
+from modules.runner import MonitoringRunner, parse_date, DEFAULT_DB_PATH
+
+
+# Срок аренды задачи: если воркер не продлил аренду, задача выдается повторно
+LEASE_SECONDS = 300
+
+# Пауза между проверками пустой очереди
+POLL_INTERVAL = 5
+
+# Сколько раз задача выдается до признания ошибкой
+MAX_ATTEMPTS = 3
+
+
+class MonitoringWorker:
+    """Воркер, выполняющий задачи мониторинга из очереди в БД"""
+
+    def __init__(self, db: VGTRKDatabase, worker_id: str = None,
+                 lease_seconds: int = LEASE_SECONDS, poll_interval: float = POLL_INTERVAL,
+                 max_attempts: int = MAX_ATTEMPTS, log_level: LogLevel = LogLevel.INFO):
+        """
+        Args:
+            db: База данных мониторинга
+            worker_id: Идентификатор воркера (по умолчанию хост:PID)
+            lease_seconds: Срок аренды задачи, секунд
+            poll_interval: Пауза между проверками пустой очереди, секунд
+            max_attempts: Максимум попыток на задачу
+            log_level: Уровень логирования
+        """
+        self.db = db
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.log_level = log_level
+        self.logger = get_logger(log_level)
+        self._leased: List[int] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._parsers = {}
+
+    def stop(self):
+        """Остановить воркер после текущих задач"""
+        self._stop.set()
+
+    def _heartbeat_loop(self):
+        """Продление аренды текущих задач каждые lease_seconds / 3"""
+        while not self._stop.wait(self.lease_seconds / 3):
+            with self._lock:
+                task_ids = list(self._leased)
+            if task_ids:
+                try:
+                    self.db.heartbeat_monitoring_tasks(task_ids, self.worker_id, self.lease_seconds)
+                except Exception as e:
+                    self.logger.log("WARNING", f"Воркер {self.worker_id}: не удалось продлить аренду: {e}")
+
+    def run(self, until_idle: bool = False, max_tasks: Optional[int] = None) -> int:
+        """
+        Цикл выполнения задач
+
+        Args:
+            until_idle: Завершиться, когда очередь опустеет
+            max_tasks: Завершиться после указанного числа задач
+
+        Returns:
+            Количество выполненных задач
+        """
+        heartbeat = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat.start()
+        self.logger.log("INFO", f"Воркер {self.worker_id} запущен")
+
+        processed = 0
+        try:
+            while not self._stop.is_set():
+                if max_tasks is not None and processed >= max_tasks:
+                    break
+                done = self.run_once()
+                processed += done
+                if not done:
+                    if until_idle:
+                        break
+                    self._stop.wait(self.poll_interval)
+        finally:
+            self._stop.set()
+            heartbeat.join(timeout=1)
+
+        self.logger.log("INFO", f"Воркер {self.worker_id} остановлен, выполнено задач: {processed}")
+        return processed
+
+    def run_once(self) -> int:
+        """
+        Арендовать и выполнить одну порцию задач
+
+        Returns:
+            Количество выполненных задач (0 - очередь пуста)
+        """
+        tasks = self.db.claim_monitoring_tasks(
+            self.worker_id, self.lease_seconds, limit=1, max_attempts=self.max_attempts)
+        if tasks and tasks[0]['params'].get('use_async'):
+            # Асинхронное задание: берем сразу пачку филиалов на одну корутину
+            batch = tasks[0]['params'].get('max_concurrent', 20)
+            if batch > 1:
+                tasks += self.db.claim_monitoring_tasks(
+                    self.worker_id, self.lease_seconds, limit=batch - 1,
+                    max_attempts=self.max_attempts, job_id=tasks[0]['job_id'])
+        if not tasks:
+            return 0
+
+        with self._lock:
+            self._leased = [task['id'] for task in tasks]
+        try:
+            if tasks[0]['params'].get('use_async'):
+                self._process_async(tasks)
+            else:
+                for task in tasks:
+                    self._process_task(task)
+        finally:
+            with self._lock:
+                self._leased = []
+        return len(tasks)
+
+    def _job_context(self, task: Dict[str, Any]):
+        """Раннер и поисковые запросы задания"""
+        params = task['params']
+        runner = MonitoringRunner(
+            self.db,
+            log_level=self.log_level,
+            model=params.get('model', 'GigaChat'),
+            temperature=params.get('temperature', 0.7)
+        )
+        query_ids = set(params.get('query_ids', []))
+        queries = [q for q in self.db.get_search_queries(active_only=False) if q['id'] in query_ids]
+        return runner, queries
+
+    def _process_task(self, task: Dict[str, Any]):
+        """Выполнить задачу по одному филиалу"""
+        params = task['params']
+        search_mode = params['search_mode']
+        runner, queries = self._job_context(task)
+
+        if search_mode not in self._parsers:
+            self._parsers[search_mode] = runner.create_parsers(search_mode)
+        site_parser, scrapy_parser = self._parsers[search_mode]
+
+        filial = self.db.get_filial_by_id(task['filial_id'])
+        if not filial:
+            self.db.complete_monitoring_task(task['id'], self.worker_id, 'error', 'Филиал не найден')
+            return
+
+        date_range = params.get('search_date_range')
+        try:
+            status = runner.process_filial(
+                filial, queries, search_mode, site_parser, scrapy_parser,
+                runner.new_session_stats(),
+                search_days=params.get('search_days'),
+                use_gigachat=params.get('use_gigachat', True),
+                search_specific_date=parse_date(params.get('search_specific_date')),
+                search_date_range=tuple(parse_date(d) for d in date_range) if date_range else None,
+                session_id=task['session_id'],
+                position=f"задание #{task['job_id']}"
+            )
+            error = None
+        except Exception as e:
+            status, error = 'error', str(e)
+
+        if not self.db.complete_monitoring_task(task['id'], self.worker_id, status, error):
+            self.logger.log("WARNING", f"Воркер {self.worker_id}: аренда задачи #{task['id']} потеряна")
+
+    def _process_async(self, tasks: List[Dict[str, Any]]):
+        """Выполнить пачку задач асинхронного задания одной корутиной"""
+        params = tasks[0]['params']
+        runner, queries = self._job_context(tasks[0])
+
+        statuses = {}
+
+        def on_progress(event):
+            if event['event'] == 'filial_done':
+                statuses[event['filial_id']] = (event['status'], event.get('error'))
+
+        runner.progress_callback = on_progress
+        filials = [f for f in (self.db.get_filial_by_id(t['filial_id']) for t in tasks) if f]
+
+        try:
+            if params.get('shards', 1) > 1:
+                runner.process_sharded(
+                    filials, queries, params.get('search_days') or 7, params.get('max_concurrent', 20),
+                    tasks[0]['session_id'], params['shards'], params.get('shard_strategy', 'round_robin'))
+            else:
+                runner.run_in_loop(runner.process_async(
+                    filials, queries, params.get('search_days') or 7,
+                    params.get('max_concurrent', 20), tasks[0]['session_id']))
+            batch_error = None
+        except Exception as e:
+            batch_error = str(e)
+
+        for task in tasks:
+            status, error = statuses.get(task['filial_id'], ('error', batch_error or 'Филиал не обработан'))
+            self.db.complete_monitoring_task(task['id'], self.worker_id, status, error)
+
+
+def run_pool(db_path: str, workers: int, until_idle: bool = False, **options) -> None:
+    """
+    Запустить пул воркеров в отдельных процессах и дождаться их завершения
+
+    Args:
+        db_path: Путь к БД
+        workers: Количество процессов
+        until_idle: Завершить воркеры, когда очередь опустеет
+        **options: Параметры MonitoringWorker
+    """
+    processes = [
+        multiprocessing.Process(target=_run_worker, args=(db_path, until_idle, options), daemon=False)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+def _run_worker(db_path: str, until_idle: bool, options: Dict[str, Any]):
+    """Запуск одного воркера (в том числе в дочернем процессе)"""
+    MonitoringWorker(VGTRKDatabase(db_path), **options).run(until_idle=until_idle)
+
+
+def main(argv: List[str] = None) -> int:
+    """Точка входа командной строки"""
+    argv = sys.argv[1:] if argv is None else argv
+
+    if '--help' in argv:
+        print("Использование: python -m modules.worker [параметры]")
+        print("\nПараметры:")
+        print("  --workers N        Количество процессов-воркеров (по умолчанию 1)")
+        print("  --until-idle       Завершиться, когда очередь опустеет")
+        print(f"  --lease SEC        Срок аренды задачи (по умолчанию {LEASE_SECONDS})")
+        print(f"  --poll SEC         Пауза между проверками очереди (по умолчанию {POLL_INTERVAL})")
+        print("  --db PATH          Путь к БД (по умолчанию data/vgtrk_monitoring.db)")
+        return 0
+
+    def option(name, default=None):
+        return argv[argv.index(name) + 1] if name in argv and argv.index(name) + 1 < len(argv) else default
+
+    db_path = option('--db', DEFAULT_DB_PATH)
+    workers = int(option('--workers', 1))
+    until_idle = '--until-idle' in argv
+    options = {
+        'lease_seconds': int(option('--lease', LEASE_SECONDS)),
+        'poll_interval': float(option('--poll', POLL_INTERVAL))
+    }
+
+    if workers > 1:
+        run_pool(db_path, workers, until_idle=until_idle, **options)
+    else:
+        _run_worker(db_path, until_idle, options)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
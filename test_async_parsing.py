@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки разбора статей в пуле процессов (AsyncMonitoring.fetch_article_content)
+"""
+
+import sys
+import os
+import asyncio
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from aiohttp import web
+
+from modules.async_monitoring import AsyncMonitoring
+
+
+ARTICLE = "<html><head><title>Новости {n}</title></head><body>Губернатор провел совещание {n}</body></html>"
+
+
+async def serve_articles():
+    """Локальный сервер со статьями /article/N (сеть не нужна)"""
+    async def article(request):
+        return web.Response(text=ARTICLE.format(n=request.match_info['n']), content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/article/{n}', article)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def fetch_all(parse_workers: int, count: int = 12):
+    runner, base_url = await serve_articles()
+    monitor = AsyncMonitoring(max_concurrent=4, parse_workers=parse_workers, parse_queue_size=2)
+    try:
+        found = await asyncio.gather(*[
+            monitor.fetch_article_content(f"{base_url}/article/{n}", ['губернатор'])
+            for n in range(count)
+        ])
+        missing = await monitor.fetch_article_content(f"{base_url}/article/0", ['мэр'])
+        return found, missing
+    finally:
+        await monitor.close()
+        await runner.cleanup()
+
+
+def test_parse_in_process_pool():
+    """Статьи разбираются в пуле процессов через ограниченную очередь"""
+    print("\n[1] Разбор статей в пуле процессов...")
+    found, missing = asyncio.run(fetch_all(parse_workers=2))
+
+    print(f"   Разобрано статей: {len(found)}")
+    assert [article['title'] for article in found] == [f"Новости {n}" for n in range(12)]
+    assert all('губернатор' in article['snippet'] for article in found)
+    assert found[3]['url'].endswith('/article/3')
+    assert missing is None
+    print("   [OK] Заголовки и фрагменты извлечены")
+
+
+def test_parse_inline():
+    """parse_workers=0: тот же результат без пула процессов"""
+    print("\n[2] Разбор статей в event loop...")
+    found, _ = asyncio.run(fetch_all(parse_workers=0, count=3))
+    assert [article['title'] for article in found] == ["Новости 0", "Новости 1", "Новости 2"]
+    print("   [OK] Результат совпадает")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ РАЗБОРА СТАТЕЙ")
+    print("=" * 60)
+
+    test_parse_in_process_pool()
+    test_parse_inline()
+
+    print("\n[OK] Все проверки пройдены")
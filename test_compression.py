@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки сжатия текстовых полей результатов
+"""
+
+import sys
+import os
+import tempfile
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.database import VGTRKDatabase
+from modules.compression import TextCompressor, train_dictionary, is_compressed, CODEC_ZLIB
+from test_helpers import create_test_db
+
+
+def make_content(i: int) -> str:
+    """Типичный текст результата поиска"""
+    lines = [f"Найдено {i} статей с упоминанием 'губернатор'"]
+    lines += [f"{j}. Губернатор области провел совещание ({i * j})" for j in range(10)]
+    return "\n".join(lines)
+
+
+def test_compressor_roundtrip():
+    """Сжатие со словарем и без него восстанавливает исходный текст"""
+    print("\n[1] Сжатие и распаковка...")
+    samples = [make_content(i) for i in range(50)]
+    dictionary = train_dictionary(samples, CODEC_ZLIB)
+
+    plain = TextCompressor(codec=CODEC_ZLIB)
+    with_dict = TextCompressor({1: (CODEC_ZLIB, dictionary)}, 1)
+
+    text = make_content(100)
+    packed = with_dict.compress(text)
+    assert is_compressed(packed)
+    assert with_dict.decompress(packed) == text
+    assert len(packed) <= len(plain.compress(text))
+
+    # Короткие строки и старые несжатые значения не меняются
+    assert with_dict.compress("ok") == "ok"
+    assert with_dict.decompress(text) == text
+    print(f"   [OK] {len(text.encode('utf-8'))} байт → {len(packed)} байт")
+
+
+def test_database_compression():
+    """Аксессоры VGTRKDatabase прозрачно распаковывают поля после пересжатия"""
+    print("\n[2] Пересжатие записей в БД...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir, queries=())
+
+        for i in range(20):
+            db.save_monitoring_result(1, {
+                'status': 'success',
+                'content': make_content(i),
+                'metrics': {'articles_found': i, 'search_days': 7}
+            })
+
+        assert db.train_compression_dictionary() == 1
+        assert db.recompress_results() == 20
+
+        # Новый экземпляр подхватывает словарь из БД
+        results = VGTRKDatabase(db.db_path).get_monitoring_results()
+        assert results[0]['content'] == make_content(19)
+        assert results[0]['metrics'] == {'articles_found': 19, 'search_days': 7}
+        print("   [OK] Данные читаются после пересжатия")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ СЖАТИЯ ДАННЫХ")
+    print("=" * 60)
+
+    test_compressor_roundtrip()
+    test_database_compression()
+
+    print("\n[OK] Все проверки пройдены")
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки адаптивной параллельности запросов (modules.concurrency)
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+import aiohttp
+from aiohttp import web
+
+from modules.database import VGTRKDatabase
+from modules.concurrency import ConcurrencyController, DEFAULT_HOST_CONCURRENCY
+
+
+async def serve():
+    """Локальный сервер: /ok отвечает 200, /busy - 429"""
+    async def ok(request):
+        return web.Response(text="ok")
+
+    async def busy(request):
+        return web.Response(status=429, text="busy")
+
+    app = web.Application()
+    app.router.add_get('/ok', ok)
+    app.router.add_get('/busy', busy)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+async def request_many(controller: ConcurrencyController, session, url: str, count: int):
+    async def one():
+        async with controller.slot(url) as slot:
+            async with session.get(url) as response:
+                slot.record_status(response.status)
+    await asyncio.gather(*[one() for _ in range(count)])
+
+
+async def aimd_scenario():
+    runner, base_url = await serve()
+    try:
+        async with aiohttp.ClientSession() as session:
+            controller = ConcurrencyController(global_limit=10)
+            await request_many(controller, session, f"{base_url}/ok", 30)
+            (host, limiter), = controller.hosts.items()
+            grown, in_flight = limiter.limit, limiter.in_flight
+
+            await request_many(controller, session, f"{base_url}/busy", 5)
+            return host, grown, in_flight, limiter.limit, controller.global_limiter.limit
+    finally:
+        await runner.cleanup()
+
+
+def test_aimd_host_limit():
+    """Быстрые ответы увеличивают предел хоста, 429 - снижает вдвое"""
+    print("\n[1] AIMD по ответам сервера...")
+    host, grown, in_flight, after_busy, global_limit = asyncio.run(aimd_scenario())
+
+    print(f"   {host}: после 30 успехов {grown:.2f}, после 429 {after_busy:.2f}")
+    assert grown > DEFAULT_HOST_CONCURRENCY + 1
+    assert in_flight == 0
+    # Всплеск 429 - одно снижение; глобальный предел 429 не трогает
+    assert after_busy == grown / 2
+    assert global_limit > 10
+    print("   [OK] Предел растет и снижается")
+
+
+def test_host_limits_persisted():
+    """Выученные пределы сохраняются в БД и суммируют счетчики"""
+    print("\n[2] Сохранение пределов хостов...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = VGTRKDatabase(str(Path(tmp_dir) / "limits_test.db"))
+        db.save_host_limits({'vesti42.ru': {'concurrency': 6.5, 'successes': 10, 'failures': 1}})
+        db.save_host_limits({'vesti42.ru': {'concurrency': 3.0, 'successes': 5, 'failures': 2}})
+
+        assert db.get_host_limits() == {'vesti42.ru': 3.0}
+        with db.get_connection() as conn:
+            row = conn.execute("SELECT successes, failures FROM host_limits").fetchone()
+        assert (row['successes'], row['failures']) == (15, 3)
+        print("   [OK] Пределы сохранены")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ АДАПТИВНОЙ ПАРАЛЛЕЛЬНОСТИ")
+    print("=" * 60)
+
+    test_aimd_host_limit()
+    test_host_limits_persisted()
+
+    print("\n[OK] Все проверки пройдены")
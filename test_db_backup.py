@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки инкрементальных снимков БД (modules.db_backup)
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.database import VGTRKDatabase
+from modules.db_backup import (_object_path, _store_file_chunks, _store_lock, collect_garbage,
+                               create_snapshot, database_files, restore_snapshot)
+from test_helpers import create_test_db, set_parsing_date
+
+
+def create_archived_db(tmp_dir: str) -> VGTRKDatabase:
+    """БД с одним результатом в закрытом месяце, перенесенным в партицию"""
+    db = create_test_db(tmp_dir)
+    result_id = db.save_monitoring_result(1, {'search_query_id': 1, 'status': 'success'})
+    db.save_monitoring_result(1, {'search_query_id': 1, 'status': 'no_data'})
+    set_parsing_date(db, result_id, datetime.now() - timedelta(days=70))
+    db.archive_closed_months()
+    return db
+
+
+def test_restore_removes_extra_partitions():
+    """Восстановление удаляет партиции, которых не было в снимке"""
+    print("\n[1] Восстановление снимка...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_archived_db(tmp_dir)
+        manifest_path = create_snapshot(str(db.db_path), str(Path(tmp_dir) / "backups"))
+
+        # Партиция, появившаяся после снимка
+        extra = db.db_path.parent / "partitions" / f"{db.db_path.stem}_2001_01.db"
+        extra.write_bytes(Path(database_files(str(db.db_path))[1][1]).read_bytes())
+        restore_snapshot(str(manifest_path), str(db.db_path))
+
+        names = [name for name, _ in database_files(str(db.db_path))]
+        print(f"   Файлы после восстановления: {names}")
+        assert not extra.exists() and len(names) == 2
+        assert len(db.get_monitoring_results()) == 2
+    print("   [OK] Лишние партиции удалены")
+
+
+def test_gc_waits_for_snapshot():
+    """Сборка мусора не удаляет блоки снимка, манифест которого еще не записан"""
+    print("\n[2] Сборка мусора во время снимка...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        backup_dir = Path(tmp_dir) / "backups"
+        (backup_dir / "snapshots").mkdir(parents=True)
+        source = Path(tmp_dir) / "data.bin"
+        source.write_bytes(os.urandom(4096))
+
+        outcome = {}
+        with _store_lock(backup_dir):
+            # Блоки уже в хранилище, манифеста еще нет
+            file_info = _store_file_chunks(backup_dir, source)
+            gc = threading.Thread(target=lambda: outcome.update(result=collect_garbage(str(backup_dir))))
+            gc.start()
+            time.sleep(1)
+            assert gc.is_alive()
+
+            file_info['name'] = source.name
+            manifest = backup_dir / "snapshots" / "data_snapshot.json"
+            manifest.write_text(json.dumps({'files': [file_info]}), encoding='utf-8')
+        gc.join(timeout=5)
+
+        print(f"   Удалено (снимков, блоков): {outcome['result']}")
+        assert outcome['result'] == (0, 0)
+        assert _object_path(backup_dir, file_info['chunks'][0]).exists()
+        assert not (backup_dir / ".lock").exists()
+    print("   [OK] Сборщик дождался записи манифеста")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ РЕЗЕРВНЫХ СНИМКОВ")
+    print("=" * 60)
+
+    test_restore_removes_extra_partitions()
+    test_gc_waits_for_snapshot()
+
+    print("\n[OK] Все проверки пройдены")
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки поиска по полнотекстовым лентам (modules.fulltext_feed)
+"""
+
+import sys
+import os
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.fulltext_feed import iter_feed_items, search_fulltext_feed
+from modules.runner import MonitoringRunner
+from modules.scrapy_parser import ScrapyParser
+from test_helpers import create_test_db
+
+
+NOW = format_datetime(datetime.now(timezone.utc))
+OLD = format_datetime(datetime.now(timezone.utc) - timedelta(days=30))
+
+
+def turbo_item(n: int, title: str, text: str, pub_date: str = NOW) -> str:
+    return (f'<item turbo="true"><title>{title}</title><link>{{base}}/news/{n}</link>'
+            f'<pubDate>{pub_date}</pubDate>'
+            f'<turbo:content><![CDATA[<header><h1>{title}</h1></header><p>{text}</p>]]></turbo:content></item>')
+
+
+FEED_HEADER = ('<?xml version="1.0" encoding="UTF-8"?>'
+               '<rss xmlns:yandex="http://news.yandex.ru" xmlns:turbo="http://turbo.yandex.ru" '
+               'xmlns:atom="http://www.w3.org/2005/Atom" version="2.0"><channel><title>ГТРК</title>')
+
+PAGES = {
+    '/turbo': FEED_HEADER
+    + '<atom:link rel="next" href="{base}/turbo?page=2"/>'
+    + turbo_item(1, "Открытие школы", "Губернатор открыл новую школу на 500 мест")
+    + turbo_item(2, "Погода", "Дожди и ветер")
+    + turbo_item(3, "Старое совещание", "Губернатор провел совещание", OLD)
+    + '</channel></rss>',
+    '/turbo?page=2': FEED_HEADER
+    + turbo_item(4, "Губернатор на форуме", "Выступление на форуме")
+    + '</channel></rss>',
+}
+
+
+def serve_site():
+    """Локальный сайт с Турбо-лентой; возвращает сервер, адрес и список запрошенных путей"""
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            body = PAGES.get(self.path)
+            self.send_response(200 if body else 404)
+            data = (body or '').format(base=f"http://127.0.0.1:{self.server.server_port}").encode('utf-8')
+            self.send_header('Content-Type', 'application/rss+xml; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", hits
+
+
+def test_streaming_parse():
+    """Лента разбирается по частям произвольного размера"""
+    print("\n[1] Потоковый разбор ленты...")
+    document = PAGES['/turbo'].format(base="https://vesti.example").encode('utf-8')
+    chunks = [document[i:i + 100] for i in range(0, len(document), 100)]
+    events = list(iter_feed_items(chunks))
+
+    assert events[0] == ('next', "https://vesti.example/turbo?page=2")
+    items = [value for kind, value in events if kind == 'item']
+    assert [item['link'] for item in items] == [f"https://vesti.example/news/{n}" for n in (1, 2, 3)]
+    assert '500 мест' in items[0]['html'] and items[0]['date'] is not None
+    print(f"   Записей: {len(items)}, следующая страница: {events[0][1]}")
+    print("   [OK] Записи и пагинация извлечены")
+
+
+def test_feed_search_without_article_fetch():
+    """Ключевые слова ищутся в тексте ленты, страницы статей не загружаются"""
+    print("\n[2] Поиск по полнотекстовой ленте...")
+    server, base_url, hits = serve_site()
+    try:
+        date_from, date_to = ScrapyParser.search_period(days=2)
+        outcome = search_fulltext_feed(base_url, ['губернатор'], date_from, date_to)
+        found = sorted(article['url'].rsplit('/', 1)[1] for article in outcome['articles'])
+        print(f"   Лента: {outcome['feed_url']} ({outcome['feed_type']}), страниц: {outcome['pages']}, "
+              f"найдено: {found}")
+
+        assert outcome['sitemap_status'] == 'found' and outcome['feed_type'] == 'turbo'
+        assert outcome['feed_url'] == f"{base_url}/turbo"
+        assert outcome['pages'] == 2 and outcome['urls_in_window'] == 3
+        assert found == ['1', '4']
+        assert 'школу на 500 мест' in outcome['articles'][0]['snippet']
+        assert not [hit for hit in hits if hit.startswith('/news/')]
+    finally:
+        server.shutdown()
+    print("   [OK] Совпадения найдены без загрузки статей")
+
+
+def test_fulltext_mode():
+    """Режим fulltext_search сохраняет найденное по ленте"""
+    print("\n[3] Режим мониторинга fulltext_search...")
+    server, base_url, hits = serve_site()
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = create_test_db(tmp_dir, filials=[('ГТРК "Томск"', base_url)])
+
+            stats = MonitoringRunner(db).run(db.get_all_filials(), db.get_search_queries(),
+                                             search_mode='fulltext_search', search_days=2,
+                                             use_gigachat=False)
+            result = db.get_monitoring_results()[0]
+            print(f"   {result['status']}: {result['metrics']['source']}, "
+                  f"статей: {result['metrics']['articles_found']}")
+            assert stats['successful'] == 1 and result['status'] == 'success'
+            assert result['metrics']['source'] == 'feed' and result['metrics']['articles_found'] == 2
+            assert not [hit for hit in hits if hit.startswith('/news/')]
+
+            # Найденная лента сохранена: повторная сессия не перебирает FEED_PATHS
+            stored = db.get_filial_by_id(result['filial_id'])
+            print(f"   Сохранено: {stored['feed_url']} ({stored['feed_type']})")
+            assert stored['feed_url'] == f"{base_url}/turbo" and stored['feed_type'] == 'turbo'
+            assert stored['feed_checked_at']
+            hits.clear()
+            MonitoringRunner(db).run(db.get_all_filials(), db.get_search_queries(),
+                                     search_mode='fulltext_search', search_days=2,
+                                     use_gigachat=False)
+            assert hits == ['/turbo', '/turbo?page=2']
+    finally:
+        server.shutdown()
+    print("   [OK] Результат и лента сохранены")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ ПОЛНОТЕКСТОВЫХ ЛЕНТ")
+    print("=" * 60)
+
+    test_streaming_parse()
+    test_feed_search_without_article_fetch()
+    test_fulltext_mode()
+
+    print("\n[OK] Все проверки пройдены")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Общие заготовки для тестовых скриптов: временная БД с филиалами и запросами
+"""
+
+import sys
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, Tuple, Union
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.database import VGTRKDatabase
+
+
+# Филиал: имя, (имя, сайт) или словарь с полями name, federal_district, website
+FilialSpec = Union[str, Tuple[str, str], Dict[str, Any]]
+
+
+def create_test_db(tmp_dir: str, db_name: str = "test.db",
+                   filials: Iterable[FilialSpec] = ('ГТРК "Томск"',),
+                   queries: Iterable[str] = ("губернатор",)) -> VGTRKDatabase:
+    """
+    Временная БД с филиалами и поисковыми запросами
+
+    Филиалы без сайта обрабатываются с ошибкой без обращения к сети.
+
+    Args:
+        tmp_dir: Каталог для файла БД
+        db_name: Имя файла БД
+        filials: Филиалы в порядке ID (по умолчанию один, без сайта, округ СФО)
+        queries: Тексты запросов в порядке ID
+
+    Returns:
+        VGTRKDatabase
+    """
+    db = VGTRKDatabase(str(Path(tmp_dir) / db_name))
+    with db.get_connection() as conn:
+        for filial in filials:
+            if isinstance(filial, str):
+                filial = {'name': filial}
+            elif isinstance(filial, tuple):
+                filial = {'name': filial[0], 'website': filial[1]}
+            conn.execute("INSERT INTO filials (name, federal_district, website) VALUES (?, ?, ?)",
+                         (filial['name'], filial.get('federal_district', 'СФО'), filial.get('website')))
+        conn.commit()
+    for query_text in queries:
+        db.add_search_query(query_text)
+    return db
+
+
+def set_parsing_date(db: VGTRKDatabase, result_id: int, parsing_date: datetime):
+    """Перенести результат в прошлое (дата парсинга задается при сохранении)"""
+    with db.get_connection() as conn:
+        conn.execute('UPDATE monitoring_results SET parsing_date = ? WHERE id = ?',
+                     (parsing_date.strftime('%Y-%m-%d %H:%M:%S'), result_id))
+        conn.commit()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки доступности сайтов и выключателя (modules.host_health)
+"""
+
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+import requests
+
+from modules.database import VGTRKDatabase
+from modules.host_health import HostHealth, HostUnavailable, OPEN_SECONDS, READ_TIMEOUT_CEILING
+from modules.async_monitoring import AsyncMonitoring
+from modules.runner import MonitoringRunner
+from modules.sitemap_discovery import SITEMAP_PATHS, discover_sitemap
+from test_helpers import create_test_db
+
+# Закрытый порт: соединение отклоняется сразу
+DEAD_URL = "http://127.0.0.1:1/"
+
+
+def test_breaker_opens_and_probes():
+    """После 3 ошибок хост отключается, по истечении срока пропускается одна проба"""
+    print("\n[1] Открытие выключателя и пробная проверка...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = VGTRKDatabase(str(Path(tmp_dir) / "health_test.db"))
+        health = HostHealth(db)
+
+        for _ in range(3):
+            try:
+                health.request(requests, 'GET', DEAD_URL, timeout=2)
+            except HostUnavailable:
+                raise AssertionError("Выключатель открылся раньше порога")
+            except requests.ConnectionError:
+                pass
+
+        started = time.time()
+        try:
+            health.request(requests, 'GET', DEAD_URL, timeout=2)
+            raise AssertionError("Запрос к отключенному хосту выполнен")
+        except HostUnavailable as e:
+            print(f"   {e}")
+        assert time.time() - started < 0.1
+
+        # До flush изменения только в памяти; затем сохранены в БД и видны новому экземпляру
+        assert db.get_host_health() == []
+        health.flush()
+        record = db.get_host_health()[0]
+        assert record['state'] == 'open' and record['error_streak'] == 3
+        assert HostHealth(db).state(DEAD_URL) == 'open'
+
+        # Срок истек: одна проба, вторая параллельная - нет
+        with db.get_connection() as conn:
+            conn.execute("UPDATE host_health SET open_until = ?", (time.time() - 1,))
+            conn.commit()
+        health = HostHealth(db)
+        assert health.state(DEAD_URL) == 'half_open'
+        assert health.allow(DEAD_URL) and not health.allow(DEAD_URL)
+        health.record_failure(DEAD_URL, 'ConnectionError')
+        health.flush()
+
+        record = db.get_host_health()[0]
+        assert record['state'] == 'open' and record['open_seconds'] == OPEN_SECONDS * 2
+
+        health.record_success(DEAD_URL, 0.5)
+        health.flush()
+        record = db.get_host_health()[0]
+        assert record['state'] == 'closed' and record['error_streak'] == 0
+        print("   [OK] Выключатель работает")
+
+
+def test_runner_skips_dead_host():
+    """Филиал с отключенным сайтом завершается ошибкой без запросов"""
+    print("\n[2] Пропуск отключенного сайта в мониторинге...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir, filials=[('ГТРК "Томск"', '127.0.0.1:1')])
+        health = HostHealth(db)
+        for _ in range(3):
+            health.record_failure(DEAD_URL, 'ConnectionError')
+        health.flush()
+
+        started = time.time()
+        stats = MonitoringRunner(db).run(db.get_all_filials(), db.get_search_queries(),
+                                         search_mode='main_only')
+        with db.get_connection() as conn:
+            error = conn.execute("SELECT error_message FROM monitoring_results").fetchone()[0]
+        print(f"   {error}")
+        assert stats['errors'] == 1 and 'недоступен' in error
+        assert time.time() - started < 5
+        print("   [OK] Отключенный сайт пропущен")
+
+
+class RecordingSession:
+    """Сессия без сети: запоминает параметры запроса"""
+
+    def __init__(self):
+        self.kwargs = None
+
+    def request(self, method, url, **kwargs):
+        self.kwargs = kwargs
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+
+def test_adaptive_timeouts():
+    """Таймауты хоста вычисляются по перцентилям времени ответа"""
+    print("\n[3] Адаптивные таймауты...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = VGTRKDatabase(str(Path(tmp_dir) / "health_test.db"))
+        health = HostHealth(db)
+        fast, slow = "https://fast.example/", "https://slow.example/"
+
+        # Мало замеров - таймаут по умолчанию
+        health.record_success(fast, 0.2)
+        assert health.timeouts(fast, 30) == 30
+
+        for _ in range(9):
+            health.record_success(fast, 0.2)
+        for latency in [4.0] * 9 + [30.0]:
+            health.record_success(slow, latency)
+        print(f"   Быстрый: {health.timeouts(fast, 30)}, медленный: {health.timeouts(slow, 30)}")
+        assert health.timeouts(fast, 30) == (2.0, 3.0)
+        assert health.timeouts(slow, 30) == (10.0, READ_TIMEOUT_CEILING)
+
+        # Замеры асинхронного обхода и сохранение в БД
+        health.add_latency_samples({'async.example': [1.0] * 5})
+        health.flush()
+        restored = HostHealth(db)
+        assert restored.all_timeouts() == {'fast.example': (2.0, 3.0), 'slow.example': (10.0, 60.0),
+                                           'async.example': (3.0, 3.0)}
+
+        # Синхронный запрос получает адаптивный таймаут вместо заданного
+        session = RecordingSession()
+        restored.request(session, 'GET', fast, timeout=30)
+        assert session.kwargs['timeout'] == (2.0, 3.0)
+        restored.request(session, 'GET', "https://new.example/", timeout=30)
+        assert session.kwargs['timeout'] == 30
+
+        monitor = AsyncMonitoring(timeout=30, parse_workers=0, host_timeouts=restored.all_timeouts())
+        assert monitor.request_timeout("https://fast.example/news/1").total == 3.0
+        assert monitor.request_timeout("https://fast.example/news/1").sock_connect == 2.0
+        assert monitor.request_timeout("https://new.example/").total == 30
+        print("   [OK] Таймауты подобраны по хостам")
+
+
+
+class TimeoutSession:
+    """Сессия без сети: каждый запрос завершается таймаутом чтения"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        time.sleep(0.1)
+        raise requests.ReadTimeout(url)
+
+
+def test_discovery_counts_one_failure():
+    """Одновременные проверки поиска sitemap дают медленному хосту одну ошибку"""
+    print("\n[4] Ошибки поиска sitemap...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = VGTRKDatabase(str(Path(tmp_dir) / "health_test.db"))
+        health = HostHealth(db)
+        session = TimeoutSession()
+
+        assert discover_sitemap("https://slow.example", health=health, session=session) is None
+        health.flush()
+        record = db.get_host_health()[0]
+        print(f"   Запросов: {session.calls}, ошибок подряд: {record['error_streak']}")
+        assert session.calls == len(SITEMAP_PATHS) + 1
+        assert record['error_streak'] == 1 and record['failures'] == 1
+        assert health.state("https://slow.example") == 'closed'
+        print("   [OK] Выключатель не открыт одним поиском")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ ДОСТУПНОСТИ САЙТОВ")
+    print("=" * 60)
+
+    test_breaker_opens_and_probes()
+    test_runner_skips_dead_host()
+    test_adaptive_timeouts()
+    test_discovery_counts_one_failure()
+
+    print("\n[OK] Все проверки пройдены")
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки очереди заданий мониторинга (monitoring_jobs / monitoring_tasks)
+"""
+
+import sys
+import os
+import time
+import tempfile
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.runner import enqueue_job, job_params
+from modules.worker import MonitoringWorker
+from test_helpers import create_test_db
+
+
+# Филиалы без сайта: задачи завершаются ошибкой без обращения к сети
+FILIALS = ['ГТРК "Томск"', 'ГТРК "Иртыш"', 'ГТРК "Алтай"']
+
+
+def test_workers_share_job():
+    """Два воркера делят задачи одного задания, сессия закрывается по последней задаче"""
+    print("\n[1] Выполнение задания двумя воркерами...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir, filials=FILIALS)
+        job_id = enqueue_job(db, [1, 2, 3], job_params([1], 'main_only'))
+
+        first = MonitoringWorker(db, worker_id='w1')
+        second = MonitoringWorker(db, worker_id='w2')
+        assert first.run(max_tasks=1) == 1
+        assert second.run(until_idle=True) == 2
+
+        job = db.get_monitoring_jobs()[0]
+        print(f"   Задание: {job['status']}, задач {job['tasks_done']}/{job['tasks_total']}")
+        assert job['id'] == job_id and job['status'] == 'completed'
+        assert job['tasks_done'] == 3 and job['tasks_error'] == 3
+
+        session = db.get_session_info(job['session_id'])
+        assert session['status'] == 'completed'
+        assert session['filials_count'] == 3
+        print("   [OK] Задание и сессия завершены")
+
+
+def test_expired_lease_retry():
+    """Задача упавшего воркера выдается повторно, после исчерпания попыток - ошибка"""
+    print("\n[2] Истечение аренды...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir, filials=FILIALS)
+        job_id = enqueue_job(db, [1], job_params([1], 'main_only'))
+
+        # Воркер взял задачу и "упал": аренда истекла сразу
+        crashed = db.claim_monitoring_tasks('crashed', lease_seconds=0)
+        assert len(crashed) == 1
+        time.sleep(0.01)
+
+        retried = db.claim_monitoring_tasks('alive', lease_seconds=0, max_attempts=2)
+        assert [t['id'] for t in retried] == [crashed[0]['id']]
+        assert retried[0]['attempts'] == 2
+
+        # Упавший воркер не может закрыть чужую задачу
+        assert not db.complete_monitoring_task(crashed[0]['id'], 'crashed', 'success')
+
+        time.sleep(0.01)
+        assert db.claim_monitoring_tasks('third', max_attempts=2) == []
+        job = db.get_monitoring_jobs()[0]
+        assert job['id'] == job_id and job['status'] == 'completed' and job['tasks_error'] == 1
+        print("   [OK] Повтор и лимит попыток работают")
+
+
+def test_claim_keeps_job_filter():
+    """Задания с исчерпанными попытками не подменяют задание, из которого берутся задачи"""
+    print("\n[3] Выбор задания при исчерпанных попытках...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir, filials=FILIALS)
+        first_job = enqueue_job(db, [1, 2], job_params([1], 'main_only'))
+        second_job = enqueue_job(db, [3], job_params([1], 'main_only'))
+
+        # Задача первого задания "упала" и исчерпала попытки
+        assert len(db.claim_monitoring_tasks('crashed', lease_seconds=0, job_id=first_job)) == 1
+        time.sleep(0.01)
+        claimed = db.claim_monitoring_tasks('w1', max_attempts=1, job_id=second_job)
+        assert [t['job_id'] for t in claimed] == [second_job]
+
+        # Без фильтра выдаются задачи любого задания, а не только исчерпавшего попытки
+        third_job = enqueue_job(db, [1], job_params([1], 'main_only'))
+        assert len(db.claim_monitoring_tasks('crashed', lease_seconds=0, job_id=first_job)) == 1
+        time.sleep(0.01)
+        claimed = db.claim_monitoring_tasks('w2', max_attempts=1)
+        print(f"   Выдано задание: {[t['job_id'] for t in claimed]}")
+        assert [t['job_id'] for t in claimed] == [third_job]
+    print("   [OK] Задачи берутся из запрошенного задания")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ ОЧЕРЕДИ ЗАДАНИЙ")
+    print("=" * 60)
+
+    test_workers_share_job()
+    test_expired_lease_retry()
+    test_claim_keeps_job_filter()
+
+    print("\n[OK] Все проверки пройдены")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки потокового извлечения метаданных (SiteParser._stream_meta)
+"""
+
+import sys
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.site_parser import META_CHUNK_SIZE, META_STREAM_LIMIT, SiteParser
+
+
+HEAD = '''<html><head><meta charset="{charset}"><title>ГТРК Томск</title>
+<meta name="description" content="Новости Томской области">
+<meta name="keywords" content="Томск, новости">
+<meta property="og:title" content="Вести Томск"></head><body>'''
+
+FILLER = '<div class="card">' + 'Текст блока новостей. ' * 40 + '</div>\n'
+
+PAGES = {
+    # Заголовки и лид в начале, дальше ~2 МБ разметки
+    '/': (HEAD + '<h1>Главные новости</h1><h2>Губернатор открыл школу</h2>'
+          '<p>Губернатор Томской области открыл новую школу на 500 мест в Северске</p>'
+          + FILLER * 2000 + '</body></html>', 'utf-8'),
+    # Обычная новость: один H1, несколько H2 по тексту статьи
+    '/article': (HEAD + '<h1>Губернатор открыл школу</h1><p>В Северске открылась школа на 500 мест</p>'
+                 + ''.join(FILLER * 10 + f'<h2>Подробности {n}</h2>' for n in range(1, 4))
+                 + FILLER * 100 + '</body></html>', 'utf-8'),
+    # Первый заголовок дальше первой части потока
+    '/late': (HEAD + '<p>Абзац</p>' + FILLER * 12 + '<h1>Главные новости</h1>'
+              + ''.join(f'<h2>Новость {n}</h2>' for n in range(1, 7)) + '<h3>Погода</h3>'
+              + FILLER * 100 + '</body></html>', 'utf-8'),
+    # Без заголовков H1-H3: нужен полный разбор
+    '/plain': (HEAD + '<p>Короткий абзац</p>' + FILLER * 20 + '</body></html>', 'utf-8'),
+    # Кодировка только в <meta charset>
+    '/cp1251': (HEAD + '<h1>Новости региона</h1><p>Абзац</p></body></html>', 'windows-1251'),
+}
+
+
+def serve_site():
+    """Локальный сайт; возвращает сервер, адрес и счетчик запросов по путям"""
+    hits = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits[self.path] += 1
+            body, charset = PAGES[self.path]
+            data = body.format(charset=charset).encode(charset)
+            try:
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                for start in range(0, len(data), 16 * 1024):
+                    self.wfile.write(data[start:start + 16 * 1024])
+            except OSError:
+                # Клиент закрыл соединение, не дочитав страницу
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", hits
+
+
+def test_head_only_stops_early():
+    """Быстрый путь читает только начало страницы, результат как при полном разборе"""
+    print("\n[1] Потоковое извлечение метаданных...")
+    server, base_url, _ = serve_site()
+    try:
+        fast_text, fast_metrics = SiteParser()._extract_meta_from_page(base_url + '/')
+        full_text, full_metrics = SiteParser()._extract_meta_from_page(base_url + '/', head_only=False)
+        print(f"   Прочитано: {fast_metrics['bytes_read']} байт вместо {full_metrics['bytes_read']}")
+
+        assert fast_metrics['head_only'] and not full_metrics['head_only']
+        assert fast_metrics['bytes_read'] <= META_STREAM_LIMIT < full_metrics['bytes_read']
+        assert fast_text == full_text
+        assert "OG title: Вести Томск" in fast_text and "H2: Губернатор открыл школу" in fast_text
+        assert fast_metrics['meta_tags_count'] == 3 and fast_metrics['headers_count'] == 2
+    finally:
+        server.shutdown()
+    print("   [OK] Загружено только начало страницы")
+
+
+def test_fallback_and_encoding():
+    """Страница без заголовков разбирается целиком; кодировка берется из <meta charset>"""
+    print("\n[2] Полный разбор и кодировка...")
+    server, base_url, hits = serve_site()
+    try:
+        parser = SiteParser()
+        text, metrics = parser._extract_meta_from_page(base_url + '/plain')
+        print(f"   /plain: head_only={metrics['head_only']}, {metrics['bytes_read']} байт")
+        assert not metrics['head_only'] and "Заголовок: ГТРК Томск" in text
+        # Полностью разобранная страница попала в кэш: повторного запроса нет
+        response, _ = parser._get_page(base_url + '/plain')
+        assert hits['/plain'] == 1
+        assert len(response.content) == metrics['bytes_read'] and "Короткий абзац" in response.text
+
+        text, metrics = parser._extract_meta_from_page(base_url + '/cp1251')
+        print(f"   /cp1251: {text.splitlines()[0]}")
+        assert metrics['head_only'] and "H1: Новости региона" in text and "ГТРК Томск" in text
+    finally:
+        server.shutdown()
+    print("   [OK] Запасной путь и кодировка работают")
+
+
+def test_headers_after_first_chunk():
+    """Чтение продолжается до первого заголовка и останавливается на его части потока"""
+    print("\n[3] Заголовки дальше начала страницы...")
+    server, base_url, _ = serve_site()
+    try:
+        fast_text, fast_metrics = SiteParser()._extract_meta_from_page(base_url + '/late')
+        full_text, full_metrics = SiteParser()._extract_meta_from_page(base_url + '/late', head_only=False)
+        print(f"   Заголовков: {fast_metrics['headers_count']}, прочитано {fast_metrics['bytes_read']} байт")
+
+        assert fast_metrics['head_only'] and fast_metrics['bytes_read'] < full_metrics['bytes_read']
+        assert "H1: Главные новости" in fast_text and "H2: Новость 1" in fast_text
+        assert "H2: Новость 6" not in fast_text
+        assert 1 < fast_metrics['headers_count'] <= full_metrics['headers_count'] == 7
+    finally:
+        server.shutdown()
+    print("   [OK] Заголовки найдены без чтения всей страницы")
+
+
+def test_article_reads_first_chunk():
+    """Обычная новость (один H1, несколько H2) читается в пределах первых частей потока"""
+    print("\n[4] Объем чтения обычной новости...")
+    server, base_url, _ = serve_site()
+    try:
+        page_size = len(PAGES['/article'][0].encode('utf-8'))
+        text, metrics = SiteParser()._extract_meta_from_page(base_url + '/article')
+        print(f"   Прочитано: {metrics['bytes_read']} байт из {page_size}")
+
+        assert metrics['head_only'] and "H1: Губернатор открыл школу" in text
+        assert metrics['bytes_read'] <= 2 * META_CHUNK_SIZE and metrics['bytes_read'] < page_size / 10
+    finally:
+        server.shutdown()
+    print("   [OK] Чтение остановлено в начале страницы")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ ПОТОКОВОГО МЕТА-ПАРСИНГА")
+    print("=" * 60)
+
+    test_head_only_stops_early()
+    test_fallback_and_encoding()
+    test_headers_after_first_chunk()
+    test_article_reads_first_chunk()
+
+    print("\n[OK] Все проверки пройдены")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки потокового импорта NDJSON дампа (export_import_data.import_ndjson)
+"""
+
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from export_import_data import export_ndjson, import_ndjson
+from modules.database import VGTRKDatabase
+from test_helpers import create_test_db
+
+
+def test_import_refuses_filled_target():
+    """Дамп загружается в пустую базу; в заполненную - только с clear_existing"""
+    print("\n[1] Импорт в пустую и заполненную базу...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        source = create_test_db(tmp_dir, "source.db", filials=[('ГТРК "Томск"', 'https://vesti.example')])
+        query_id = source.get_search_queries()[0]['id']
+        source.save_monitoring_result(1, {'search_query_id': query_id, 'status': 'success',
+                                          'content': 'Губернатор открыл школу'})
+        dump = str(Path(tmp_dir) / "dump.ndjson.gz")
+        export_ndjson(str(source.db_path), dump)
+
+        target_path = str(Path(tmp_dir) / "target.db")
+        import_ndjson(target_path, dump)
+
+        # Результат, которого нет в дампе, не должен быть перезаписан
+        target = VGTRKDatabase(target_path)
+        local_id = target.save_monitoring_result(1, {'search_query_id': query_id, 'status': 'no_data'})
+        refused = False
+        try:
+            import_ndjson(target_path, dump)
+        except ValueError as e:
+            refused = True
+            print(f"   Отказ: {e}")
+        assert refused
+        assert [r['id'] for r in target.get_monitoring_results()] == [local_id, 1]
+
+        import_ndjson(target_path, dump, clear_existing=True)
+        results = target.get_monitoring_results()
+        assert len(results) == 1 and results[0]['content'] == 'Губернатор открыл школу'
+    print("   [OK] Заполненная база не перезаписывается без clear_existing")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ ИМПОРТА NDJSON")
+    print("=" * 60)
+
+    test_import_refuses_filled_target()
+
+    print("\n[OK] Все проверки пройдены")
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки одновременной загрузки новостных страниц (режим "Главная + Новости")
+"""
+
+import sys
+import os
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.site_parser import NEWS_PER_HOST, SiteParser
+
+
+HOMEPAGE = ('<html><head><title>ГТРК Томск</title></head><body><h1>Главное</h1>'
+            + ''.join(f'<a href="/news/{n}">Новость {n}</a>' for n in range(1, 6)) + '</body></html>')
+
+NEWS = '<html><head><title>Новость {n}</title></head><body><h1>Губернатор: новость {n}</h1></body></html>'
+
+# Новость без заголовков: разбирается целиком и кладется в кэш страниц
+NEWS_PLAIN = '<html><head><title>Новость {n}</title></head><body><p>Губернатор: новость {n}</p></body></html>'
+
+
+def serve_site(news_delay: float, news_template: str = NEWS):
+    """
+    Локальный сайт с медленными новостными страницами
+
+    Returns:
+        Сервер, адрес и статистика {'active', 'max_active', 'requests'} запросов новостей
+    """
+    stats = {'active': 0, 'max_active': 0, 'requests': 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/':
+                body = HOMEPAGE
+            else:
+                with lock:
+                    stats['active'] += 1
+                    stats['requests'] += 1
+                    stats['max_active'] = max(stats['max_active'], stats['active'])
+                time.sleep(news_delay)
+                with lock:
+                    stats['active'] -= 1
+                body = news_template.format(n=self.path.rsplit('/', 1)[1])
+            data = body.encode('utf-8')
+            try:
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+            except OSError:
+                pass
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", stats
+
+
+def test_news_pages_concurrent():
+    """Новостные страницы загружаются одновременно, но не более NEWS_PER_HOST к сайту"""
+    print("\n[1] Одновременная загрузка новостей...")
+    server, base_url, stats = serve_site(news_delay=0.4)
+    try:
+        started = time.time()
+        text, metrics = SiteParser().parse_meta_data(base_url + '/', include_news=True)
+        elapsed = time.time() - started
+        print(f"   Страниц: {metrics['pages_parsed']} за {elapsed:.2f} с, "
+              f"одновременно к сайту: {stats['max_active']}")
+
+        assert metrics['pages_parsed'] == 6 and metrics['news_timed_out'] == 0
+        assert all(f"новость {n}" in text for n in range(1, 6))
+        # Последовательно с задержкой PARSER_DELAY было бы 5 x (1 + 0.4) с
+        assert elapsed < 1.5
+        assert stats['max_active'] <= NEWS_PER_HOST
+    finally:
+        server.shutdown()
+    print("   [OK] Новости загружены одновременно")
+
+
+def test_time_budget_partial_result():
+    """По истечении лимита времени возвращается то, что уже загружено"""
+    print("\n[2] Лимит времени на филиал...")
+    server, base_url, _ = serve_site(news_delay=3)
+    try:
+        started = time.time()
+        text, metrics = SiteParser().parse_meta_data(base_url + '/', include_news=True, time_budget=0.5)
+        elapsed = time.time() - started
+        print(f"   За {elapsed:.2f} с: страниц {metrics['pages_parsed']}, пропущено {metrics['news_timed_out']}")
+
+        assert elapsed < 1.5
+        assert "ГТРК Томск" in text and metrics['pages_parsed'] == 1
+        assert metrics['news_timed_out'] == 5
+    finally:
+        server.shutdown()
+    print("   [OK] Главная страница сохранена, медленные новости пропущены")
+
+
+
+def test_late_news_not_cached():
+    """Новости, загрузившиеся после лимита и очистки кэша, в кэш не попадают"""
+    print("\n[3] Опоздавшие новости после очистки кэша...")
+    server, base_url, stats = serve_site(news_delay=1, news_template=NEWS_PLAIN)
+    try:
+        parser = SiteParser()
+        _, metrics = parser.parse_meta_data(base_url + '/', include_news=True, time_budget=0.3)
+        assert metrics['news_timed_out'] == 5
+        # Так делает MonitoringRunner.process_filial по завершении филиала
+        parser.clear_page_cache()
+        time.sleep(1.5)
+
+        news_urls = [f"{base_url}/news/{n}" for n in range(1, 6)]
+        cached = [url for url in news_urls if parser._is_page_cached(url)]
+        print(f"   Запросов новостей: {stats['requests']}, в кэше после очистки: {len(cached)}")
+        assert not cached
+        # Ожидавшие очереди к хосту загрузки отменены и к сайту не обращались
+        assert stats['requests'] == NEWS_PER_HOST
+    finally:
+        server.shutdown()
+    print("   [OK] Поздние результаты не изменяют кэш")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ ЗАГРУЗКИ НОВОСТНЫХ СТРАНИЦ")
+    print("=" * 60)
+
+    test_news_pages_concurrent()
+    test_time_budget_partial_result()
+    test_late_news_not_cached()
+
+    print("\n[OK] Все проверки пройдены")
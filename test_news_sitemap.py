@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки отбора статей по метаданным news sitemap (ScrapyParser.search_sitemap)
+"""
+
+import sys
+import os
+import threading
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.scrapy_parser import ScrapyParser
+
+
+TODAY = date.today().isoformat()
+OLD = (date.today() - timedelta(days=30)).isoformat()
+
+NEWS_SITEMAP = f'''<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:news="http://www.google.com/schemas/sitemap-news/0.9">
+  <url><loc>{{base}}/news/1</loc><lastmod>{OLD}</lastmod>
+    <news:news><news:publication_date>{TODAY}T10:00:00+07:00</news:publication_date>
+      <news:title>Губернатор открыл новую школу</news:title></news:news></url>
+  <url><loc>{{base}}/news/2</loc>
+    <news:news><news:publication_date>{TODAY}</news:publication_date>
+      <news:title>Прогноз погоды на выходные</news:title><news:keywords>погода, дожди</news:keywords></news:news></url>
+  <url><loc>{{base}}/news/3</loc><lastmod>{TODAY}</lastmod>
+    <news:news><news:publication_date>{OLD}</news:publication_date>
+      <news:title>Губернатор в прошлом месяце</news:title></news:news></url>
+  <url><loc>{{base}}/news/4</loc><lastmod>{TODAY}</lastmod></url>
+</urlset>'''
+
+ARTICLE = "<html><head><title>{title}</title></head><body><p>{text}</p></body></html>"
+
+PAGES = {
+    '/news-sitemap.xml': NEWS_SITEMAP,
+    '/news/1': ARTICLE.format(title="Губернатор открыл новую школу", text="Губернатор открыл школу на 500 мест"),
+    '/news/2': ARTICLE.format(title="Прогноз погоды", text="Губернатор не упоминается в заголовке"),
+    '/news/4': ARTICLE.format(title="Итоги недели", text="Губернатор подвел итоги недели"),
+}
+
+
+def serve_site():
+    """Локальный сайт с news sitemap; возвращает сервер, адрес и список запрошенных путей"""
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            body = PAGES.get(self.path)
+            self.send_response(200 if body else 404)
+            data = (body or '').format(base=f"http://127.0.0.1:{self.server.server_port}").encode('utf-8')
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", hits
+
+
+def search(fetch_snippets: bool):
+    server, base_url, hits = serve_site()
+    try:
+        parser = ScrapyParser()
+        date_from, date_to = parser.search_period(days=2)
+        outcome = parser.search_sitemap(base_url, ['губернатор'], date_from, date_to,
+                                        sitemap_url=f"{base_url}/news-sitemap.xml",
+                                        fetch_snippets=fetch_snippets)
+        return outcome, [hit for hit in hits if hit.startswith('/news/')]
+    finally:
+        server.shutdown()
+
+
+def test_news_metadata_prematch():
+    """Статьи без совпадений в заголовке news sitemap не загружаются"""
+    print("\n[1] Отбор по метаданным news sitemap...")
+    outcome, fetched = search(fetch_snippets=True)
+    urls = sorted(article['url'].rsplit('/', 1)[1] for article in outcome['articles'])
+    print(f"   Найдено: {urls}, загружено: {fetched}")
+
+    # news/3 отсеян по дате публикации (lastmod свежий), news/1 - наоборот
+    assert outcome['urls_in_window'] == 3
+    assert urls == ['1', '4']
+    # news/2 не совпал по заголовку и не загружался; news/4 без метаданных - загружен
+    assert sorted(fetched) == ['/news/1', '/news/4']
+    assert outcome['articles_checked'] == 3 and outcome['articles_fetched'] == 2
+    assert 'школу на 500 мест' in next(a for a in outcome['articles'] if a['url'].endswith('/1'))['snippet']
+    print("   [OK] Загружены только совпавшие и статьи без метаданных")
+
+
+def test_news_metadata_without_fetch():
+    """fetch_snippets=False: совпадение по заголовку - без запроса статьи"""
+    print("\n[2] Совпадения по заголовку без загрузки...")
+    outcome, fetched = search(fetch_snippets=False)
+    print(f"   Загружено: {fetched}")
+    assert fetched == ['/news/4']
+    article = next(a for a in outcome['articles'] if a['url'].endswith('/1'))
+    assert article['title'] == "Губернатор открыл новую школу" and article['keywords'] == ['губернатор']
+    assert article['date'].date() == date.today()
+    print("   [OK] Результат построен по метаданным")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ NEWS SITEMAP")
+    print("=" * 60)
+
+    test_news_metadata_prematch()
+    test_news_metadata_without_fetch()
+
+    print("\n[OK] Все проверки пройдены")
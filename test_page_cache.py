@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки кэша страниц SiteParser
+"""
+
+import sys
+import os
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+import modules.site_parser as site_parser_module
+from modules.site_parser import SiteParser
+
+
+HOMEPAGE = '''<html><head><title>ГТРК Томск</title>
+<meta name="description" content="Новости Томской области">
+<link rel="alternate" type="application/rss+xml" href="/rss"></head>
+<body><h1>Главное</h1>
+<a href="/news/1">Губернатор открыл школу</a><a href="/news/2">Погода</a></body></html>'''
+
+NEWS = '<html><head><title>Новость {n}</title></head><body><h1>Новость {n}</h1></body></html>'
+
+
+def serve_site():
+    """Локальный сайт; возвращает сервер, адрес и счетчик запросов по путям"""
+    hits = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits[self.path] += 1
+            if self.path == '/':
+                body = HOMEPAGE
+            elif self.path.startswith('/news/'):
+                body = NEWS.format(n=self.path.rsplit('/', 1)[1])
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", hits
+
+
+def test_homepage_fetched_once():
+    """Главная загружается один раз для мета-данных, новостей и поиска RSS"""
+    print("\n[1] Повторные обращения к главной...")
+    server, base_url, hits = serve_site()
+    try:
+        parser = SiteParser()
+        text, metrics = parser.parse_meta_data(base_url + '/', include_news=True)
+        rss_url = parser._find_rss_url(base_url + '/')
+        print(f"   Страниц: {metrics['pages_parsed']}, RSS: {rss_url}, запросы: {dict(hits)}, "
+              f"кэш: {parser.page_cache_stats}")
+
+        assert "ГТРК Томск" in text and metrics['pages_parsed'] == 3
+        assert rss_url == f"{base_url}/rss"
+        assert hits['/'] == 1 and hits['/news/1'] == 1
+        assert parser.page_cache_stats['hits'] == 2
+
+        # После очистки (следующий филиал) страница загружается снова
+        parser.clear_page_cache()
+        parser._find_rss_url(base_url + '/')
+        assert hits['/'] == 2
+    finally:
+        server.shutdown()
+    print("   [OK] Главная загружена один раз")
+
+
+def test_lru_eviction():
+    """Кэш ограничен PAGE_CACHE_SIZE, вытесняется давно не использованная страница"""
+    print("\n[2] Вытеснение из кэша...")
+    server, base_url, hits = serve_site()
+    size = site_parser_module.PAGE_CACHE_SIZE
+    site_parser_module.PAGE_CACHE_SIZE = 2
+    try:
+        parser = SiteParser()
+        parser._get_page(f"{base_url}/news/1")
+        parser._get_page(f"{base_url}/news/2")
+        parser._get_page(f"{base_url}/news/1")   # /news/1 становится свежей
+        parser._get_page(f"{base_url}/news/3")   # вытесняет /news/2
+        parser._get_page(f"{base_url}/news/1")
+        parser._get_page(f"{base_url}/news/2")
+        print(f"   Запросы: {dict(hits)}")
+        assert hits['/news/1'] == 1 and hits['/news/2'] == 2 and hits['/news/3'] == 1
+        assert len(parser._page_cache) == 2
+
+        # Ошибки не кэшируются
+        for _ in range(2):
+            try:
+                parser._get_page(f"{base_url}/missing")
+            except Exception:
+                pass
+        assert hits['/missing'] == 2
+    finally:
+        site_parser_module.PAGE_CACHE_SIZE = size
+        server.shutdown()
+    print("   [OK] Кэш ограничен по размеру")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ КЭША СТРАНИЦ")
+    print("=" * 60)
+
+    test_homepage_fetched_once()
+    test_lru_eviction()
+
+    print("\n[OK] Все проверки пройдены")
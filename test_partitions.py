@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки месячных партиций результатов мониторинга
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.database import VGTRKDatabase
+from test_helpers import create_test_db, set_parsing_date
+
+
+def create_history_db(tmp_dir: str) -> VGTRKDatabase:
+    """Создание временной БД с результатами за текущий и два прошлых месяца"""
+    db = create_test_db(tmp_dir, queries=("губернатор", "мэр"))
+
+    old_dates = [datetime.now() - timedelta(days=days) for days in (70, 100)]
+    for parsing_date in old_dates:
+        result_id = db.save_monitoring_result(1, {
+            'search_query_id': 1,
+            'status': 'success',
+            'articles': [{'title': 'Старая статья', 'url': f'https://vesti-tomsk.ru/{parsing_date:%m}',
+                          'date': parsing_date.strftime('%d.%m.%Y'), 'keywords_found': ['губернатор']}]
+        })
+        set_parsing_date(db, result_id, parsing_date)
+
+    # Свежие результаты: по запросу 1 (заменяет старые в latest_results) и по запросу 2
+    db.save_monitoring_result(1, {'search_query_id': 1, 'status': 'no_data'})
+    db.save_monitoring_result(1, {'search_query_id': 2, 'status': 'no_data'})
+    db.rebuild_statistics()
+    return db
+
+
+def test_archive_and_query():
+    """Старые месяцы уходят в партиции, запросы читают их прозрачно"""
+    print("\n[1] Перенос в партиции...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_history_db(tmp_dir)
+        archived = db.archive_closed_months()
+        print(f"   Перенесено: {archived}")
+
+        assert sum(archived.values()) == 2
+        assert len(db.list_partitions()) == len(archived)
+
+        with db.get_connection() as conn:
+            assert conn.execute('SELECT COUNT(*) FROM monitoring_results').fetchone()[0] == 2
+
+        all_results = db.get_monitoring_results()
+        assert len(all_results) == 4
+        assert sum(1 for r in all_results if r.get('articles')) == 2
+        assert len(list(db.iter_articles())) == 2
+
+        # Запрос за последние дни не подключает старые партиции
+        recent = db.get_monitoring_results(date_from=datetime.now().strftime('%Y-%m-%d'))
+        assert len(recent) == 2
+
+        # Агрегаты пересчитываются с учетом партиций
+        db.rebuild_statistics()
+        assert sum(day['count'] for day in db.get_statistics()['last_week']) == 2
+        print("   [OK] Результаты читаются из партиций")
+
+
+def test_retention_drops_files():
+    """Очистка удаляет файлы партиций целиком"""
+    print("\n[2] Удаление старых партиций...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_history_db(tmp_dir)
+        deleted = db.clear_old_results(days_to_keep=30)
+
+        assert deleted == 2
+        assert db.list_partitions() == []
+        assert len(db.get_monitoring_results()) == 2
+        assert len(db.get_latest_results()) == 2
+        print(f"   [OK] Удалено записей: {deleted}")
+
+
+def test_retention_keeps_stats_consistent():
+    """Агрегаты после очистки совпадают с результатами, оставшимися в партициях"""
+    print("\n[3] Статистика после очистки...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_history_db(tmp_dir)
+
+        # Результат в начале позапрошлого месяца, граница хранения - на день позже
+        month_start = (datetime.now().replace(day=1) - timedelta(days=40)).replace(day=1, hour=12)
+        result_id = db.save_monitoring_result(1, {'search_query_id': 2, 'status': 'success'})
+        db.save_monitoring_result(1, {'search_query_id': 2, 'status': 'no_data'})
+        set_parsing_date(db, result_id, month_start)
+        db.rebuild_statistics()
+
+        db.clear_old_results(days_to_keep=(datetime.now() - month_start).days - 1)
+        with db.get_connection() as conn:
+            stats_total = conn.execute('SELECT SUM(results_count) FROM results_daily_stats').fetchone()[0]
+        results = db.get_monitoring_results()
+        print(f"   Результатов: {len(results)}, в агрегатах: {stats_total}")
+        assert any(r['id'] == result_id for r in results)
+        assert stats_total == len(results)
+    print("   [OK] Агрегаты и архив согласованы")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ ПАРТИЦИЙ РЕЗУЛЬТАТОВ")
+    print("=" * 60)
+
+    test_archive_and_query()
+    test_retention_drops_files()
+    test_retention_keeps_stats_consistent()
+
+    print("\n[OK] Все проверки пройдены")
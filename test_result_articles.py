@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки хранения статей в таблице result_articles
+"""
+
+import sys
+import os
+import json
+import tempfile
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from test_helpers import create_test_db
+
+
+TEST_ARTICLES = [
+    {
+        'title': 'Губернатор посетил школу',
+        'url': 'https://vesti-tomsk.ru/news/1',
+        'date': '15.09.2025',
+        'keywords_found': ['губернатор'],
+        'snippet': 'Губернатор области посетил новую школу'
+    },
+    {
+        'title': 'Губернатор провел прием граждан',
+        'url': 'https://vesti-tomsk.ru/news/2',
+        'date': 'Дата не указана',
+        'keywords_found': ['губернатор', 'прием'],
+        'snippet': ''
+    }
+]
+
+
+def test_save_and_read_articles():
+    """Статьи сохраняются в отдельную таблицу и читаются в прежнем формате"""
+    print("\n[1] Сохранение и чтение статей...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir)
+        result_id = db.save_monitoring_result(1, {
+            'search_query_id': 1,
+            'status': 'success',
+            'search_mode': 'sitemap',
+            'articles': TEST_ARTICLES
+        })
+
+        results = db.get_monitoring_results()
+        assert results[0]['articles'] == TEST_ARTICLES
+
+        # Для таблицы статьи не загружаются
+        assert not db.get_monitoring_results(include_articles=False)[0].get('articles')
+
+        by_url = list(db.iter_articles(url='https://vesti-tomsk.ru/news/1'))
+        assert len(by_url) == 1 and by_url[0]['result_id'] == result_id
+
+        by_date = list(db.iter_articles(date_from='2025-09-01', date_to='2025-09-30'))
+        assert [a['title'] for a in by_date] == ['Губернатор посетил школу']
+        print("   [OK] Статьи читаются корректно")
+
+
+def test_migrate_articles():
+    """Старые JSON статьи переносятся в result_articles"""
+    print("\n[2] Миграция JSON статей...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir)
+        result_id = db.save_monitoring_result(1, {'search_query_id': 1, 'status': 'success',
+                                                  'search_mode': 'sitemap'})
+
+        # Имитируем запись, сохраненную старой версией
+        with db.get_connection() as conn:
+            conn.execute('UPDATE monitoring_results SET articles = ? WHERE id = ?',
+                         (json.dumps(TEST_ARTICLES, ensure_ascii=False), result_id))
+            conn.commit()
+        assert db.get_monitoring_results()[0]['articles'] == TEST_ARTICLES
+
+        migrated = db.migrate_articles_to_table(batch_size=1)
+        assert migrated == 1
+        assert db.migrate_articles_to_table() == 0
+
+        with db.get_connection() as conn:
+            row = conn.execute('SELECT articles FROM monitoring_results WHERE id = ?', (result_id,)).fetchone()
+        assert row['articles'] is None
+        assert db.get_monitoring_results()[0]['articles'] == TEST_ARTICLES
+        print(f"   [OK] Перенесено результатов: {migrated}")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ ТАБЛИЦЫ СТАТЕЙ")
+    print("=" * 60)
+
+    test_save_and_read_articles()
+    test_migrate_articles()
+
+    print("\n[OK] Все проверки пройдены")
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки режима RSS (SiteParser.parse_rss_feed, MonitoringRunner rss_search)
+"""
+
+import sys
+import os
+import time
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.runner import MonitoringRunner
+from modules.site_parser import SiteParser
+from test_helpers import create_test_db
+
+
+HOMEPAGE = ('<html><head><link rel="alternate" type="application/rss+xml" href="/export/news.xml">'
+            '</head><body>ГТРК</body></html>')
+
+ITEM = ('<item><title>Новость {n}</title><link>{{base}}/news/{n}</link>'
+        '<description>&lt;p&gt;Губернатор провел совещание {n}&lt;/p&gt;</description>'
+        '<pubDate>Mon, 20 Oct 2025 10:00:00 +0300</pubDate></item>')
+
+FEED = ('<?xml version="1.0" encoding="UTF-8"?><rss version="2.0"><channel><title>Вести</title>'
+        '<description>Новости региона</description>'
+        + ''.join(ITEM.format(n=n) for n in range(50)) + '</channel></rss>')
+
+ETAG = '"feed-v1"'
+
+
+class OfflineGigaChat:
+    """Ответ GigaChat без сетевых запросов"""
+
+    def analyze_content(self, content, prompt):
+        return "Найдено: упоминание губернатора", {'total_tokens': 0}
+
+
+def serve_site(delay: float = 0):
+    """
+    Локальный сайт с RSS-лентой (ссылка на главной, ETag для условного GET)
+
+    Returns:
+        Сервер, адрес и список запрошенных путей
+    """
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            if self.path == '/':
+                body = HOMEPAGE
+            elif self.path == '/export/news.xml':
+                time.sleep(delay)
+                if self.headers.get('If-None-Match') == ETAG:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = FEED
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            data = body.format(base=f"http://127.0.0.1:{self.server.server_port}").encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/rss+xml; charset=utf-8')
+            self.send_header('ETag', ETAG)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", hits
+
+
+def test_conditional_streaming_feed():
+    """Лента находится по ссылке на главной, читается до max_items, повтор - 304"""
+    print("\n[1] Поиск, потоковый разбор и условный GET...")
+    server, base_url, hits = serve_site()
+    try:
+        parser = SiteParser()
+        rss_data, metrics = parser.parse_rss_feed(base_url, max_items=5)
+        print(f"   {metrics['rss_url']}: {metrics['items_count']} записей, ETag {metrics['etag']}")
+        assert metrics['rss_url'] == f"{base_url}/export/news.xml" and metrics['discovered']
+        assert metrics['items_count'] == 5 and metrics['etag'] == ETAG
+        assert rss_data['channel_title'] == "Вести"
+        assert rss_data['items'][0]['description'] == "Губернатор провел совещание 0"
+        assert rss_data['items'][0]['link'] == f"{base_url}/news/0"
+
+        hits.clear()
+        rss_data, metrics = parser.parse_rss_feed(base_url, rss_url=metrics['rss_url'], etag=metrics['etag'])
+        print(f"   Повторный запрос: not_modified={metrics['not_modified']}, запросы {hits}")
+        assert rss_data is None and metrics['not_modified'] and metrics['etag'] == ETAG
+        assert hits == ['/export/news.xml']
+    finally:
+        server.shutdown()
+    print("   [OK] Лента загружается только при изменении")
+
+
+def test_rss_mode_concurrent_and_persisted():
+    """Ленты филиалов загружаются одновременно, адрес и ETag сохраняются в filials"""
+    print("\n[2] Режим rss_search...")
+    sites = [serve_site(delay=0.5) for _ in range(4)]
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filials = [(f'ГТРК {n}', base_url) for n, (_, base_url, _) in enumerate(sites)]
+            db = create_test_db(tmp_dir, filials=filials + [('ГТРК без ленты', 'http://127.0.0.1:1')])
+
+            def run():
+                runner = MonitoringRunner(db)
+                runner._gigachat_client = OfflineGigaChat()
+                started = time.time()
+                stats = runner.run(db.get_all_filials(), db.get_search_queries(), search_mode='rss_search')
+                return stats, time.time() - started
+
+            stats, elapsed = run()
+            print(f"   Первый запуск: успешно {stats['successful']}, ошибок {stats['errors']} за {elapsed:.2f} с")
+            # Последовательно только ленты заняли бы 4 x 0.5 с
+            assert stats['successful'] == 4 and stats['errors'] == 1
+            assert elapsed < 1.8
+
+            filials = {f['name']: f for f in db.get_all_filials()}
+            assert filials['ГТРК 0']['rss_url'] == f"{sites[0][1]}/export/news.xml"
+            assert filials['ГТРК 0']['rss_etag'] == ETAG
+            assert not filials['ГТРК без ленты']['rss_url']
+
+            for _, _, hits in sites:
+                hits.clear()
+            stats, elapsed = run()
+            results = [r for r in db.get_monitoring_results() if r['session_id'] == stats['session_id']]
+            print(f"   Повторный запуск: {[r['status'] for r in results]} за {elapsed:.2f} с")
+            # Сохраненная лента запрашивается условно, без поиска и загрузки главной
+            assert all(hits == ['/export/news.xml'] for _, _, hits in sites)
+            # Лента не менялась: новых записей нет, найденное в прошлый раз остается текущим
+            assert [r['status'] for r in results] == ['error']
+            latest = db.get_latest_results()
+            assert sorted(r['status'] for r in latest) == ['error'] + ['success'] * 4
+            assert all(r['session_id'] != stats['session_id'] for r in latest if r['status'] == 'success')
+
+            # Новый запрос при неизмененной ленте: лента загружается целиком и проверяется только он
+            query_id = db.add_search_query("школа")
+            for _, _, hits in sites:
+                hits.clear()
+            stats, elapsed = run()
+            results = [r for r in db.get_monitoring_results() if r['session_id'] == stats['session_id']]
+            print(f"   Новый запрос: {[(r['search_query_id'], r['status']) for r in results]}")
+            assert all(hits == ['/export/news.xml'] * 2 for _, _, hits in sites)
+            assert sorted(r['search_query_id'] or 0 for r in results) == [0] + [query_id] * 4
+    finally:
+        for server, _, _ in sites:
+            server.shutdown()
+    print("   [OK] Ленты загружены одновременно и не перезапрашиваются без изменений")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ РЕЖИМА RSS")
+    print("=" * 60)
+
+    test_conditional_streaming_feed()
+    test_rss_mode_concurrent_and_persisted()
+
+    print("\n[OK] Все проверки пройдены")
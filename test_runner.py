@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки фонового запуска мониторинга (modules.runner)
+"""
+
+import sys
+import os
+import time
+import asyncio
+import tempfile
+import threading
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.runner import MonitoringRunner, main, read_progress
+from modules.db_writer import DBWriter
+from test_helpers import create_test_db
+
+
+# Филиалы без сайта: обработка завершается ошибкой без обращения к сети
+FILIALS = ['ГТРК "Томск"', 'ГТРК "Иртыш"']
+
+
+def test_runner_cli_progress():
+    """Запуск из командной строки пишет прогресс в JSON lines и закрывает сессию"""
+    print("\n[1] Запуск python -m modules.runner...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir, filials=FILIALS)
+        progress_file = str(Path(tmp_dir) / "progress.jsonl")
+
+        code = main(['--db', str(db.db_path), '--district', 'СФО', '--mode', 'main_only',
+                     '--progress-file', progress_file])
+        events = read_progress(progress_file)
+        print(f"   События: {[e['event'] for e in events]}")
+
+        assert code == 0
+        assert [e['event'] for e in events] == [
+            'session_started', 'filial_started', 'filial_done',
+            'filial_started', 'filial_done', 'session_completed'
+        ]
+        assert events[2]['status'] == 'error'
+        assert events[-1]['errors'] == 2
+
+        session = db.get_session_info(events[0]['session_id'])
+        assert session['status'] == 'completed'
+        assert session['filials_count'] == 2
+        print("   [OK] Прогресс и сессия корректны")
+
+
+def test_runner_stop():
+    """Остановка прерывает обработку до следующего филиала"""
+    print("\n[2] Остановка мониторинга...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir, filials=FILIALS)
+        events = []
+        runner = MonitoringRunner(
+            db,
+            progress_callback=events.append,
+            should_stop=lambda: any(e['event'] == 'filial_done' for e in events)
+        )
+        stats = runner.run(db.get_all_filials(), db.get_search_queries(), search_mode='main_only')
+
+        assert [e['event'] for e in events].count('filial_done') == 1
+        assert any(e['event'] == 'stopped' for e in events)
+        assert stats['errors'] == 1
+        print("   [OK] Обработан 1 филиал из 2")
+
+
+def test_runner_resume():
+    """Остановленная сессия продолжается только с необработанных филиалов"""
+    print("\n[3] Продолжение остановленной сессии...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir, filials=FILIALS)
+        events = []
+        runner = MonitoringRunner(
+            db,
+            progress_callback=events.append,
+            should_stop=lambda: any(e['event'] == 'filial_done' for e in events)
+        )
+        filials = db.get_all_filials()
+        session_id = runner.run(filials, db.get_search_queries(), search_mode='main_only')['session_id']
+
+        session = db.get_session_info(session_id)
+        assert session['status'] == 'error'
+        assert (session['filials_done'], session['filials_total']) == (1, 2)
+        assert [s['id'] for s in db.get_resumable_sessions()] == [session_id]
+
+        resumed = []
+        MonitoringRunner(db, progress_callback=resumed.append).resume(session_id)
+        processed = [e['filial_id'] for e in resumed if e['event'] == 'filial_done']
+        print(f"   Продолжено для филиалов: {processed}")
+
+        session = db.get_session_info(session_id)
+        assert processed == [filials[1]['id']]
+        assert session['status'] == 'completed'
+        assert session['filials_done'] == 2
+        assert db.get_resumable_sessions() == []
+        print("   [OK] Обработан только оставшийся филиал")
+
+
+def test_async_results_streamed():
+    """Асинхронный режим пишет результаты через поток записи по мере готовности"""
+    print("\n[4] Потоковая запись асинхронных результатов...")
+    with DBWriter(max_pending=1) as writer:
+        order = []
+        futures = [writer.submit(order.append, n) for n in range(5)]
+        failed = writer.submit(int, 'не число')
+    assert order == [0, 1, 2, 3, 4] and all(f.done() for f in futures)
+    assert isinstance(failed.exception(), ValueError)
+
+    # Заполненная очередь не блокирует event loop
+    async def submit_while_ticking():
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.time())
+                await asyncio.sleep(0.05)
+
+        with DBWriter(max_pending=1) as slow_writer:
+            ticking = asyncio.create_task(ticker())
+            await asyncio.sleep(0.01)
+            for _ in range(5):
+                await slow_writer.submit_async(time.sleep, 0.1)
+            await ticking
+        return ticks
+
+    ticks = asyncio.run(submit_while_ticking())
+    assert len(ticks) == 5 and max(b - a for a, b in zip(ticks, ticks[1:])) < 0.09
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir, filials=FILIALS)
+        events = []
+        stats = MonitoringRunner(db, progress_callback=events.append).run(
+            db.get_all_filials(), db.get_search_queries(), search_mode='sitemap_search',
+            search_days=1, use_async=True)
+
+        session = db.get_session_info(stats['session_id'])
+        with db.get_connection() as conn:
+            saved = conn.execute("SELECT COUNT(*) FROM monitoring_results WHERE status = 'error'").fetchone()[0]
+        print(f"   Сохранено результатов: {saved}, ошибок: {stats['error_count']}")
+        assert saved == 2 and stats['error_count'] == 2
+        assert session['status'] == 'completed' and session['filials_done'] == 2
+        print("   [OK] Результаты и контрольные точки записаны")
+
+
+def serve_site(pages):
+    """Локальный сайт {путь: HTML/XML}; возвращает сервер, адрес и список запрошенных путей"""
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            body = pages.get(self.path)
+            self.send_response(200 if body else 404)
+            data = (body or '').format(base=f"http://127.0.0.1:{self.server.server_port}").encode('utf-8')
+            self.send_header('Content-Type', 'text/xml; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", hits
+
+
+def test_sitemap_outcome_without_refetch():
+    """Пустой результат классифицируется по итогу поиска, sitemap не загружается повторно"""
+    print("\n[5] Итог поиска по sitemap...")
+    today = date.today().isoformat()
+    server, base_url, hits = serve_site({
+        '/sitemap.xml': '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                        f'<url><loc>{{base}}/news/1</loc><lastmod>{today}</lastmod></url>'
+                        f'<url><loc>{{base}}/news/2</loc><lastmod>{today}</lastmod></url></urlset>',
+        '/news/1': '<html><head><title>Погода</title></head><body>Дожди</body></html>',
+        '/news/2': '<html><head><title>Спорт</title></head><body>Матч</body></html>',
+    })
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = create_test_db(tmp_dir, filials=[('ГТРК "Томск"', base_url)])
+            db.update_filial(1, sitemap_url=f"{base_url}/sitemap.xml")
+
+            MonitoringRunner(db).run(db.get_all_filials(), db.get_search_queries(),
+                                     search_mode='sitemap_search', search_days=1)
+            result = db.get_monitoring_results()[0]
+            status, metrics = result['status'], result['metrics']
+            print(f"   {status}: {metrics}")
+            assert status == 'no_data'
+            assert metrics['urls_in_window'] == 2 and metrics['articles_checked'] == 2
+            assert metrics['sitemap_url'] == f"{base_url}/sitemap.xml" and 'total' in metrics['timings']
+            assert hits.count('/sitemap.xml') == 1
+    finally:
+        server.shutdown()
+    print("   [OK] Sitemap загружен один раз, метрики сохранены")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ ФОНОВОГО ЗАПУСКА МОНИТОРИНГА")
+    print("=" * 60)
+
+    test_runner_cli_progress()
+    test_runner_stop()
+    test_runner_resume()
+    test_async_results_streamed()
+    test_sitemap_outcome_without_refetch()
+
+    print("\n[OK] Все проверки пройдены")
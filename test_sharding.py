@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки шардированного асинхронного мониторинга (modules.sharding)
+"""
+
+import sys
+import os
+import tempfile
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.runner import MonitoringRunner
+from modules.sharding import shard_filials
+from test_helpers import create_test_db
+
+
+FILIALS = [
+    {'id': 1, 'name': 'Томск', 'federal_district': 'СФО'},
+    {'id': 2, 'name': 'Иртыш', 'federal_district': 'СФО'},
+    {'id': 3, 'name': 'Алтай', 'federal_district': 'СФО'},
+    {'id': 4, 'name': 'Кубань', 'federal_district': 'ЮФО'},
+    {'id': 5, 'name': 'Дон-ТР', 'federal_district': 'ЮФО'},
+    {'id': 6, 'name': 'Калининград', 'federal_district': 'СЗФО'},
+]
+
+
+def ids(shards):
+    return [[filial['id'] for filial in shard] for shard in shards]
+
+
+def test_shard_strategies():
+    """Деление по очереди, по округам и по исторической стоимости"""
+    print("\n[1] Стратегии шардирования...")
+
+    assert ids(shard_filials(FILIALS, 2, 'round_robin')) == [[1, 3, 5], [2, 4, 6]]
+
+    by_district = shard_filials(FILIALS, 2, 'district')
+    districts = [{filial['federal_district'] for filial in shard} for shard in by_district]
+    print(f"   По округам: {districts}")
+    assert districts == [{'СФО'}, {'ЮФО', 'СЗФО'}]
+
+    # Филиал 1 дороже всех остальных вместе: он один в своем шарде
+    costs = {1: 100.0, 2: 5.0, 3: 5.0, 4: 5.0, 5: 5.0}
+    by_cost = shard_filials(FILIALS, 2, 'cost', costs)
+    print(f"   По стоимости: {ids(by_cost)}")
+    assert ids(by_cost) == [[1], [2, 3, 4, 5, 6]]
+
+    # Шардов не больше, чем филиалов
+    assert len(shard_filials(FILIALS[:2], 4)) == 2
+    print("   [OK] Шарды корректны")
+
+
+def test_sharded_session():
+    """Шарды в отдельных процессах, запись результатов и контрольных точек - в родителе"""
+    print("\n[2] Шардированная сессия...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Без сайта: филиал завершается ошибкой без обращения к сети
+        db = create_test_db(tmp_dir, filials=FILIALS[:4])
+
+        events = []
+        runner = MonitoringRunner(db, progress_callback=events.append)
+        stats = runner.run(db.get_all_filials(), db.get_search_queries(), search_mode='sitemap_search',
+                           search_days=1, use_async=True, shards=2, shard_strategy='district')
+
+        done = [e for e in events if e['event'] == 'filial_done']
+        print(f"   Обработано: {len(done)}, ошибок: {stats['error_count']}")
+        assert len(done) == 4 and stats['error_count'] == 4
+        assert all(e['error'] == 'Нет сайта' for e in done)
+
+        session = db.get_session_info(stats['session_id'])
+        assert session['status'] == 'completed'
+        assert session['filials_done'] == 4
+        assert set(db.get_filial_costs()) == {f['id'] for f in db.get_all_filials()}
+        print("   [OK] Результаты сохранены одним процессом")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ ШАРДИРОВАННОГО МОНИТОРИНГА")
+    print("=" * 60)
+
+    test_shard_strategies()
+    test_sharded_session()
+
+    print("\n[OK] Все проверки пройдены")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки поиска sitemap (modules.sitemap_discovery)
+"""
+
+import sys
+import os
+import time
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from modules.scrapy_parser import ScrapyParser
+from modules.sitemap_discovery import discover_for_filial, discover_sitemap, sniff_sitemap_type
+from test_helpers import create_test_db
+
+
+INDEX = '<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"></sitemapindex>'
+URLSET = '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"></urlset>'
+NEWS = ('<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" '
+        'xmlns:news="http://www.google.com/schemas/sitemap-news/0.9"></urlset>')
+TURBO = '<?xml version="1.0"?><rss xmlns:yandex="http://news.yandex.ru" xmlns:turbo="http://turbo.yandex.ru"></rss>'
+SOFT_404 = '<!DOCTYPE html><html><body>Страница не найдена</body></html>'
+
+
+def serve(routes):
+    """
+    Локальный сайт (сеть не нужна)
+
+    Args:
+        routes: {путь: (задержка, тело)}; остальные пути - 404
+    """
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            if self.path not in routes:
+                self.send_response(404)
+                self.end_headers()
+                return
+            delay, body = routes[self.path]
+            time.sleep(delay)
+            data = body.format(base=f"http://127.0.0.1:{self.server.server_port}").encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", hits
+
+
+def test_sniff_types():
+    """Тип определяется по первым байтам, HTML-заглушка - не sitemap"""
+    print("\n[1] Определение типа sitemap...")
+    assert sniff_sitemap_type(INDEX) == 'index'
+    assert sniff_sitemap_type(URLSET) == 'urlset'
+    assert sniff_sitemap_type(NEWS) == 'news'
+    assert sniff_sitemap_type(TURBO) == 'turbo'
+    assert sniff_sitemap_type(SOFT_404) is None
+    assert sniff_sitemap_type('User-agent: *') is None
+    print("   [OK] Типы определены")
+
+
+def test_racing_priority():
+    """Кандидаты проверяются одновременно, побеждает наиболее приоритетный"""
+    print("\n[2] Одновременная проверка кандидатов...")
+
+    # robots.txt приоритетнее путей: медленный /sitemap.xml не ждем
+    server, base_url, _ = serve({
+        '/robots.txt': (0, "User-agent: *\nSitemap: {base}/news.xml\n"),
+        '/news.xml': (0, NEWS),
+        '/sitemap_index.xml': (0, SOFT_404),
+        '/sitemap.xml': (3, URLSET),
+    })
+    try:
+        started = time.time()
+        found = discover_sitemap(base_url)
+        elapsed = time.time() - started
+        print(f"   {found} за {elapsed:.2f} с")
+        assert found == {'url': f"{base_url}/news.xml", 'type': 'news', 'source': 'robots'}
+        assert elapsed < 2
+    finally:
+        server.shutdown()
+
+    # Без robots.txt: /sitemap_index.xml приоритетнее быстрого /sitemap.xml,
+    # а время - как у самой медленной нужной проверки, а не их сумма
+    server, base_url, _ = serve({
+        '/sitemap_index.xml': (1, INDEX),
+        '/sitemap.xml': (0, URLSET),
+        '/news-sitemap.xml': (1, NEWS),
+    })
+    try:
+        started = time.time()
+        found = discover_sitemap(base_url)
+        elapsed = time.time() - started
+        print(f"   {found} за {elapsed:.2f} с")
+        assert found['url'] == f"{base_url}/sitemap_index.xml" and found['type'] == 'index'
+        assert elapsed < 1.8
+    finally:
+        server.shutdown()
+    print("   [OK] Победитель выбран по приоритету")
+
+
+def test_discovery_persisted():
+    """Результат сохраняется в filials, повторный поиск не выполняется"""
+    print("\n[3] Сохранение результата поиска...")
+    server, base_url, hits = serve({'/sitemap.xml': (0, URLSET)})
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = create_test_db(tmp_dir, queries=(),
+                                filials=[('ГТРК "Томск"', base_url), ('ГТРК "Иртыш"', 'http://127.0.0.1:1')])
+            tomsk, irtysh = sorted(db.get_all_filials(), key=lambda f: f['id'])
+
+            found = discover_for_filial(db, tomsk)
+            assert found['url'] == f"{base_url}/sitemap.xml"
+            stored = db.get_filial_by_id(tomsk['id'])
+            print(f"   {stored['sitemap_url']} ({stored['sitemap_type']}), проверен {stored['sitemap_checked_at']}")
+            assert stored['sitemap_type'] == 'urlset' and stored['sitemap_checked_at']
+
+            # Сохраненный sitemap используется без запросов
+            requests_made = len(hits)
+            assert discover_for_filial(db, stored)['url'] == found['url']
+            assert len(hits) == requests_made
+
+            # Сайт без sitemap повторно не проверяется до RECHECK_DAYS
+            assert discover_for_filial(db, irtysh) is None
+            irtysh = db.get_filial_by_id(irtysh['id'])
+            assert irtysh['sitemap_checked_at'] and not irtysh['sitemap_url']
+            started = time.time()
+            assert discover_for_filial(db, irtysh) is None
+            assert time.time() - started < 0.05
+
+            # Ручное изменение sitemap сбрасывает результат поиска
+            db.update_filial(tomsk['id'], sitemap_url=f"{base_url}/other.xml")
+            assert db.get_filial_by_id(tomsk['id'])['sitemap_type'] is None
+    finally:
+        server.shutdown()
+    print("   [OK] Поиск выполняется один раз")
+
+
+def test_find_sitemap_single_fetch():
+    """ScrapyParser.find_sitemap берет содержимое из проверки, sitemap загружается один раз"""
+    print("\n[4] Загрузка найденного sitemap...")
+    # Документ больше SNIFF_BYTES: тело дочитывается после определения типа
+    urlset = URLSET.replace('></urlset>', '>' + '<url><loc>{base}/news/1</loc></url>' * 200 + '</urlset>')
+    server, base_url, hits = serve({'/sitemap.xml': (0, urlset)})
+    try:
+        sitemap_url, content = ScrapyParser().find_sitemap(base_url)
+        print(f"   {sitemap_url}: {len(content)} символов, запросов: {hits.count('/sitemap.xml')}")
+        assert sitemap_url == f"{base_url}/sitemap.xml"
+        assert content == urlset.format(base=base_url)
+        assert hits.count('/sitemap.xml') == 1
+    finally:
+        server.shutdown()
+    print("   [OK] Повторной загрузки нет")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ ПОИСКА SITEMAP")
+    print("=" * 60)
+
+    test_sniff_types()
+    test_racing_priority()
+    test_discovery_persisted()
+    test_find_sitemap_single_fetch()
+
+    print("\n[OK] Все проверки пройдены")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Тестовый скрипт для проверки агрегатов статистики (results_daily_stats)
+и текущего состояния по филиалам (latest_results)
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+# Добавляем путь к модулям
+sys.path.append(os.path.dirname(__file__))
+
+from test_helpers import create_test_db, set_parsing_date
+
+
+FILIALS = ['ГТРК "Томск"', 'ГТРК "Иртыш"']
+
+
+def test_statistics_from_rollup():
+    """Статистика из агрегатов совпадает с фактическими результатами"""
+    print("\n[1] Сохранение результатов и чтение статистики...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir, filials=FILIALS)
+
+        for status in ['success', 'success', 'error', 'no_data']:
+            db.save_monitoring_result(1, {'search_query_id': 1, 'status': status})
+        db.save_monitoring_result(2, {'search_query_id': 1, 'status': 'success'})
+
+        stats = db.get_statistics()
+        print(f"   Сегодня: {stats['today']}")
+        print(f"   Топ: {stats['top_filials']}")
+
+        assert stats['today'] == {'total': 5, 'success': 3, 'errors': 1, 'no_data': 1}
+        assert stats['top_filials'][0] == {'name': 'ГТРК "Томск"', 'count': 2}
+        assert sum(day['count'] for day in stats['last_week']) == 5
+        print("   [OK] Статистика корректна")
+
+
+def test_rebuild_statistics():
+    """Пересчет агрегатов восстанавливает их после ручной правки таблицы"""
+    print("\n[2] Пересчет агрегатов...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir, filials=FILIALS)
+        db.save_monitoring_result(1, {'search_query_id': 1, 'status': 'success'})
+        db.save_monitoring_result(1, {'status': 'error'})
+
+        with db.get_connection() as conn:
+            conn.execute('DELETE FROM results_daily_stats')
+            conn.commit()
+        assert db.get_statistics()['today']['total'] == 0
+
+        rows = db.rebuild_statistics()
+        stats = db.get_statistics()
+
+        assert rows == 2
+        assert stats['today']['total'] == 2
+        assert stats['today']['errors'] == 1
+        print(f"   [OK] Пересчитано строк: {rows}")
+
+
+def test_rebuild_is_atomic():
+    """Сбой пересчета не оставляет агрегаты очищенными или неполными"""
+    print("\n[4] Сбой при пересчете агрегатов...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir, filials=FILIALS)
+        db.save_monitoring_result(1, {'search_query_id': 1, 'status': 'success'})
+        old_id = db.save_monitoring_result(2, {'search_query_id': 1, 'status': 'error'})
+        set_parsing_date(db, old_id, datetime.now() - timedelta(days=70))
+        # Более новый результат филиала 2: старый уходит в партицию
+        db.save_monitoring_result(2, {'search_query_id': 1, 'status': 'no_data'})
+        assert sum(db.archive_closed_months().values()) == 1
+        assert db.rebuild_statistics() == 3
+
+        # Строка из партиции прерывает пересчет после обработки основной БД
+        with db.get_connection() as conn:
+            conn.execute('''CREATE TRIGGER fail_rebuild BEFORE INSERT ON results_daily_stats
+                            WHEN NEW.status = 'error' BEGIN SELECT RAISE(ABORT, 'сбой'); END''')
+            conn.commit()
+        failed = False
+        try:
+            db.rebuild_statistics()
+        except Exception as e:
+            failed = True
+            print(f"   Ошибка: {e}")
+        assert failed
+
+        with db.get_connection() as conn:
+            rows = conn.execute('SELECT filial_id, status FROM results_daily_stats '
+                                'ORDER BY filial_id, status').fetchall()
+        print(f"   Агрегаты: {[tuple(row) for row in rows]}")
+        assert [tuple(row) for row in rows] == [(1, 'success'), (2, 'error'), (2, 'no_data')]
+        print("   [OK] Агрегаты не изменились")
+
+
+def test_latest_results():
+    """Текущее состояние хранит только последний результат по паре (филиал, запрос)"""
+    print("\n[3] Текущее состояние по филиалам...")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = create_test_db(tmp_dir, filials=FILIALS)
+        db.save_monitoring_result(1, {'status': 'error'})
+        db.save_monitoring_result(1, {'search_query_id': 1, 'status': 'no_data'})
+        db.save_monitoring_result(1, {'search_query_id': 1, 'status': 'success'})
+        db.save_monitoring_result(2, {'status': 'error'})
+
+        latest = db.get_latest_results()
+        states = {(r['filial_id'], r['search_query_id']): r['status'] for r in latest}
+        print(f"   Состояние: {states}")
+
+        # Ошибка уровня филиала 1 заменена более новым результатом по запросу
+        assert states == {(1, 1): 'success', (2, None): 'error'}
+        assert [r['filial_id'] for r in db.get_latest_results(status='error')] == [2]
+
+        # Пересоздание таблицы дает то же состояние
+        with db.get_connection() as conn:
+            db._rebuild_latest_results(conn)
+            conn.commit()
+        assert len(db.get_latest_results()) == 2
+        print("   [OK] Текущее состояние корректно")
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("ТЕСТИРОВАНИЕ АГРЕГАТОВ СТАТИСТИКИ")
+    print("=" * 60)
+
+    test_statistics_from_rollup()
+    test_rebuild_statistics()
+    test_latest_results()
+    test_rebuild_is_atomic()
+
+    print("\n[OK] Все проверки пройдены")